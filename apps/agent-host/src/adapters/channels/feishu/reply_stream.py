@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+from src.adapters.channels.feishu.card_scaffold import build_card_payload
+from src.config import Settings
+from src.utils.feishu_api import send_message, update_message
+from src.utils.metrics import observe_reply_first_visible_token, record_reply_stream_update
+
+logger = logging.getLogger(__name__)
+
+
+def _build_stream_card(text: str) -> dict[str, Any]:
+    payload = build_card_payload([{"tag": "markdown", "content": text}])
+    return dict(payload["card"]) if payload else {}
+
+
+class FeishuStreamingCardReply:
+    """
+    飞书流式回复：首个增量前先发占位卡片，之后按节流间隔 patch 卡片内容。
+
+    所有网络调用串行在单个后台任务中执行，不阻塞模型流的消费。
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        chat_id: str,
+        reply_message_id: str | None = None,
+        *,
+        channel: str = "webhook",
+        update_interval_seconds: float = 0.6,
+        placeholder_text: str = "正在生成回复…",
+        started_at: float | None = None,
+    ) -> None:
+        self._settings = settings
+        self._chat_id = str(chat_id or "").strip()
+        self._reply_message_id = reply_message_id
+        self._channel = channel
+        self._interval = max(0.0, float(update_interval_seconds))
+        self._placeholder_text = placeholder_text
+        self._started_at = started_at if started_at is not None else time.perf_counter()
+        self._buffer: list[str] = []
+        self._message_id = ""
+        self._failed = False
+        self._dirty = False
+        self._first_visible_recorded = False
+        self._last_update_at = 0.0
+        self._worker: asyncio.Task[None] | None = None
+
+    @property
+    def message_id(self) -> str:
+        return self._message_id
+
+    @property
+    def text(self) -> str:
+        return "".join(self._buffer)
+
+    async def on_start(self) -> None:
+        self._ensure_worker()
+
+    async def on_delta(self, delta: str) -> None:
+        if not delta:
+            return
+        self._buffer.append(delta)
+        self._dirty = True
+        self._ensure_worker()
+
+    async def finalize(self, msg_type: str, content: dict[str, Any]) -> bool:
+        """
+        用最终回复覆盖流式卡片。
+
+        返回:
+            True 表示最终回复已通过 patch 送达，调用方无需再发送新消息
+        """
+        worker = self._worker
+        if worker is not None:
+            try:
+                await worker
+            except Exception:
+                pass
+        if not self._message_id or self._failed:
+            return False
+
+        final_card = content if msg_type == "interactive" and content else _build_stream_card(
+            str(content.get("text") or self.text or "")
+        )
+        try:
+            await update_message(self._settings, self._message_id, "interactive", final_card)
+        except Exception as exc:
+            record_reply_stream_update(self._channel, "finalize", "error")
+            logger.warning(
+                "流式回复最终更新失败，降级为发送新消息: %s",
+                exc,
+                extra={"event_code": "feishu.reply_stream.finalize_failed", "message_id": self._message_id},
+            )
+            return False
+        record_reply_stream_update(self._channel, "finalize", "success")
+        return True
+
+    def _ensure_worker(self) -> None:
+        if self._failed or not self._chat_id:
+            return
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        if not self._message_id:
+            await self._send_placeholder()
+        while self._dirty and not self._failed:
+            delay = self._last_update_at + self._interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._dirty = False
+            await self._patch(self.text)
+
+    async def _send_placeholder(self) -> None:
+        sent_chunks = len(self._buffer)
+        text = self.text if sent_chunks else self._placeholder_text
+        try:
+            sent = await send_message(
+                self._settings,
+                self._chat_id,
+                "interactive",
+                _build_stream_card(text),
+                reply_message_id=self._reply_message_id,
+            )
+        except Exception as exc:
+            self._failed = True
+            record_reply_stream_update(self._channel, "send", "error")
+            logger.warning(
+                "流式回复占位卡片发送失败: %s",
+                exc,
+                extra={"event_code": "feishu.reply_stream.placeholder_failed", "chat_id": self._chat_id},
+            )
+            return
+        self._message_id = str((sent or {}).get("message_id") or "")
+        if not self._message_id:
+            self._failed = True
+            record_reply_stream_update(self._channel, "send", "error")
+            return
+        record_reply_stream_update(self._channel, "send", "success")
+        self._last_update_at = time.perf_counter()
+        if sent_chunks:
+            self._dirty = len(self._buffer) > sent_chunks
+            self._record_first_visible()
+
+    async def _patch(self, text: str) -> None:
+        if not text:
+            return
+        try:
+            await update_message(self._settings, self._message_id, "interactive", _build_stream_card(text))
+        except Exception as exc:
+            record_reply_stream_update(self._channel, "patch", "error")
+            logger.debug(
+                "流式回复增量更新失败: %s",
+                exc,
+                extra={"event_code": "feishu.reply_stream.patch_failed", "message_id": self._message_id},
+            )
+            return
+        finally:
+            self._last_update_at = time.perf_counter()
+        record_reply_stream_update(self._channel, "patch", "success")
+        self._record_first_visible()
+
+    def _record_first_visible(self) -> None:
+        if self._first_visible_recorded:
+            return
+        self._first_visible_recorded = True
+        observe_reply_first_visible_token(self._channel, time.perf_counter() - self._started_at)
+
+
+def create_streaming_card_reply(
+    settings: Settings,
+    chat_id: str,
+    reply_message_id: str | None = None,
+    *,
+    channel: str = "webhook",
+    started_at: float | None = None,
+) -> FeishuStreamingCardReply | None:
+    reply_cfg = getattr(settings, "reply", None)
+    if not bool(getattr(reply_cfg, "stream_enabled", False)):
+        return None
+    if not bool(getattr(reply_cfg, "card_enabled", True)):
+        return None
+    normalized_chat_id = str(chat_id or "").strip()
+    if not normalized_chat_id:
+        return None
+    interval_ms = int(getattr(reply_cfg, "stream_update_interval_ms", 600) or 0)
+    return FeishuStreamingCardReply(
+        settings=settings,
+        chat_id=normalized_chat_id,
+        reply_message_id=reply_message_id,
+        channel=channel,
+        update_interval_seconds=max(0, interval_ms) / 1000.0,
+        placeholder_text=str(getattr(reply_cfg, "stream_placeholder_text", "") or "正在生成回复…"),
+        started_at=started_at,
+    )
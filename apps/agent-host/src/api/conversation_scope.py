@@ -3,6 +3,32 @@
 from __future__ import annotations
 
 
+def resolve_sender_user_id(
+    open_id: str | None,
+    user_id: str | None,
+    chat_id: str | None,
+    message_id: str | None,
+) -> str:
+    """
+    推导发送者用户标识。
+
+    优先 open_id，其次 user:{user_id}；都缺失时退化为 chat 级标识。
+    """
+    normalized_open_id = str(open_id or "").strip()
+    normalized_user_id = str(user_id or "").strip()
+    normalized_chat_id = str(chat_id or "").strip()
+    normalized_message_id = str(message_id or "").strip()
+    if normalized_open_id:
+        return normalized_open_id
+    if normalized_user_id:
+        return f"user:{normalized_user_id}"
+    if normalized_chat_id and normalized_message_id:
+        return f"chat:{normalized_chat_id}:msg:{normalized_message_id}"
+    if normalized_chat_id:
+        return f"chat:{normalized_chat_id}:anon"
+    return "unknown"
+
+
 def build_session_key(
     user_id: str,
     chat_id: str | None,
@@ -0,0 +1,266 @@
+"""
+描述: 入站消息分发器（按会话键串行的 actor 队列）
+主要功能:
+    - 每个会话键一条 FIFO 队列：同一用户的消息严格按到达顺序逐条处理
+    - 固定数量的 worker 轮转各会话队列，限制全局并发处理数
+    - 总积压或单会话积压超限时直接丢弃，并回调调用方发送"繁忙"提示
+    - 上报排队深度、在途数量、排队等待时长与丢弃次数
+    - 停机时在限定时间内处理完已入队消息
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+import logging
+import time
+from typing import Any, Awaitable, Callable, Deque
+
+from src.utils.metrics import (
+    observe_message_dispatch_wait,
+    record_message_dispatch_shed,
+    set_message_dispatch_inflight,
+    set_message_dispatch_queue_depth,
+)
+
+
+logger = logging.getLogger(__name__)
+
+SHED_BACKLOG_FULL = "backlog_full"
+SHED_SESSION_QUEUE_FULL = "session_queue_full"
+
+MessageJob = Callable[[], Awaitable[Any]]
+ShedCallback = Callable[[str], Awaitable[Any]]
+
+
+# region 配置
+@dataclass
+class MessageDispatcherConfig:
+    """
+    分发器配置
+
+    属性:
+        enabled: 关闭时退化为每条消息直接 create_task（旧行为）
+        max_workers: 全局同时处理的消息数上限
+        max_backlog: 所有会话排队（未开始处理）消息总数上限
+        max_queue_per_session: 单个会话排队消息数上限
+        shutdown_drain_seconds: 停机时等待已入队消息处理完毕的最长时间
+    """
+
+    enabled: bool = True
+    max_workers: int = 16
+    max_backlog: int = 500
+    max_queue_per_session: int = 20
+    shutdown_drain_seconds: float = 10.0
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "MessageDispatcherConfig":
+        webhook = getattr(settings, "webhook", None)
+        cfg = getattr(webhook, "dispatch", None)
+        if cfg is None:
+            return cls()
+        return cls(
+            enabled=bool(getattr(cfg, "enabled", True)),
+            max_workers=max(1, int(getattr(cfg, "max_workers", 16))),
+            max_backlog=max(1, int(getattr(cfg, "max_backlog", 500))),
+            max_queue_per_session=max(1, int(getattr(cfg, "max_queue_per_session", 20))),
+            shutdown_drain_seconds=max(0.0, float(getattr(cfg, "shutdown_drain_seconds", 10.0))),
+        )
+
+
+@dataclass
+class _Envelope:
+    job: MessageJob
+    enqueued_at: float
+
+
+# endregion
+
+
+# region 分发器
+class MessageDispatcher:
+    """
+    按会话键串行、全局限并发的消息分发器
+
+    不变式: 会话键存在于 _queues 中，当且仅当它正在 _ready 中等待或正被某个 worker 处理；
+    因此同一会话任意时刻最多只有一条消息在处理。
+    """
+
+    def __init__(self, config: MessageDispatcherConfig | None = None, source: str = "webhook") -> None:
+        self._config = config or MessageDispatcherConfig()
+        self._source = source
+        self._queues: dict[str, Deque[_Envelope]] = {}
+        self._ready: asyncio.Queue[str] | None = None
+        self._workers: list[asyncio.Task[None]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._idle: asyncio.Event | None = None
+        self._backlog = 0
+        self._inflight = 0
+        self._background: set[asyncio.Task[Any]] = set()
+
+    @property
+    def backlog(self) -> int:
+        return self._backlog
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def submit(self, session_key: str, job: MessageJob, on_shed: ShedCallback | None = None) -> bool:
+        """
+        提交一条消息处理任务（需在事件循环内调用）
+
+        参数:
+            session_key: 会话键，相同键的任务按提交顺序串行执行
+            job: 无参协程工厂；被丢弃时不会被调用
+            on_shed: 丢弃时的回调，参数为丢弃原因
+        返回:
+            True 表示已入队，False 表示已丢弃
+        """
+        loop = asyncio.get_running_loop()
+        if not self._config.enabled:
+            self._spawn(loop, job())
+            return True
+
+        self._ensure_started(loop)
+        key = str(session_key or "").strip() or "unknown"
+        queue = self._queues.get(key)
+        reason = ""
+        if self._backlog >= self._config.max_backlog:
+            reason = SHED_BACKLOG_FULL
+        elif queue is not None and len(queue) >= self._config.max_queue_per_session:
+            reason = SHED_SESSION_QUEUE_FULL
+        if reason:
+            record_message_dispatch_shed(self._source, reason)
+            logger.warning(
+                "入站消息积压超限，已丢弃",
+                extra={
+                    "event_code": "dispatcher.message.shed",
+                    "source": self._source,
+                    "session_key": key,
+                    "reason": reason,
+                    "backlog": self._backlog,
+                },
+            )
+            if on_shed is not None:
+                self._spawn(loop, on_shed(reason))
+            return False
+
+        envelope = _Envelope(job=job, enqueued_at=time.perf_counter())
+        if queue is None:
+            self._queues[key] = deque([envelope])
+            assert self._ready is not None
+            self._ready.put_nowait(key)
+        else:
+            queue.append(envelope)
+        self._backlog += 1
+        self._publish()
+        return True
+
+    async def join(self) -> None:
+        """等待所有已入队消息处理完毕。"""
+        if self._idle is None or self._loop is not asyncio.get_running_loop():
+            return
+        await self._idle.wait()
+
+    async def aclose(self, drain_timeout_seconds: float | None = None) -> None:
+        """
+        停止 worker
+
+        参数:
+            drain_timeout_seconds: 先等待已入队消息处理完毕的最长时间（None 取配置值，0 表示不等待）；
+                超时后仍未处理的消息被丢弃
+        """
+        timeout = self._config.shutdown_drain_seconds if drain_timeout_seconds is None else drain_timeout_seconds
+        if timeout > 0 and self._workers:
+            try:
+                await asyncio.wait_for(self.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "停机等待入站消息处理超时，剩余消息被丢弃",
+                    extra={
+                        "event_code": "dispatcher.shutdown.drain_timeout",
+                        "source": self._source,
+                        "backlog": self._backlog,
+                        "inflight": self._inflight,
+                    },
+                )
+        workers, self._workers = self._workers, []
+        for task in workers:
+            task.cancel()
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+        self._reset()
+
+    def _ensure_started(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._loop is loop and self._workers:
+            return
+        # 事件循环变化（如测试中多次 asyncio.run）时旧队列与 worker 已失效，整体重建
+        self._reset()
+        self._loop = loop
+        self._ready = asyncio.Queue()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._workers = [
+            loop.create_task(self._worker(), name=f"message-dispatcher-{self._source}-{index}")
+            for index in range(max(1, self._config.max_workers))
+        ]
+
+    def _reset(self) -> None:
+        self._queues.clear()
+        self._ready = None
+        self._idle = None
+        self._loop = None
+        self._backlog = 0
+        self._inflight = 0
+        self._publish()
+
+    async def _worker(self) -> None:
+        while True:
+            assert self._ready is not None
+            key = await self._ready.get()
+            queue = self._queues.get(key)
+            if not queue:
+                self._queues.pop(key, None)
+                continue
+            envelope = queue.popleft()
+            self._backlog -= 1
+            self._inflight += 1
+            self._publish()
+            observe_message_dispatch_wait(self._source, time.perf_counter() - envelope.enqueued_at)
+            try:
+                await envelope.job()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(
+                    "入站消息处理失败",
+                    extra={"event_code": "dispatcher.message.failed", "source": self._source, "session_key": key},
+                )
+            finally:
+                self._inflight -= 1
+                if queue:
+                    # 放回就绪队尾：同一会话保持串行，不同会话之间轮转
+                    self._ready.put_nowait(key)
+                else:
+                    self._queues.pop(key, None)
+                self._publish()
+
+    def _publish(self) -> None:
+        set_message_dispatch_queue_depth(self._source, self._backlog)
+        set_message_dispatch_inflight(self._source, self._inflight)
+        if self._idle is None:
+            return
+        if self._backlog == 0 and self._inflight == 0:
+            self._idle.set()
+        else:
+            self._idle.clear()
+
+    def _spawn(self, loop: asyncio.AbstractEventLoop, coro: Awaitable[Any]) -> None:
+        task = loop.create_task(coro)  # type: ignore[arg-type]
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+
+# endregion
@@ -22,9 +22,10 @@ from fastapi import APIRouter, HTTPException, Request
 
 from src.adapters.channels.feishu.event_adapter import FeishuEventAdapter, MessageEvent
 from src.adapters.channels.feishu.processing_status import create_reaction_status_emitter
+from src.adapters.channels.feishu.reply_stream import create_streaming_card_reply
 from src.adapters.channels.feishu.skills.bitable_writer import BitableWriter
 from src.api.chunk_assembler import ChunkAssembler
-from src.api.conversation_scope import build_session_key
+from src.api.conversation_scope import build_session_key, resolve_sender_user_id
 from src.api.file_pipeline import (
     build_ocr_completion_text,
     build_processing_status_text,
@@ -36,6 +37,7 @@ from src.adapters.channels.feishu.formatter import FeishuFormatter
 from src.api.automation_consumer import QueueAutomationEnqueuer, create_default_automation_enqueuer
 from src.api.event_router import FeishuEventRouter, get_enabled_types
 from src.api.inbound_normalizer import normalize_content
+from src.api.message_dispatcher import MessageDispatcher, MessageDispatcherConfig
 from src.core.orchestrator import AgentOrchestrator
 from src.core.batch_progress import BatchProgressEmitter, BatchProgressEvent, BatchProgressPhase
 from src.core.errors import (
@@ -71,6 +73,7 @@ _deduplicator: "EventDeduplicator | None" = None
 _event_router: FeishuEventRouter | None = None
 _automation_enqueuer: QueueAutomationEnqueuer | None = None
 _chunk_assembler: ChunkAssembler | None = None
+_message_dispatcher: MessageDispatcher | None = None
 _chunk_expire_hook_bound: bool = False
 _user_manager: Any = None  # 用户管理器
 _schema_sync_bridge: Any = None
@@ -200,6 +203,25 @@ def _get_chunk_assembler() -> ChunkAssembler:
     return _chunk_assembler
 
 
+def _get_message_dispatcher() -> MessageDispatcher:
+    """延迟初始化入站消息分发器。"""
+    global _message_dispatcher
+    if _message_dispatcher is None:
+        _message_dispatcher = MessageDispatcher(
+            MessageDispatcherConfig.from_settings(_get_settings()),
+            source="webhook",
+        )
+    return _message_dispatcher
+
+
+async def shutdown_message_dispatcher() -> None:
+    """停机：在限定时间内处理完已入队的入站消息后停止分发器。"""
+    global _message_dispatcher
+    dispatcher, _message_dispatcher = _message_dispatcher, None
+    if dispatcher is not None:
+        await dispatcher.aclose()
+
+
 def _bind_chunk_expire_hook() -> None:
     """将会话过期清理与分片兜底冲刷绑定。"""
     global _chunk_expire_hook_bound
@@ -982,8 +1004,26 @@ async def feishu_webhook(request: Request) -> dict[str, str]:
     )
     if dedup_key and settings.webhook.dedup.enabled:
         deduplicator.mark(dedup_key)
+    session_key = build_session_key(
+        user_id=resolve_sender_user_id(
+            open_id=message.sender_open_id,
+            user_id=message.sender_user_id,
+            chat_id=message.chat_id,
+            message_id=message.message_id,
+        ),
+        chat_id=message.chat_id,
+        chat_type=message.chat_type,
+        channel_type="feishu",
+    )
+    accepted = _get_message_dispatcher().submit(
+        session_key,
+        lambda: _process_message_event_with_dedup(message, dedup_key),
+        on_shed=lambda reason: _reply_busy(message),
+    )
+    if not accepted:
+        record_inbound_message("webhook", message_type, "shed")
+        return {"status": "busy"}
     record_inbound_message("webhook", message_type, "accepted")
-    asyncio.create_task(_process_message_event_with_dedup(message, dedup_key))
     return {"status": "ok"}
 
 
@@ -1015,6 +1055,33 @@ async def _process_message_event_with_dedup(
         _get_deduplicator().remove(dedup_key)
 
 
+async def _reply_busy(message_event: MessageEvent) -> None:
+    """
+    分发器积压超限：回复繁忙提示
+
+    说明:
+        - 已按 200 应答飞书、不会重投；保留去重标记，避免重投/重发后既收到繁忙提示又收到正式回复
+    """
+    settings = _get_settings()
+    chat_id = str(message_event.chat_id or "")
+    if not chat_id or chat_id.startswith("test-"):
+        return
+    try:
+        await send_message(
+            settings,
+            chat_id,
+            "text",
+            {"text": settings.reply.templates.busy},
+            reply_message_id=message_event.message_id or None,
+        )
+    except Exception as exc:
+        logger.warning(
+            "发送繁忙提示失败: %s",
+            exc,
+            extra={"event_code": "webhook.reply.busy_failed"},
+        )
+
+
 def _to_legacy_message_sender(message_event: MessageEvent) -> tuple[dict[str, Any], dict[str, Any]]:
     """将标准事件对象转换为现有处理流程使用的结构。"""
     message = {
@@ -1043,6 +1110,7 @@ async def _process_message(message: dict[str, Any], sender: dict[str, Any]) -> b
         sender: 发送者信息
     """
     logger.info("开始执行消息处理流程", extra={"event_code": "webhook.pipeline.start"})
+    received_at = time.perf_counter()
     settings = _get_settings()
     file_pipeline_cfg = getattr(settings, "file_pipeline", None)
     file_pipeline_enabled = bool(getattr(file_pipeline_cfg, "enabled", False))
@@ -1074,18 +1142,12 @@ async def _process_message(message: dict[str, Any], sender: dict[str, Any]) -> b
     chat_type = message.get("chat_type")
     message_id = message.get("message_id")
     sender_id = sender.get("sender_id", {})
-    open_id = str(sender_id.get("open_id") or "").strip()
-    inner_user_id = str(sender_id.get("user_id") or "").strip()
-    if open_id:
-        user_id = open_id
-    elif inner_user_id:
-        user_id = f"user:{inner_user_id}"
-    elif chat_id and message_id:
-        user_id = f"chat:{chat_id}:msg:{message_id}"
-    elif chat_id:
-        user_id = f"chat:{chat_id}:anon"
-    else:
-        user_id = "unknown"
+    user_id = resolve_sender_user_id(
+        open_id=sender_id.get("open_id"),
+        user_id=sender_id.get("user_id"),
+        chat_id=chat_id,
+        message_id=message_id,
+    )
     scoped_user_id = build_session_key(
         user_id=user_id,
         chat_id=str(chat_id or ""),
@@ -1192,6 +1254,7 @@ async def _process_message(message: dict[str, Any], sender: dict[str, Any]) -> b
         file_reason = reason
         direct_reply_text = build_file_unavailable_guidance(reason)
     
+    stream_reply = None
     try:
         # 静默获取用户信息（仅用于"我的案件"识别）
         open_id = sender_id.get("open_id")
@@ -1227,6 +1290,14 @@ async def _process_message(message: dict[str, Any], sender: dict[str, Any]) -> b
             else:
                 reply = {"type": "text", "text": direct_reply_text}
         else:
+            if not str(chat_id).startswith("test-") and not ocr_completion_text:
+                stream_reply = create_streaming_card_reply(
+                    settings,
+                    str(chat_id),
+                    message_id,
+                    channel="webhook",
+                    started_at=received_at,
+                )
             reply = await agent_core.handle_message(
                 scoped_user_id,
                 text,
@@ -1236,6 +1307,7 @@ async def _process_message(message: dict[str, Any], sender: dict[str, Any]) -> b
                 file_markdown=file_markdown,
                 file_provider=file_provider,
                 status_emitter=create_reaction_status_emitter(settings, str(message_id or "")),
+                stream_sink=stream_reply,
             )
             if ocr_completion_text:
                 reply = _prepend_reply_text(reply, ocr_completion_text)
@@ -1283,7 +1355,10 @@ async def _process_message(message: dict[str, Any], sender: dict[str, Any]) -> b
                 "has_card": bool(reply.get("card")),
             },
         )
-        sent = await send_message(settings, chat_id, msg_type, content, reply_message_id=message_id)
+        if stream_reply is not None and await stream_reply.finalize(msg_type, dict(content)):
+            sent = {"message_id": stream_reply.message_id}
+        else:
+            sent = await send_message(settings, chat_id, msg_type, content, reply_message_id=message_id)
         logger.info(
             "回复发送成功",
             extra={"event_code": "webhook.reply.sent", "message_id": sent.get("message_id", "")},
@@ -1298,6 +1373,9 @@ async def _process_message(message: dict[str, Any], sender: dict[str, Any]) -> b
             extra={"event_code": "webhook.message.process_failed"},
             exc_info=True,
         )
+        # 已发出的流式卡片用错误文案收尾，避免半截内容留在会话里
+        if stream_reply is not None:
+            await stream_reply.finalize("text", {"text": settings.reply.templates.error.format(message=str(exc))})
         record_inbound_message("webhook", str(normalized.message_type or "unknown"), "error")
         return False
 # endregion
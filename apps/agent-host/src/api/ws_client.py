@@ -11,6 +11,7 @@ from __future__ import annotations
 import asyncio
 import logging
 import sys
+import time
 from typing import Any
 
 from dotenv import load_dotenv
@@ -25,19 +26,22 @@ if sys.platform == "win32":
 
 import lark_oapi as lark
 from lark_oapi.api.im.v1 import P2ImMessageReceiveV1
+from lark_oapi.ws import client as lark_ws_client
 
 from src.adapters.channels.feishu.event_adapter import FeishuEventAdapter
 from src.adapters.channels.feishu.formatter import FeishuFormatter
 from src.adapters.channels.feishu.processing_status import create_reaction_status_emitter
+from src.adapters.channels.feishu.reply_stream import create_streaming_card_reply
 from src.adapters.channels.feishu.skills.bitable_writer import BitableWriter
 from src.api.chunk_assembler import ChunkAssembler
-from src.api.conversation_scope import build_session_key
+from src.api.conversation_scope import build_session_key, resolve_sender_user_id
 from src.api.file_pipeline import (
     build_file_unavailable_guidance,
     is_file_pipeline_message,
     resolve_file_markdown,
 )
 from src.api.inbound_normalizer import normalize_content
+from src.api.message_dispatcher import MessageDispatcher, MessageDispatcherConfig
 from src.config import get_settings
 from src.core.batch_progress import BatchProgressEmitter, BatchProgressEvent, BatchProgressPhase
 from src.core.errors import PendingActionExpiredError, get_user_message as get_core_user_message
@@ -46,6 +50,7 @@ from src.core.response.models import RenderedResponse
 from src.core.session import SessionManager
 from src.llm.provider import create_llm_client
 from src.mcp.client import MCPClient
+from src.utils.expiry import ExpirySweeper
 from src.utils.metrics import record_inbound_message
 from src.utils.logger import setup_logging
 
@@ -79,6 +84,7 @@ chunk_assembler = ChunkAssembler(
     max_chars=int(settings.webhook.chunk_assembler.max_chars),
 )
 _pending_chunk_flush_tasks: dict[str, asyncio.Task[Any]] = {}
+message_dispatcher = MessageDispatcher(MessageDispatcherConfig.from_settings(settings), source="ws")
 
 
 def _flush_orphan_chunks(session_key: str) -> None:
@@ -128,6 +134,8 @@ async def handle_message_async(
         text: 消息文本
         message_id: 消息 ID（用于回复）
     """
+    received_at = time.perf_counter()
+    stream_reply = None
     try:
         logger.info(
             "通过长连接处理消息",
@@ -215,6 +223,13 @@ async def handle_message_async(
         elif message_type in {"file", "audio", "image"} and text.startswith("已收到文件"):
             reply = {"type": "text", "text": text}
         else:
+            stream_reply = create_streaming_card_reply(
+                settings,
+                chat_id,
+                message_id,
+                channel="ws",
+                started_at=received_at,
+            )
             reply = await agent_core.handle_message(
                 user_id,
                 text,
@@ -223,6 +238,7 @@ async def handle_message_async(
                 file_markdown=file_markdown,
                 file_provider=file_provider,
                 status_emitter=create_reaction_status_emitter(settings, message_id),
+                stream_sink=stream_reply,
             )
         
         # 发送回复
@@ -256,7 +272,8 @@ async def handle_message_async(
                 content = dict(content_payload)
             else:
                 content = {"text": _pick_reply_text(reply)}
-        await send_reply(chat_id, msg_type, content, message_id)
+        if stream_reply is None or not await stream_reply.finalize(msg_type, content):
+            await send_reply(chat_id, msg_type, content, message_id)
         record_inbound_message("ws", message_type, "processed")
             
     except Exception as e:
@@ -267,7 +284,9 @@ async def handle_message_async(
             exc_info=True,
         )
         error_text = settings.reply.templates.error.format(message=str(e))
-        await send_reply(chat_id, "text", {"text": error_text}, message_id)
+        # 已发出的流式卡片用错误文案收尾；卡片不可用时再单独发送错误消息
+        if stream_reply is None or not await stream_reply.finalize("text", {"text": error_text}):
+            await send_reply(chat_id, "text", {"text": error_text}, message_id)
         record_inbound_message("ws", message_type, "error")
 
 
@@ -387,14 +406,19 @@ async def _flush_buffered_message_after_window(
             },
         )
         record_inbound_message("ws", message_type, "accepted")
-        await handle_message_async(
-            user_id,
-            chat_id,
-            chat_type,
-            decision.text,
-            message_id,
-            message_type=message_type,
-            attachments=attachments,
+        # 冲刷结果与后续消息同走会话队列，保证同一用户按序处理
+        message_dispatcher.submit(
+            scope_key,
+            lambda: handle_message_async(
+                user_id,
+                chat_id,
+                chat_type,
+                decision.text,
+                message_id,
+                message_type=message_type,
+                attachments=attachments,
+            ),
+            on_shed=lambda reason: _reply_busy(chat_id, message_id),
         )
     except asyncio.CancelledError:
         return
@@ -736,6 +760,35 @@ def _noop_event_handler(event_type: str):
     return _handler
 
 
+def _event_session_key(event: Any) -> str:
+    """标准化 WS 消息事件 -> 会话键（与分发队列、分片聚合共用）。"""
+    return build_session_key(
+        user_id=resolve_sender_user_id(
+            open_id=event.sender_open_id,
+            user_id=event.sender_user_id,
+            chat_id=event.chat_id,
+            message_id=event.message_id,
+        ),
+        chat_id=event.chat_id,
+        chat_type=event.chat_type,
+        channel_type="feishu",
+    )
+
+
+async def _reply_busy(chat_id: str, message_id: str | None) -> None:
+    """分发器积压超限时回复繁忙提示。"""
+    if not chat_id:
+        return
+    try:
+        await send_reply(chat_id, "text", {"text": settings.reply.templates.busy}, reply_message_id=message_id or None)
+    except Exception as exc:
+        logger.warning(
+            "发送繁忙提示失败: %s",
+            exc,
+            extra={"event_code": "ws.reply.busy_failed"},
+        )
+
+
 async def _handle_message_receive_event(event: Any) -> None:
     """异步处理标准化后的 WS 消息事件。"""
     try:
@@ -780,23 +833,7 @@ async def _handle_message_receive_event(event: Any) -> None:
             record_inbound_message("ws", message_type, "ignored")
             return
 
-        if event.sender_open_id:
-            user_id = event.sender_open_id
-        elif event.sender_user_id:
-            user_id = f"user:{event.sender_user_id}"
-        elif chat_id and message_id:
-            user_id = f"chat:{chat_id}:msg:{message_id}"
-        elif chat_id:
-            user_id = f"chat:{chat_id}:anon"
-        else:
-            user_id = "unknown"
-        
-        scoped_user_id = build_session_key(
-            user_id=user_id,
-            chat_id=chat_id,
-            chat_type=chat_type,
-            channel_type="feishu",
-        )
+        scoped_user_id = _event_session_key(event)
         chunk_decision = await chunk_assembler.ingest(scope_key=scoped_user_id, text=text)
         if not chunk_decision.should_process:
             logger.info(
@@ -866,10 +903,18 @@ def on_message_receive(data: P2ImMessageReceiveV1) -> None:
         return
 
     try:
-        loop = asyncio.get_running_loop()
-        loop.create_task(_handle_message_receive_event(event))
+        asyncio.get_running_loop()
     except RuntimeError:
         asyncio.run(_handle_message_receive_event(event))
+        return
+
+    accepted = message_dispatcher.submit(
+        _event_session_key(event),
+        lambda: _handle_message_receive_event(event),
+        on_shed=lambda reason: _reply_busy(event.chat_id, event.message_id),
+    )
+    if not accepted:
+        record_inbound_message("ws", event.message_type, "shed")
 
 
 # endregion
@@ -907,6 +952,17 @@ def start_ws_client() -> None:
     )
     
     client = create_ws_client()
+    # lark 长连接在其模块级事件循环上执行全部事件回调；清扫也放到该循环上，
+    # 过期回调（残留分片冲刷等）才能与消息处理共用同一循环内的 ChunkAssembler 状态
+    ws_loop = lark_ws_client.loop
+    expiry_sweeper: ExpirySweeper | None = None
+    if settings.session.cleanup.enabled:
+        expiry_sweeper = ExpirySweeper(
+            agent_core.asweep_expired,
+            interval_seconds=settings.session.cleanup.interval_seconds,
+        )
+        # 循环开始运行后再启动，清扫器以该循环上的 asyncio 任务运行
+        ws_loop.call_soon(expiry_sweeper.start)
     
     try:
         client.start()
@@ -920,6 +976,24 @@ def start_ws_client() -> None:
             exc_info=True,
         )
         raise
+    finally:
+        if expiry_sweeper is not None:
+            expiry_sweeper.stop()
+        _shutdown_agent_core(ws_loop)
+
+
+def _shutdown_agent_core(loop: asyncio.AbstractEventLoop) -> None:
+    """长连接退出后在其事件循环上执行收尾（落库向量记忆写缓冲等）；FastAPI 入口由 lifespan 负责。"""
+    if loop.is_closed() or loop.is_running():
+        return
+    try:
+        loop.run_until_complete(agent_core.aclose())
+    except Exception:
+        logger.warning(
+            "长连接停机收尾失败",
+            extra={"event_code": "ws.client.shutdown_failed"},
+            exc_info=True,
+        )
 # endregion
 
 
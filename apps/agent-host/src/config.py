@@ -75,6 +75,52 @@ class LLMFallbackSettings(BaseModel):
     api_base: str | None = None
 
 
+class LLMHedgeSettings(BaseModel):
+    """对冲请求：主模型超过自适应分位数延迟未返回时并发请求备用模型"""
+    enabled: bool = False
+    model: str = ""
+    percentile: float = 0.95
+    min_delay_ms: int = 300
+    max_delay_ms: int = 5000
+    initial_delay_ms: int = 2000
+    latency_window: int = 50
+
+
+class LLMCircuitBreakerSettings(BaseModel):
+    """按模型熔断：窗口内错误/超时率超过阈值时跳过该模型"""
+    enabled: bool = False
+    window_seconds: float = 60.0
+    min_calls: int = 5
+    failure_rate_threshold: float = 0.5
+    cooldown_seconds: float = 30.0
+
+
+class LLMPriorityClassSettings(BaseModel):
+    """单个优先级的并发/排队限制（max_wait_seconds 为空表示一直等待）"""
+    max_concurrency: int = 1
+    max_queue: int = 100
+    max_wait_seconds: float | None = None
+
+
+class LLMSchedulerSettings(BaseModel):
+    """LLM 优先级调度：交互流量优先且从不丢弃（其 max_queue/max_wait_seconds 不生效），低优先级在压力下延迟或丢弃"""
+    enabled: bool = False
+    max_concurrency: int = 8
+    reserved_interactive: int = 2
+    interactive: LLMPriorityClassSettings = Field(
+        default_factory=lambda: LLMPriorityClassSettings(max_concurrency=8, max_queue=200)
+    )
+    batch: LLMPriorityClassSettings = Field(
+        default_factory=lambda: LLMPriorityClassSettings(max_concurrency=3, max_queue=50, max_wait_seconds=30.0)
+    )
+    background: LLMPriorityClassSettings = Field(
+        default_factory=lambda: LLMPriorityClassSettings(max_concurrency=2, max_queue=20, max_wait_seconds=60.0)
+    )
+    shadow: LLMPriorityClassSettings = Field(
+        default_factory=lambda: LLMPriorityClassSettings(max_concurrency=1, max_queue=5, max_wait_seconds=2.0)
+    )
+
+
 class LLMSettings(BaseModel):
     """LLM 模型配置"""
     provider: str = "openai"
@@ -87,7 +133,12 @@ class LLMSettings(BaseModel):
     max_tokens: int = 2000
     timeout: int = 60
     max_retries: int = 2
+    coalesce_enabled: bool = True
+    memo_ttl_seconds: float = 0.0
     fallback: LLMFallbackSettings = Field(default_factory=LLMFallbackSettings)
+    hedge: LLMHedgeSettings = Field(default_factory=LLMHedgeSettings)
+    circuit_breaker: LLMCircuitBreakerSettings = Field(default_factory=LLMCircuitBreakerSettings)
+    scheduler: LLMSchedulerSettings = Field(default_factory=LLMSchedulerSettings)
 
 
 # ============================================
@@ -274,10 +325,13 @@ class RedisStateStoreSettings(BaseModel):
     password: str | None = None
     key_prefix: str = "omniagent:state:"
     socket_timeout_seconds: float = 1.0
+    max_connections: int = 32
 
 
 class StateStoreSettings(BaseModel):
     backend: str = "memory"
+    last_result_mode: str = "full"  # full | compact
+    record_cache_size: int = 2048
     redis: RedisStateStoreSettings = Field(default_factory=RedisStateStoreSettings)
 
 
@@ -315,12 +369,21 @@ class WebhookChunkAssemblerSettings(BaseModel):
     max_chars: int = 500
 
 
+class WebhookDispatchSettings(BaseModel):
+    enabled: bool = True
+    max_workers: int = 16
+    max_backlog: int = 500
+    max_queue_per_session: int = 20
+    shutdown_drain_seconds: float = 10.0
+
+
 class WebhookSettings(BaseModel):
     path: str = "/feishu/webhook"
     dedup: WebhookDedupSettings = Field(default_factory=WebhookDedupSettings)
     filter: WebhookFilterSettings = Field(default_factory=WebhookFilterSettings)
     events: WebhookEventSettings = Field(default_factory=WebhookEventSettings)
     chunk_assembler: WebhookChunkAssemblerSettings = Field(default_factory=WebhookChunkAssemblerSettings)
+    dispatch: WebhookDispatchSettings = Field(default_factory=WebhookDispatchSettings)
 
 
 class AutomationNotifySettings(BaseModel):
@@ -337,6 +400,7 @@ class ReplyTemplateSettings(BaseModel):
     small_talk: str = "你好！我可以帮你查询案件或文档。"
     thanks: str = "不客气！需要查询案件或文档随时告诉我。"
     goodbye: str = "好的，如需查询随时找我。"
+    busy: str = "当前咨询较多，请稍后再发一次。"
 
 
 class ReplyCaseListSettings(BaseModel):
@@ -357,6 +421,9 @@ class ReplySettings(BaseModel):
     reaction_enabled: bool = True
     query_card_v2_enabled: bool = False
     reply_personalization_enabled: bool = False
+    stream_enabled: bool = False
+    stream_update_interval_ms: int = 600
+    stream_placeholder_text: str = "正在生成回复…"
 
 
 class LoggingFileSettings(BaseModel):
@@ -532,6 +599,15 @@ def _apply_env_overrides(data: dict[str, Any]) -> dict[str, Any]:
         "LLM_API_KEY": ["llm", "api_key"],
         "LLM_API_BASE": ["llm", "api_base"],
         "LLM_FALLBACK_API_KEY": ["llm", "fallback", "api_key"],
+        "LLM_COALESCE_ENABLED": ["llm", "coalesce_enabled"],
+        "LLM_MEMO_TTL_SECONDS": ["llm", "memo_ttl_seconds"],
+        "LLM_HEDGE_ENABLED": ["llm", "hedge", "enabled"],
+        "LLM_HEDGE_MODEL": ["llm", "hedge", "model"],
+        "LLM_HEDGE_PERCENTILE": ["llm", "hedge", "percentile"],
+        "LLM_CIRCUIT_BREAKER_ENABLED": ["llm", "circuit_breaker", "enabled"],
+        "LLM_SCHEDULER_ENABLED": ["llm", "scheduler", "enabled"],
+        "LLM_SCHEDULER_MAX_CONCURRENCY": ["llm", "scheduler", "max_concurrency"],
+        "LLM_SCHEDULER_RESERVED_INTERACTIVE": ["llm", "scheduler", "reserved_interactive"],
         "MCP_BASE_URL": ["mcp", "base_url"],
         "TASK_LLM_ENABLED": ["task_llm", "enabled"],
         "TASK_LLM_MODEL": ["task_llm", "model"],
@@ -541,6 +617,8 @@ def _apply_env_overrides(data: dict[str, Any]) -> dict[str, Any]:
         "REACTION_ENABLED": ["reply", "reaction_enabled"],
         "QUERY_CARD_V2_ENABLED": ["reply", "query_card_v2_enabled"],
         "REPLY_PERSONALIZATION_ENABLED": ["reply", "reply_personalization_enabled"],
+        "REPLY_STREAM_ENABLED": ["reply", "stream_enabled"],
+        "REPLY_STREAM_UPDATE_INTERVAL_MS": ["reply", "stream_update_interval_ms"],
         "HEARING_REMINDER_ENABLED": ["hearing_reminder", "enabled"],
         "HEARING_REMINDER_CHAT_ID": ["hearing_reminder", "reminder_chat_id"],
         "HEARING_REMINDER_OFFSETS": ["hearing_reminder", "reminder_offsets"],
@@ -549,13 +627,21 @@ def _apply_env_overrides(data: dict[str, Any]) -> dict[str, Any]:
         "CHUNK_ASSEMBLER_ENABLED": ["webhook", "chunk_assembler", "enabled"],
         "CHUNK_ASSEMBLER_WINDOW_SECONDS": ["webhook", "chunk_assembler", "window_seconds"],
         "CHUNK_ASSEMBLER_STALE_WINDOW_SECONDS": ["webhook", "chunk_assembler", "stale_window_seconds"],
+        "WEBHOOK_DISPATCH_ENABLED": ["webhook", "dispatch", "enabled"],
+        "WEBHOOK_DISPATCH_MAX_WORKERS": ["webhook", "dispatch", "max_workers"],
+        "WEBHOOK_DISPATCH_MAX_BACKLOG": ["webhook", "dispatch", "max_backlog"],
+        "WEBHOOK_DISPATCH_MAX_QUEUE_PER_SESSION": ["webhook", "dispatch", "max_queue_per_session"],
         "AUTOMATION_NOTIFY_ENABLED": ["automation_notify", "enabled"],
         "AUTOMATION_NOTIFY_API_KEY": ["automation_notify", "api_key"],
         "MIDTERM_MEMORY_SQLITE_PATH": ["agent", "midterm_memory", "sqlite_path"],
         "MIDTERM_MEMORY_INJECT_TO_LLM": ["agent", "midterm_memory", "inject_to_llm"],
         "MIDTERM_MEMORY_LLM_RECENT_LIMIT": ["agent", "midterm_memory", "llm_recent_limit"],
         "MIDTERM_MEMORY_LLM_MAX_CHARS": ["agent", "midterm_memory", "llm_max_chars"],
+        "SESSION_CLEANUP_ENABLED": ["session", "cleanup", "enabled"],
+        "SESSION_CLEANUP_INTERVAL_SECONDS": ["session", "cleanup", "interval_seconds"],
         "STATE_STORE_BACKEND": ["state_store", "backend"],
+        "STATE_STORE_LAST_RESULT_MODE": ["state_store", "last_result_mode"],
+        "STATE_STORE_RECORD_CACHE_SIZE": ["state_store", "record_cache_size"],
         "STATE_STORE_REDIS_DSN": ["state_store", "redis", "dsn"],
         "STATE_STORE_REDIS_HOST": ["state_store", "redis", "host"],
         "STATE_STORE_REDIS_PORT": ["state_store", "redis", "port"],
@@ -563,6 +649,7 @@ def _apply_env_overrides(data: dict[str, Any]) -> dict[str, Any]:
         "STATE_STORE_REDIS_PASSWORD": ["state_store", "redis", "password"],
         "STATE_STORE_REDIS_KEY_PREFIX": ["state_store", "redis", "key_prefix"],
         "STATE_STORE_REDIS_SOCKET_TIMEOUT_SECONDS": ["state_store", "redis", "socket_timeout_seconds"],
+        "STATE_STORE_REDIS_MAX_CONNECTIONS": ["state_store", "redis", "max_connections"],
         "FILE_PIPELINE_ENABLED": ["file_pipeline", "enabled"],
         "FILE_PIPELINE_MAX_BYTES": ["file_pipeline", "max_bytes"],
         "FILE_PIPELINE_TIMEOUT_SECONDS": ["file_pipeline", "timeout_seconds"],
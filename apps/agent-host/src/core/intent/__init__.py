@@ -1,10 +1,13 @@
 """Intent parsing package."""
 
+from src.core.intent.classifier import LocalIntentClassifier, load_local_intent_classifier
 from src.core.intent.parser import IntentParser, IntentResult, SkillMatch, load_skills_config
 
 __all__ = [
     "IntentParser",
     "IntentResult",
+    "LocalIntentClassifier",
     "SkillMatch",
+    "load_local_intent_classifier",
     "load_skills_config",
 ]
@@ -0,0 +1,323 @@
+"""
+描述: 本地轻量意图分类器
+主要功能:
+    - 字符 n-gram TF-IDF 特征 + 最近质心（余弦）分类，纯 NumPy 实现
+    - 给出 Top-K 技能及分数，按 top1 与 top2 的差值（margin）判断是否可直接采用
+    - 版本化模型文件（.npz）的保存与加载
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import hashlib
+import json
+import logging
+from pathlib import Path
+import re
+from typing import Any, Iterable, Sequence
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+# 模型文件格式版本：特征/文件结构变化时递增，旧文件加载时拒绝
+ARTIFACT_FORMAT_VERSION = 1
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+# region 数据结构
+@dataclass
+class ClassifierPrediction:
+    """
+    分类结果
+
+    属性:
+        ranked: (技能名, 余弦分数) 按分数降序
+        margin: top1 与 top2 的分数差
+    """
+
+    ranked: list[tuple[str, float]]
+    margin: float
+
+    @property
+    def label(self) -> str:
+        return self.ranked[0][0] if self.ranked else ""
+
+    @property
+    def score(self) -> float:
+        return self.ranked[0][1] if self.ranked else 0.0
+
+
+# endregion
+
+
+# region 分类器
+def _normalize_text(text: str) -> str:
+    return _WHITESPACE_RE.sub("", str(text or "").lower())
+
+
+class CharNgramIntentClassifier:
+    """
+    字符 n-gram TF-IDF 最近质心分类器
+
+    功能:
+        - fit: 由 (文本, 技能名) 样本训练 IDF 与各技能 L2 归一化质心
+        - predict: 仅对查询中出现的 n-gram 列做稀疏点积，单次预测为微秒级
+    """
+
+    def __init__(
+        self,
+        *,
+        vocabulary: dict[str, int],
+        idf: np.ndarray,
+        centroids: np.ndarray,
+        labels: list[str],
+        ngram_range: tuple[int, int] = (1, 3),
+        model_version: str = "",
+        trained_at: str = "",
+        sample_count: int = 0,
+    ) -> None:
+        self._vocabulary = vocabulary
+        self._idf = idf.astype(np.float32, copy=False)
+        self._centroids = centroids.astype(np.float32, copy=False)
+        # 按 n-gram 行存放的质心转置，预测时只取查询命中的行
+        self._feature_rows = np.ascontiguousarray(self._centroids.T)
+        self._labels = list(labels)
+        self._ngram_range = (int(ngram_range[0]), int(ngram_range[1]))
+        self.model_version = model_version
+        self.trained_at = trained_at
+        self.sample_count = sample_count
+
+    @property
+    def labels(self) -> list[str]:
+        return list(self._labels)
+
+    @property
+    def ngram_range(self) -> tuple[int, int]:
+        return self._ngram_range
+
+    @classmethod
+    def fit(
+        cls,
+        samples: Sequence[tuple[str, str]],
+        *,
+        ngram_range: tuple[int, int] = (1, 3),
+    ) -> "CharNgramIntentClassifier":
+        """
+        训练分类器
+
+        参数:
+            samples: (文本, 技能名) 样本
+            ngram_range: 字符 n-gram 长度范围（闭区间）
+        返回:
+            训练好的分类器
+        """
+        pairs = [(_normalize_text(text), str(label)) for text, label in samples if _normalize_text(text) and label]
+        if not pairs:
+            raise ValueError("no training samples")
+        labels = sorted({label for _, label in pairs})
+        label_index = {label: i for i, label in enumerate(labels)}
+
+        vocabulary: dict[str, int] = {}
+        doc_grams: list[dict[int, int]] = []
+        for text, _ in pairs:
+            counts: dict[int, int] = {}
+            for gram in _iter_ngrams(text, ngram_range):
+                index = vocabulary.setdefault(gram, len(vocabulary))
+                counts[index] = counts.get(index, 0) + 1
+            doc_grams.append(counts)
+
+        doc_freq = np.zeros(len(vocabulary), dtype=np.float64)
+        for counts in doc_grams:
+            doc_freq[list(counts)] += 1
+        idf = np.log((1 + len(pairs)) / (1 + doc_freq)) + 1.0
+
+        centroids = np.zeros((len(labels), len(vocabulary)), dtype=np.float64)
+        for counts, (_, label) in zip(doc_grams, pairs):
+            indices = np.fromiter(counts.keys(), dtype=np.int64)
+            weights = (1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64))) * idf[indices]
+            norm = np.linalg.norm(weights)
+            if norm > 0:
+                centroids[label_index[label], indices] += weights / norm
+        row_norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        centroids = np.divide(centroids, row_norms, out=np.zeros_like(centroids), where=row_norms > 0)
+
+        digest = hashlib.sha256()
+        for text, label in sorted(pairs):
+            digest.update(f"{label}\t{text}\n".encode("utf-8"))
+        digest.update(f"{ngram_range}".encode("utf-8"))
+        return cls(
+            vocabulary=vocabulary,
+            idf=idf,
+            centroids=centroids,
+            labels=labels,
+            ngram_range=ngram_range,
+            model_version=digest.hexdigest()[:12],
+            trained_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            sample_count=len(pairs),
+        )
+
+    def predict(self, text: str, top_k: int = 3) -> ClassifierPrediction:
+        """返回 Top-K 技能及余弦分数。"""
+        counts: dict[int, int] = {}
+        for gram in _iter_ngrams(_normalize_text(text), self._ngram_range):
+            index = self._vocabulary.get(gram)
+            if index is not None:
+                counts[index] = counts.get(index, 0) + 1
+        if not counts:
+            return ClassifierPrediction(ranked=[], margin=0.0)
+
+        indices = np.fromiter(counts.keys(), dtype=np.int64)
+        weights = (1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32))) * self._idf[indices]
+        norm = float(np.linalg.norm(weights))
+        if norm <= 0:
+            return ClassifierPrediction(ranked=[], margin=0.0)
+        scores = (weights / norm) @ self._feature_rows[indices]
+
+        order = np.argsort(-scores)[: max(1, top_k)]
+        ranked = [(self._labels[i], float(scores[i])) for i in order]
+        second = ranked[1][1] if len(ranked) > 1 else 0.0
+        return ClassifierPrediction(ranked=ranked, margin=ranked[0][1] - second)
+
+    # region 模型文件
+    def save(self, path: str | Path) -> Path:
+        """保存为 .npz（词表与元数据以 JSON 字符串存放，加载无需 pickle）。"""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        vocab = sorted(self._vocabulary.items(), key=lambda item: item[1])
+        meta = {
+            "format_version": ARTIFACT_FORMAT_VERSION,
+            "model_version": self.model_version,
+            "trained_at": self.trained_at,
+            "sample_count": self.sample_count,
+            "labels": self._labels,
+            "ngram_range": list(self._ngram_range),
+            "vocabulary": [gram for gram, _ in vocab],
+        }
+        with target.open("wb") as f:
+            np.savez_compressed(
+                f,
+                meta=np.array(json.dumps(meta, ensure_ascii=False)),
+                idf=self._idf,
+                centroids=self._centroids,
+            )
+        return target
+
+    @classmethod
+    def load(cls, path: str | Path) -> "CharNgramIntentClassifier":
+        with np.load(Path(path), allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if int(meta.get("format_version", 0)) != ARTIFACT_FORMAT_VERSION:
+                raise ValueError(
+                    f"unsupported intent classifier artifact version: {meta.get('format_version')}"
+                )
+            vocabulary = {gram: i for i, gram in enumerate(meta["vocabulary"])}
+            ngram_range = meta.get("ngram_range") or [1, 3]
+            return cls(
+                vocabulary=vocabulary,
+                idf=np.asarray(data["idf"]),
+                centroids=np.asarray(data["centroids"]),
+                labels=list(meta["labels"]),
+                ngram_range=(int(ngram_range[0]), int(ngram_range[1])),
+                model_version=str(meta.get("model_version", "")),
+                trained_at=str(meta.get("trained_at", "")),
+                sample_count=int(meta.get("sample_count", 0)),
+            )
+
+    # endregion
+
+
+def _iter_ngrams(text: str, ngram_range: tuple[int, int]) -> Iterable[str]:
+    low, high = ngram_range
+    length = len(text)
+    for n in range(low, high + 1):
+        for start in range(0, length - n + 1):
+            yield text[start : start + n]
+
+
+# endregion
+
+
+# region 运行时封装
+class LocalIntentClassifier:
+    """
+    运行时封装：置信门限 + margin 判定
+
+    功能:
+        - top1 分数 >= min_score 且 margin >= min_margin 时给出结果
+        - 否则返回 None，交由 LLM 分类
+    """
+
+    def __init__(
+        self,
+        model: CharNgramIntentClassifier,
+        *,
+        min_score: float = 0.35,
+        min_margin: float = 0.1,
+    ) -> None:
+        self._model = model
+        self._min_score = float(min_score)
+        self._min_margin = float(min_margin)
+
+    @property
+    def model(self) -> CharNgramIntentClassifier:
+        return self._model
+
+    def classify(self, text: str) -> ClassifierPrediction | None:
+        prediction = self._model.predict(text)
+        if not prediction.ranked:
+            return None
+        if prediction.score < self._min_score or prediction.margin < self._min_margin:
+            return None
+        return prediction
+
+
+def load_local_intent_classifier(config: dict[str, Any] | None) -> LocalIntentClassifier | None:
+    """
+    按 skills.yaml `intent.local_classifier` 加载模型；未启用或文件缺失/不兼容时返回 None。
+    """
+    cfg = config or {}
+    if not bool(cfg.get("enabled", False)):
+        return None
+    artifact_path = str(cfg.get("artifact_path") or "").strip()
+    if not artifact_path:
+        return None
+    path = Path(artifact_path)
+    if not path.exists():
+        logger.warning(
+            "本地意图分类器模型文件不存在: %s",
+            artifact_path,
+            extra={"event_code": "intent.local_classifier.artifact_missing"},
+        )
+        return None
+    try:
+        model = CharNgramIntentClassifier.load(path)
+    except Exception as exc:
+        logger.warning(
+            "本地意图分类器加载失败: %s",
+            exc,
+            extra={"event_code": "intent.local_classifier.load_failed", "artifact_path": artifact_path},
+        )
+        return None
+    logger.info(
+        "本地意图分类器已加载",
+        extra={
+            "event_code": "intent.local_classifier.loaded",
+            "artifact_path": artifact_path,
+            "model_version": model.model_version,
+            "trained_at": model.trained_at,
+            "labels": model.labels,
+        },
+    )
+    return LocalIntentClassifier(
+        model,
+        min_score=float(cfg.get("min_score", 0.35)),
+        min_margin=float(cfg.get("min_margin", 0.1)),
+    )
+
+
+# endregion
+
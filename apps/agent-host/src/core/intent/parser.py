@@ -2,6 +2,7 @@
 描述: 意图解析器
 主要功能:
     - 基于规则的意图识别
+    - 本地轻量分类器（可选）在置信足够时替代 LLM 分类
     - LLM 兜底识别
     - 输出 Top-3 匹配技能及置信度
 """
@@ -9,11 +10,15 @@
 from __future__ import annotations
 
 import logging
-import re
 from dataclasses import dataclass, field
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from src.core.intent.rules import match_date_query
+from src.core.intent.rules import KeywordAutomaton, compile_trigger_patterns, match_date_query
+from src.llm.usage_ledger import llm_stage
+from src.utils.metrics import record_intent_local_classifier
+
+if TYPE_CHECKING:
+    from src.core.intent.classifier import LocalIntentClassifier
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +43,10 @@ _SKILL_NAME_MAP: dict[str, str] = {
     "ChitchatSkill": "ChitchatSkill",
 }
 
+# 特定技能的动作词加成（大小写敏感匹配）
+_REMINDER_BOOST_WORDS: tuple[str, ...] = ("提醒",)
+_CREATE_BOOST_WORDS: tuple[str, ...] = ("新增", "新建", "创建", "添加", "录入")
+
 
 # region 数据结构
 @dataclass
@@ -72,7 +81,7 @@ class IntentResult:
         skills: 匹配的技能列表
         is_chain: 是否为链式调用
         requires_llm_confirm: 是否需要 LLM 确认
-        method: 识别方法 (rule / llm / fallback)
+        method: 识别方法 (rule / local_model / llm / fallback)
     """
 
     skills: list[SkillMatch] = field(default_factory=list)
@@ -114,6 +123,7 @@ class IntentParser:
         self,
         skills_config: dict[str, Any],
         llm_client: Any = None,
+        local_classifier: "LocalIntentClassifier | None" = None,
     ) -> None:
         """
         初始化意图解析器
@@ -121,9 +131,11 @@ class IntentParser:
         参数:
             skills_config: 技能配置字典
             llm_client: LLM 客户端实例 (可选)
+            local_classifier: 本地意图分类器 (可选)，规则分不足时先于 LLM 尝试
         """
         self._config = skills_config or {}
         self._llm = llm_client
+        self._local_classifier = local_classifier
 
         self._routing = self._config.get("routing", {})
         intent_cfg = self._config.get("intent", {})
@@ -140,20 +152,28 @@ class IntentParser:
         self._skills = self._normalize_skills_config(self._config)
         self._chains = self._config.get("chains", {})
         self._llm_timeout = float(intent_cfg.get("llm_timeout", 10))
+        self._compile_rules()
 
-    async def parse(self, query: str, llm_context: dict[str, str] | None = None) -> IntentResult:
+    async def parse(
+        self,
+        query: str,
+        llm_context: dict[str, str] | None = None,
+        llm_hint: IntentResult | None = None,
+    ) -> IntentResult:
         """
         解析用户输入，返回意图识别结果
 
         参数:
             query: 用户输入文本
             llm_context: LLM 上下文信息 (可选)
+            llm_hint: 上游（融合 Planner）已给出的技能排序，提供时替代 LLM 分类调用
 
         返回:
             意图识别结果
         """
 
-        is_chain = self._detect_chain(query)
+        hits = self._scan(query)
+        is_chain = self._detect_chain(query, hits)
         date_score = match_date_query(query)
         if date_score >= 0.9:
             match = SkillMatch(
@@ -178,7 +198,7 @@ class IntentParser:
                 method="rule",
             )
 
-        rule_matches = self._rule_match(query)
+        rule_matches = self._rule_match(query, hits)
         top_score = rule_matches[0].score if rule_matches else 0.0
 
         requires_llm_confirm = (
@@ -205,10 +225,15 @@ class IntentParser:
                 method="rule",
             )
 
+        local_result = None if llm_hint is not None else self._local_classify(query)
+
         if top_score >= self._llm_confirm_threshold:
-            if self._llm:
+            if local_result is not None:
+                local_result.is_chain = is_chain
+                return local_result
+            if self._llm or llm_hint:
                 try:
-                    llm_result = await self._llm_classify(query, rule_matches[:3], llm_context)
+                    llm_result = await self._classify(query, rule_matches[:3], llm_context, llm_hint)
                     if llm_result:
                         llm_result.method = "llm"
                         llm_result.is_chain = llm_result.is_chain or is_chain
@@ -228,9 +253,13 @@ class IntentParser:
                 method="rule",
             )
 
-        if self._llm:
+        if local_result is not None:
+            local_result.is_chain = is_chain
+            return local_result
+
+        if self._llm or llm_hint:
             try:
-                llm_result = await self._llm_classify(query, None, llm_context)
+                llm_result = await self._classify(query, None, llm_context, llm_hint)
                 if llm_result:
                     llm_result.method = "llm"
                     return llm_result
@@ -272,42 +301,74 @@ class IntentParser:
             skills[key] = merged
         return skills
 
-    def _rule_match(self, query: str) -> list[SkillMatch]:
+    def _compile_rules(self) -> None:
+        """
+        配置加载时预编译规则
+
+        功能:
+            - 技能关键词（原样 + 小写）、时间关键词、加成动作词、链式触发词合并为一个 Aho-Corasick 自动机
+            - 链式触发正则预编译
+            - 每个技能的关键词表保留原顺序与重复项，保证评分与逐词匹配一致
+        """
+        patterns: list[str] = list(_REMINDER_BOOST_WORDS) + list(_CREATE_BOOST_WORDS)
+        skill_rules: list[tuple[str, str, tuple[tuple[str, str], ...], tuple[tuple[str, str], ...]]] = []
+        for skill_key, skill_cfg in self._skills.items():
+            keywords = tuple((kw, kw.lower()) for kw in skill_cfg.get("keywords", []) or [])
+            if not keywords:
+                continue
+            time_keywords = tuple((kw, kw.lower()) for kw in skill_cfg.get("time_keywords", []) or [])
+            for kw, kw_lower in keywords + time_keywords:
+                patterns.extend((kw, kw_lower))
+            skill_rules.append((skill_key, skill_cfg.get("name", skill_key), keywords, time_keywords))
+
+        chain_cfg = self._config.get("chain", {})
+        self._chain_patterns = compile_trigger_patterns(
+            trigger.get("pattern") for trigger in chain_cfg.get("triggers", []) or []
+        )
+        self._chain_keywords = tuple(
+            trigger
+            for chain in self._chains.values()
+            for trigger in chain.get("trigger_keywords", []) or []
+            if trigger
+        )
+        patterns.extend(self._chain_keywords)
+
+        self._skill_rules = skill_rules
+        self._automaton = KeywordAutomaton(patterns)
+
+    def _scan(self, query: str) -> tuple[set[str], set[str]]:
+        """
+        单次扫描得到命中词
+
+        返回:
+            (原文命中词, 小写文本命中词)；原文已是小写时两者为同一集合
+        """
+        hits = self._automaton.find_all(query)
+        query_lower = query.lower()
+        if query_lower == query:
+            return hits, hits
+        return hits, self._automaton.find_all(query_lower)
+
+    def _rule_match(self, query: str, hits: tuple[set[str], set[str]] | None = None) -> list[SkillMatch]:
         """
         基于规则匹配技能
 
         参数:
             query: 用户输入
+            hits: _scan 的结果 (可选)，parse 内已扫描时复用
 
         返回:
             匹配的技能列表（按分数降序）
         """
+        raw_hits, lower_hits = hits if hits is not None else self._scan(query)
         matches: list[SkillMatch] = []
-        query_lower = query.lower()
-
-        for skill_key, skill_cfg in self._skills.items():
-            keywords = skill_cfg.get("keywords", [])
-            time_keywords = skill_cfg.get("time_keywords", [])
-            weights = skill_cfg.get("weights", {})
-            skill_name = skill_cfg.get("name", skill_key)
-
-            if not keywords:
-                continue
 
-            hit_count = 0
-            hit_keywords: list[str] = []
-            total_weight = 0.0
-
-            for kw in keywords:
-                weight = weights.get(kw, 1.0)
-                if kw in query or kw.lower() in query_lower:
-                    hit_count += 1
-                    hit_keywords.append(kw)
-                    total_weight += weight
-
-            time_hits = [kw for kw in time_keywords if kw in query or kw.lower() in query_lower]
+        for skill_key, skill_name, keywords, time_keywords in self._skill_rules:
+            hit_keywords = [kw for kw, kw_lower in keywords if kw in raw_hits or kw_lower in lower_hits]
+            hit_count = len(hit_keywords)
             if hit_count == 0:
                 continue
+            time_hits = [kw for kw, kw_lower in time_keywords if kw in raw_hits or kw_lower in lower_hits]
 
             # 新评分算法：
             # - 基础分：命中任意关键词给 0.6 分
@@ -317,11 +378,11 @@ class IntentParser:
             hit_bonus = min((hit_count - 1) * 0.1, 0.3)
             time_bonus = 0.1 if time_hits else 0.0
             score = min(base_score + hit_bonus + time_bonus, 1.0)
-            
+
             # 特定技能加成（动作词优先于名词）
-            if skill_key == "reminder" and "提醒" in query:
+            if skill_key == "reminder" and any(kw in raw_hits for kw in _REMINDER_BOOST_WORDS):
                 score = min(score + 0.15, 1.0)
-            if skill_key == "create" and any(kw in query for kw in ["新增", "新建", "创建", "添加", "录入"]):
+            if skill_key == "create" and any(kw in raw_hits for kw in _CREATE_BOOST_WORDS):
                 score = min(score + 0.2, 1.0)  # create 动作词优先级更高
 
             reason = f"命中关键词: {', '.join(hit_keywords[:3])}"
@@ -346,21 +407,16 @@ class IntentParser:
         matches.sort(key=lambda x: x.score, reverse=True)
         return matches
 
-    def _detect_chain(self, query: str) -> bool:
+    def _detect_chain(self, query: str, hits: tuple[set[str], set[str]] | None = None) -> bool:
         """检测是否触发链式执行"""
-        chain_cfg = self._config.get("chain", {})
-        triggers = chain_cfg.get("triggers", [])
-        for trigger in triggers:
-            pattern = trigger.get("pattern")
-            if pattern and re.search(pattern, query):
+        for pattern in self._chain_patterns:
+            if pattern.search(query):
                 return True
 
-        for chain_key, chain_cfg in self._chains.items():
-            trigger_keywords = chain_cfg.get("trigger_keywords", [])
-            for trigger in trigger_keywords:
-                if trigger in query:
-                    return True
-        return False
+        if not self._chain_keywords:
+            return False
+        raw_hits = hits[0] if hits is not None else self._automaton.find_all(query)
+        return any(trigger in raw_hits for trigger in self._chain_keywords)
 
     def _get_skill_name(self, skill_key: str) -> str:
         """获取技能标准名称"""
@@ -369,6 +425,73 @@ class IntentParser:
             return skill_cfg.get("name", skill_key)
         return _SKILL_NAME_MAP.get(skill_key, skill_key)
 
+    def skill_keywords(self) -> dict[str, list[str]]:
+        """返回技能标准名到关键词列表的映射（供本地分类器训练）。"""
+        return {
+            str(cfg.get("name", key)): [str(kw) for kw in cfg.get("keywords", []) or []]
+            for key, cfg in self._skills.items()
+        }
+
+    def _local_classify(self, query: str) -> IntentResult | None:
+        """本地分类器置信足够时直接给出结果，否则返回 None 交由 LLM。"""
+        classifier = self._local_classifier
+        if classifier is None:
+            return None
+        prediction = classifier.classify(query)
+        if prediction is None:
+            record_intent_local_classifier("deferred")
+            return None
+        known = {str(cfg.get("name", key)) for key, cfg in self._skills.items()}
+        known.update(_SKILL_NAME_MAP.get(name, name) for name in list(known))
+        if prediction.label not in known:
+            record_intent_local_classifier("rejected_label")
+            return None
+        record_intent_local_classifier("accepted")
+        logger.info(
+            "本地分类器完成意图解析",
+            extra={
+                "event_code": "intent.parsed_by_local_classifier",
+                "query": query,
+                "top_skill": prediction.label,
+                "score": prediction.score,
+                "margin": prediction.margin,
+                "model_version": classifier.model.model_version,
+            },
+        )
+        return IntentResult(
+            skills=[
+                SkillMatch(name=name, score=max(0.0, min(1.0, score)), reason="本地分类器")
+                for name, score in prediction.ranked
+                if name in known and score > 0
+            ],
+            is_chain=False,
+            requires_llm_confirm=False,
+            method="local_model",
+        )
+
+    def skill_catalog(self) -> list[dict[str, str]]:
+        """返回可用技能名称与描述（供融合 Planner 构建提示词）。"""
+        return [
+            {"name": str(cfg.get("name", key)), "description": str(cfg.get("description", ""))}
+            for key, cfg in self._skills.items()
+        ]
+
+    async def _classify(
+        self,
+        query: str,
+        hints: list[SkillMatch] | None,
+        llm_context: dict[str, str] | None,
+        llm_hint: IntentResult | None,
+    ) -> IntentResult | None:
+        """优先复用上游技能排序，缺失时再调用 LLM 分类。"""
+        if llm_hint is not None and llm_hint.skills:
+            return IntentResult(
+                skills=list(llm_hint.skills[:3]),
+                is_chain=llm_hint.is_chain,
+                method="llm",
+            )
+        return await self._llm_classify(query, hints, llm_context)
+
     async def _llm_classify(
         self,
         query: str,
@@ -425,11 +548,12 @@ class IntentParser:
         system_prompt = self._build_llm_system_prompt(llm_context)
 
         try:
-            response = await self._llm.chat_json(
-                prompt,
-                system=system_prompt,
-                timeout=self._llm_timeout,
-            )
+            with llm_stage("intent"):
+                response = await self._llm.chat_json(
+                    prompt,
+                    system=system_prompt,
+                    timeout=self._llm_timeout,
+                )
             if not response:
                 return None
 
@@ -2,11 +2,13 @@
 描述: 意图识别规则库 (Regex Patterns)
 主要功能:
     - 编译正则模式
+    - 多模式关键词自动机 (Aho-Corasick)，单次扫描得到全部命中词
     - 提供特定领域 (如日期查询) 的硬规则匹配逻辑
 """
 
 from __future__ import annotations
 
+from collections import deque
 import re
 from typing import Iterable
 
@@ -17,6 +19,69 @@ def compile_trigger_patterns(patterns: Iterable[str]) -> list[re.Pattern[str]]:
     return [re.compile(pattern) for pattern in patterns if pattern]
 
 
+class KeywordAutomaton:
+    """
+    Aho-Corasick 多模式匹配自动机
+
+    功能:
+        - 构建时合并全部关键词的 goto / fail 表，并把 fail 链上的输出预先合并
+        - find_all 单次扫描文本，返回出现过的关键词集合（O(len(text) + 命中数)）
+    """
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._outputs: list[tuple[str, ...]] = [()]
+        unique = list(dict.fromkeys(p for p in patterns if p))
+        self._patterns = tuple(unique)
+
+        raw_outputs: list[list[str]] = [[]]
+        for pattern in unique:
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    raw_outputs.append([])
+                state = next_state
+            raw_outputs[state].append(pattern)
+
+        fail = [0] * len(self._goto)
+        queue: deque[int] = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                queue.append(child)
+                probe = fail[state]
+                while probe and ch not in self._goto[probe]:
+                    probe = fail[probe]
+                fallback = self._goto[probe].get(ch, 0)
+                fail[child] = fallback if fallback != child else 0
+                # BFS 保证 fail 目标的输出已合并完毕
+                raw_outputs[child].extend(raw_outputs[fail[child]])
+        self._fail = fail
+        self._outputs = [tuple(dict.fromkeys(items)) for items in raw_outputs]
+
+    @property
+    def patterns(self) -> tuple[str, ...]:
+        return self._patterns
+
+    def find_all(self, text: str) -> set[str]:
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        found: set[str] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+
 # 日期类查询正则
 DATE_QUERY_PATTERNS = [
     r"(今天|明天|后天|本周|下周|这周).*(有|什么|哪些).*(庭|案|开庭|案件)",
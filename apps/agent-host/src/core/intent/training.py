@@ -0,0 +1,278 @@
+"""
+描述: 本地意图分类器的离线训练与评测
+主要功能:
+    - 从场景剧本（docs/scenarios/scenarios.yaml）、技能关键词与已记录的 Planner/意图决策日志收集样本
+    - 训练并保存版本化模型文件
+    - 对场景集给出准确率、覆盖率与单次预测延迟；默认按 k 折交叉验证，评测样本不参与训练
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+import math
+from pathlib import Path
+import re
+import time
+from typing import Any, Iterable, Sequence
+
+import yaml
+
+from src.core.intent.classifier import CharNgramIntentClassifier, LocalIntentClassifier
+from src.core.intent.parser import IntentParser
+
+
+_PLACEHOLDER_RE = re.compile(r"\$\{([^{}]+)\}")
+
+# 可作为训练样本的结构化日志事件（orchestrator 意图解析完成时输出）
+_DECISION_EVENTS = {"orchestrator.intent.parsed_planner", "orchestrator.intent.parsed"}
+# 规则直出的结果不回灌训练，避免模型只学到关键词表本身
+_DECISION_METHODS = {"planner", "planner_fused", "llm"}
+
+
+# region 样本收集
+def scenario_samples(scenarios_path: str | Path, skill_names: Iterable[str]) -> list[tuple[str, str]]:
+    """
+    读取场景剧本中 expected.intent 为技能名的首轮用户输入。
+
+    参数:
+        scenarios_path: 场景剧本路径
+        skill_names: 合法技能名（其余 intent 如 cancel / out_of_scope 忽略）
+    返回:
+        (文本, 技能名) 样本
+    """
+    path = Path(scenarios_path)
+    if not path.exists():
+        return []
+    payload = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    variables = {str(k): str(v) for k, v in (payload.get("variables") or {}).items()}
+    valid = set(skill_names)
+    samples: list[tuple[str, str]] = []
+    for scenario in payload.get("scenarios") or []:
+        expected = scenario.get("expected") or {}
+        label = str(expected.get("intent") or "")
+        if label not in valid:
+            continue
+        user_turns = [turn for turn in scenario.get("dialogue") or [] if turn.get("role") == "user"]
+        if not user_turns:
+            continue
+        text = _PLACEHOLDER_RE.sub(lambda m: variables.get(m.group(1), m.group(0)), str(user_turns[0].get("text") or ""))
+        if text.strip() and "${" not in text:
+            samples.append((text.strip(), label))
+    return samples
+
+
+def keyword_samples(parser: IntentParser) -> list[tuple[str, str]]:
+    """每个技能关键词单独作为一条样本。"""
+    return [
+        (keyword, skill_name)
+        for skill_name, keywords in parser.skill_keywords().items()
+        for keyword in keywords
+    ]
+
+
+def decision_log_samples(
+    log_paths: Sequence[str | Path],
+    skill_names: Iterable[str],
+    min_score: float = 0.6,
+) -> list[tuple[str, str]]:
+    """
+    从 JSON 结构化日志中提取 Planner / LLM 给出的意图决策。
+
+    参数:
+        log_paths: JSON 行日志文件
+        skill_names: 合法技能名
+        min_score: top1 分数下限
+    """
+    valid = set(skill_names)
+    samples: list[tuple[str, str]] = []
+    for log_path in log_paths:
+        path = Path(log_path)
+        if not path.exists():
+            continue
+        with path.open("r", encoding="utf-8") as f:
+            for raw_line in f:
+                line = raw_line.strip()
+                if not line.startswith("{"):
+                    continue
+                try:
+                    payload = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if payload.get("event_code") not in _DECISION_EVENTS:
+                    continue
+                intent = payload.get("intent") or {}
+                skills = intent.get("skills") or []
+                if not skills or str(intent.get("method") or "") not in _DECISION_METHODS:
+                    continue
+                top = skills[0]
+                label = str(top.get("name") or "")
+                query = str(payload.get("query") or "").strip()
+                if query and label in valid and float(top.get("score") or 0.0) >= min_score:
+                    samples.append((query, label))
+    return samples
+
+
+def _intent_parser(skills_config: dict[str, Any]) -> IntentParser:
+    parser = IntentParser(skills_config)
+    if not any(parser.skill_keywords().values()):
+        # `skills:` 仅含超时等运行参数时，关键词仍在顶层 query/create/... 段
+        parser = IntentParser({key: value for key, value in skills_config.items() if key != "skills"})
+    return parser
+
+
+def collect_training_samples(
+    skills_config: dict[str, Any],
+    *,
+    scenarios_path: str | Path | None = None,
+    decision_logs: Sequence[str | Path] = (),
+    exclude_texts: Iterable[str] = (),
+) -> list[tuple[str, str]]:
+    """
+    合并三类样本并去重
+
+    参数:
+        exclude_texts: 留作评测的文本；任一来源中相同文本的样本都不进入训练集
+    """
+    parser = _intent_parser(skills_config)
+    skill_names = list(parser.skill_keywords())
+    samples = keyword_samples(parser)
+    if scenarios_path:
+        samples.extend(scenario_samples(scenarios_path, skill_names))
+    samples.extend(decision_log_samples(decision_logs, skill_names))
+    excluded = {text.strip() for text in exclude_texts}
+    return [sample for sample in dict.fromkeys(samples) if sample[0] not in excluded]
+
+
+# endregion
+
+
+# region 评测
+@dataclass
+class BenchmarkReport:
+    samples: int
+    top1_accuracy: float
+    accepted: int
+    accepted_accuracy: float
+    latency_p50_us: float
+    latency_p99_us: float
+    folds: int = 0
+
+    @property
+    def coverage(self) -> float:
+        return self.accepted / self.samples if self.samples else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "folds": self.folds,
+            "top1_accuracy": round(self.top1_accuracy, 4),
+            "coverage": round(self.coverage, 4),
+            "accepted_accuracy": round(self.accepted_accuracy, 4),
+            "latency_p50_us": round(self.latency_p50_us, 1),
+            "latency_p99_us": round(self.latency_p99_us, 1),
+        }
+
+
+def benchmark(classifier: LocalIntentClassifier, samples: Sequence[tuple[str, str]], repeat: int = 20) -> BenchmarkReport:
+    """
+    评测给定模型的准确率与延迟
+
+    说明:
+        - 样本若参与过训练，结果即训练集准确率；留出评测用 cross_validate
+
+    参数:
+        classifier: 带门限的运行时分类器
+        samples: (文本, 期望技能名)
+        repeat: 每条样本重复预测次数（用于延迟统计）
+    """
+    tally = _Tally()
+    tally.add(classifier, samples, repeat)
+    return tally.report()
+
+
+def cross_validate(
+    skills_config: dict[str, Any],
+    *,
+    scenarios_path: str | Path,
+    decision_logs: Sequence[str | Path] = (),
+    folds: int = 5,
+    min_score: float = 0.35,
+    min_margin: float = 0.1,
+    ngram_range: tuple[int, int] = (1, 3),
+    repeat: int = 20,
+) -> BenchmarkReport:
+    """
+    k 折交叉验证：场景样本按序号轮流分入各折，每折用其余样本重新训练后只在该折上评测
+
+    门限（min_score / min_margin）据此调参时不会受训练集泄漏影响。
+    """
+    evaluation = scenario_samples(scenarios_path, _intent_parser(skills_config).skill_keywords())
+    folds = max(2, min(int(folds), len(evaluation))) if len(evaluation) >= 2 else 1
+    tally = _Tally()
+    for fold in range(folds):
+        held_out = evaluation[fold::folds]
+        if not held_out:
+            continue
+        model = train(
+            collect_training_samples(
+                skills_config,
+                scenarios_path=scenarios_path,
+                decision_logs=decision_logs,
+                exclude_texts=[text for text, _ in held_out],
+            ),
+            ngram_range=ngram_range,
+        )
+        tally.add(LocalIntentClassifier(model, min_score=min_score, min_margin=min_margin), held_out, repeat)
+    report = tally.report()
+    report.folds = folds
+    return report
+
+
+class _Tally:
+    def __init__(self) -> None:
+        self.total = 0
+        self.correct = 0
+        self.accepted = 0
+        self.accepted_correct = 0
+        self.latencies: list[float] = []
+
+    def add(self, classifier: LocalIntentClassifier, samples: Sequence[tuple[str, str]], repeat: int) -> None:
+        self.total += len(samples)
+        for text, label in samples:
+            prediction = classifier.model.predict(text)
+            self.correct += int(prediction.label == label)
+            decided = classifier.classify(text)
+            if decided is not None:
+                self.accepted += 1
+                self.accepted_correct += int(decided.label == label)
+            for _ in range(max(1, repeat)):
+                start = time.perf_counter()
+                classifier.classify(text)
+                self.latencies.append((time.perf_counter() - start) * 1_000_000)
+
+    def report(self) -> BenchmarkReport:
+        total = self.total
+        return BenchmarkReport(
+            samples=total,
+            top1_accuracy=self.correct / total if total else 0.0,
+            accepted=self.accepted,
+            accepted_accuracy=self.accepted_correct / self.accepted if self.accepted else 0.0,
+            latency_p50_us=_percentile(self.latencies, 0.5),
+            latency_p99_us=_percentile(self.latencies, 0.99),
+        )
+
+
+def train(samples: Sequence[tuple[str, str]], ngram_range: tuple[int, int] = (1, 3)) -> CharNgramIntentClassifier:
+    return CharNgramIntentClassifier.fit(samples, ngram_range=ngram_range)
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+    return ordered[index]
+
+
+# endregion
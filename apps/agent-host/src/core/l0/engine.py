@@ -2,6 +2,8 @@
 L0 规则硬约束引擎。
 
 仅处理精确触发与状态检查，不做语义理解。
+全部触发词在构造时编译为一个关键词自动机（子串类）与一张整句索引（精确类），
+每条消息只扫描一次；会话状态每次求值只读取一次，由各项检查共享。
 """
 
 from __future__ import annotations
@@ -9,12 +11,93 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 import logging
 import re
-from typing import Any
+from typing import Any, Iterable
 
+from src.core.intent.rules import KeywordAutomaton
 from src.core.state import ConversationStateManager
 
 logger = logging.getLogger(__name__)
 
+_ORDINAL_PATTERN = re.compile(r"第\s*([一二三四五六七八九十\d]+)\s*个")
+
+# 子串类触发词分组（在原文上匹配）
+_KIND_BATCH_DELETE = "batch_delete"
+_KIND_DELETE = "delete"
+_KIND_UPDATE = "update"
+_KIND_REFERENCE = "reference"
+_KIND_PENDING_FIELD = "pending_field"
+_KIND_DOMAIN = "domain"
+_KIND_UPDATE_HINT = "update_hint"
+_KIND_UPDATE_VERB = "update_verb"
+_KIND_COLON = "colon"
+_KIND_ORDINAL = "ordinal"
+# 在小写文本上匹配
+_KIND_CHITCHAT_SHORT = "chitchat_short"
+
+# 整句类触发词分组（在规范化文本上精确匹配）
+_KIND_CONFIRM = "confirm"
+_KIND_CANCEL = "cancel"
+_KIND_NEXT_PAGE = "next_page"
+_KIND_GENERIC_CONFIRM = "generic_confirm"
+_KIND_CHITCHAT = "chitchat"
+_KIND_DELETE_CONFIRM = "delete_confirm"
+
+
+class L0Patterns:
+    """
+    编译后的 L0 触发词索引
+
+    功能:
+        - 子串类触发词合并为一个 Aho-Corasick 自动机，一次扫描得到命中分组
+        - 整句类触发词合并为一张 规范化文本 -> 分组 的字典
+    """
+
+    def __init__(self, substring_groups: dict[str, Iterable[str]], exact_groups: dict[str, Iterable[str]]) -> None:
+        token_kinds: dict[str, set[str]] = {}
+        for kind, tokens in substring_groups.items():
+            for token in tokens:
+                if token:
+                    token_kinds.setdefault(token, set()).add(kind)
+        self._token_kinds = {token: frozenset(kinds) for token, kinds in token_kinds.items()}
+        self._automaton = KeywordAutomaton(self._token_kinds)
+
+        exact_kinds: dict[str, set[str]] = {}
+        for kind, phrases in exact_groups.items():
+            for phrase in phrases:
+                exact_kinds.setdefault(phrase, set()).add(kind)
+        self._exact_kinds = {phrase: frozenset(kinds) for phrase, kinds in exact_kinds.items()}
+
+    def scan(self, text: str) -> frozenset[str]:
+        kinds: set[str] = set()
+        for token in self._automaton.find_all(text):
+            kinds.update(self._token_kinds[token])
+        return frozenset(kinds)
+
+    def exact(self, normalized: str) -> frozenset[str]:
+        return self._exact_kinds.get(normalized, frozenset())
+
+
+class L0Scan:
+    """单条消息的扫描结果，供各项检查共享。"""
+
+    __slots__ = ("text", "normalized", "kinds", "exact", "_patterns", "_lower_kinds")
+
+    def __init__(self, patterns: L0Patterns, text: str, normalized: str) -> None:
+        self.text = text
+        self.normalized = normalized
+        self.kinds = patterns.scan(text)
+        self.exact = patterns.exact(normalized)
+        self._patterns = patterns
+        self._lower_kinds: frozenset[str] | None = None
+
+    @property
+    def lower_kinds(self) -> frozenset[str]:
+        """小写文本上的命中分组（仅闲聊短词使用，按需扫描）。"""
+        if self._lower_kinds is None:
+            lowered = self.text.lower()
+            self._lower_kinds = self.kinds if lowered == self.text else self._patterns.scan(lowered)
+        return self._lower_kinds
+
 
 @dataclass
 class L0Decision:
@@ -26,6 +109,24 @@ class L0Decision:
     intent_hint: str | None = None
 
 
+_UPDATE_COLLECT_HINTS = (
+    "案号", "项目ID", "项目id", "项目编号", "项目号",
+    "开庭日", "日期", "状态", "进展", "主办", "协办", "法院", "案由", "金额", "备注",
+)
+_UPDATE_COLLECT_VERBS = ("改成", "改为", "变成", "变为", "更新为", "修改为", "设为", "设成", "调整为", "追加")
+_CHITCHAT_SHORT_TOKENS = ("你好", "在吗", "谢谢", "bye", "help")
+
+_PENDING_ACTION_SKILLS = {
+    "create_record": "CreateSkill",
+    "update_record": "UpdateSkill",
+    "update_collect_fields": "UpdateSkill",
+    "delete_record": "DeleteSkill",
+    "repair_child_write": "CreateSkill",
+    "repair_child_create": "CreateSkill",
+    "repair_child_update": "UpdateSkill",
+}
+
+
 class L0RuleEngine:
     """L0 规则引擎。"""
 
@@ -51,11 +152,8 @@ class L0RuleEngine:
         next_page_triggers = self._rules.get("next_page_triggers", ["下一页", "继续", "更多"])
         self._next_page_triggers = {str(x).strip().lower() for x in next_page_triggers if str(x).strip()}
 
-        self._batch_delete_patterns = [
-            re.compile(r"删除所有"),
-            re.compile(r"全部删除"),
-            re.compile(r"批量删除"),
-        ]
+        batch_delete_phrases = self._rules.get("batch_delete_phrases", ["删除所有", "全部删除", "批量删除"])
+        self._batch_delete_phrases = {str(x).strip() for x in batch_delete_phrases if str(x).strip()}
 
         self._update_triggers = {
             "更新", "修改", "改", "改成", "改为", "设成", "设置为", "设为", "调整", "变更",
@@ -86,12 +184,36 @@ class L0RuleEngine:
             "委托人", "提醒", "查询", "新增", "更新", "删除", "总结",
         }
 
+        self._patterns = L0Patterns(
+            substring_groups={
+                _KIND_BATCH_DELETE: self._batch_delete_phrases,
+                _KIND_DELETE: self._delete_triggers,
+                _KIND_UPDATE: self._update_triggers,
+                _KIND_REFERENCE: self._reference_tokens,
+                _KIND_PENDING_FIELD: self._pending_field_hints,
+                _KIND_DOMAIN: self._domain_hints,
+                _KIND_UPDATE_HINT: _UPDATE_COLLECT_HINTS,
+                _KIND_UPDATE_VERB: _UPDATE_COLLECT_VERBS,
+                _KIND_COLON: (":", "："),
+                _KIND_ORDINAL: ("第",),
+                _KIND_CHITCHAT_SHORT: _CHITCHAT_SHORT_TOKENS,
+            },
+            exact_groups={
+                _KIND_CONFIRM: self._confirm_phrases,
+                _KIND_CANCEL: self._cancel_phrases,
+                _KIND_NEXT_PAGE: self._next_page_triggers,
+                _KIND_GENERIC_CONFIRM: self._generic_confirm_tokens,
+                _KIND_CHITCHAT: self._chitchat_keywords,
+                _KIND_DELETE_CONFIRM: ("确认删除",),
+            },
+        )
+
     def evaluate(self, user_id: str, text: str) -> L0Decision:
         query = (text or "").strip()
         normalized = self._normalize_text(query)
+        scan = L0Scan(self._patterns, query, normalized)
 
-        # 先触发状态清理
-        self._state.cleanup_expired()
+        # 过期清理不在此处执行：由编排层/后台清理负责，L0 只读取当前用户状态
 
         # 1) 空消息与纯符号
         if self._is_empty_like(query):
@@ -101,16 +223,19 @@ class L0RuleEngine:
             )
 
         # 2) 批量删除拦截
-        if any(pattern.search(query) for pattern in self._batch_delete_patterns):
+        if _KIND_BATCH_DELETE in scan.kinds:
             return L0Decision(
                 handled=True,
                 reply={"type": "text", "text": "不支持批量删除操作，请指定具体案件后再删除。"},
             )
 
+        # 会话状态只读取一次（get_state 内完成子状态过期清理），后续检查共享
+        state = self._state.get_state(user_id)
+
         # 3) 删除确认状态
-        pending_delete = self._state.get_pending_delete(user_id)
+        pending_delete = state.pending_delete
         if pending_delete:
-            if normalized in self._confirm_phrases:
+            if _KIND_CONFIRM in scan.exact:
                 return L0Decision(
                     handled=False,
                     force_skill="DeleteSkill",
@@ -123,7 +248,7 @@ class L0RuleEngine:
                     },
                 )
 
-            if normalized in self._cancel_phrases:
+            if _KIND_CANCEL in scan.exact:
                 self._state.clear_pending_delete(user_id)
                 return L0Decision(
                     handled=True,
@@ -135,9 +260,9 @@ class L0RuleEngine:
             self._state.clear_pending_delete(user_id)
 
         # 3.1) 通用待办动作状态（如创建补充字段）
-        pending_action = self._state.get_pending_action(user_id)
+        pending_action = state.pending_action
         if pending_action:
-            if normalized in self._cancel_phrases:
+            if _KIND_CANCEL in scan.exact:
                 self._state.clear_pending_action(user_id)
                 return L0Decision(
                     handled=True,
@@ -145,7 +270,7 @@ class L0RuleEngine:
                 )
 
             force_skill = self._map_pending_action_skill(pending_action.action)
-            if force_skill and self._should_continue_pending_action(query, pending_action.action):
+            if force_skill and self._should_continue_pending_action(query, pending_action.action, scan=scan):
                 return L0Decision(
                     handled=False,
                     force_skill=force_skill,
@@ -161,8 +286,8 @@ class L0RuleEngine:
             self._state.clear_pending_action(user_id)
 
         # 4) 分页
-        if normalized in self._next_page_triggers:
-            pagination = self._state.get_pagination(user_id)
+        if _KIND_NEXT_PAGE in scan.exact:
+            pagination = state.pagination
             if not pagination:
                 return L0Decision(
                     handled=True,
@@ -191,13 +316,13 @@ class L0RuleEngine:
             )
 
         # 4.5) 闲聊预判（只打 hint，不做拦截）
-        if self._is_chitchat_like(query):
+        if self._is_chitchat_like(query, scan=scan):
             return L0Decision(handled=False, intent_hint="chitchat")
 
         # 5) 第N个（使用最近结果）
-        ordinal_idx = self._extract_ordinal_index(query)
+        ordinal_idx = self._extract_ordinal_index(query) if _KIND_ORDINAL in scan.kinds else None
         if ordinal_idx is not None:
-            last_result = self._state.get_last_result(user_id)
+            last_result = state.last_result
             if not last_result or not last_result.records:
                 return L0Decision(
                     handled=True,
@@ -211,7 +336,7 @@ class L0RuleEngine:
                 )
 
             record = last_result.records[ordinal_idx]
-            action_skill = self._detect_action_skill(query)
+            action_skill = self._detect_action_skill(query, scan=scan)
             if action_skill:
                 return L0Decision(
                     handled=False,
@@ -238,10 +363,10 @@ class L0RuleEngine:
             )
 
         # 6) 指代 + 动作（这个/那条/刚才那条）
-        action_skill = self._detect_action_skill(query)
-        active_record = self._state.get_active_record(user_id)
+        action_skill = self._detect_action_skill(query, scan=scan)
+        active_record = state.active_record
         if action_skill and active_record:
-            if action_skill == "DeleteSkill" and not self._has_reference_token(query):
+            if action_skill == "DeleteSkill" and not self._has_reference_token(query, scan=scan):
                 return L0Decision(handled=False)
             record = active_record.record or {
                 "record_id": active_record.record_id,
@@ -273,8 +398,12 @@ class L0RuleEngine:
         )
         return not has_meaningful
 
+    def _scan(self, query: str) -> L0Scan:
+        text = (query or "").strip()
+        return L0Scan(self._patterns, text, self._normalize_text(text))
+
     def _extract_ordinal_index(self, text: str) -> int | None:
-        m = re.search(r"第\s*([一二三四五六七八九十\d]+)\s*个", text)
+        m = _ORDINAL_PATTERN.search(text)
         if not m:
             return None
         token = m.group(1)
@@ -303,78 +432,66 @@ class L0RuleEngine:
             return mapping[token[0]] * 10 - 1
         return None
 
-    def _detect_action_skill(self, query: str) -> str | None:
-        text = (query or "").strip()
-        if not text:
+    def _detect_action_skill(self, query: str, scan: L0Scan | None = None) -> str | None:
+        scan = scan or self._scan(query)
+        if not scan.text:
             return None
-        if any(token in text for token in self._delete_triggers):
+        if _KIND_DELETE in scan.kinds:
             return "DeleteSkill"
-        if any(token in text for token in self._update_triggers):
+        if _KIND_UPDATE in scan.kinds:
             return "UpdateSkill"
         return None
 
-    def _has_reference_token(self, query: str) -> bool:
-        text = (query or "").strip()
-        if not text:
+    def _has_reference_token(self, query: str, scan: L0Scan | None = None) -> bool:
+        scan = scan or self._scan(query)
+        if not scan.text:
             return False
-        if self._extract_ordinal_index(text) is not None:
+        if _KIND_ORDINAL in scan.kinds and self._extract_ordinal_index(scan.text) is not None:
             return True
-        return any(token in text for token in self._reference_tokens)
+        return _KIND_REFERENCE in scan.kinds
 
     def _map_pending_action_skill(self, action: str) -> str | None:
-        mapping = {
-            "create_record": "CreateSkill",
-            "update_record": "UpdateSkill",
-            "update_collect_fields": "UpdateSkill",
-            "delete_record": "DeleteSkill",
-            "repair_child_write": "CreateSkill",
-            "repair_child_create": "CreateSkill",
-            "repair_child_update": "UpdateSkill",
-        }
         key = str(action or "").strip()
-        return mapping.get(key)
+        return _PENDING_ACTION_SKILLS.get(key)
 
-    def _should_continue_pending_action(self, query: str, action: str | None = None) -> bool:
-        text = (query or "").strip()
+    def _should_continue_pending_action(
+        self,
+        query: str,
+        action: str | None = None,
+        scan: L0Scan | None = None,
+    ) -> bool:
+        scan = scan or self._scan(query)
+        text = scan.text
         if not text:
             return False
-        normalized = self._normalize_text(text)
+        exact = scan.exact
         action_key = str(action or "").strip()
         if action_key == "delete_record":
-            if normalized in self._cancel_phrases:
+            if _KIND_CANCEL in exact:
                 return True
-            return normalized in self._confirm_phrases or normalized in {"确认删除"}
+            return _KIND_CONFIRM in exact or _KIND_DELETE_CONFIRM in exact
         if action_key == "update_collect_fields":
-            if normalized in self._generic_confirm_tokens or normalized in self._cancel_phrases:
+            if _KIND_GENERIC_CONFIRM in exact or _KIND_CANCEL in exact:
                 return True
-            update_hints = {
-                "案号", "项目ID", "项目id", "项目编号", "项目号",
-                "开庭日", "日期", "状态", "进展", "主办", "协办", "法院", "案由", "金额", "备注",
-            }
-            if any(token in text for token in update_hints):
-                return True
-            if any(token in text for token in ("改成", "改为", "变成", "变为", "更新为", "修改为", "设为", "设成", "调整为", "追加")):
-                return True
-            if ":" in text or "：" in text:
-                return True
-            return False
-        if normalized in self._generic_confirm_tokens or normalized in self._cancel_phrases:
+            kinds = scan.kinds
+            return _KIND_UPDATE_HINT in kinds or _KIND_UPDATE_VERB in kinds or _KIND_COLON in kinds
+        if _KIND_GENERIC_CONFIRM in exact or _KIND_CANCEL in exact:
             return True
-        if self._extract_ordinal_index(text) is not None:
+        if _KIND_ORDINAL in scan.kinds and self._extract_ordinal_index(text) is not None:
             return True
-        if any(token in text for token in self._pending_field_hints):
+        if _KIND_PENDING_FIELD in scan.kinds:
             return True
         return any(("\u4e00" <= ch <= "\u9fff") or ch.isalnum() for ch in text)
 
-    def _is_chitchat_like(self, query: str) -> bool:
-        text = (query or "").strip()
+    def _is_chitchat_like(self, query: str, scan: L0Scan | None = None) -> bool:
+        scan = scan or self._scan(query)
+        text = scan.text
         if not text:
             return False
-        lowered = self._normalize_text(text)
-        if any(hint in text for hint in self._domain_hints):
+        if _KIND_DOMAIN in scan.kinds:
             return False
-        if lowered in self._chitchat_keywords:
+        if _KIND_CHITCHAT in scan.exact:
             return True
-        if len(text) <= 8 and any(token in lowered for token in ("你好", "在吗", "谢谢", "bye", "help")):
+        if len(text) <= 8 and _KIND_CHITCHAT_SHORT in scan.lower_kinds:
             return True
         return False
@@ -4,20 +4,27 @@
     - 管理用户长期记忆 (User Memory) 和共享记忆 (Shared Memory)
     - 维护每日对话日志 (Daily Logs)
     - 提供记忆快照和向量检索支持
+    - 读取经 (mtime, size) 校验的内容缓存；异步入口在线程池中读盘，不阻塞事件循环
 """
 
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass
 import asyncio
+import threading
 import typing
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from src.utils.file_cache import FileContentCache
 from src.utils.filelock import FileLock
 from src.utils.workspace import ensure_workspace, get_workspace_root
 
 
+_RECENT_LOGS_MEMO_SIZE = 256
+
+
 @dataclass
 class MemorySnapshot:
     """记忆快照数据结构"""
@@ -43,6 +50,7 @@ class MemoryManager:
         lock_timeout: float = 5.0,
         max_context_tokens: int = 2000,
         vector_memory: typing.Any | None = None,
+        file_cache: FileContentCache | None = None,
     ) -> None:
         """
         初始化记忆管理器
@@ -53,6 +61,7 @@ class MemoryManager:
             lock_timeout: 文件锁超时时间
             max_context_tokens: 最大上下文 Token 限制
             vector_memory: 向量记忆实例
+            file_cache: 文件内容缓存（默认每个管理器独立一份）
         """
         self._workspace_root = Path(workspace_root) if workspace_root else get_workspace_root()
         ensure_workspace(self._workspace_root)
@@ -60,16 +69,22 @@ class MemoryManager:
         self._lock_timeout = lock_timeout
         self._max_context_tokens = max_context_tokens
         self._vector_memory = vector_memory
+        self._file_cache = file_cache or FileContentCache()
+        # 合并截断后的日志：缓存命中时文件缓存返回同一字符串对象，按对象身份判断是否可复用
+        self._recent_logs_memo: OrderedDict[tuple[str, int], tuple[tuple[str, ...], str]] = OrderedDict()
+        self._memo_lock = threading.Lock()
+
+    @property
+    def file_cache(self) -> FileContentCache:
+        return self._file_cache
 
     def load_shared_memory(self) -> str:
         """读取共享记忆"""
-        path = self._workspace_root / "MEMORY.md"
-        return path.read_text(encoding="utf-8") if path.exists() else ""
+        return self._file_cache.read_text(self._workspace_root / "MEMORY.md")
 
     def load_user_memory(self, user_id: str) -> str:
         """读取用户专属记忆"""
-        path = self._user_dir(user_id) / "memory.md"
-        return path.read_text(encoding="utf-8") if path.exists() else ""
+        return self._file_cache.read_text(self._user_dir(user_id) / "memory.md")
 
     def load_recent_logs(self, user_id: str, days: int = 2) -> str:
         """
@@ -83,18 +98,27 @@ class MemoryManager:
             合并并截断后的日志文本
         """
         daily_dir = self._daily_dir(user_id)
-        if not daily_dir.exists():
-            return ""
-
         today = datetime.now().date()
         parts: list[str] = []
         for offset in range(days):
             date_str = (today - timedelta(days=offset)).strftime("%Y-%m-%d")
-            path = daily_dir / f"{date_str}.md"
-            if path.exists():
-                parts.append(path.read_text(encoding="utf-8"))
+            text = self._file_cache.read_text(daily_dir / f"{date_str}.md")
+            if text:
+                parts.append(text)
+        memo_key = (user_id, days)
+        with self._memo_lock:
+            memo = self._recent_logs_memo.get(memo_key)
+            if memo is not None and len(memo[0]) == len(parts) and all(a is b for a, b in zip(memo[0], parts)):
+                self._recent_logs_memo.move_to_end(memo_key)
+                return memo[1]
         merged = "\n".join(reversed(parts)).strip()
-        return self._truncate_text(merged, self._max_context_tokens)
+        result = self._truncate_text(merged, self._max_context_tokens)
+        with self._memo_lock:
+            self._recent_logs_memo[memo_key] = (tuple(parts), result)
+            self._recent_logs_memo.move_to_end(memo_key)
+            while len(self._recent_logs_memo) > _RECENT_LOGS_MEMO_SIZE:
+                self._recent_logs_memo.popitem(last=False)
+        return result
 
     def append_daily_log(
         self,
@@ -123,6 +147,7 @@ class MemoryManager:
         with lock:
             with open(path, "a", encoding="utf-8") as f:
                 f.write(line)
+        self._file_cache.invalidate(path)
 
         if self._vector_memory and vectorize:
             vector_metadata = metadata or self._build_metadata(
@@ -130,9 +155,7 @@ class MemoryManager:
                 source="daily_log",
                 tags=["daily_log"],
             )
-            self._run_vector_task(
-                self._vector_memory.add_memory(user_id, content, vector_metadata)
-            )
+            self._queue_vector_memory(user_id, content, vector_metadata)
 
     def remember_user(self, user_id: str, content: str) -> None:
         """
@@ -151,6 +174,7 @@ class MemoryManager:
         with lock:
             with open(path, "a", encoding="utf-8") as f:
                 f.write(line)
+        self._file_cache.invalidate(path)
 
         if self._vector_memory:
             metadata = self._build_metadata(
@@ -158,7 +182,7 @@ class MemoryManager:
                 source="user_memory",
                 tags=["explicit"],
             )
-            self._run_vector_task(self._vector_memory.add_memory(user_id, content, metadata))
+            self._queue_vector_memory(user_id, content, metadata)
 
     def snapshot(self, user_id: str, days: int = 2) -> MemorySnapshot:
         """获取当前上下文快照 (共享 + 用户 + 最近日志)"""
@@ -168,6 +192,14 @@ class MemoryManager:
             recent_logs=self.load_recent_logs(user_id, days=days),
         )
 
+    async def asnapshot(self, user_id: str, days: int = 2) -> MemorySnapshot:
+        """snapshot 的异步版本：在线程池中读盘"""
+        return await asyncio.to_thread(self.snapshot, user_id, days)
+
+    async def aload_recent_logs(self, user_id: str, days: int = 2) -> str:
+        """load_recent_logs 的异步版本：在线程池中读盘"""
+        return await asyncio.to_thread(self.load_recent_logs, user_id, days)
+
     async def search_memory(self, user_id: str, query: str, top_k: int = 5) -> str:
         """
         搜索相关记忆
@@ -185,23 +217,40 @@ class MemoryManager:
             except Exception:
                 pass
 
-        combined = "\n".join([
+        combined = await asyncio.to_thread(self._load_fallback_text, user_id)
+        return self._keyword_fallback(combined, query, top_k)
+
+    def _load_fallback_text(self, user_id: str) -> str:
+        return "\n".join([
             self.load_user_memory(user_id),
             self.load_recent_logs(user_id, days=2),
         ])
-        return self._keyword_fallback(combined, query, top_k)
 
-    @staticmethod
-    def _run_vector_task(task: typing.Any) -> None:
+    def _queue_vector_memory(self, user_id: str, content: str, metadata: dict[str, typing.Any]) -> None:
+        """写入向量记忆缓冲；无事件循环时（脚本/同步调用）就地落库。"""
         try:
-            loop = asyncio.get_running_loop()
+            asyncio.get_running_loop()
         except RuntimeError:
-            loop = None
+            asyncio.run(self._write_vector_now(user_id, content, metadata))
+            return
 
-        if loop and loop.is_running():
-            loop.create_task(task)
+        enqueue = getattr(self._vector_memory, "enqueue", None)
+        if callable(enqueue):
+            enqueue(user_id, content, metadata)
         else:
-            asyncio.run(task)
+            asyncio.get_running_loop().create_task(self._vector_memory.add_memory(user_id, content, metadata))
+
+    async def _write_vector_now(self, user_id: str, content: str, metadata: dict[str, typing.Any]) -> None:
+        await self._vector_memory.add_memory(user_id, content, metadata)
+        flush = getattr(self._vector_memory, "flush", None)
+        if callable(flush):
+            await flush(user_id)
+
+    async def aclose(self) -> None:
+        """停机前落库向量记忆缓冲"""
+        close = getattr(self._vector_memory, "aclose", None)
+        if callable(close):
+            await close()
 
     @staticmethod
     def _build_metadata(
@@ -234,6 +283,7 @@ class MemoryManager:
                     continue
                 if log_date < cutoff:
                     path.unlink(missing_ok=True)
+                    self._file_cache.invalidate(path)
                     removed += 1
         return removed
 
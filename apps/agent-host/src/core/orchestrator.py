@@ -10,13 +10,14 @@ from __future__ import annotations
 
 import asyncio
 from contextlib import nullcontext
+from dataclasses import dataclass
 import logging
 import random
 import re
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, ContextManager as TypingContextManager, Mapping, cast
+from typing import Any, Awaitable, ContextManager as TypingContextManager, Mapping, TypeVar, cast
 
 import yaml
 
@@ -24,6 +25,7 @@ from src.utils.logger import set_request_context, clear_request_context, generat
 from src.utils.metrics import (
     record_chitchat_guard,
     record_file_pipeline,
+    observe_pipeline_stage,
     record_intent_parse,
     record_request,
     record_usage_log_write,
@@ -32,9 +34,10 @@ from src.utils.metrics import (
 )
 from src.core.batch_progress import BatchProgressEmitter, BatchProgressEvent, BatchProgressPhase
 from src.core.processing_status import ProcessingStatus, ProcessingStatusEmitter, ProcessingStatusEvent
+from src.core.reply_stream import ReplyStreamSink, reply_stream_context
 
 from src.core.session import SessionManager
-from src.core.intent import IntentParser, IntentResult, SkillMatch, load_skills_config
+from src.core.intent import IntentParser, IntentResult, SkillMatch, load_local_intent_classifier, load_skills_config
 from src.core.router import (
     SkillRouter,
     SkillContext,
@@ -44,10 +47,12 @@ from src.core.router import (
     RoutingDecision,
 )
 from src.core.l0 import L0RuleEngine
-from src.core.planner import PlannerEngine, PlannerOutput
+from src.core.planner import FusedPlannerOutput, PlannerEngine, PlannerOutput
+from src.core.planner.cache import build_planner_cache
 from src.core.state import ConversationStateManager, create_state_store
 from src.core.state.models import OperationEntry, OperationExecutionStatus, PendingActionState
 from src.core.state.midterm_memory_store import RuleSummaryExtractor, SQLiteMidtermMemoryStore
+from src.core.state.record_cache import RecordCache, compact_result_data, is_compact
 from src.core.skills import (
     QuerySkill,
     SummarySkill,
@@ -65,9 +70,23 @@ from src.core.response.renderer import ResponseRenderer
 from src.db.postgres import PostgresClient
 from src.config import Settings
 from src.llm.client import LLMClient
+from src.llm.model_health import ModelHealthConfig, configure_model_health
+from src.llm.scheduler import (
+    PRIORITY_ORDER,
+    LLMPriorityLimits,
+    LLMSchedulerConfig,
+    configure_llm_scheduler,
+)
+from src.llm.usage_ledger import LLMUsageEntry, get_usage_ledger, llm_stage, usage_ledger_scope
 from src.mcp.client import MCPClient
 from src.utils.time_parser import parse_time_range
-from src.vector import load_vector_config, EmbeddingClient, ChromaStore, VectorMemoryManager
+from src.vector import (
+    VECTOR_BACKENDS,
+    EmbeddingClient,
+    VectorMemoryManager,
+    create_vector_store,
+    load_vector_config,
+)
 from src.skills_market import load_market_skills
 from src.core.usage_logger import UsageLogger, UsageRecord, now_iso
 from src.core.usage_cost import compute_usage_cost, load_model_pricing
@@ -81,6 +100,14 @@ from src.core.errors import (
 
 logger = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
+# 需要完整记录的技能：last_result 为紧凑引用时先回填再执行
+_RECORD_CONSUMER_SKILLS = frozenset({"SummarySkill", "UpdateSkill", "DeleteSkill"})
+_RECORD_FETCH_TOOL = "feishu.v1.bitable.record.get"
+_RECORD_FETCH_MAX = 50
+_RECORD_FETCH_CONCURRENCY = 4
+
 
 def _resolve_assistant_name(skills_config: dict[str, Any] | None) -> str:
     configured_name = ""
@@ -102,6 +129,56 @@ def _resolve_chitchat_allow_llm(skills_config: dict[str, Any] | None) -> bool:
     return bool(chitchat.get("allow_llm", False))
 
 
+def _resolve_concurrent_pipeline(skills_config: dict[str, Any] | None) -> bool:
+    if not isinstance(skills_config, dict):
+        return False
+    pipeline = skills_config.get("pipeline")
+    if not isinstance(pipeline, dict):
+        return False
+    return bool(pipeline.get("concurrent", False))
+
+
+def _build_llm_scheduler_config(scheduler_cfg: Any) -> LLMSchedulerConfig | None:
+    """settings.llm.scheduler -> 调度器配置；未启用时返回 None（不做调度）。"""
+    if scheduler_cfg is None or not bool(getattr(scheduler_cfg, "enabled", False)):
+        return None
+    classes: dict[str, LLMPriorityLimits] = {}
+    for priority in PRIORITY_ORDER:
+        class_cfg = getattr(scheduler_cfg, priority, None)
+        if class_cfg is None:
+            continue
+        max_wait = getattr(class_cfg, "max_wait_seconds", None)
+        classes[priority] = LLMPriorityLimits(
+            max_concurrency=int(getattr(class_cfg, "max_concurrency", 1)),
+            max_queue=int(getattr(class_cfg, "max_queue", 100)),
+            max_wait_seconds=float(max_wait) if max_wait is not None else None,
+        )
+    return LLMSchedulerConfig(
+        max_concurrency=int(getattr(scheduler_cfg, "max_concurrency", 8)),
+        reserved_interactive=int(getattr(scheduler_cfg, "reserved_interactive", 2)),
+        classes=classes,
+    )
+
+
+@dataclass
+class _PlanningTasks:
+    """并发流水线中的推测任务：上下文构建、Planner、时间范围解析。"""
+
+    context: asyncio.Task[Any]
+    planner: asyncio.Task[Any]
+    time_range: asyncio.Task[Any] | None = None
+
+    def cancel_pending(self) -> None:
+        for task in (self.context, self.planner, self.time_range):
+            if task is None:
+                continue
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                # 未被汇合的分支异常在此标记为已读取，避免 "exception was never retrieved"
+                task.exception()
+
+
 def _load_casual_responses() -> list[str]:
     casual_path = Path("config/responses/casual.yaml")
     if not casual_path.exists():
@@ -229,6 +306,8 @@ class AgentOrchestrator:
                 temperature=settings.task_llm.temperature,
                 max_tokens=settings.task_llm.max_tokens,
                 timeout=settings.task_llm.timeout,
+                coalesce_enabled=settings.llm.coalesce_enabled,
+                memo_ttl_seconds=settings.llm.memo_ttl_seconds,
             )
             self._task_llm = LLMClient(_task_llm_cfg)
             logger.info(
@@ -288,6 +367,7 @@ class AgentOrchestrator:
         self._table_identity_fields = self._load_table_identity_fields(self._skills_config)
         self._assistant_name = _resolve_assistant_name(self._skills_config)
         self._chitchat_allow_llm = _resolve_chitchat_allow_llm(self._skills_config)
+        self._concurrent_pipeline = _resolve_concurrent_pipeline(self._skills_config)
         self._casual_responses = _load_casual_responses()
         self._response_renderer = ResponseRenderer(
             assistant_name=self._assistant_name,
@@ -315,12 +395,34 @@ class AgentOrchestrator:
         secondary_model = str(getattr(settings.llm, "model_secondary", "") or "").strip()
         model_a = str(getattr(settings.ab_routing, "model_a", "") or "").strip()
         model_b = str(getattr(settings.ab_routing, "model_b", "") or "").strip()
+        hedge_cfg = getattr(settings.llm, "hedge", None)
+        breaker_cfg = getattr(settings.llm, "circuit_breaker", None)
+        model_health = configure_model_health(
+            ModelHealthConfig(
+                breaker_enabled=bool(getattr(breaker_cfg, "enabled", False)),
+                window_seconds=float(getattr(breaker_cfg, "window_seconds", 60.0)),
+                min_calls=int(getattr(breaker_cfg, "min_calls", 5)),
+                failure_rate_threshold=float(getattr(breaker_cfg, "failure_rate_threshold", 0.5)),
+                cooldown_seconds=float(getattr(breaker_cfg, "cooldown_seconds", 30.0)),
+                latency_window=int(getattr(hedge_cfg, "latency_window", 50)),
+                hedge_percentile=float(getattr(hedge_cfg, "percentile", 0.95)),
+                hedge_min_delay_ms=int(getattr(hedge_cfg, "min_delay_ms", 300)),
+                hedge_max_delay_ms=int(getattr(hedge_cfg, "max_delay_ms", 5000)),
+                hedge_initial_delay_ms=int(getattr(hedge_cfg, "initial_delay_ms", 2000)),
+            )
+        )
+        configure_llm_scheduler(_build_llm_scheduler_config(getattr(settings.llm, "scheduler", None)))
+        hedge_model = ""
+        if bool(getattr(hedge_cfg, "enabled", False)):
+            hedge_model = str(getattr(hedge_cfg, "model", "") or "").strip() or secondary_model
         self._model_router = ModelRouter(
             enabled=bool(getattr(settings.ab_routing, "enabled", False)),
             ratio=float(getattr(settings.ab_routing, "ratio", 0.0)),
             primary_model=primary_model,
             model_a=model_a or primary_model,
             model_b=model_b or secondary_model,
+            hedge_model=hedge_model or None,
+            health=model_health,
         )
 
         # LLM 超时配置
@@ -330,6 +432,9 @@ class AgentOrchestrator:
         self._intent_parser = IntentParser(
             skills_config=self._skills_config,
             llm_client=self._task_llm,
+            local_classifier=load_local_intent_classifier(
+                (self._skills_config.get("intent") or {}).get("local_classifier")
+            ),
         )
         
         # 初始化技能路由器
@@ -356,6 +461,8 @@ class AgentOrchestrator:
             last_result_ttl_seconds=600,
             active_record_ttl_seconds=max(int(settings.session.ttl_minutes * 60), 60),
             pending_action_ttl_seconds=300,
+            last_result_mode=str(getattr(settings.state_store, "last_result_mode", "full") or "full"),
+            record_cache=RecordCache(max_size=int(getattr(settings.state_store, "record_cache_size", 2048) or 2048)),
         )
 
         # 初始化 L0 规则层
@@ -367,21 +474,28 @@ class AgentOrchestrator:
         )
 
         # 初始化 L1 Planner
+        self._planner = self._build_planner(skills_config_path)
+        
+        # 注册技能
+        self._register_skills()
+
+    def _build_planner(self, skills_config_path: str) -> PlannerEngine:
+        """根据 skills.yaml 的 planner 配置构建 L1 Planner（含结果缓存）。"""
         planner_cfg = self._skills_config.get("planner", {}) if isinstance(self._skills_config, dict) else {}
-        planner_enabled = bool(planner_cfg.get("enabled", True))
         self._planner_confidence_threshold = float(planner_cfg.get("confidence_threshold", 0.65))
         scenarios_dir = self._resolve_planner_scenarios_dir(
             skills_config_path,
             str(planner_cfg.get("scenarios_dir", "config/scenarios")),
         )
-        self._planner = PlannerEngine(
-            llm_client=self._task_llm,
+        skill_catalog = getattr(self._intent_parser, "skill_catalog", None)
+        return PlannerEngine(
+            llm_client=getattr(self, "_task_llm", self._llm),
             scenarios_dir=scenarios_dir,
-            enabled=planner_enabled,
+            enabled=bool(planner_cfg.get("enabled", True)),
+            fused=bool(planner_cfg.get("fused", False)),
+            skill_catalog=skill_catalog() if callable(skill_catalog) else None,
+            cache=build_planner_cache(planner_cfg.get("cache")),
         )
-        
-        # 注册技能
-        self._register_skills()
 
     def _register_skills(self) -> None:
         """注册并初始化所有技能"""
@@ -435,8 +549,8 @@ class AgentOrchestrator:
             return None
 
         store_cfg = config.get("vector_store", {})
-        store_type = store_cfg.get("type", "chroma")
-        if store_type != "chroma":
+        store_type = str(store_cfg.get("type") or "chroma").strip().lower()
+        if store_type not in VECTOR_BACKENDS:
             logger.warning(
                 "不支持的向量存储类型: %s",
                 store_type,
@@ -445,8 +559,8 @@ class AgentOrchestrator:
             return None
 
         embedding_cfg = config.get("embedding", {})
-        chroma_cfg = config.get("chroma", {})
-        if not embedding_cfg or not chroma_cfg:
+        backend_cfg = config.get(store_type, {})
+        if not embedding_cfg or (store_type == "chroma" and not backend_cfg):
             logger.warning(
                 "向量配置不完整，已禁用向量记忆",
                 extra={"event_code": "orchestrator.vector.invalid_config"},
@@ -459,23 +573,25 @@ class AgentOrchestrator:
             )
             return None
 
-        store = ChromaStore(
-            persist_path=chroma_cfg.get("persist_path", "./workspace/chroma"),
-            collection_prefix=chroma_cfg.get("collection_prefix", "memory_vectors_"),
-        )
-        if not store.is_available:
+        store = create_vector_store(config)
+        if store is None or not store.is_available:
             logger.warning(
-                "Chroma 不可用，已禁用向量记忆",
-                extra={"event_code": "orchestrator.vector.chroma_unavailable"},
+                "向量存储 %s 不可用，已禁用向量记忆",
+                store_type,
+                extra={"event_code": f"orchestrator.vector.{store_type}_unavailable"},
             )
             return None
 
         embedder = EmbeddingClient(embedding_cfg)
+        write_cfg = config.get("write_buffer") or {}
         return VectorMemoryManager(
             store=store,
             embedder=embedder,
             top_k=self._vector_top_k,
             fallback=self._vector_fallback,
+            write_batch_size=int(write_cfg.get("batch_size", 16)),
+            flush_interval_seconds=float(write_cfg.get("flush_interval_seconds", 2.0)),
+            max_buffered=int(write_cfg.get("max_buffered", 1000)),
         )
 
     def _load_skills_config(self, config_path: str) -> dict[str, Any]:
@@ -645,6 +761,91 @@ class AgentOrchestrator:
             method="planner",
         )
 
+    def _start_concurrent_planning(
+        self,
+        user_id: str,
+        text: str,
+        *,
+        file_markdown: str,
+        file_provider: str,
+        user_profile: Any,
+        stage_timings: dict[str, float],
+    ) -> _PlanningTasks:
+        """启动并发规划：Planner 不依赖记忆/向量上下文，与上下文构建并行执行。"""
+        mode = "concurrent"
+        context_task = asyncio.create_task(
+            self._timed_stage(
+                "context",
+                mode,
+                self._build_llm_context(
+                    user_id,
+                    query=text,
+                    file_markdown=file_markdown,
+                    file_provider=file_provider,
+                ),
+                stage_timings,
+            )
+        )
+        planner_task = asyncio.create_task(
+            self._timed_stage("planner", mode, self._planner.plan(text, user_profile=user_profile), stage_timings)
+        )
+        time_range_task: asyncio.Task[Any] | None = None
+        # 融合 Planner 自带时间范围，推测解析只会成为输家，不启动
+        if not getattr(self._planner, "fused", False):
+            time_range_task = asyncio.create_task(
+                self._timed_stage(
+                    "time_range",
+                    mode,
+                    self._speculative_time_range(text, context_task),
+                    stage_timings,
+                )
+            )
+        return _PlanningTasks(context=context_task, planner=planner_task, time_range=time_range_task)
+
+    async def _speculative_time_range(
+        self,
+        text: str,
+        context_task: asyncio.Task[Any],
+    ) -> dict[str, str] | None:
+        """推测式时间解析：仅在需要 LLM 兜底时才等待上下文（shield 防止取消波及上下文任务）。"""
+        llm_context: dict[str, str] | None = None
+        if parse_time_range(text) is None and self._has_time_hint(text):
+            llm_context = await asyncio.shield(context_task)
+        return await self._resolve_time_range(text, llm_context)
+
+    @staticmethod
+    def _speculative_time_range_lost(planner_output: PlannerOutput | None) -> bool:
+        if planner_output is None:
+            return False
+        return planner_output.intent == "clarify_needed" or isinstance(planner_output, FusedPlannerOutput)
+
+    async def _timed_stage(
+        self,
+        stage: str,
+        mode: str,
+        awaitable: Awaitable[_T],
+        stage_timings: dict[str, float],
+    ) -> _T:
+        start = time.perf_counter()
+        result = await awaitable
+        self._observe_stage(stage, mode, time.perf_counter() - start, stage_timings)
+        return result
+
+    @staticmethod
+    def _observe_stage(stage: str, mode: str, duration: float, stage_timings: dict[str, float]) -> None:
+        stage_timings[stage] = duration
+        observe_pipeline_stage(stage, mode, duration)
+
+    def _build_intent_hint_from_fused(self, plan: FusedPlannerOutput | None) -> IntentResult | None:
+        """将融合 Planner 的技能排序转换为 IntentParser 可复用的 LLM 分类结果。"""
+        if plan is None or not plan.skills:
+            return None
+        return IntentResult(
+            skills=[SkillMatch(name=item.name, score=item.score, reason=item.reason) for item in plan.skills],
+            is_chain=plan.is_chain,
+            method="planner_fused",
+        )
+
     async def handle_message(
         self,
         user_id: str,
@@ -655,6 +856,7 @@ class AgentOrchestrator:
         file_markdown: str = "",
         file_provider: str = "none",
         status_emitter: ProcessingStatusEmitter | None = None,
+        stream_sink: ReplyStreamSink | None = None,
     ) -> dict[str, Any]:
         """
         处理用户消息
@@ -665,12 +867,39 @@ class AgentOrchestrator:
             chat_id: 群组 ID (可选)
             chat_type: 会话类型 (可选)
             user_profile: 用户档案 (可选)
+            stream_sink: 流式回复 sink (可选，闲聊/汇总等 LLM 长回复边生成边推送)
 
         返回:
             回复内容（type, text, card 等）
         """
+        # 每个请求独立的 LLM 用量账本，覆盖请求内全部调用（含并发子任务）；
+        # 会话状态在请求内只读一次，修改于请求结束时合并回写（读写均在线程池中，不阻塞事件循环）
+        with usage_ledger_scope():
+            async with self._state_manager.aunit_of_work(user_id):
+                return await self._handle_message(
+                    user_id,
+                    text,
+                    chat_id=chat_id,
+                    chat_type=chat_type,
+                    user_profile=user_profile,
+                    file_markdown=file_markdown,
+                    file_provider=file_provider,
+                    status_emitter=status_emitter,
+                    stream_sink=stream_sink,
+                )
 
-        
+    async def _handle_message(
+        self,
+        user_id: str,
+        text: str,
+        chat_id: str | None = None,
+        chat_type: str | None = None,
+        user_profile: Any = None,
+        file_markdown: str = "",
+        file_provider: str = "none",
+        status_emitter: ProcessingStatusEmitter | None = None,
+        stream_sink: ReplyStreamSink | None = None,
+    ) -> dict[str, Any]:
         # 设置请求上下文（用于结构化日志）
         request_id = generate_request_id()
         set_request_context(request_id=request_id, user_id=user_id)
@@ -698,6 +927,9 @@ class AgentOrchestrator:
             "type": "text",
             "text": "请稍后重试。",
         }
+        planning_tasks: _PlanningTasks | None = None
+        pipeline_mode = "concurrent" if getattr(self, "_concurrent_pipeline", False) else "sequential"
+        stage_timings: dict[str, float] = {}
         
         try:
             cost_monitor = getattr(self, "_cost_monitor", None)
@@ -710,12 +942,7 @@ class AgentOrchestrator:
                         "text": guidance or "当前服务预算已达到阈值，请稍后再试。",
                     }
 
-            # 清理过期会话和上下文
-            self._sessions.cleanup_expired()
-            self._context_manager.cleanup_expired()
-            self._state_manager.cleanup_expired()
-            
-            # 更新活跃会话指标
+            # 更新活跃会话指标（过期清理由后台 sweep_expired 周期执行）
             active_count = max(self._context_manager.active_count(), self._state_manager.active_count())
             set_active_sessions(active_count)
             
@@ -732,6 +959,9 @@ class AgentOrchestrator:
                 "complexity": route_decision.complexity,
                 "route_reason": route_decision.reason,
             }
+            for key in ("hedge_model", "breaker_skipped"):
+                if route_decision.metadata.get(key):
+                    route_context[key] = route_decision.metadata[key]
             task_route_context = getattr(getattr(self, "_task_llm", None), "route_context", None)
             llm_route_context = getattr(getattr(self, "_llm", None), "route_context", None)
             task_ctx = cast(
@@ -742,7 +972,7 @@ class AgentOrchestrator:
                 TypingContextManager[Any],
                 llm_route_context(**route_context) if callable(llm_route_context) else nullcontext(),
             )
-            with task_ctx, llm_ctx:
+            with task_ctx, llm_ctx, reply_stream_context(stream_sink):
                 # Step 0: L0 规则硬约束
                 l0_decision = self._l0_engine.evaluate(user_id, text)
                 if l0_decision.handled:
@@ -755,6 +985,7 @@ class AgentOrchestrator:
                     # Step 1: L0 强制技能 或 L1 Planner/IntentParser
                     llm_context: dict[str, str] | None = None
                     planner_output: PlannerOutput | None = None
+                    fused_output: FusedPlannerOutput | None = None
                     planner_applied = False
                     should_execute = True
                     intent: IntentResult | None = None
@@ -805,23 +1036,59 @@ class AgentOrchestrator:
                                 method="l0_hint",
                             )
                     else:
-                        llm_context = await self._build_llm_context(
-                            user_id,
-                            query=text,
-                            file_markdown=file_markdown,
-                            file_provider=file_provider,
-                        )
-                        await self._emit_processing_status(
-                            status_emitter,
-                            ProcessingStatus.THINKING,
-                            user_id,
-                            chat_id,
-                            chat_type,
-                        )
-
-                        planner_start = time.perf_counter()
-                        planner_output = await self._planner.plan(text, user_profile=user_profile)
-                        planner_duration = time.perf_counter() - planner_start
+                        planning_start = time.perf_counter()
+                        if pipeline_mode == "concurrent":
+                            # 上下文构建、Planner、时间范围解析同时启动，按需汇合
+                            planning_tasks = self._start_concurrent_planning(
+                                user_id,
+                                text,
+                                file_markdown=file_markdown,
+                                file_provider=file_provider,
+                                user_profile=user_profile,
+                                stage_timings=stage_timings,
+                            )
+                            await self._emit_processing_status(
+                                status_emitter,
+                                ProcessingStatus.THINKING,
+                                user_id,
+                                chat_id,
+                                chat_type,
+                            )
+                            planner_output = await planning_tasks.planner
+                            if self._speculative_time_range_lost(planner_output) and planning_tasks.time_range:
+                                planning_tasks.time_range.cancel()
+                                planning_tasks.time_range = None
+                            if planner_output is None or planner_output.intent != "clarify_needed":
+                                llm_context = await planning_tasks.context
+                        else:
+                            llm_context = await self._timed_stage(
+                                "context",
+                                pipeline_mode,
+                                self._build_llm_context(
+                                    user_id,
+                                    query=text,
+                                    file_markdown=file_markdown,
+                                    file_provider=file_provider,
+                                ),
+                                stage_timings,
+                            )
+                            await self._emit_processing_status(
+                                status_emitter,
+                                ProcessingStatus.THINKING,
+                                user_id,
+                                chat_id,
+                                chat_type,
+                            )
+                            planner_output = await self._timed_stage(
+                                "planner",
+                                pipeline_mode,
+                                self._planner.plan(text, user_profile=user_profile),
+                                stage_timings,
+                            )
+                        planner_duration = stage_timings.get("planner", 0.0)
+                        self._observe_stage("planning", pipeline_mode, time.perf_counter() - planning_start, stage_timings)
+                        if isinstance(planner_output, FusedPlannerOutput):
+                            fused_output = planner_output
 
                         if planner_output and planner_output.intent == "clarify_needed":
                             reply = {
@@ -848,8 +1115,17 @@ class AgentOrchestrator:
 
                             if intent is None:
                                 intent_start = time.perf_counter()
-                                intent = await self._intent_parser.parse(text, llm_context=llm_context)
-                                record_intent_parse(intent.method, time.perf_counter() - intent_start)
+                                fused_hint = self._build_intent_hint_from_fused(fused_output)
+                                intent = await self._intent_parser.parse(
+                                    text,
+                                    llm_context=llm_context,
+                                    llm_hint=fused_hint,
+                                )
+                                if fused_hint is not None and intent.method == "llm":
+                                    intent.method = "planner_fused"
+                                intent_duration = time.perf_counter() - intent_start
+                                record_intent_parse(intent.method, intent_duration)
+                                self._observe_stage("intent", pipeline_mode, intent_duration, stage_timings)
                                 logger.info(
                                     "意图解析完成",
                                     extra={
@@ -870,7 +1146,15 @@ class AgentOrchestrator:
                         if l0_decision.force_skill:
                             extra = dict(l0_decision.force_extra or {})
                         else:
-                            extra = await self._build_extra(text, user_id, llm_context)
+                            extra = await self._build_extra(
+                                text,
+                                user_id,
+                                llm_context,
+                                fused_plan=fused_output,
+                                time_range_task=planning_tasks.time_range if planning_tasks else None,
+                                stage_timings=stage_timings,
+                                pipeline_mode=pipeline_mode,
+                            )
                             if planner_applied and planner_output:
                                 extra["planner_plan"] = planner_output.to_context()
 
@@ -912,10 +1196,17 @@ class AgentOrchestrator:
                         usage_source = str(extra.get("usage_source") or "text")
 
                         force_last_result = l0_decision.force_last_result if l0_decision.force_skill else None
+                        context_last_result = (
+                            force_last_result
+                            if force_last_result is not None
+                            else (state_last_result or (prev_context.last_result if prev_context else None))
+                        )
+                        if intent is not None and any(item.name in _RECORD_CONSUMER_SKILLS for item in intent.skills):
+                            context_last_result = await self._rehydrate_last_result(context_last_result)
                         context = SkillContext(
                             query=text,
                             user_id=user_id,
-                            last_result=force_last_result if force_last_result is not None else (state_last_result or (prev_context.last_result if prev_context else None)),
+                            last_result=context_last_result,
                             last_skill=state_last_skill or (prev_context.last_skill if prev_context else None),
                             extra=extra,
                         )
@@ -937,7 +1228,8 @@ class AgentOrchestrator:
                                 chat_id,
                                 chat_type,
                             )
-                            result = await self._router.route(intent, context)
+                            with llm_stage("skill"):
+                                result = await self._router.route(intent, context)
                         usage_skill = result.skill_name
                         close_semantic = str((result.data or {}).get("close_semantic") or "")
                         close_profile = str((result.data or {}).get("close_profile") or "")
@@ -945,8 +1237,11 @@ class AgentOrchestrator:
 
                         # Step 4: 更新上下文（保存结果供后续链式调用）
                         if result.success and result.data:
-                            self._context_manager.update_result(user_id, result.skill_name, result.data)
-                            self._context_manager.set(user_id, context.with_result(result.skill_name, result.data))
+                            context_data = result.data
+                            if getattr(self._state_manager, "compact_last_result", False) is True:
+                                context_data = compact_result_data(result.data, self._state_manager.record_cache)
+                            self._context_manager.update_result(user_id, result.skill_name, context_data)
+                            self._context_manager.set(user_id, context.with_result(result.skill_name, context_data))
 
                         # Step 4.1: 同步会话状态机（L0 使用）
                         self._sync_state_after_result(user_id, text, result)
@@ -1004,6 +1299,17 @@ class AgentOrchestrator:
                 "text": self._settings.reply.templates.error.format(message="处理出错"),
             }
         finally:
+            if planning_tasks is not None:
+                planning_tasks.cancel_pending()
+            if stage_timings:
+                logger.info(
+                    "编排流水线阶段耗时",
+                    extra={
+                        "event_code": "orchestrator.pipeline.stages",
+                        "pipeline_mode": pipeline_mode,
+                        "stage_ms": {name: round(value * 1000, 2) for name, value in stage_timings.items()},
+                    },
+                )
             await self._emit_processing_status(
                 status_emitter,
                 ProcessingStatus.DONE,
@@ -1633,6 +1939,59 @@ class AgentOrchestrator:
             "outbound": rendered.to_dict(),
         }
 
+    async def _rehydrate_last_result(self, last_result: dict[str, Any] | None) -> dict[str, Any] | None:
+        """紧凑 last_result -> 完整记录：先查进程内 LRU，未命中的按 record_id 并发拉取 MCP。"""
+        if not isinstance(last_result, dict):
+            return last_result
+        records = last_result.get("records")
+        if not isinstance(records, list) or not any(is_compact(item) for item in records):
+            return last_result
+
+        records, missing = self._state_manager.rehydrate_records(records)
+        if missing and getattr(self, "_mcp", None) is not None:
+            fetched = await self._fetch_records(missing[:_RECORD_FETCH_MAX], last_result)
+            if fetched:
+                self._state_manager.remember_records(list(fetched.values()))
+                records = [
+                    fetched.get(str(item.get("record_id") or ""), item) if is_compact(item) else item
+                    for item in records
+                ]
+        return {**last_result, "records": records}
+
+    async def _fetch_records(self, record_ids: list[str], last_result: dict[str, Any]) -> dict[str, dict[str, Any]]:
+        query_meta = last_result.get("query_meta")
+        meta_params = query_meta.get("params") if isinstance(query_meta, dict) else None
+        params_base: dict[str, Any] = {}
+        if isinstance(meta_params, dict):
+            for key in ("table_id", "app_token"):
+                if meta_params.get(key):
+                    params_base[key] = meta_params[key]
+        if last_result.get("table_id"):
+            params_base["table_id"] = last_result["table_id"]
+
+        semaphore = asyncio.Semaphore(_RECORD_FETCH_CONCURRENCY)
+
+        async def _fetch(record_id: str) -> dict[str, Any] | None:
+            async with semaphore:
+                try:
+                    result = await self._mcp.call_tool(_RECORD_FETCH_TOOL, {**params_base, "record_id": record_id})
+                except Exception as exc:
+                    logger.warning(
+                        "回填记录失败: %s",
+                        exc,
+                        extra={"event_code": "orchestrator.state.record_rehydrate_failed", "record_id": record_id},
+                    )
+                    return None
+            if not isinstance(result, dict) or not result.get("record_id"):
+                return None
+            record = dict(result)
+            if params_base.get("table_id"):
+                record.setdefault("table_id", params_base["table_id"])
+            return record
+
+        fetched = await asyncio.gather(*(_fetch(record_id) for record_id in record_ids))
+        return {str(item["record_id"]): item for item in fetched if item is not None}
+
     def _resolve_record_from_callback(self, user_id: str, callback_value: Mapping[str, Any]) -> dict[str, Any]:
         record_id = str(callback_value.get("record_id") or "").strip()
         table_type = str(callback_value.get("table_type") or "").strip().lower()
@@ -1652,7 +2011,8 @@ class AgentOrchestrator:
 
         last_result = self._state_manager.get_last_result(user_id)
         if last_result is not None and isinstance(last_result.records, list):
-            for item in last_result.records:
+            last_records, _ = self._state_manager.rehydrate_records(last_result.records)
+            for item in last_records:
                 if not isinstance(item, dict):
                     continue
                 current_record_id = str(item.get("record_id") or "").strip()
@@ -1763,6 +2123,19 @@ class AgentOrchestrator:
         usage_logger = getattr(self, "_usage_logger", None)
         if usage_logger is None:
             return
+        ledger = get_usage_ledger()
+        if ledger is not None:
+            # 请求级账本为准：账本为空即本请求没有 LLM 调用，不再读取可能属于其他请求的共享槽位
+            self._record_ledger_usage_log(
+                ledger.entries(),
+                user_id=user_id,
+                conversation_id=conversation_id,
+                skill_name=skill_name,
+                usage_source=usage_source,
+                route_decision=route_decision,
+                business_metadata=business_metadata,
+            )
+            return
         usage = self._drain_latest_llm_usage()
         model = str((usage or {}).get("model") or getattr(getattr(self, "_llm", None), "model_name", ""))
         token_count = int((usage or {}).get("token_count") or 0)
@@ -1816,6 +2189,91 @@ class AgentOrchestrator:
         except Exception:
             record_usage_log_write("error")
 
+    def _record_ledger_usage_log(
+        self,
+        entries: list[LLMUsageEntry],
+        *,
+        user_id: str,
+        conversation_id: str,
+        skill_name: str,
+        usage_source: str,
+        route_decision: RoutingDecision,
+        business_metadata: dict[str, Any] | None = None,
+    ) -> None:
+        """按请求账本汇总全部 LLM 调用：逐条按模型计价后求和，并附带分阶段明细。"""
+        usage_logger = getattr(self, "_usage_logger", None)
+        if usage_logger is None:
+            return
+        pricing_map = getattr(self, "_usage_model_pricing", {})
+        metadata: dict[str, Any] = {
+            "route_label": route_decision.route_label,
+            "model_selected": route_decision.model_selected,
+            "complexity": route_decision.complexity,
+            "route_reason": route_decision.reason,
+        }
+        total_cost = 0.0
+        estimated = False
+        warnings: set[str] = set()
+        model_tokens: dict[str, int] = {}
+        stages: list[dict[str, Any]] = []
+        hedge_wins = 0
+        for entry in entries:
+            if entry.metadata.get("coalesced"):
+                # 合并到他人在途调用/命中结果缓存：不产生上游费用
+                cost, entry_estimated, warning_label = 0.0, False, ""
+            else:
+                cost, entry_estimated, warning_label = compute_usage_cost(
+                    model=entry.model,
+                    prompt_tokens=entry.prompt_tokens,
+                    completion_tokens=entry.completion_tokens,
+                    token_count=entry.token_count,
+                    pricing_map=pricing_map,
+                )
+            total_cost += cost
+            estimated = estimated or entry_estimated
+            if warning_label:
+                warnings.add(warning_label)
+            model_tokens[entry.model] = model_tokens.get(entry.model, 0) + entry.token_count
+            stage_payload = entry.to_dict()
+            stage_payload["cost"] = cost
+            stages.append(stage_payload)
+            metadata.update({str(k): str(v) for k, v in entry.metadata.items()})
+            hedge_winner = entry.metadata.get("hedge_winner")
+            if hedge_winner and hedge_winner == entry.metadata.get("hedge_model"):
+                hedge_wins += 1
+
+        if hedge_wins:
+            metadata["hedge_wins"] = str(hedge_wins)
+            route_decision.metadata["hedge_wins"] = str(hedge_wins)
+        if warnings:
+            metadata["cost_warning"] = ",".join(sorted(warnings))
+        metadata["llm_calls"] = str(len(entries))
+        metadata["latency_ms"] = str(sum(entry.latency_ms for entry in entries))
+        metadata["stages"] = stages
+        model = max(model_tokens.items(), key=lambda item: item[1])[0] if model_tokens else ""
+        try:
+            record = UsageRecord(
+                ts=now_iso(),
+                user_id=user_id,
+                conversation_id=conversation_id,
+                model=model or str(getattr(getattr(self, "_llm", None), "model_name", "")),
+                skill=str(skill_name or "unknown"),
+                token_count=sum(entry.token_count for entry in entries),
+                prompt_tokens=sum(entry.prompt_tokens for entry in entries),
+                completion_tokens=sum(entry.completion_tokens for entry in entries),
+                cost=round(total_cost, 8),
+                usage_source=str(usage_source or "text"),
+                estimated=estimated,
+                metadata=metadata,
+                business_metadata=dict(business_metadata or {}),
+            )
+            ok = usage_logger.log(record)
+            if not ok:
+                self._on_usage_record_written(record)
+            record_usage_log_write("ok" if ok else "noop")
+        except Exception:
+            record_usage_log_write("error")
+
     def _extract_usage_business_metadata(self, result_data: dict[str, Any]) -> dict[str, Any]:
         data = result_data if isinstance(result_data, dict) else {}
         close_semantic = str(data.get("close_semantic") or "").strip()
@@ -1867,6 +2325,10 @@ class AgentOrchestrator:
         text: str,
         user_id: str,
         llm_context: dict[str, str] | None = None,
+        fused_plan: FusedPlannerOutput | None = None,
+        time_range_task: Awaitable[dict[str, str] | None] | None = None,
+        stage_timings: dict[str, float] | None = None,
+        pipeline_mode: str = "sequential",
     ) -> dict[str, Any]:
         """
         构建额外上下文数据（如 Soul、记忆、时间范围）
@@ -1875,6 +2337,10 @@ class AgentOrchestrator:
             text: 用户输入文本
             user_id: 用户 ID
             llm_context: 预构建的 LLM 上下文 (可选)
+            fused_plan: 融合 Planner 输出 (可选)，提供时不再单独调用 LLM 解析时间
+            time_range_task: 并发流水线中已推测启动的时间解析任务 (可选)
+            stage_timings: 阶段耗时收集字典 (可选)
+            pipeline_mode: 流水线模式，用于阶段耗时指标
 
         返回:
             包含上下文信息的字典
@@ -1893,7 +2359,13 @@ class AgentOrchestrator:
         extra["usage_source"] = "file" if context_data.get("file_context", "") else "text"
 
         # 解析时间范围
-        date_range = await self._resolve_time_range(text, llm_context)
+        if time_range_task is not None:
+            date_range = await time_range_task
+        else:
+            time_range_start = time.perf_counter()
+            date_range = await self._resolve_time_range(text, llm_context, fused_plan=fused_plan)
+            if stage_timings is not None:
+                self._observe_stage("time_range", pipeline_mode, time.perf_counter() - time_range_start, stage_timings)
         if date_range:
             extra["date_from"] = date_range.get("date_from")
             extra["date_to"] = date_range.get("date_to")
@@ -2280,10 +2752,20 @@ class AgentOrchestrator:
             if skill_name == "QuerySkill" and result.success:
                 records = data.get("records") if isinstance(data, dict) else None
                 if isinstance(records, list):
-                    self._state_manager.set_last_result(user_id, records, query)
+                    table_id, table_name = (
+                        self._resolve_table_context_from_result(data, records) if records else (None, None)
+                    )
+                    query_meta_raw = data.get("query_meta")
+                    self._state_manager.set_last_result(
+                        user_id,
+                        records,
+                        query,
+                        table_id=table_id,
+                        table_name=table_name,
+                        query_meta=query_meta_raw if isinstance(query_meta_raw, dict) else None,
+                    )
 
                     if records:
-                        table_id, table_name = self._resolve_table_context_from_result(data, records)
                         if table_id or table_name:
                             self._state_manager.set_active_table(user_id, table_id, table_name)
                         if len(records) == 1 and isinstance(records[0], dict):
@@ -2428,13 +2910,22 @@ class AgentOrchestrator:
             "midterm_memory": "",
             "file_context": "",
         }
+        # 文件读取走异步入口（线程池），测试替身等只有同步方法时回退
         try:
-            context["soul_prompt"] = self._soul_manager.build_system_prompt()
+            build_prompt = getattr(self._soul_manager, "abuild_system_prompt", None)
+            if callable(build_prompt):
+                context["soul_prompt"] = await build_prompt()
+            else:
+                context["soul_prompt"] = self._soul_manager.build_system_prompt()
         except Exception:
             context["soul_prompt"] = ""
 
         try:
-            snapshot = self._memory_manager.snapshot(user_id)
+            load_snapshot = getattr(self._memory_manager, "asnapshot", None)
+            if callable(load_snapshot):
+                snapshot = await load_snapshot(user_id)
+            else:
+                snapshot = self._memory_manager.snapshot(user_id)
             context["shared_memory"] = snapshot.shared_memory
             context["user_memory"] = snapshot.user_memory
             context["recent_logs"] = snapshot.recent_logs
@@ -2584,6 +3075,7 @@ class AgentOrchestrator:
         self,
         text: str,
         llm_context: dict[str, str] | None = None,
+        fused_plan: FusedPlannerOutput | None = None,
     ) -> dict[str, str] | None:
         """解析时间范围"""
         # 优先使用规则解析
@@ -2596,18 +3088,23 @@ class AgentOrchestrator:
                 result["time_to"] = parsed.time_to
             return result
         
-        # 检查是否有时间相关词
+        # 检查是否有时间相关词（融合 Planner 对无时间词的查询误填日期时同样忽略，避免静默收窄检索）
         if not self._has_time_hint(text):
             return None
+
+        # 融合 Planner 已在同一次调用中给出时间范围（或判定无时间），不再单独调用 LLM
+        if fused_plan is not None:
+            return fused_plan.time_range()
         
         # 尝试 LLM 解析
         try:
             system_context = self._format_llm_context(llm_context)
-            content = await self._llm.parse_time_range(
-                text,
-                system_context=system_context,
-                timeout=self._llm_timeout,
-            )
+            with llm_stage("time_range"):
+                content = await self._llm.parse_time_range(
+                    text,
+                    system_context=system_context,
+                    timeout=self._llm_timeout,
+                )
             if "date_from" in content and "date_to" in content:
                 return {"date_from": content["date_from"], "date_to": content["date_to"]}
         except Exception:
@@ -2635,6 +3132,54 @@ class AgentOrchestrator:
             return random.choice(self._casual_responses)
         return "我先聚焦案件相关事项，您可以直接告诉我需要查询什么。"
 
+    def sweep_expired(self) -> dict[str, int]:
+        """
+        清理过期会话、上下文与对话状态（由后台 ExpirySweeper 周期调用）
+
+        返回:
+            dict[str, int]: 各存储清理的数量
+        """
+        removed = {
+            "sessions": int(self._sessions.cleanup_expired() or 0),
+            "contexts": int(self._context_manager.cleanup_expired() or 0),
+            "states": int(self._state_manager.cleanup_expired() or 0),
+        }
+        return self._report_swept(removed, self._state_manager.active_count())
+
+    async def asweep_expired(self) -> dict[str, int]:
+        """
+        sweep_expired 的异步版本（事件循环内的 ExpirySweeper 使用）
+
+        会话/上下文清理是进程内操作，且过期回调需在事件循环线程执行，仍在循环内完成；
+        对话状态存储（如 Redis）的清理与计数放到线程池，不阻塞事件循环。
+        """
+        removed = {
+            "sessions": int(self._sessions.cleanup_expired() or 0),
+            "contexts": int(self._context_manager.cleanup_expired() or 0),
+            "states": await self._state_manager.acleanup_expired(),
+        }
+        return self._report_swept(removed, await self._state_manager.aactive_count())
+
+    def _report_swept(self, removed: dict[str, int], state_active: int) -> dict[str, int]:
+        set_active_sessions(max(self._context_manager.active_count(), state_active))
+        if any(removed.values()):
+            logger.debug(
+                "已清理过期会话与状态",
+                extra={"event_code": "orchestrator.expiry.swept", **removed},
+            )
+        return removed
+
+    async def aclose(self) -> None:
+        """停机：落库仍在缓冲中的向量记忆。"""
+        try:
+            await self._memory_manager.aclose()
+        except Exception as exc:
+            logger.warning(
+                "向量记忆缓冲落库失败: %s",
+                exc,
+                extra={"event_code": "orchestrator.vector.drain_failed"},
+            )
+
     def reload_config(self, config_path: str = "config/skills.yaml") -> None:
         """
         热更新配置
@@ -2651,6 +3196,7 @@ class AgentOrchestrator:
         self._table_identity_fields = self._load_table_identity_fields(self._skills_config)
         self._assistant_name = _resolve_assistant_name(self._skills_config)
         self._chitchat_allow_llm = _resolve_chitchat_allow_llm(self._skills_config)
+        self._concurrent_pipeline = _resolve_concurrent_pipeline(self._skills_config)
         self._casual_responses = _load_casual_responses()
         self._response_renderer = ResponseRenderer(
             assistant_name=self._assistant_name,
@@ -2661,6 +3207,9 @@ class AgentOrchestrator:
         self._intent_parser = IntentParser(
             skills_config=self._skills_config,
             llm_client=self._llm,
+            local_classifier=load_local_intent_classifier(
+                (self._skills_config.get("intent") or {}).get("local_classifier")
+            ),
         )
         
         max_hops = self._skills_config.get("chain", {}).get(
@@ -2675,6 +3224,12 @@ class AgentOrchestrator:
 
         self._llm_timeout = float(self._skills_config.get("intent", {}).get("llm_timeout", 10))
 
+        # 重建 Planner：规则/提示词可能已变化，旧缓存一并失效
+        previous_planner = getattr(self, "_planner", None)
+        if previous_planner is not None:
+            previous_planner.invalidate_cache("reload")
+        self._planner = self._build_planner(config_path)
+
         # 重新加载 L0 规则
         l0_rules = self._load_l0_rules(config_path)
         self._l0_engine = L0RuleEngine(
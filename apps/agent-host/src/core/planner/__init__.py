@@ -1,6 +1,6 @@
 """L1 Planner 模块。"""
 
 from src.core.planner.engine import PlannerEngine
-from src.core.planner.schema import PlannerOutput
+from src.core.planner.schema import FusedPlannerOutput, PlannerOutput
 
-__all__ = ["PlannerEngine", "PlannerOutput"]
+__all__ = ["FusedPlannerOutput", "PlannerEngine", "PlannerOutput"]
@@ -0,0 +1,170 @@
+"""
+Planner 结果缓存。
+
+职责：
+- 精确层：规范化 query + 规则/提示词指纹 -> PlannerOutput（TTL + LRU）
+- 相似层（可选）：字符 n-gram 余弦相似度命中无参数的规划结果
+"""
+
+from __future__ import annotations
+
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+import math
+import re
+import time
+from typing import Any, Callable
+import unicodedata
+
+from src.core.planner.schema import PlannerOutput
+from src.utils.metrics import record_planner_cache_invalidation, record_planner_cache_lookup
+
+
+_NORMALIZE_STRIP_PATTERN = re.compile(r"[\s\.,!?;:，。！？；：、~～…\"'“”‘’()（）\[\]【】]+")
+
+
+def normalize_query(query: str) -> str:
+    """规范化 query：全角转半角、小写、去掉空白与标点。"""
+    text = unicodedata.normalize("NFKC", str(query or "")).lower()
+    return _NORMALIZE_STRIP_PATTERN.sub("", text)
+
+
+def _char_ngrams(text: str, n: int) -> Counter[str]:
+    if len(text) <= n:
+        return Counter([text]) if text else Counter()
+    return Counter(text[i : i + n] for i in range(len(text) - n + 1))
+
+
+def _cosine(left: Counter[str], right: Counter[str], left_norm: float, right_norm: float) -> float:
+    if not left_norm or not right_norm:
+        return 0.0
+    if len(left) > len(right):
+        left, right = right, left
+    dot = sum(count * right.get(gram, 0) for gram, count in left.items())
+    return dot / (left_norm * right_norm)
+
+
+@dataclass
+class _CacheEntry:
+    output: PlannerOutput
+    expires_at: float
+    scope: str
+    ngrams: Counter[str]
+    norm: float
+
+
+class PlannerCache:
+    """
+    Planner 结果缓存（进程内）。
+
+    相似层只复用 params 为空且不携带时间范围的规划结果，
+    避免 "查张三的案件" 命中 "查李四的案件" 这类仅实体不同的缓存。
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float = 600.0,
+        max_entries: int = 512,
+        similarity_enabled: bool = False,
+        similarity_threshold: float = 0.92,
+        ngram_size: int = 2,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._ttl = max(0.0, float(ttl_seconds))
+        self._max_entries = max(1, int(max_entries))
+        self._similarity_enabled = bool(similarity_enabled)
+        self._similarity_threshold = float(similarity_threshold)
+        self._ngram_size = max(1, int(ngram_size))
+        self._clock = clock
+        self._entries: OrderedDict[tuple[str, str], _CacheEntry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, query: str, scope: str) -> PlannerOutput | None:
+        key_text = normalize_query(query)
+        if not key_text:
+            return None
+        now = self._clock()
+        key = (scope, key_text)
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= now:
+            self._entries.pop(key, None)
+            entry = None
+        if entry is not None:
+            self._entries.move_to_end(key)
+            record_planner_cache_lookup("exact", "hit")
+            return entry.output.model_copy(deep=True)
+        record_planner_cache_lookup("exact", "miss")
+
+        if not self._similarity_enabled:
+            return None
+        similar = self._find_similar(key_text, scope, now)
+        record_planner_cache_lookup("similar", "hit" if similar is not None else "miss")
+        return similar
+
+    def put(self, query: str, scope: str, output: PlannerOutput) -> None:
+        key_text = normalize_query(query)
+        if not key_text or self._ttl <= 0:
+            return
+        ngrams = _char_ngrams(key_text, self._ngram_size)
+        key = (scope, key_text)
+        self._entries[key] = _CacheEntry(
+            output=output.model_copy(deep=True),
+            expires_at=self._clock() + self._ttl,
+            scope=scope,
+            ngrams=ngrams,
+            norm=math.sqrt(sum(count * count for count in ngrams.values())),
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self, reason: str = "manual") -> None:
+        if self._entries:
+            self._entries.clear()
+        record_planner_cache_invalidation(reason)
+
+    def _find_similar(self, key_text: str, scope: str, now: float) -> PlannerOutput | None:
+        ngrams = _char_ngrams(key_text, self._ngram_size)
+        norm = math.sqrt(sum(count * count for count in ngrams.values()))
+        best_key: tuple[str, str] | None = None
+        best_score = self._similarity_threshold
+        expired: list[tuple[str, str]] = []
+        for key, entry in self._entries.items():
+            if entry.expires_at <= now:
+                expired.append(key)
+                continue
+            if entry.scope != scope or not _is_reusable(entry.output):
+                continue
+            score = _cosine(ngrams, entry.ngrams, norm, entry.norm)
+            if score >= best_score:
+                best_key, best_score = key, score
+        for key in expired:
+            self._entries.pop(key, None)
+        if best_key is None:
+            return None
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key].output.model_copy(deep=True)
+
+
+def _is_reusable(output: PlannerOutput) -> bool:
+    if output.params:
+        return False
+    time_range = getattr(output, "time_range", None)
+    return not (callable(time_range) and time_range())
+
+
+def build_planner_cache(config: dict[str, Any] | None) -> PlannerCache | None:
+    """根据 skills.yaml 的 planner.cache 配置创建缓存，未启用时返回 None。"""
+    cfg = config if isinstance(config, dict) else {}
+    if not bool(cfg.get("enabled", False)):
+        return None
+    return PlannerCache(
+        ttl_seconds=float(cfg.get("ttl_seconds", 600)),
+        max_entries=int(cfg.get("max_entries", 512)),
+        similarity_enabled=bool(cfg.get("similarity_enabled", False)),
+        similarity_threshold=float(cfg.get("similarity_threshold", 0.92)),
+        ngram_size=int(cfg.get("ngram_size", 2)),
+    )
@@ -2,25 +2,68 @@
 L1 Planner 引擎。
 
 职责：
-- 单次 LLM 规划 intent/tool/params
+- 单次 LLM 规划 intent/tool/params（融合模式下同时输出技能排序与时间范围）
 - 输出 schema 校验
-- LLM 失败时规则降级
+- LLM 失败时规则降级（决策表见 fallback_rules.py）
+- 规划结果缓存（规则/提示词变更或场景目录变更时自动失效）
 """
 
 from __future__ import annotations
 
 from datetime import date, timedelta
+import hashlib
+import json
 import logging
+from pathlib import Path
 import re
+import time
 from typing import Any
 
 from pydantic import ValidationError
 
-from src.core.planner.prompt_builder import build_planner_system_prompt, load_scenario_rules
-from src.core.planner.schema import PlannerOutput
+from src.core.planner.cache import PlannerCache
+from src.core.planner.fallback_rules import TOKEN_GROUPS, CompiledFallbackTable, FallbackContext
+from src.core.planner.prompt_builder import (
+    build_fused_planner_system_prompt,
+    build_planner_system_prompt,
+    load_scenario_rules,
+)
+from src.core.planner.schema import FusedPlannerOutput, PlannerOutput
+from src.llm.usage_ledger import llm_stage
 
 logger = logging.getLogger(__name__)
 
+_WEEKDAY_NAMES = ("周一", "周二", "周三", "周四", "周五", "周六", "周日")
+_SCENARIOS_CHECK_INTERVAL_SECONDS = 5.0
+
+_BARE_PROJECT_ID_PATTERN = re.compile(r"\b[A-Z]{2,}-\d{4}-\d{2,}\b")
+_EXACT_CASE_NO_PATTERN = re.compile(r"(?:案号|案件号)[是为:：\s]*([A-Za-z0-9\-_/（）()_\u4e00-\u9fa5]+)")
+_EXACT_PROJECT_ID_PATTERN = re.compile(r"(?:项目ID|项目编号|项目号)[是为:：\s]*([A-Za-z0-9\-_/（）()_\u4e00-\u9fa5]+)")
+
+_STRUCTURED_FIELD_RULES: tuple[tuple[tuple[str, ...], tuple[str, ...], float], ...] = (
+    (("对方当事人",), ("对方当事人",), 0.9),
+    (("联系人",), ("联系人",), 0.9),
+    (("法官", "承办法官"), ("承办法官",), 0.9),
+    (("法院", "审理法院"), ("审理法院",), 0.88),
+    (("案由",), ("案由",), 0.88),
+    (("当事人",), ("委托人", "对方当事人", "联系人"), 0.88),
+)
+_LABEL_VALUE_SUFFIX_PATTERN = re.compile(r"(?:的)?(?:案件|案子|项目)$")
+_LABEL_VALUE_PREFIX_PATTERN = re.compile(r"^(?:是|为)")
+_LABEL_VALUE_PATTERNS: dict[str, re.Pattern[str]] = {}
+
+
+def _label_value_pattern(label: str) -> re.Pattern[str]:
+    pattern = _LABEL_VALUE_PATTERNS.get(label)
+    if pattern is None:
+        pattern = re.compile(rf"(?:{re.escape(label)})\s*(?:是|为|=|:|：)?\s*([^，。,.！？!\s][^，。,.！？!]{{0,40}})")
+        _LABEL_VALUE_PATTERNS[label] = pattern
+    return pattern
+
+
+# 规则降级决策表：模块加载时编译一次
+_FALLBACK_TABLE = CompiledFallbackTable()
+
 
 class PlannerEngine:
     """L1 Planner。"""
@@ -30,11 +73,60 @@ class PlannerEngine:
         llm_client: Any,
         scenarios_dir: str,
         enabled: bool = True,
+        fused: bool = False,
+        skill_catalog: list[dict[str, str]] | None = None,
+        cache: PlannerCache | None = None,
     ) -> None:
         self._llm = llm_client
         self._enabled = enabled
-        self._rules = load_scenario_rules(scenarios_dir)
-        self._system_prompt = build_planner_system_prompt(self._rules)
+        self._fused = fused
+        self._skill_catalog = list(skill_catalog or [])
+        self._scenarios_dir = scenarios_dir
+        self._cache = cache
+        self._scenarios_signature: tuple[tuple[str, int, int], ...] = ()
+        self._scenarios_checked_at = 0.0
+        self._load_rules()
+
+    @property
+    def fused(self) -> bool:
+        return self._fused
+
+    def invalidate_cache(self, reason: str = "manual") -> None:
+        if self._cache is not None:
+            self._cache.clear(reason)
+
+    def _load_rules(self) -> None:
+        self._scenarios_signature = _scan_scenarios_signature(self._scenarios_dir)
+        self._scenarios_checked_at = time.monotonic()
+        self._rules = load_scenario_rules(self._scenarios_dir)
+        if self._fused:
+            self._system_prompt = build_fused_planner_system_prompt(self._rules, self._skill_catalog)
+        else:
+            self._system_prompt = build_planner_system_prompt(self._rules)
+        fingerprint_source = json.dumps(self._rules, ensure_ascii=False, sort_keys=True, default=str)
+        self._fingerprint = hashlib.sha256(
+            (fingerprint_source + "\n" + self._system_prompt).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def _refresh_rules_if_changed(self) -> None:
+        now = time.monotonic()
+        if now - self._scenarios_checked_at < _SCENARIOS_CHECK_INTERVAL_SECONDS:
+            return
+        self._scenarios_checked_at = now
+        if _scan_scenarios_signature(self._scenarios_dir) == self._scenarios_signature:
+            return
+        logger.info(
+            "Planner scenarios changed, reload rules and invalidate cache",
+            extra={"event_code": "planner.scenarios.reloaded", "scenarios_dir": self._scenarios_dir},
+        )
+        self._load_rules()
+        self.invalidate_cache("scenarios_changed")
+
+    def _cache_scope(self) -> str:
+        # 融合模式输出包含按当天换算的日期，缓存按天隔离
+        if self._fused:
+            return f"{self._fingerprint}:{date.today().isoformat()}"
+        return self._fingerprint
 
     async def plan(self, query: str, *, user_profile: Any = None) -> PlannerOutput | None:
         if not self._enabled:
@@ -44,415 +136,197 @@ class PlannerEngine:
         if not getattr(getattr(self._llm, "_settings", None), "api_key", ""):
             return self._fallback_plan(query, user_profile=user_profile)
 
+        cache_scope = ""
+        if self._cache is not None:
+            self._refresh_rules_if_changed()
+            cache_scope = self._cache_scope()
+            cached = self._cache.get(query, cache_scope)
+            if cached is not None:
+                return cached
+
         user_prompt = f"用户输入：{query}\n请输出 JSON。"
+        if self._fused:
+            today = date.today()
+            user_prompt = f"今天是 {today.isoformat()}（{_WEEKDAY_NAMES[today.weekday()]}）。\n" + user_prompt
         try:
-            raw = await self._llm.chat_json(
-                user_prompt,
-                system=self._system_prompt,
-                timeout=10,
-            )
+            with llm_stage("planner"):
+                raw = await self._llm.chat_json(
+                    user_prompt,
+                    system=self._system_prompt,
+                    timeout=10,
+                )
             if not isinstance(raw, dict) or not raw:
                 return self._fallback_plan(query, user_profile=user_profile)
             try:
                 self._warn_close_semantic_drift(raw)
-                output = PlannerOutput.model_validate(raw)
+                if self._fused:
+                    output = self._validate_fused(raw)
+                else:
+                    output = PlannerOutput.model_validate(raw)
             except ValidationError as exc:
                 logger.warning("Planner schema validation failed: %s", exc)
                 return self._fallback_plan(query, user_profile=user_profile)
+            if self._cache is not None:
+                self._cache.put(query, cache_scope, output)
             return output
         except Exception as exc:
             logger.warning("Planner failed, fallback to rules: %s", exc)
             return self._fallback_plan(query, user_profile=user_profile)
 
+    def _validate_fused(self, raw: dict[str, Any]) -> PlannerOutput:
+        """融合输出校验失败时保留基础规划结果，技能排序与时间范围交回编排层单独解析。"""
+        try:
+            return FusedPlannerOutput.model_validate(raw)
+        except ValidationError as exc:
+            logger.info(
+                "Fused planner fields invalid, keep base plan: %s",
+                exc,
+                extra={"event_code": "planner.fused_validation_failed"},
+            )
+        return PlannerOutput.model_validate(raw)
+
     def _fallback_plan(self, query: str, *, user_profile: Any = None) -> PlannerOutput | None:
         text = (query or "").strip()
         normalized = text.replace(" ", "")
-
-        # 越权/注入类输入：统一降级为 out_of_scope
-        if any(token in normalized.lower() for token in ["drop table", "ignore previous", "system prompt"]):
-            return PlannerOutput(
-                intent="out_of_scope",
-                tool="none",
-                params={},
-                confidence=0.95,
-            )
-        if any(token in normalized for token in ["忽略之前", "系统提示", "越狱", "写一首诗"]):
-            return PlannerOutput(
-                intent="out_of_scope",
-                tool="none",
-                params={},
-                confidence=0.92,
-            )
-
-        case_tokens = ["案件", "案子", "项目"]
-        has_case_token = any(token in normalized for token in case_tokens)
-
-        # 表/台账/库类泛查询（表名识别前置）
-        if any(token in normalized for token in ["什么表", "哪个表", "那个表"]):
-            return PlannerOutput(
-                intent="clarify_needed",
-                tool="none",
-                params={},
-                confidence=0.6,
-                clarify_question="请问您想查哪方面的数据呢？比如：案件、收费、还是招投标？",
-            )
-
-        if normalized in {"查数据", "看看数据", "查一下数据", "数据"}:
-            return PlannerOutput(
-                intent="clarify_needed",
-                tool="none",
-                params={},
-                confidence=0.55,
-                clarify_question="能具体说说查哪一块的数据吗？例如查所有案件，或是查收费记录~",
-            )
-
-        if any(token in normalized for token in ["表", "台账", "登记", "库"]) and any(
-            token in normalized for token in ["查", "查询", "看", "搜索", "找", "有什么", "哪些"]
-        ):
-            return PlannerOutput(
-                intent="query_all",
-                tool="search",
-                params={"ignore_default_view": True},
-                confidence=0.72,
-            )
-
-        if any(token in normalized for token in ["收费", "费用", "缴费"]) and any(
-            token in normalized for token in ["查", "查询", "看", "搜索", "找", "情况"]
-        ):
-            return PlannerOutput(
-                intent="query_all",
-                tool="search",
-                params={"ignore_default_view": True},
-                confidence=0.75,
-            )
-
-        # 视图查询（优先）
-        if has_case_token and any(token in normalized for token in ["按视图", "当前视图", "仅视图", "视图内", "只看视图", "视图"]):
-            return PlannerOutput(
-                intent="query_view",
-                tool="search",
-                params={},
-                confidence=0.9,
-            )
-
-        # 提醒相关
-        if any(token in normalized for token in ["查看提醒", "提醒列表", "我的提醒", "有哪些提醒", "查看待办", "待办列表"]):
-            return PlannerOutput(
-                intent="list_reminders",
-                tool="reminder.list",
-                params={},
-                confidence=0.95,
-            )
-
-        if any(token in normalized for token in ["取消提醒", "撤销提醒"]) or (
-            any(token in normalized for token in ["取消", "撤销", "不要"]) and any(token in normalized for token in ["提醒", "开庭前", "提前"]) 
-        ):
-            return PlannerOutput(
-                intent="cancel_reminder",
-                tool="reminder.cancel",
-                params={},
-                confidence=0.92,
-            )
-
-        if any(token in normalized for token in ["提醒我", "帮我提醒", "帮我设置提醒", "设置提醒", "设提醒", "记得", "别忘了", "提醒一下", "开庭前", "提前提醒", "提前"]):
-            return PlannerOutput(
-                intent="create_reminder",
-                tool="reminder.create",
-                params={},
-                confidence=0.9,
-            )
-
-        # CRUD 相关
-        if any(token in normalized for token in ["新增", "创建", "添加", "新建"]) and has_case_token:
-            return PlannerOutput(
-                intent="create_record",
-                tool="record.create",
-                params={},
-                confidence=0.88,
-            )
-
-        if any(token in normalized for token in ["更新", "修改", "改成", "改为", "变更"]):
-            return PlannerOutput(
-                intent="update_record",
-                tool="record.update",
-                params={},
-                confidence=0.86,
-            )
-
-        if any(token in normalized for token in ["结案", "判决生效", "撤诉", "调解结案"]):
-            return PlannerOutput(
-                intent="close_record",
-                tool="record.close",
-                params={"close_semantic": "default"},
-                confidence=0.9,
-            )
-
-        if any(token in normalized for token in ["执行终本", "终本", "终结本次执行", "执行不了了"]):
-            return PlannerOutput(
-                intent="close_record",
-                tool="record.close",
-                params={"close_semantic": "enforcement_end"},
-                confidence=0.9,
-            )
-
-        if any(token in normalized for token in ["删除", "移除"]) and any(token in normalized for token in ["案件", "案号", "项目", "记录"]):
-            return PlannerOutput(
-                intent="delete_record",
-                tool="record.delete",
-                params={},
-                confidence=0.9,
-            )
-
-        structured_field_plan = self._build_structured_field_plan(text)
-        if structured_field_plan is not None:
-            return structured_field_plan
-
-        # 组合查询：人员 + 法院 + 时间
-        has_person_pattern = bool(re.search(r"([^的\s]{2,8})的(?:案件|案子|项目)", text))
-        has_court = any(token in normalized for token in ["法院", "中院", "高院", "基层院"])
-        has_time = any(token in normalized for token in [
-            "今天",
-            "明天",
-            "后天",
-            "过两天",
-            "两天后",
-            "本周",
-            "下周",
-            "本月",
-            "上个月",
-            "下个月",
-            "未来",
-            "后续",
-            "本年",
-        ])
-        status_candidates = ["进行中", "审理中", "已结案", "已完结", "待开庭", "已开庭"]
-        has_status = any(token in normalized for token in status_candidates)
-        if has_person_pattern and has_court and has_time:
-            return PlannerOutput(
-                intent="query_advanced",
-                tool="search_advanced",
-                params={},
-                confidence=0.9,
-            )
-
-        if has_status and has_time and any(token in normalized for token in ["开庭", "庭审"]):
-            return PlannerOutput(
-                intent="query_advanced",
-                tool="search_advanced",
-                params={},
-                confidence=0.86,
-            )
-
+        return _FALLBACK_TABLE.evaluate(text, normalized, self, user_profile=user_profile)
+
+    # region 降级规则处理函数（由 fallback_rules.FALLBACK_RULES 按名引用）
+    def _fallback_structured_field(self, ctx: FallbackContext) -> PlannerOutput | None:
+        return self._build_structured_field_plan(ctx.text)
+
+    def _fallback_hearing_past(self, ctx: FallbackContext) -> PlannerOutput | None:
+        return PlannerOutput(
+            intent="query_date_range",
+            tool="search_date_range",
+            params={
+                "field": "开庭日",
+                "date_to": (date.today() - timedelta(days=1)).isoformat(),
+            },
+            confidence=0.9,
+        )
+
+    def _fallback_hearing_future(self, ctx: FallbackContext) -> PlannerOutput | None:
         today = date.today()
-        if any(token in normalized for token in ["已经开过庭", "开过庭的", "已开庭的", "开过庭"]):
-            return PlannerOutput(
-                intent="query_date_range",
-                tool="search_date_range",
-                params={
-                    "field": "开庭日",
-                    "date_to": (today - timedelta(days=1)).isoformat(),
-                },
-                confidence=0.9,
-            )
-
-        if any(token in normalized for token in ["后续要开庭", "后续开庭", "待开庭", "未来开庭", "接下来开庭"]):
-            return PlannerOutput(
-                intent="query_date_range",
-                tool="search_date_range",
-                params={
-                    "field": "开庭日",
-                    "date_from": today.isoformat(),
-                    "date_to": (today + timedelta(days=3650)).isoformat(),
-                },
-                confidence=0.86,
-            )
-
-        # 我的案件（优先于“xx的案件”文本模式）
-        if any(token in normalized for token in ["我的案件", "我负责", "我的案子", "我经手", "我跟进"]):
+        return PlannerOutput(
+            intent="query_date_range",
+            tool="search_date_range",
+            params={
+                "field": "开庭日",
+                "date_from": today.isoformat(),
+                "date_to": (today + timedelta(days=3650)).isoformat(),
+            },
+            confidence=0.86,
+        )
+
+    def _fallback_status_exact(self, ctx: FallbackContext) -> PlannerOutput | None:
+        status_value = next((s for s in TOKEN_GROUPS["status"] if s in ctx.hits), "")
+        return PlannerOutput(
+            intent="query_exact",
+            tool="search_exact",
+            params={"field": "案件状态", "value": status_value},
+            confidence=0.84,
+        )
+
+    def _fallback_bare_project_id(self, ctx: FallbackContext) -> PlannerOutput | None:
+        bare_project_id = _BARE_PROJECT_ID_PATTERN.search(ctx.text)
+        if not bare_project_id:
+            return None
+        return PlannerOutput(
+            intent="query_exact",
+            tool="search_exact",
+            params={"field": "项目ID", "value": bare_project_id.group(0)},
+            confidence=0.8,
+        )
+
+    def _fallback_subject(self, ctx: FallbackContext) -> PlannerOutput | None:
+        subject = self._extract_subject_entity(ctx.text)
+        if not subject:
+            return None
+        if self._is_current_user_subject(subject, ctx.user_profile):
             return PlannerOutput(
                 intent="query_my_cases",
                 tool="search_person",
                 params={"field": "主办律师"},
-                confidence=0.93,
-            )
-
-        # 日期范围查询（优先于“xx的案件”文本模式）
-        has_date_keyword = any(token in normalized for token in [
-            "今天", "明天", "后天", "本周", "下周", "本月", "上周", "上个月", "下个月", "这周", "这月", "期间", "到", "至", "最近", "近期",
-            "过两天", "两天后", "未来", "后续",
-            "明早", "今早", "上午", "下午", "中午", "晚上", "今晚", "明晚", "凌晨", "傍晚",
-        ]) or bool(re.search(r"\d{1,2}月\d{1,2}", text)) or bool(re.search(r"(?<!\d)\d{1,2}月(?!\d)", text)) or bool(re.search(r"\d{4}[-/\.]\d{1,2}[-/\.]\d{1,2}", text)) or bool(re.search(r"(?<!\d)\d{1,2}[-/\.]\d{1,2}(?!\d)", text)) or bool(re.search(r"(?:未来|接下来)\s*[一二两三四五六七八九十\d]{1,3}\s*天", normalized)) or bool(re.search(r"\d{1,2}[:：]\d{1,2}|\d{1,2}点(?:\d{1,2}分?|半)?", text))
-        if has_date_keyword and any(token in normalized for token in ["开庭", "庭审"]):
-            return PlannerOutput(
-                intent="query_date_range",
-                tool="search_date_range",
-                params={"field": "开庭日"},
-                confidence=0.85,
-            )
-
-        # 时间词 + 案件词（无明确开庭词）的弱日期查询兜底
-        if has_date_keyword and has_case_token and any(token in normalized for token in ["案号", "安排", "日程"]):
-            return PlannerOutput(
-                intent="query_date_range",
-                tool="search_date_range",
-                params={"field": "开庭日"},
-                confidence=0.72,
-            )
-
-        # 状态精确筛选（优先于“xx的案件”文本模式）
-        status_value = next((s for s in status_candidates if s in normalized), "")
-        if status_value and has_case_token:
-            return PlannerOutput(
-                intent="query_exact",
-                tool="search_exact",
-                params={"field": "案件状态", "value": status_value},
-                confidence=0.84,
-            )
-
-        # 无前缀的项目编号（如 PRJ-2024-088）
-        bare_project_id = re.search(r"\b[A-Z]{2,}-\d{4}-\d{2,}\b", text)
-        if bare_project_id:
-            return PlannerOutput(
-                intent="query_exact",
-                tool="search_exact",
-                params={"field": "项目ID", "value": bare_project_id.group(0)},
-                confidence=0.8,
+                confidence=0.94,
             )
 
-        # 指定主体案件（X 的案子）消歧：当前用户 > 律师 > 当事人
-        subject = self._extract_subject_entity(text)
-        if subject:
-            if self._is_current_user_subject(subject, user_profile):
-                return PlannerOutput(
-                    intent="query_my_cases",
-                    tool="search_person",
-                    params={"field": "主办律师"},
-                    confidence=0.94,
-                )
-
-            if self._looks_like_lawyer_subject(subject, normalized):
-                return PlannerOutput(
-                    intent="query_person",
-                    tool="search_keyword",
-                    params={
-                        "keyword": subject,
-                        "fields": ["主办律师", "协办律师"],
-                    },
-                    confidence=0.9,
-                )
-
+        if self._looks_like_lawyer_subject(subject, ctx.normalized):
             return PlannerOutput(
                 intent="query_person",
                 tool="search_keyword",
                 params={
                     "keyword": subject,
-                    "fields": ["委托人", "对方当事人", "联系人"],
+                    "fields": ["主办律师", "协办律师"],
                 },
-                confidence=0.86,
-            )
-
-        if any(token in normalized for token in ["所有案件", "全部案件", "案件列表", "查全部", "所有项目", "全部项目"]):
-            if any(token in normalized for token in ["按视图", "当前视图", "仅视图", "视图内", "只看视图"]):
-                return PlannerOutput(
-                    intent="query_view",
-                    tool="search",
-                    params={},
-                    confidence=0.95,
-                )
-            return PlannerOutput(
-                intent="query_all",
-                tool="search",
-                params={"ignore_default_view": True},
-                confidence=0.95,
-            )
-
-        if has_case_token and any(token in normalized for token in ["有什么", "有哪些", "列表", "清单"]):
-            return PlannerOutput(
-                intent="query_all",
-                tool="search",
-                params={"ignore_default_view": True},
-                confidence=0.8,
-            )
-
-        # 合同/侵权等模糊组合查询兜底
-        if has_case_token and any(token in normalized for token in ["合同", "侵权", "纠纷", "之前", "那个"]):
-            return PlannerOutput(
-                intent="query_advanced",
-                tool="search_advanced",
-                params={},
-                confidence=0.68,
-            )
-
-        exact_case = re.search(r"(?:案号|案件号)[是为:：\s]*([A-Za-z0-9\-_/（）()_\u4e00-\u9fa5]+)", text)
-        if exact_case:
-            return PlannerOutput(
-                intent="query_exact",
-                tool="search_exact",
-                params={"field": "案号", "value": exact_case.group(1).strip()},
-                confidence=0.95,
-            )
-
-        exact_project = re.search(r"(?:项目ID|项目编号|项目号)[是为:：\s]*([A-Za-z0-9\-_/（）()_\u4e00-\u9fa5]+)", text)
-        if exact_project:
-            return PlannerOutput(
-                intent="query_exact",
-                tool="search_exact",
-                params={"field": "项目ID", "value": exact_project.group(1).strip()},
-                confidence=0.94,
-            )
-
-        if any(token in normalized for token in ["查", "查询", "找", "搜索"]) and any(
-            token in normalized for token in ["案件", "案子", "项目"]
-        ):
-            return PlannerOutput(
-                intent="query_all",
-                tool="search",
-                params={"ignore_default_view": True},
-                confidence=0.7,
-            )
-
-        if len(normalized) <= 1:
-            return PlannerOutput(
-                intent="clarify_needed",
-                tool="none",
-                params={},
-                confidence=0.2,
-                clarify_question="哎呀，没太明白您的意思 😅 能再说具体点吗？例如您可以说：查所有案件、我的案件、或者查案号 XXX。",
+                confidence=0.9,
             )
 
-        return None
+        return PlannerOutput(
+            intent="query_person",
+            tool="search_keyword",
+            params={
+                "keyword": subject,
+                "fields": ["委托人", "对方当事人", "联系人"],
+            },
+            confidence=0.86,
+        )
+
+    def _fallback_exact_case_no(self, ctx: FallbackContext) -> PlannerOutput | None:
+        exact_case = _EXACT_CASE_NO_PATTERN.search(ctx.text)
+        if not exact_case:
+            return None
+        return PlannerOutput(
+            intent="query_exact",
+            tool="search_exact",
+            params={"field": "案号", "value": exact_case.group(1).strip()},
+            confidence=0.95,
+        )
+
+    def _fallback_exact_project_id(self, ctx: FallbackContext) -> PlannerOutput | None:
+        exact_project = _EXACT_PROJECT_ID_PATTERN.search(ctx.text)
+        if not exact_project:
+            return None
+        return PlannerOutput(
+            intent="query_exact",
+            tool="search_exact",
+            params={"field": "项目ID", "value": exact_project.group(1).strip()},
+            confidence=0.94,
+        )
+
+    def _fallback_too_short(self, ctx: FallbackContext) -> PlannerOutput | None:
+        if len(ctx.normalized) > 1:
+            return None
+        return PlannerOutput(
+            intent="clarify_needed",
+            tool="none",
+            params={},
+            confidence=0.2,
+            clarify_question="哎呀，没太明白您的意思 😅 能再说具体点吗？例如您可以说：查所有案件、我的案件、或者查案号 XXX。",
+        )
+
+    # endregion
 
     def _build_structured_field_plan(self, text: str) -> PlannerOutput | None:
-        rules: list[tuple[tuple[str, ...], list[str], float]] = [
-            (("对方当事人",), ["对方当事人"], 0.9),
-            (("联系人",), ["联系人"], 0.9),
-            (("法官", "承办法官"), ["承办法官"], 0.9),
-            (("法院", "审理法院"), ["审理法院"], 0.88),
-            (("案由",), ["案由"], 0.88),
-            (("当事人",), ["委托人", "对方当事人", "联系人"], 0.88),
-        ]
-
-        for labels, fields, confidence in rules:
+        for labels, fields, confidence in _STRUCTURED_FIELD_RULES:
             value = self._extract_value_after_label(text, labels)
             if not value:
                 continue
             return PlannerOutput(
                 intent="query_person",
                 tool="search_keyword",
-                params={"keyword": value, "fields": fields},
+                params={"keyword": value, "fields": list(fields)},
                 confidence=confidence,
             )
         return None
 
     def _extract_value_after_label(self, text: str, labels: tuple[str, ...]) -> str:
         for label in labels:
-            pattern = rf"(?:{re.escape(label)})\s*(?:是|为|=|:|：)?\s*([^，。,.！？!\s][^，。,.！？!]{{0,40}})"
-            matched = re.search(pattern, text)
+            matched = _label_value_pattern(label).search(text)
             if not matched:
                 continue
             raw = matched.group(1).strip()
-            value = re.sub(r"(?:的)?(?:案件|案子|项目)$", "", raw).strip()
-            value = re.sub(r"^(?:是|为)", "", value).strip()
+            value = _LABEL_VALUE_SUFFIX_PATTERN.sub("", raw).strip()
+            value = _LABEL_VALUE_PREFIX_PATTERN.sub("", value).strip()
             if value:
                 return value
         return ""
@@ -539,3 +413,17 @@ class PlannerEngine:
                     "close_semantic": semantic,
                 },
             )
+
+
+def _scan_scenarios_signature(scenarios_dir: str) -> tuple[tuple[str, int, int], ...]:
+    path = Path(scenarios_dir)
+    if not path.is_dir():
+        return ()
+    signature: list[tuple[str, int, int]] = []
+    for file in sorted(path.glob("*.yaml")):
+        try:
+            stat = file.stat()
+        except OSError:
+            continue
+        signature.append((file.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
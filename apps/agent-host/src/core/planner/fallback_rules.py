@@ -0,0 +1,463 @@
+"""
+Planner 规则降级决策表。
+
+职责：
+- 以数据描述降级规则：词组信号、正则信号、规则顺序（即优先级）与输出
+- 加载时把全部词组编译成一个多模式自动机，每次降级只扫描一遍输入
+- 按表顺序求值，首个命中的规则给出结果；需要抽取参数的规则交给 PlannerEngine 的处理函数
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import re
+from typing import Any, Callable
+
+from src.core.intent.rules import KeywordAutomaton
+from src.core.planner.schema import PlannerOutput
+
+
+# region 信号定义
+# 词组信号：输入（去空格后）包含任一词即命中
+TOKEN_GROUPS: dict[str, tuple[str, ...]] = {
+    "injection_zh": ("忽略之前", "系统提示", "越狱", "写一首诗"),
+    "case": ("案件", "案子", "项目"),
+    "table_ask": ("什么表", "哪个表", "那个表"),
+    "table_word": ("表", "台账", "登记", "库"),
+    "table_verb": ("查", "查询", "看", "搜索", "找", "有什么", "哪些"),
+    "fee_word": ("收费", "费用", "缴费"),
+    "fee_verb": ("查", "查询", "看", "搜索", "找", "情况"),
+    "view": ("按视图", "当前视图", "仅视图", "视图内", "只看视图", "视图"),
+    "view_strict": ("按视图", "当前视图", "仅视图", "视图内", "只看视图"),
+    "reminder_list": ("查看提醒", "提醒列表", "我的提醒", "有哪些提醒", "查看待办", "待办列表"),
+    "reminder_cancel": ("取消提醒", "撤销提醒"),
+    "cancel_verb": ("取消", "撤销", "不要"),
+    "cancel_target": ("提醒", "开庭前", "提前"),
+    "reminder_create": (
+        "提醒我", "帮我提醒", "帮我设置提醒", "设置提醒", "设提醒", "记得", "别忘了", "提醒一下", "开庭前", "提前提醒", "提前",
+    ),
+    "create_verb": ("新增", "创建", "添加", "新建"),
+    "update_verb": ("更新", "修改", "改成", "改为", "变更"),
+    "close_default": ("结案", "判决生效", "撤诉", "调解结案"),
+    "close_enforcement": ("执行终本", "终本", "终结本次执行", "执行不了了"),
+    "delete_verb": ("删除", "移除"),
+    "delete_target": ("案件", "案号", "项目", "记录"),
+    "court": ("法院", "中院", "高院", "基层院"),
+    "time": (
+        "今天", "明天", "后天", "过两天", "两天后", "本周", "下周", "本月", "上个月", "下个月", "未来", "后续", "本年",
+    ),
+    "status": ("进行中", "审理中", "已结案", "已完结", "待开庭", "已开庭"),
+    "hearing": ("开庭", "庭审"),
+    "hearing_past": ("已经开过庭", "开过庭的", "已开庭的", "开过庭"),
+    "hearing_future": ("后续要开庭", "后续开庭", "待开庭", "未来开庭", "接下来开庭"),
+    "my_cases": ("我的案件", "我负责", "我的案子", "我经手", "我跟进"),
+    "date_word": (
+        "今天", "明天", "后天", "本周", "下周", "本月", "上周", "上个月", "下个月", "这周", "这月", "期间", "到", "至", "最近", "近期",
+        "过两天", "两天后", "未来", "后续",
+        "明早", "今早", "上午", "下午", "中午", "晚上", "今晚", "明晚", "凌晨", "傍晚",
+    ),
+    "schedule": ("案号", "安排", "日程"),
+    "all_cases": ("所有案件", "全部案件", "案件列表", "查全部", "所有项目", "全部项目"),
+    "case_listing": ("有什么", "有哪些", "列表", "清单"),
+    "fuzzy_topic": ("合同", "侵权", "纠纷", "之前", "那个"),
+    "search_verb": ("查", "查询", "找", "搜索"),
+    # 以下词组只用于给处理函数做前置过滤：处理函数内的正则命中时这些词必然出现
+    "field_label": ("对方当事人", "联系人", "法官", "法院", "案由", "当事人"),
+    "subject_of": ("的案件", "的案子", "的项目"),
+    "case_no_label": ("案号", "案件号"),
+    "project_id_label": ("项目ID", "项目编号", "项目号"),
+}
+
+# 小写后匹配的词组信号（英文注入词）
+LOWER_TOKEN_GROUPS: dict[str, tuple[str, ...]] = {
+    "injection_en": ("drop table", "ignore previous", "system prompt"),
+}
+
+# 整句精确匹配信号
+EXACT_SIGNALS: dict[str, frozenset[str]] = {
+    "data_ask": frozenset({"查数据", "看看数据", "查一下数据", "数据"}),
+}
+
+# 正则信号：(模式, 作用对象)；text 为原文（去首尾空白），normalized 为去空格文本
+REGEX_SIGNALS: dict[str, tuple[str, str]] = {
+    "person_of_case": (r"([^的\s]{2,8})的(?:案件|案子|项目)", "text"),
+    "month_day": (r"\d{1,2}月\d{1,2}", "text"),
+    "month_only": (r"(?<!\d)\d{1,2}月(?!\d)", "text"),
+    "full_date": (r"\d{4}[-/\.]\d{1,2}[-/\.]\d{1,2}", "text"),
+    "short_date": (r"(?<!\d)\d{1,2}[-/\.]\d{1,2}(?!\d)", "text"),
+    "next_n_days": (r"(?:未来|接下来)\s*[一二两三四五六七八九十\d]{1,3}\s*天", "normalized"),
+    "clock_time": (r"\d{1,2}[:：]\d{1,2}|\d{1,2}点(?:\d{1,2}分?|半)?", "text"),
+}
+
+# 组合信号：任一子信号命中即命中
+COMPOSITE_SIGNALS: dict[str, tuple[str, ...]] = {
+    "date": ("date_word", "month_day", "month_only", "full_date", "short_date", "next_n_days", "clock_time"),
+}
+
+# endregion
+
+
+# region 规则表
+@dataclass(frozen=True)
+class FallbackRule:
+    """
+    单条降级规则
+
+    属性:
+        name: 规则名（日志/排查用）
+        when: 命中条件（析取范式）：任一子句中的信号全部命中即满足；为空表示无条件
+        handler: PlannerEngine 上的处理函数名，返回 None 时继续匹配后续规则
+        其余字段: 静态输出
+    """
+
+    name: str
+    when: tuple[tuple[str, ...], ...] = ()
+    handler: str = ""
+    intent: str = ""
+    tool: str = "none"
+    params: dict[str, Any] = field(default_factory=dict)
+    confidence: float = 0.0
+    clarify_question: str = ""
+
+    def build(self) -> PlannerOutput:
+        return PlannerOutput(
+            intent=self.intent,
+            tool=self.tool,
+            params=dict(self.params),
+            confidence=self.confidence,
+            clarify_question=self.clarify_question,
+        )
+
+
+_IGNORE_VIEW = {"ignore_default_view": True}
+
+# 顺序即优先级
+FALLBACK_RULES: tuple[FallbackRule, ...] = (
+    # 越权/注入类输入：统一降级为 out_of_scope
+    FallbackRule("injection_en", when=(("injection_en",),), intent="out_of_scope", confidence=0.95),
+    FallbackRule("injection_zh", when=(("injection_zh",),), intent="out_of_scope", confidence=0.92),
+    # 表/台账/库类泛查询（表名识别前置）
+    FallbackRule(
+        "table_ask",
+        when=(("table_ask",),),
+        intent="clarify_needed",
+        confidence=0.6,
+        clarify_question="请问您想查哪方面的数据呢？比如：案件、收费、还是招投标？",
+    ),
+    FallbackRule(
+        "data_ask",
+        when=(("data_ask",),),
+        intent="clarify_needed",
+        confidence=0.55,
+        clarify_question="能具体说说查哪一块的数据吗？例如查所有案件，或是查收费记录~",
+    ),
+    FallbackRule(
+        "table_query",
+        when=(("table_word", "table_verb"),),
+        intent="query_all",
+        tool="search",
+        params=_IGNORE_VIEW,
+        confidence=0.72,
+    ),
+    FallbackRule(
+        "fee_query",
+        when=(("fee_word", "fee_verb"),),
+        intent="query_all",
+        tool="search",
+        params=_IGNORE_VIEW,
+        confidence=0.75,
+    ),
+    # 视图查询（优先）
+    FallbackRule("view_query", when=(("case", "view"),), intent="query_view", tool="search", confidence=0.9),
+    # 提醒相关
+    FallbackRule(
+        "list_reminders", when=(("reminder_list",),), intent="list_reminders", tool="reminder.list", confidence=0.95
+    ),
+    FallbackRule(
+        "cancel_reminder",
+        when=(("reminder_cancel",), ("cancel_verb", "cancel_target")),
+        intent="cancel_reminder",
+        tool="reminder.cancel",
+        confidence=0.92,
+    ),
+    FallbackRule(
+        "create_reminder",
+        when=(("reminder_create",),),
+        intent="create_reminder",
+        tool="reminder.create",
+        confidence=0.9,
+    ),
+    # CRUD 相关
+    FallbackRule(
+        "create_record", when=(("create_verb", "case"),), intent="create_record", tool="record.create", confidence=0.88
+    ),
+    FallbackRule(
+        "update_record", when=(("update_verb",),), intent="update_record", tool="record.update", confidence=0.86
+    ),
+    FallbackRule(
+        "close_default",
+        when=(("close_default",),),
+        intent="close_record",
+        tool="record.close",
+        params={"close_semantic": "default"},
+        confidence=0.9,
+    ),
+    FallbackRule(
+        "close_enforcement",
+        when=(("close_enforcement",),),
+        intent="close_record",
+        tool="record.close",
+        params={"close_semantic": "enforcement_end"},
+        confidence=0.9,
+    ),
+    FallbackRule(
+        "delete_record",
+        when=(("delete_verb", "delete_target"),),
+        intent="delete_record",
+        tool="record.delete",
+        confidence=0.9,
+    ),
+    FallbackRule("structured_field", when=(("field_label",),), handler="_fallback_structured_field"),
+    # 组合查询：人员 + 法院 + 时间 / 状态 + 时间 + 开庭
+    FallbackRule(
+        "person_court_time",
+        when=(("court", "time", "subject_of", "person_of_case"),),
+        intent="query_advanced",
+        tool="search_advanced",
+        confidence=0.9,
+    ),
+    FallbackRule(
+        "status_time_hearing",
+        when=(("status", "time", "hearing"),),
+        intent="query_advanced",
+        tool="search_advanced",
+        confidence=0.86,
+    ),
+    FallbackRule("hearing_past", when=(("hearing_past",),), handler="_fallback_hearing_past"),
+    FallbackRule("hearing_future", when=(("hearing_future",),), handler="_fallback_hearing_future"),
+    # 我的案件（优先于“xx的案件”文本模式）
+    FallbackRule(
+        "my_cases",
+        when=(("my_cases",),),
+        intent="query_my_cases",
+        tool="search_person",
+        params={"field": "主办律师"},
+        confidence=0.93,
+    ),
+    # 日期范围查询（优先于“xx的案件”文本模式）
+    FallbackRule(
+        "date_hearing",
+        when=(("date", "hearing"),),
+        intent="query_date_range",
+        tool="search_date_range",
+        params={"field": "开庭日"},
+        confidence=0.85,
+    ),
+    # 时间词 + 案件词（无明确开庭词）的弱日期查询兜底
+    FallbackRule(
+        "date_case_schedule",
+        when=(("date", "case", "schedule"),),
+        intent="query_date_range",
+        tool="search_date_range",
+        params={"field": "开庭日"},
+        confidence=0.72,
+    ),
+    # 状态精确筛选（优先于“xx的案件”文本模式）
+    FallbackRule("status_exact", when=(("status", "case"),), handler="_fallback_status_exact"),
+    # 无前缀的项目编号（如 PRJ-2024-088）
+    FallbackRule("bare_project_id", handler="_fallback_bare_project_id"),
+    # 指定主体案件（X 的案子）消歧：当前用户 > 律师 > 当事人
+    FallbackRule("subject", when=(("subject_of",),), handler="_fallback_subject"),
+    FallbackRule(
+        "all_cases_view",
+        when=(("all_cases", "view_strict"),),
+        intent="query_view",
+        tool="search",
+        confidence=0.95,
+    ),
+    FallbackRule(
+        "all_cases", when=(("all_cases",),), intent="query_all", tool="search", params=_IGNORE_VIEW, confidence=0.95
+    ),
+    FallbackRule(
+        "case_listing",
+        when=(("case", "case_listing"),),
+        intent="query_all",
+        tool="search",
+        params=_IGNORE_VIEW,
+        confidence=0.8,
+    ),
+    # 合同/侵权等模糊组合查询兜底
+    FallbackRule(
+        "fuzzy_topic",
+        when=(("case", "fuzzy_topic"),),
+        intent="query_advanced",
+        tool="search_advanced",
+        confidence=0.68,
+    ),
+    FallbackRule("exact_case_no", when=(("case_no_label",),), handler="_fallback_exact_case_no"),
+    FallbackRule("exact_project_id", when=(("project_id_label",),), handler="_fallback_exact_project_id"),
+    FallbackRule(
+        "search_case",
+        when=(("search_verb", "case"),),
+        intent="query_all",
+        tool="search",
+        params=_IGNORE_VIEW,
+        confidence=0.7,
+    ),
+    FallbackRule("too_short", handler="_fallback_too_short"),
+)
+
+# endregion
+
+
+# region 编译与求值
+class FallbackContext:
+    """单次降级求值的上下文：输入文本、扫描命中与信号缓存。"""
+
+    __slots__ = ("text", "normalized", "user_profile", "hits", "present", "_table", "_lazy")
+
+    def __init__(self, table: "CompiledFallbackTable", text: str, normalized: str, user_profile: Any) -> None:
+        self.text = text
+        self.normalized = normalized
+        self.user_profile = user_profile
+        self._table = table
+        self._lazy: dict[str, bool] = {}
+        self.hits = table._automaton.find_all(normalized)
+        present: set[str] = set()
+        token_groups = table._token_groups
+        for token in self.hits:
+            present.update(token_groups[token])
+        if table._lower_automaton is not None:
+            for token in table._lower_automaton.find_all(normalized.lower()):
+                present.update(table._lower_token_groups[token])
+        self.present = present
+
+    def has(self, signal: str) -> bool:
+        if signal in self.present:
+            return True
+        value = self._lazy.get(signal)
+        if value is None:
+            value = self._table._evaluate_signal(self, signal)
+            self._lazy[signal] = value
+        return value
+
+
+# 编译后的子句：(必须全部命中的词组信号, 需按需求值的其它信号)
+_CompiledClause = tuple[frozenset[str], tuple[str, ...]]
+
+
+class CompiledFallbackTable:
+    """
+    编译后的降级决策表
+
+    功能:
+        - 所有词组信号合并为一个自动机，扫描一次得到全部命中词组
+        - 子句中的词组部分编译为集合，求值时做一次子集判断；正则/精确/组合信号按需求值并在单次调用内缓存
+        - 按规则顺序求值，返回首个命中规则的输出
+    """
+
+    def __init__(
+        self,
+        rules: tuple[FallbackRule, ...] = FALLBACK_RULES,
+        token_groups: dict[str, tuple[str, ...]] = TOKEN_GROUPS,
+        lower_token_groups: dict[str, tuple[str, ...]] = LOWER_TOKEN_GROUPS,
+        exact_signals: dict[str, frozenset[str]] = EXACT_SIGNALS,
+        regex_signals: dict[str, tuple[str, str]] = REGEX_SIGNALS,
+        composite_signals: dict[str, tuple[str, ...]] = COMPOSITE_SIGNALS,
+    ) -> None:
+        self._rules = rules
+        self._token_groups = _invert(token_groups)
+        self._lower_token_groups = _invert(lower_token_groups)
+        self._automaton = KeywordAutomaton(self._token_groups)
+        self._lower_automaton = KeywordAutomaton(self._lower_token_groups) if lower_token_groups else None
+        self._exact_signals = dict(exact_signals)
+        self._regex_signals = {
+            name: (re.compile(pattern), source) for name, (pattern, source) in regex_signals.items()
+        }
+        self._composite_signals = dict(composite_signals)
+
+        token_signals = set(token_groups) | set(lower_token_groups)
+        known = token_signals | set(exact_signals) | set(regex_signals) | set(composite_signals)
+        referenced = {
+            signal for rule in rules for clause in rule.when for signal in clause
+        } | {signal for members in composite_signals.values() for signal in members}
+        unknown = sorted(referenced - known)
+        if unknown:
+            raise ValueError(f"fallback rules reference unknown signals: {', '.join(unknown)}")
+
+        self._compiled: tuple[tuple[FallbackRule, tuple[_CompiledClause, ...]], ...] = tuple(
+            (
+                rule,
+                tuple(
+                    (
+                        frozenset(signal for signal in clause if signal in token_signals),
+                        tuple(signal for signal in clause if signal not in token_signals),
+                    )
+                    for clause in rule.when
+                ),
+            )
+            for rule in rules
+        )
+
+    @property
+    def rules(self) -> tuple[FallbackRule, ...]:
+        return self._rules
+
+    def evaluate(
+        self,
+        text: str,
+        normalized: str,
+        handlers: Any,
+        user_profile: Any = None,
+    ) -> PlannerOutput | None:
+        """
+        按规则顺序求值
+
+        参数:
+            text: 原文（去首尾空白）
+            normalized: 去空格文本
+            handlers: 提供 handler 方法的对象（PlannerEngine）
+            user_profile: 当前用户画像
+        返回:
+            首个命中规则的输出；均未命中返回 None
+        """
+        ctx = FallbackContext(self, text, normalized, user_profile)
+        present = ctx.present
+        for rule, clauses in self._compiled:
+            if clauses:
+                for required, lazy in clauses:
+                    if required <= present and (not lazy or all(ctx.has(signal) for signal in lazy)):
+                        break
+                else:
+                    continue
+            if rule.handler:
+                handler: Callable[[FallbackContext], PlannerOutput | None] = getattr(handlers, rule.handler)
+                output = handler(ctx)
+                if output is None:
+                    continue
+                return output
+            return rule.build()
+        return None
+
+    def _evaluate_signal(self, ctx: FallbackContext, signal: str) -> bool:
+        exact = self._exact_signals.get(signal)
+        if exact is not None:
+            return ctx.normalized in exact
+        regex = self._regex_signals.get(signal)
+        if regex is not None:
+            pattern, source = regex
+            return bool(pattern.search(ctx.normalized if source == "normalized" else ctx.text))
+        # 组合信号；未命中的词组信号也落在这里（无成员，返回 False）
+        return any(ctx.has(member) for member in self._composite_signals.get(signal, ()))
+
+
+def _invert(groups: dict[str, tuple[str, ...]]) -> dict[str, tuple[str, ...]]:
+    """词 -> 所属词组名"""
+    index: dict[str, list[str]] = {}
+    for group, tokens in groups.items():
+        for token in tokens:
+            index.setdefault(token, []).append(group)
+    return {token: tuple(names) for token, names in index.items()}
+
+
+# endregion
@@ -84,3 +84,38 @@ def build_planner_system_prompt(rules: list[dict[str, Any]]) -> str:
             "要求：confidence 在 [0,1]；若无法确定 intent，输出 intent=clarify_needed 且给出 clarify_question。",
         ]
     )
+
+
+def build_fused_planner_system_prompt(
+    rules: list[dict[str, Any]],
+    skills: list[dict[str, str]],
+) -> str:
+    """
+    构建融合 Planner system prompt：一次输出 intent/tool/params、技能排序与时间范围。
+
+    当天日期由调用方放在 user prompt 中，system prompt 本身保持稳定。
+    """
+    base = build_planner_system_prompt(rules)
+
+    skill_lines = [
+        f"- {item.get('name')}: {item.get('description') or ''}".rstrip(": ")
+        for item in skills
+        if item.get("name")
+    ]
+    schema_text = (
+        '{"skills":[{"name":"QuerySkill","score":0.9,"reason":"..."}],"is_chain":false,'
+        '"date_from":"","date_to":"","time_from":"","time_to":""}'
+    )
+
+    return "\n\n".join(
+        [
+            base,
+            "可用技能：\n" + ("\n".join(skill_lines) if skill_lines else "- QuerySkill\n- ChitchatSkill"),
+            "在上述 JSON 中追加以下字段：\n" + schema_text,
+            (
+                "要求：skills 按 score 降序，最多 3 个；is_chain 表示需要先查询再执行其他技能；"
+                "用户提到时间时根据今天日期换算 date_from/date_to（YYYY-MM-DD），"
+                "具体时刻填写 time_from/time_to（HH:MM），否则全部留空字符串。"
+            ),
+        ]
+    )
@@ -4,9 +4,10 @@ L1 Planner 输出结构定义与校验。
 
 from __future__ import annotations
 
+from datetime import date, time
 from typing import Any, Literal
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 PlannerIntent = Literal[
@@ -79,3 +80,71 @@ class PlannerOutput(BaseModel):
             "confidence": self.confidence,
             "clarify_question": self.clarify_question,
         }
+
+
+class SkillRank(BaseModel):
+    """融合规划中的技能排序项（对齐 IntentParser 的 SkillMatch）。"""
+
+    name: str
+    score: float = Field(ge=0.0, le=1.0)
+    reason: str = ""
+
+
+class FusedPlannerOutput(PlannerOutput):
+    """
+    融合 Planner 输出：一次调用同时给出 intent/tool/params、技能排序与时间范围。
+
+    校验通过时编排层跳过 IntentParser 的 LLM 分类与 LLM 时间解析。
+    """
+
+    skills: list[SkillRank] = Field(default_factory=list, max_length=3)
+    is_chain: bool = False
+    date_from: str = ""
+    date_to: str = ""
+    time_from: str = ""
+    time_to: str = ""
+
+    @field_validator("date_from", "date_to", mode="before")
+    @classmethod
+    def _validate_date(cls, value: Any) -> str:
+        text = str(value or "").strip()
+        if text:
+            date.fromisoformat(text)
+        return text
+
+    @field_validator("time_from", "time_to", mode="before")
+    @classmethod
+    def _validate_time(cls, value: Any) -> str:
+        text = str(value or "").strip()
+        if text:
+            time.fromisoformat(text)
+        return text
+
+    @model_validator(mode="after")
+    def _validate_range(self) -> "FusedPlannerOutput":
+        if bool(self.date_from) != bool(self.date_to):
+            raise ValueError("date_from and date_to must be provided together")
+        if self.date_from and self.date_from > self.date_to:
+            raise ValueError("date_from must not be later than date_to")
+        if (self.time_from or self.time_to) and not self.date_from:
+            raise ValueError("time range requires date range")
+        return self
+
+    def time_range(self) -> dict[str, str] | None:
+        if not self.date_from:
+            return None
+        result = {"date_from": self.date_from, "date_to": self.date_to}
+        if self.time_from:
+            result["time_from"] = self.time_from
+        if self.time_to:
+            result["time_to"] = self.time_to
+        return result
+
+    def to_context(self) -> dict[str, Any]:
+        context = super().to_context()
+        context["skills"] = [item.model_dump() for item in self.skills]
+        context["is_chain"] = self.is_chain
+        time_range = self.time_range()
+        if time_range:
+            context["time_range"] = time_range
+        return context
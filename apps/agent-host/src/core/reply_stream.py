@@ -0,0 +1,73 @@
+"""Core reply streaming abstractions."""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+from typing import Any, Awaitable, Iterator, Protocol
+
+logger = logging.getLogger(__name__)
+
+
+class ReplyStreamSink(Protocol):
+    """接收模型增量输出的渠道侧回调（例如飞书占位卡片 + 增量 patch）。"""
+
+    def on_start(self) -> Awaitable[None] | None: ...
+
+    def on_delta(self, delta: str) -> Awaitable[None] | None: ...
+
+
+_REPLY_STREAM_SINK: ContextVar[ReplyStreamSink | None] = ContextVar("reply_stream_sink", default=None)
+
+
+@contextmanager
+def reply_stream_context(sink: ReplyStreamSink | None) -> Iterator[None]:
+    """在当前请求上下文内挂载流式输出 sink，未提供时不做任何事。"""
+    token = _REPLY_STREAM_SINK.set(sink)
+    try:
+        yield
+    finally:
+        _REPLY_STREAM_SINK.reset(token)
+
+
+def get_reply_stream_sink() -> ReplyStreamSink | None:
+    return _REPLY_STREAM_SINK.get()
+
+
+async def _notify(sink: ReplyStreamSink, method: str, *args: Any) -> bool:
+    try:
+        maybe_awaitable = getattr(sink, method)(*args)
+        if maybe_awaitable is not None:
+            await maybe_awaitable
+        return True
+    except Exception:
+        logger.warning(
+            "流式回复回调失败，后续增量不再推送",
+            extra={"event_code": "reply_stream.sink_failed", "method": method},
+        )
+        return False
+
+
+async def chat_with_reply_stream(
+    llm_client: Any,
+    messages: list[dict[str, str]],
+    timeout: float | None = None,
+) -> str:
+    """
+    调用 LLM 生成最终回复文本；若当前请求挂载了流式 sink 且客户端支持 chat_stream，
+    则边生成边推送增量，返回值与非流式 chat 一致（完整文本）。
+    """
+    kwargs: dict[str, Any] = {} if timeout is None else {"timeout": timeout}
+    sink = get_reply_stream_sink()
+    chat_stream = getattr(llm_client, "chat_stream", None)
+    if sink is None or not callable(chat_stream):
+        return await llm_client.chat(messages, **kwargs)
+
+    sink_alive = await _notify(sink, "on_start")
+    parts: list[str] = []
+    async for delta in chat_stream(messages, **kwargs):
+        parts.append(delta)
+        if sink_alive:
+            sink_alive = await _notify(sink, "on_delta", delta)
+    return "".join(parts)
@@ -3,7 +3,10 @@ from __future__ import annotations
 import hashlib
 import logging
 from dataclasses import dataclass, field
-from typing import Protocol
+from typing import TYPE_CHECKING, Protocol
+
+if TYPE_CHECKING:
+    from src.llm.model_health import ModelHealthRegistry
 
 
 logger = logging.getLogger(__name__)
@@ -113,6 +116,8 @@ class ModelRouter:
         model_a: str | None = None,
         model_b: str | None = None,
         scorer: ComplexityScorer | None = None,
+        hedge_model: str | None = None,
+        health: "ModelHealthRegistry | None" = None,
     ) -> None:
         self._enabled = bool(enabled)
         self._ratio = max(0.0, min(1.0, float(ratio)))
@@ -120,8 +125,13 @@ class ModelRouter:
         self._model_a = str(model_a or "").strip()
         self._model_b = str(model_b or "").strip()
         self._scorer = scorer or RuleBasedComplexityScorer()
+        self._hedge_model = str(hedge_model or "").strip()
+        self._health = health
 
     def decide(self, user_id: str, query: str) -> RoutingDecision:
+        return self._apply_health(self._decide(user_id, query))
+
+    def _decide(self, user_id: str, query: str) -> RoutingDecision:
         if not self._enabled or self._ratio <= 0:
             return self._primary_decision(complexity="medium", route_label="primary_default", reason="routing_disabled")
 
@@ -147,6 +157,45 @@ class ModelRouter:
             return self._build(self._model_b, "ab_complex", complexity, f"complex:{score_reason}", True)
         return self._primary_decision(complexity=complexity, route_label="primary_default", reason=f"fallback:{score_reason}")
 
+    def _apply_health(self, decision: RoutingDecision) -> RoutingDecision:
+        """熔断中的模型改路由到健康的备用模型，并为对冲请求标注备用模型。"""
+        health = self._health
+        selected = decision.model_selected
+        if health is not None and selected and not health.allow(selected):
+            fallback = next(
+                (
+                    model
+                    for model in (self._hedge_model, self._primary_model)
+                    if model and model != selected and health.allow(model)
+                ),
+                "",
+            )
+            if fallback:
+                logger.info(
+                    "model circuit open, rerouting %s -> %s",
+                    selected,
+                    fallback,
+                    extra={"event_code": "model_router.breaker.reroute"},
+                )
+                skipped = selected
+                decision = self._build(
+                    fallback,
+                    "breaker_fallback",
+                    decision.complexity,
+                    f"breaker_open:{skipped}",
+                    decision.in_ab_bucket,
+                )
+                decision.metadata["breaker_skipped"] = skipped
+        hedge_model = self._hedge_model
+        if (
+            hedge_model
+            and hedge_model != decision.model_selected
+            # 只读检查：半开探测名额留给真正发起对冲的调用
+            and (health is None or not health.is_open(hedge_model))
+        ):
+            decision.metadata["hedge_model"] = hedge_model
+        return decision
+
     def _primary_decision(self, complexity: str, route_label: str, reason: str) -> RoutingDecision:
         return self._build(self._primary_model, route_label, complexity, reason, False)
 
@@ -13,12 +13,16 @@ import asyncio
 import logging
 from pathlib import Path
 import re
+import threading
 import time
 from typing import TYPE_CHECKING, Any
 
 from src.core.errors import get_user_message_by_code
 from src.core.intent import IntentResult, SkillMatch
 from src.core.types import SkillContext, SkillExecutionStatus, SkillResult
+from src.llm.scheduler import PRIORITY_SHADOW, llm_priority
+from src.utils.exceptions import LLMOverloadedError
+from src.utils.expiry import ExpiryIndex
 
 if TYPE_CHECKING:
     from src.core.router.llm_selector import LLMSelectionResult, LLMSkillSelector
@@ -304,8 +308,15 @@ class SkillRouter:
             return
 
         try:
-            llm_result = await self._llm_selector.select(user_message, context)
+            with llm_priority(PRIORITY_SHADOW):
+                llm_result = await self._llm_selector.select(user_message, context)
             self._log_shadow_comparison(user_message, rule_skill_name, llm_result)
+        except LLMOverloadedError as exc:
+            logger.info(
+                "Shadow LLM 对比被调度器丢弃: %s",
+                exc,
+                extra={"event_code": "router.shadow.shed"},
+            )
         except Exception as exc:
             logger.warning(
                 "Shadow LLM 对比异常: %s",
@@ -573,25 +584,34 @@ class ContextManager:
     
     功能:
         - 存储用户会话上下文 (SkillContext)
-        - 管理上下文生命周期 (TTL 过期清理)
+        - 管理上下文生命周期 (TTL 过期索引，清扫只触达到期项)
         - 记录最后一次技能执行结果 (用于多轮对话)
     """
 
     def __init__(self, ttl_minutes: int = 30) -> None:
         self._contexts: dict[str, SkillContext] = {}
-        self._timestamps: dict[str, float] = {}
+        self._expiry = ExpiryIndex()
+        self._lock = threading.Lock()
         self._ttl_seconds = ttl_minutes * 60
 
     def get(self, user_id: str) -> SkillContext | None:
-        ctx = self._contexts.get(user_id)
-        if ctx:
-
-            self._timestamps[user_id] = time.time()
+        now = time.time()
+        with self._lock:
+            ctx = self._contexts.get(user_id)
+            if ctx is None:
+                return None
+            deadline = self._expiry.deadline(user_id)
+            if deadline is not None and now > deadline:
+                self._contexts.pop(user_id, None)
+                self._expiry.discard(user_id)
+                return None
+            self._expiry.touch(user_id, now + self._ttl_seconds)
         return ctx
 
     def set(self, user_id: str, context: SkillContext) -> None:
-        self._contexts[user_id] = context
-        self._timestamps[user_id] = time.time()
+        with self._lock:
+            self._contexts[user_id] = context
+            self._expiry.touch(user_id, time.time() + self._ttl_seconds)
 
     def update_result(
         self,
@@ -604,22 +624,23 @@ class ContextManager:
         if ctx:
             ctx.last_skill = skill_name
             ctx.last_result = result
-            self._timestamps[user_id] = time.time()
+            with self._lock:
+                self._expiry.touch(user_id, time.time() + self._ttl_seconds)
 
     def clear(self, user_id: str) -> None:
-        self._contexts.pop(user_id, None)
-        self._timestamps.pop(user_id, None)
-
-    def cleanup_expired(self) -> None:
-        now = time.time()
-        expired_users = [
-            user_id
-            for user_id, ts in self._timestamps.items()
-            if now - ts > self._ttl_seconds
-        ]
-        for user_id in expired_users:
+        with self._lock:
             self._contexts.pop(user_id, None)
-            self._timestamps.pop(user_id, None)
+            self._expiry.discard(user_id)
+
+    def cleanup_expired(self, now: float | None = None) -> int:
+        """只清理过期索引中已到期的上下文，返回清理数量。"""
+        now = time.time() if now is None else now
+        with self._lock:
+            expired_users = [
+                user_id
+                for user_id in self._expiry.pop_expired(now)
+                if self._contexts.pop(user_id, None) is not None
+            ]
 
         if expired_users:
             logger.debug(
@@ -627,6 +648,7 @@ class ContextManager:
                 len(expired_users),
                 extra={"event_code": "router.context.cleanup"},
             )
+        return len(expired_users)
 
     def active_count(self) -> int:
         return len(self._contexts)
@@ -3,18 +3,22 @@
 主要功能:
     - 维护用户会话上下文
     - 管理消息历史 (Context Window)
-    - 自动清理过期会话
+    - 自动清理过期会话（过期索引 + 后台清扫）
 """
 
 from __future__ import annotations
 
 import logging
 import math
+import threading
+import time
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import Callable
+from typing import Callable, Deque
 
 from src.config import SessionSettings
+from src.utils.expiry import ExpiryIndex
 
 
 logger = logging.getLogger(__name__)
@@ -22,9 +26,16 @@ logger = logging.getLogger(__name__)
 
 @dataclass
 class Session:
-    """会话数据结构"""
+    """
+    会话数据结构
+
+    message_tokens 与 messages 一一对应，缓存每条消息的 token 估算；
+    token_total 为其累计值，裁剪时无需重新估算整段历史。
+    """
     user_id: str
-    messages: list[dict[str, str]] = field(default_factory=list)
+    messages: Deque[dict[str, str]] = field(default_factory=deque)
+    message_tokens: Deque[int] = field(default_factory=deque)
+    token_total: int = 0
     created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
     last_active: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
 
@@ -48,6 +59,8 @@ class SessionManager:
         """
         self._settings = settings
         self._sessions: dict[str, Session] = {}
+        self._expiry = ExpiryIndex()
+        self._lock = threading.Lock()
         self._expire_listeners: list[Callable[[str], None]] = []
 
     def register_expire_listener(self, listener: Callable[[str], None]) -> None:
@@ -55,12 +68,21 @@ class SessionManager:
         self._expire_listeners.append(listener)
 
     def get_or_create(self, user_id: str) -> Session:
-        """获取或创建会话"""
-        session = self._sessions.get(user_id)
-        if not session:
-            session = Session(user_id=user_id)
-            self._sessions[user_id] = session
-        session.last_active = datetime.now(timezone.utc)
+        """获取或创建会话（已过期的旧会话先按过期处理）"""
+        now = datetime.now(timezone.utc)
+        expired = False
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if session and now - session.last_active > self._ttl():
+                self._sessions.pop(user_id, None)
+                session = None
+                expired = True
+            if not session:
+                session = Session(user_id=user_id)
+                self._sessions[user_id] = session
+            self._touch(session, now)
+        if expired:
+            self._notify_expired([user_id])
         return session
 
     def add_message(self, user_id: str, role: str, content: str) -> None:
@@ -73,10 +95,14 @@ class SessionManager:
             content: 消息内容
         """
         session = self.get_or_create(user_id)
-        session.messages.append({"role": role, "content": content})
-        session.last_active = datetime.now(timezone.utc)
-        if len(session.messages) > self._settings.max_rounds * 2:
-            session.messages = session.messages[-self._settings.max_rounds * 2 :]
+        message = {"role": role, "content": content}
+        tokens = self._estimate_message_tokens(message)
+        session.messages.append(message)
+        session.message_tokens.append(tokens)
+        session.token_total += tokens
+        max_messages = self._settings.max_rounds * 2
+        while len(session.messages) > max_messages:
+            self._drop_oldest(session)
 
     def trim_context_to_token_budget(
         self,
@@ -84,17 +110,14 @@ class SessionManager:
         max_tokens: int,
         keep_recent_messages: int = 2,
     ) -> int:
-        """Trim oldest messages when estimated tokens exceed budget."""
+        """Trim oldest messages when estimated tokens exceed budget (O(removed))."""
         session = self.get_or_create(user_id)
         keep_recent_messages = max(0, keep_recent_messages)
         max_tokens = max(1, max_tokens)
 
         removed = 0
-        while (
-            len(session.messages) > keep_recent_messages
-            and self._estimate_messages_tokens(session.messages) > max_tokens
-        ):
-            session.messages.pop(0)
+        while len(session.messages) > keep_recent_messages and session.token_total > max_tokens:
+            self._drop_oldest(session)
             removed += 1
 
         if removed > 0:
@@ -110,8 +133,9 @@ class SessionManager:
             )
         return removed
 
-    def _estimate_messages_tokens(self, messages: list[dict[str, str]]) -> int:
-        return sum(self._estimate_message_tokens(message) for message in messages)
+    def _drop_oldest(self, session: Session) -> None:
+        session.messages.popleft()
+        session.token_total -= session.message_tokens.popleft()
 
     def _estimate_message_tokens(self, message: dict[str, str]) -> int:
         role = str(message.get("role", "")).strip()
@@ -125,17 +149,49 @@ class SessionManager:
         session = self.get_or_create(user_id)
         return list(session.messages)
 
-    def cleanup_expired(self) -> None:
-        """清理过期会话"""
-        ttl = timedelta(minutes=self._settings.ttl_minutes)
-        now = datetime.now(timezone.utc)
-        expired = [
-            user_id
-            for user_id, session in self._sessions.items()
-            if now - session.last_active > ttl
-        ]
-        for user_id in expired:
-            self._sessions.pop(user_id, None)
+    def active_count(self) -> int:
+        """当前会话数（O(1)，含尚未被清扫的过期会话）"""
+        return len(self._sessions)
+
+    def cleanup_expired(self, now: float | None = None) -> int:
+        """
+        清理过期会话
+
+        只处理过期索引中已到期的会话，并对每个会话复核 last_active。
+
+        参数:
+            now: 当前时间戳（秒），默认取系统时间
+        返回:
+            int: 清理的会话数
+        """
+        now_ts = time.time() if now is None else now
+        now_dt = datetime.fromtimestamp(now_ts, tz=timezone.utc)
+        ttl = self._ttl()
+        expired: list[str] = []
+        with self._lock:
+            for user_id in self._expiry.pop_expired(now_ts):
+                session = self._sessions.get(user_id)
+                if session is None:
+                    continue
+                if now_dt - session.last_active > ttl:
+                    self._sessions.pop(user_id, None)
+                    expired.append(user_id)
+                else:
+                    self._touch(session)
+        self._notify_expired(expired)
+        return len(expired)
+
+    def _ttl(self) -> timedelta:
+        return timedelta(minutes=self._settings.ttl_minutes)
+
+    def _touch(self, session: Session, now: datetime | None = None) -> None:
+        if now is not None:
+            session.last_active = now
+        deadline = session.last_active.timestamp() + self._ttl().total_seconds()
+        self._expiry.touch(session.user_id, deadline)
+
+    def _notify_expired(self, user_ids: list[str]) -> None:
+        for user_id in user_ids:
             for listener in self._expire_listeners:
                 try:
                     listener(user_id)
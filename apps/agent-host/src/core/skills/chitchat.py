@@ -16,6 +16,8 @@ from typing import Any
 
 import yaml
 
+from src.core.reply_stream import chat_with_reply_stream
+from src.llm.usage_ledger import llm_stage
 from src.core.skills.base import BaseSkill
 from src.core.skills.metadata import SkillMetadataLoader
 from src.core.types import SkillContext, SkillResult
@@ -197,8 +199,9 @@ class ChitchatSkill(BaseSkill):
                 {"role": "user", "content": query},
             ]
             
-            # 调用 LLM
-            response = await self._llm_client.chat(messages)
+            # 调用 LLM（请求挂载了流式 sink 时边生成边推送）
+            with llm_stage("chitchat"):
+                response = await chat_with_reply_stream(self._llm_client, messages)
             reply_text = response if isinstance(response, str) else response.get("content", "")
             
             if not reply_text:
@@ -4,13 +4,19 @@
     - 结构化查询结果汇总
     - 案件记录/文档搜索结果聚合
     - 调用 LLM 生成自然语言摘要
+    - 大结果集按 token 预算分块 map-reduce 汇总，并附带本地统计（状态/法院/阶段）
 """
 
 from __future__ import annotations
 
+import asyncio
+from collections import Counter
 import logging
+import math
 from typing import Any
 
+from src.core.reply_stream import chat_with_reply_stream
+from src.llm.usage_ledger import llm_stage
 from src.core.skills.base import BaseSkill
 from src.core.router import SkillContext, SkillResult
 
@@ -40,6 +46,13 @@ class SummarySkill(BaseSkill):
     # 触发扩展的关键词
     EXTEND_TRIGGERS = ["详细", "完整", "全部", "所有"]
 
+    # 本地预聚合维度：展示名 -> 候选字段名
+    AGGREGATE_DIMENSIONS: dict[str, list[str]] = {
+        "案件状态": ["案件状态", "状态"],
+        "审理法院": ["审理法院", "法院", "管辖法院"],
+        "程序阶段": ["程序阶段", "阶段", "审理程序"],
+    }
+
     def __init__(
         self,
         llm_client: Any = None,
@@ -66,6 +79,11 @@ class SummarySkill(BaseSkill):
         self._llm_timeout = float(
             summary_cfg.get("llm_timeout", intent_cfg.get("llm_timeout", 10))
         )
+        map_reduce_cfg = summary_cfg.get("map_reduce", {}) or {}
+        self._map_reduce_enabled = bool(map_reduce_cfg.get("enabled", True))
+        self._chunk_token_budget = max(200, int(map_reduce_cfg.get("chunk_token_budget", 1500)))
+        self._map_concurrency = max(1, int(map_reduce_cfg.get("max_concurrency", 4)))
+        self._aggregate_top_n = max(1, int(map_reduce_cfg.get("aggregate_top_n", 8)))
 
     async def execute(self, context: SkillContext) -> SkillResult:
         """
@@ -161,6 +179,7 @@ class SummarySkill(BaseSkill):
         
         # 生成汇总文本
         count = len(summary_data)
+        aggregates = self._pre_aggregate(records)
         
         if self._llm:
             # 使用 LLM 生成自然语言摘要
@@ -170,6 +189,7 @@ class SummarySkill(BaseSkill):
                 soul_prompt=soul_prompt,
                 user_memory=user_memory,
                 shared_memory=shared_memory,
+                aggregates_text=self._format_aggregates(aggregates, len(records)),
             )
         else:
             # 简单模板汇总
@@ -184,7 +204,7 @@ class SummarySkill(BaseSkill):
         return SkillResult(
             success=True,
             skill_name=self.name,
-            data={"summary": summary_data, "total": count},
+            data={"summary": summary_data, "total": count, "aggregates": aggregates},
             message=f"已汇总 {count} 条案件",
             reply_type="text",
             reply_text=reply_text,
@@ -225,6 +245,55 @@ class SummarySkill(BaseSkill):
             lines.append(" | ".join(parts))
         return "\n".join(lines)
 
+    def _pre_aggregate(self, records: list[dict[str, Any]]) -> dict[str, dict[str, int]]:
+        """本地确定性统计：按状态/法院/阶段计数（不依赖 LLM）。"""
+        counters: dict[str, Counter[str]] = {name: Counter() for name in self.AGGREGATE_DIMENSIONS}
+        for record in records:
+            fields = record.get("fields_text") or record.get("fields", {})
+            if not isinstance(fields, dict):
+                continue
+            for name, aliases in self.AGGREGATE_DIMENSIONS.items():
+                value = next((str(fields[alias]).strip() for alias in aliases if fields.get(alias)), "")
+                if value:
+                    counters[name][value] += 1
+        return {
+            name: dict(counter.most_common(self._aggregate_top_n))
+            for name, counter in counters.items()
+            if counter
+        }
+
+    @staticmethod
+    def _format_aggregates(aggregates: dict[str, dict[str, int]], total: int) -> str:
+        if not aggregates:
+            return ""
+        lines = [f"共 {total} 条"]
+        for name, counts in aggregates.items():
+            lines.append(f"{name}：" + "、".join(f"{value} {count} 条" for value, count in counts.items()))
+        return "\n".join(lines)
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """粗略估算 token：中日韩字符按 1 个计，其余按 4 字符 1 个计。"""
+        cjk = sum(1 for ch in text if "\u2e80" <= ch <= "\u9fff" or "\uf900" <= ch <= "\ufaff")
+        return cjk + math.ceil((len(text) - cjk) / 4)
+
+    def _partition_by_budget(self, data: list[dict[str, Any]]) -> list[list[str]]:
+        """按 token 预算把记录行贪心装箱；单条超预算的记录独占一块。"""
+        chunks: list[list[str]] = []
+        current: list[str] = []
+        used = 0
+        for item in data:
+            line = f"- {item}"
+            cost = self._estimate_tokens(line)
+            if current and used + cost > self._chunk_token_budget:
+                chunks.append(current)
+                current, used = [], 0
+            current.append(line)
+            used += cost
+        if current:
+            chunks.append(current)
+        return chunks
+
     async def _llm_summarize(
         self,
         data: list[dict[str, Any]],
@@ -232,13 +301,23 @@ class SummarySkill(BaseSkill):
         soul_prompt: str = "",
         user_memory: str = "",
         shared_memory: str = "",
+        aggregates_text: str = "",
     ) -> str:
-        """调用 LLM 生成自然语言摘要"""
+        """调用 LLM 生成自然语言摘要（超出单块预算时走 map-reduce）"""
         try:
-            # 构建数据描述
-            data_desc = "\n".join(
-                f"- {item}" for item in data[:10]  # 限制数量避免 token 过多
-            )
+            chunks = self._partition_by_budget(data) if self._map_reduce_enabled else []
+            partial_summaries: list[str] = []
+            if len(chunks) > 1:
+                partial_summaries = await self._map_chunks(chunks, query)
+                data_label = "分块摘要"
+                data_desc = "\n\n".join(
+                    f"[第 {i} 组]\n{text}" for i, text in enumerate(partial_summaries, start=1)
+                )
+            else:
+                data_label = "案件数据"
+                data_desc = "\n".join(chunks[0]) if chunks else "\n".join(
+                    f"- {item}" for item in data[:10]  # 限制数量避免 token 过多
+                )
 
             memory_notes = []
             if user_memory:
@@ -248,13 +327,14 @@ class SummarySkill(BaseSkill):
             memory_block = "\n\n".join(memory_notes)
             if memory_block:
                 memory_block = f"\n\n参考记忆：\n{memory_block}"
+            aggregates_block = f"\n\n整体统计（已本地精确计算，可直接引用）：\n{aggregates_text}" if aggregates_text else ""
             
             prompt = f"""请根据以下案件数据，用简洁的中文生成汇总摘要。
 
 用户问题：{query}
 
-案件数据：
-{data_desc}
+{data_label}：
+{data_desc}{aggregates_block}
 {memory_block}
 
 要求：
@@ -267,15 +347,70 @@ class SummarySkill(BaseSkill):
             if soul_prompt:
                 system_prompt = f"{soul_prompt.strip()}\n\n{system_prompt}"
 
-            response = await self._llm.chat([
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt},
-            ], timeout=self._llm_timeout)
-            return response or self._template_summarize(data, self._default_fields)
+            with llm_stage("summary"):
+                response = await chat_with_reply_stream(self._llm, [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt},
+                ], timeout=self._llm_timeout)
+            if response:
+                return response
+            if partial_summaries:
+                return "\n".join(partial_summaries)
+            return self._template_summarize(data, self._default_fields)
         except Exception as e:
             logger.warning(f"LLM summarize failed: {e}")
             return self._template_summarize(data, self._default_fields)
 
+    async def _map_chunks(self, chunks: list[list[str]], query: str) -> list[str]:
+        """并发生成分块摘要（受并发上限约束）；单块失败时保留该块前几条原始记录。"""
+        semaphore = asyncio.Semaphore(self._map_concurrency)
+
+        async def _map_one(index: int, lines: list[str]) -> str:
+            prompt = f"""以下是一批案件记录（第 {index}/{len(chunks)} 批，共 {len(lines)} 条），请提炼要点。
+
+用户问题：{query}
+
+案件记录：
+{chr(10).join(lines)}
+
+要求：
+1. 保留案号、当事人、开庭时间等关键信息
+2. 相似案件合并描述，不逐条罗列
+3. 控制在 150 字以内"""
+            async with semaphore:
+                try:
+                    # 沿用调用方优先级（用户等待中的摘要为交互流量）；并发由 semaphore 限制
+                    with llm_stage("summary_map"):
+                        text = await self._llm.chat(
+                            [
+                                {"role": "system", "content": "你是一个专业的律师助理。"},
+                                {"role": "user", "content": prompt},
+                            ],
+                            timeout=self._llm_timeout,
+                        )
+                    if text:
+                        return str(text).strip()
+                except Exception as exc:
+                    logger.warning(
+                        "分块摘要失败，保留原始记录: %s",
+                        exc,
+                        extra={"event_code": "summary.map_chunk_failed", "chunk": index},
+                    )
+                return "\n".join(lines[:5])
+
+        started = asyncio.get_running_loop().time()
+        results = await asyncio.gather(*(_map_one(i, lines) for i, lines in enumerate(chunks, start=1)))
+        logger.info(
+            "分块摘要完成",
+            extra={
+                "event_code": "summary.map_reduce",
+                "chunks": len(chunks),
+                "records": sum(len(lines) for lines in chunks),
+                "duration_ms": int((asyncio.get_running_loop().time() - started) * 1000),
+            },
+        )
+        return list(results)
+
     async def _summarize_docs(
         self,
         documents: list[dict[str, Any]],
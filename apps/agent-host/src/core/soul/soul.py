@@ -3,14 +3,16 @@
 主要功能:
     - 加载 SOUL.md 和 IDENTITY.md 配置
     - 构建 LLM System Prompt
-    - 支持配置文件的热重载
+    - 支持配置文件的热重载（文件未变化时不重复读盘）
 """
 
 from __future__ import annotations
 
+import asyncio
 import time
 from pathlib import Path
 
+from src.utils.file_cache import FileContentCache
 from src.utils.workspace import ensure_workspace, get_workspace_root
 
 
@@ -40,6 +42,7 @@ class SoulManager:
         self._last_load = 0.0
         self._soul_text = ""
         self._identity_text = ""
+        self._file_cache = FileContentCache(max_entries=4)
         self._load(force=True)
 
     def get_soul(self) -> str:
@@ -55,22 +58,31 @@ class SoulManager:
     def build_system_prompt(self) -> str:
         """构建完整的系统提示词 (Identity + Soul)"""
         self._load()
+        return self._compose_prompt()
+
+    async def abuild_system_prompt(self) -> str:
+        """build_system_prompt 的异步版本：需要重载时在线程池中读盘"""
+        if self._reload_due(time.time()):
+            await asyncio.to_thread(self._load)
+        return self._compose_prompt()
+
+    def _compose_prompt(self) -> str:
         parts = [self._identity_text.strip(), self._soul_text.strip()]
         return "\n\n".join([p for p in parts if p])
 
+    def _reload_due(self, now: float) -> bool:
+        return now - self._last_load >= self._reload_interval
+
     def _load(self, force: bool = False) -> None:
         """加载配置文件 (带缓存检查)"""
         now = time.time()
-        if not force and now - self._last_load < self._reload_interval:
+        if not force and not self._reload_due(now):
             return
 
         self._soul_text = self._read_file(self._soul_path)
         self._identity_text = self._read_file(self._identity_path)
         self._last_load = now
 
-    @staticmethod
-    def _read_file(path: Path) -> str:
-        if not path.exists():
-            return ""
-        return path.read_text(encoding="utf-8")
+    def _read_file(self, path: Path) -> str:
+        return self._file_cache.read_text(path)
 # endregion
@@ -4,6 +4,8 @@ from src.core.state.manager import ConversationStateManager
 from src.core.state.factory import create_state_store
 from src.core.state.memory_store import MemoryStateStore
 from src.core.state.redis_store import RedisStateStore
+from src.core.state.record_cache import RecordCache
+from src.core.state.unit_of_work import StateUnitOfWork
 from src.core.state.midterm_memory_store import (
     MidtermMemoryItem,
     RuleSummaryExtractor,
@@ -23,6 +25,8 @@ from src.core.state.models import (
 
 __all__ = [
     "ConversationStateManager",
+    "StateUnitOfWork",
+    "RecordCache",
     "create_state_store",
     "MemoryStateStore",
     "RedisStateStore",
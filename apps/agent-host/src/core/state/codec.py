@@ -0,0 +1,169 @@
+"""
+描述: 会话状态编解码（带版本号的位置编码）
+主要功能:
+    - 每个模型一组显式字段元组，编码为 [版本号, 字段值...]，不经 asdict 递归
+    - orjson 可用时用 orjson，否则回退标准库 json
+    - 兼容解码 v1（asdict 生成的 JSON 对象）
+    - 其他版本号（滚动发布中新/旧实例写入的数据）抛出 UnknownCodecVersionError，与损坏数据区分
+
+说明:
+    - 字段元组只能在末尾追加（新字段需有默认值）；删改或调序必须提升 CODEC_VERSION
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable
+
+from src.core.state.models import (
+    ActiveRecordState,
+    ConversationState,
+    LastResultState,
+    MessageChunkState,
+    OperationEntry,
+    PaginationState,
+    PendingActionState,
+    PendingDeleteState,
+)
+
+try:  # pragma: no cover - 依赖是否安装由环境决定
+    import orjson
+
+    def _dumps(value: Any) -> bytes | str:
+        # 与标准库一致：非字符串键（如 int）转为字符串而不是报错
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+    _loads: Callable[[str | bytes], Any] = orjson.loads
+except ImportError:  # pragma: no cover - 依赖是否安装由环境决定
+
+    def _dumps(value: Any) -> bytes | str:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+    _loads = json.loads
+
+
+CODEC_VERSION = 2
+
+
+class UnknownCodecVersionError(ValueError):
+    """数据由其他版本的编码写入，本实例无法解析；数据本身未损坏，不应删除。"""
+
+    def __init__(self, version: Any) -> None:
+        super().__init__(f"unsupported state codec version: {version!r}")
+        self.version = version
+
+CORE_FIELDS = (
+    "user_id",
+    "created_at",
+    "updated_at",
+    "expires_at",
+    "last_result_ids",
+    "active_table_id",
+    "active_table_name",
+    "extras",
+    "revision",
+)
+OPERATION_FIELDS = ("index", "payload", "status", "error_code", "error_detail", "executed_at")
+SUBSTATE_FIELDS: dict[type, tuple[str, ...]] = {
+    PendingDeleteState: ("record_id", "record_summary", "table_id", "created_at", "expires_at"),
+    PaginationState: ("tool", "params", "page_token", "current_page", "total", "created_at", "expires_at"),
+    LastResultState: (
+        "records",
+        "record_ids",
+        "query_summary",
+        "created_at",
+        "expires_at",
+        "table_id",
+        "table_name",
+        "query_meta",
+        "compact",
+    ),
+    ActiveRecordState: (
+        "record_id",
+        "record_summary",
+        "table_id",
+        "table_name",
+        "record",
+        "source",
+        "created_at",
+        "expires_at",
+    ),
+    PendingActionState: ("action", "payload", "operations", "status", "created_at", "expires_at"),
+    MessageChunkState: ("segments", "started_at", "last_at"),
+}
+
+
+# region 编码
+def encode_core(state: ConversationState) -> bytes | str:
+    return _dumps([CODEC_VERSION, *(getattr(state, name) for name in CORE_FIELDS)])
+
+
+def encode_substate(value: Any) -> bytes | str:
+    names = SUBSTATE_FIELDS[type(value)]
+    row: list[Any] = [CODEC_VERSION]
+    for name in names:
+        item = getattr(value, name)
+        if name == "operations":
+            item = [_operation_row(entry) for entry in item]
+        elif name == "status":
+            item = getattr(item, "value", item)
+        row.append(item)
+    return _dumps(row)
+
+
+def _operation_row(entry: OperationEntry) -> list[Any]:
+    return [
+        entry.index,
+        entry.payload,
+        entry.status.value,
+        entry.error_code,
+        entry.error_detail,
+        entry.executed_at,
+    ]
+
+
+# endregion
+
+
+# region 解码
+def decode_core(raw: str | bytes | None) -> dict[str, Any] | None:
+    """core 字段 -> 构造参数；无法识别返回 None。"""
+    if not raw:
+        return None
+    data = _loads(raw)
+    _check_version(data)
+    if isinstance(data, list) and data and data[0] == CODEC_VERSION:
+        return dict(zip(CORE_FIELDS, data[1:]))
+    if isinstance(data, dict):
+        return data
+    return None
+
+
+def decode_substate(model: type, raw: str | bytes | None) -> Any:
+    if not raw:
+        return None
+    data = _loads(raw)
+    _check_version(data)
+    if isinstance(data, list) and data and data[0] == CODEC_VERSION:
+        values = data[1:]
+        if model is PendingActionState and len(values) > 2 and isinstance(values[2], list):
+            values = list(values)
+            values[2] = [
+                OperationEntry(*row) if isinstance(row, list) else row
+                for row in values[2]
+            ]
+        return model(*values)
+    if isinstance(data, dict):
+        return model(**data)
+    return None
+
+
+def _check_version(data: Any) -> None:
+    if not isinstance(data, list) or not data:
+        return
+    version = data[0]
+    if isinstance(version, int) and not isinstance(version, bool) and version != CODEC_VERSION:
+        raise UnknownCodecVersionError(version)
+
+
+# endregion
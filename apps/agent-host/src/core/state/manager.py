@@ -4,12 +4,18 @@
 职责：
 - 管理短生命周期对话状态（删除确认、分页、最近结果）
 - 提供统一读写接口，便于后续替换为 Redis 实现
+- 提供请求级工作单元（unit_of_work），请求内读写走内存，结束时一次回写
+- 异步入口（aunit_of_work / acleanup_expired）把阻塞的存储 I/O 放到线程池，不占用事件循环
+- last_result 可选 compact 模式：只存记录引用与展示投影，完整记录按需回填
 """
 
 from __future__ import annotations
 
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+import logging
 import time
-from typing import Any, cast
+from typing import Any, AsyncIterator, Callable, Iterator, TypeVar, cast
 
 from src.core.state.models import (
     ActiveRecordState,
@@ -22,13 +28,39 @@ from src.core.state.models import (
     PaginationState,
     PendingDeleteState,
 )
+from src.core.state.memory_store import MemoryStateStore
+from src.core.state.record_cache import RecordCache, compact_record, is_compact
 from src.core.state.store import StateStore
+from src.core.state.unit_of_work import (
+    StateUnitOfWork,
+    bind_unit_of_work,
+    get_unit_of_work,
+    unbind_unit_of_work,
+)
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+_ALL_ATTRS = (
+    "pending_delete",
+    "pagination",
+    "last_result",
+    "last_result_ids",
+    "active_table_id",
+    "active_table_name",
+    "active_record",
+    "pending_action",
+    "message_chunk",
+    "extras",
+)
 
 
 class ConversationStateManager:
     """会话状态管理器（基于 StateStore）。"""
 
     CHUNK_STALE_SECONDS = 9.0
+    FLUSH_MAX_RETRIES = 2
 
     @staticmethod
     def _resolve_pending_action_status(action: str, payload: dict[str, Any]) -> PendingActionStatus:
@@ -71,44 +103,93 @@ class ConversationStateManager:
         last_result_ttl_seconds: int = 600,
         active_record_ttl_seconds: int = 1800,
         pending_action_ttl_seconds: int = 300,
+        last_result_mode: str = "full",
+        record_cache: RecordCache | None = None,
     ) -> None:
         self._store = store
+        # 进程内存储只是加锁的 dict，无需切线程；Redis 等网络存储的同步调用会阻塞事件循环
+        self._offload_io = not isinstance(store, MemoryStateStore)
         self._default_ttl = default_ttl_seconds
         self._pending_delete_ttl = pending_delete_ttl_seconds
         self._pagination_ttl = pagination_ttl_seconds
         self._last_result_ttl = last_result_ttl_seconds
         self._active_record_ttl = active_record_ttl_seconds
         self._pending_action_ttl = pending_action_ttl_seconds
+        mode = str(last_result_mode or "full").strip().lower()
+        self._compact_last_result = mode == "compact"
+        self._record_cache = record_cache if record_cache is not None else (
+            RecordCache() if self._compact_last_result else None
+        )
+
+    @property
+    def compact_last_result(self) -> bool:
+        return self._compact_last_result
+
+    @property
+    def record_cache(self) -> RecordCache | None:
+        return self._record_cache
 
     def active_count(self) -> int:
         return self._store.active_count()
 
-    def cleanup_expired(self) -> None:
-        self._store.cleanup_expired()
+    def cleanup_expired(self) -> int:
+        return int(self._store.cleanup_expired() or 0)
+
+    async def aactive_count(self) -> int:
+        return await self._run_io(self.active_count)
+
+    async def acleanup_expired(self) -> int:
+        return await self._run_io(self.cleanup_expired)
+
+    async def _run_io(self, func: Callable[..., _T], *args: Any) -> _T:
+        if not self._offload_io:
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
 
     def get_state(self, user_id: str) -> ConversationState:
+        unit = self._active_unit(user_id)
+        if unit is not None and unit.state is not None:
+            return unit.state
+
+        state, loaded_revision, changed = self._load_state(user_id)
+        if unit is not None:
+            unit.attach(state, loaded_revision, changed)
+            return state
+        state.revision = loaded_revision + 1
+        self._store.set(user_id, state)
+        return state
+
+    def _load_state(self, user_id: str) -> tuple[ConversationState, int, set[str]]:
+        """读取并完成子状态过期清理；返回 (状态, 读取时 revision, 被清理/刷新的属性)。"""
         now = time.time()
         state = self._store.get(user_id)
         if state is None or state.is_expired(now):
+            # 过期状态的 revision 延续下去，回写时的并发校验才能对上
+            revision = state.revision if state is not None else 0
             state = ConversationState(
                 user_id=user_id,
                 created_at=now,
                 updated_at=now,
                 expires_at=now + self._default_ttl,
+                revision=revision,
             )
-            self._store.set(user_id, state)
-            return state
+            return state, revision, set(_ALL_ATTRS)
 
+        changed: set[str] = set()
         # 子状态过期清理
         if state.pending_delete and state.pending_delete.is_expired(now):
             state.pending_delete = None
+            changed.add("pending_delete")
         if state.pagination and state.pagination.is_expired(now):
             state.pagination = None
+            changed.add("pagination")
         if state.last_result and state.last_result.is_expired(now):
             state.last_result = None
             state.last_result_ids = []
+            changed.update(("last_result", "last_result_ids"))
         if state.active_record and state.active_record.is_expired(now):
             state.active_record = None
+            changed.add("active_record")
         if state.pending_action and state.pending_action.is_expired(now):
             # S2: 用状态机迁移而非直接清空，保留 INVALIDATED 记录
             if state.pending_action.status in {
@@ -131,17 +212,142 @@ class ConversationStateManager:
             )
             state.extras["pending_action_history"] = pending_history[-20:]
             state.pending_action = None
+            changed.update(("pending_action", "extras"))
 
         state.updated_at = now
         state.expires_at = max(state.expires_at, now + self._default_ttl)
+        return state, state.revision, changed
+
+    # region 请求级工作单元
+    @contextmanager
+    def unit_of_work(self, user_id: str) -> Iterator[StateUnitOfWork]:
+        """
+        请求级工作单元：状态只读取一次，修改在退出时合并为一次回写。
+
+        同一会话嵌套进入时复用外层单元；其他会话的读写不受影响，照常直达存储。
+        """
+        current = get_unit_of_work()
+        if current is not None and current.covers(self, user_id):
+            yield current
+            return
+
+        unit = StateUnitOfWork(session_key=user_id, owner=self)
+        token = bind_unit_of_work(unit)
+        try:
+            yield unit
+        finally:
+            unbind_unit_of_work(token)
+            unit.closed = True
+            self._flush(unit)
+
+    @asynccontextmanager
+    async def aunit_of_work(self, user_id: str) -> AsyncIterator[StateUnitOfWork]:
+        """
+        unit_of_work 的异步版本：进入时预读状态、退出时回写，两次存储 I/O 都在线程池中完成。
+
+        请求内的读写命中已预读的状态，不再访问存储，因此不会阻塞事件循环。
+        """
+        current = get_unit_of_work()
+        if current is not None and current.covers(self, user_id):
+            yield current
+            return
+
+        unit = StateUnitOfWork(session_key=user_id, owner=self)
+        try:
+            unit.attach(*await self._run_io(self._load_state, user_id))
+        except Exception:
+            # 预读失败不阻断请求，首次访问时按同步路径重试
+            logger.warning(
+                "会话状态预读失败",
+                extra={"event_code": "state.unit_of_work.preload_failed", "session_key": user_id},
+                exc_info=True,
+            )
+        token = bind_unit_of_work(unit)
+        try:
+            yield unit
+        finally:
+            unbind_unit_of_work(token)
+            unit.closed = True
+            await self._run_io(self._flush, unit)
+
+    def _active_unit(self, user_id: str) -> StateUnitOfWork | None:
+        unit = get_unit_of_work()
+        if unit is not None and unit.covers(self, user_id):
+            return unit
+        return None
+
+    def _save(self, user_id: str, state: ConversationState, *attrs: str) -> None:
+        unit = self._active_unit(user_id)
+        if unit is not None and unit.state is state:
+            unit.mark(attrs)
+            return
+        state.revision += 1
         self._store.set(user_id, state)
-        return state
+
+    def _flush(self, unit: StateUnitOfWork) -> None:
+        state = unit.state
+        if state is None:
+            return
+        key = unit.session_key
+        compare_and_set = getattr(self._store, "compare_and_set", None)
+        try:
+            if not callable(compare_and_set):
+                state.revision = unit.loaded_revision + 1
+                self._store.set(key, state)
+                unit.stats.store_writes += 1
+                return
+
+            expected = unit.loaded_revision
+            for _ in range(self.FLUSH_MAX_RETRIES + 1):
+                unit.stats.store_writes += 1
+                if compare_and_set(key, state, expected, fields=sorted(unit.dirty)):
+                    return
+                unit.stats.conflicts += 1
+                state, expected = self._rebase(key, state, unit.dirty)
+
+            logger.warning(
+                "会话状态回写冲突重试耗尽，按最后写入覆盖",
+                extra={
+                    "event_code": "state.unit_of_work.conflict_overwrite",
+                    "session_key": key,
+                    "conflicts": unit.stats.conflicts,
+                },
+            )
+            state.revision = expected + 1
+            self._store.set(key, state)
+        except Exception:
+            logger.exception(
+                "会话状态回写失败",
+                extra={"event_code": "state.unit_of_work.flush_failed", "session_key": key},
+            )
+
+    def _rebase(
+        self,
+        key: str,
+        ours: ConversationState,
+        dirty: set[str],
+    ) -> tuple[ConversationState, int]:
+        """并发写入冲突：在最新状态上重放本请求修改过的属性。"""
+        latest = self._store.get(key)
+        if latest is None or latest.is_expired(time.time()):
+            return ours, latest.revision if latest is not None else 0
+        if latest is not ours:
+            for attr in dirty:
+                setattr(latest, attr, getattr(ours, attr))
+            latest.updated_at = max(latest.updated_at, ours.updated_at)
+            latest.expires_at = max(latest.expires_at, ours.expires_at)
+        return latest, latest.revision
+
+    # endregion
 
     def get_state_by_session_key(self, session_key: str) -> ConversationState:
         """session_key 语义入口（兼容旧 get_state）。"""
         return self.get_state(session_key)
 
     def clear_user(self, user_id: str) -> None:
+        unit = self._active_unit(user_id)
+        if unit is not None:
+            unit.reset()
         self._store.delete(user_id)
 
     def clear_session(self, session_key: str) -> None:
@@ -165,7 +371,7 @@ class ConversationStateManager:
             expires_at=now + self._pending_delete_ttl,
         )
         state.updated_at = now
-        self._store.set(user_id, state)
+        self._save(user_id, state, "pending_delete")
 
     def get_pending_delete(self, user_id: str) -> PendingDeleteState | None:
         state = self.get_state(user_id)
@@ -175,9 +381,17 @@ class ConversationStateManager:
         state = self.get_state(user_id)
         state.pending_delete = None
         state.updated_at = time.time()
-        self._store.set(user_id, state)
+        self._save(user_id, state, "pending_delete")
 
-    def set_last_result(self, user_id: str, records: list[dict[str, Any]], query_summary: str) -> None:
+    def set_last_result(
+        self,
+        user_id: str,
+        records: list[dict[str, Any]],
+        query_summary: str,
+        table_id: str | None = None,
+        table_name: str | None = None,
+        query_meta: dict[str, Any] | None = None,
+    ) -> None:
         now = time.time()
         state = self.get_state(user_id)
         record_ids: list[str] = []
@@ -185,16 +399,26 @@ class ConversationStateManager:
             rid = item.get("record_id")
             if isinstance(rid, str) and rid:
                 record_ids.append(rid)
+        stored_records = records
+        if self._compact_last_result:
+            # 完整记录只进进程内 LRU，状态里保留紧凑引用
+            if self._record_cache is not None:
+                self._record_cache.put_many(records)
+            stored_records = [compact_record(item) for item in records]
         state.last_result = LastResultState(
-            records=records,
+            records=stored_records,
             record_ids=record_ids,
             query_summary=query_summary,
             created_at=now,
             expires_at=now + self._last_result_ttl,
+            table_id=table_id,
+            table_name=table_name,
+            query_meta=dict(query_meta) if isinstance(query_meta, dict) else {},
+            compact=self._compact_last_result,
         )
         state.last_result_ids = record_ids
         state.updated_at = now
-        self._store.set(user_id, state)
+        self._save(user_id, state, "last_result", "last_result_ids")
 
     def get_last_result(self, user_id: str) -> LastResultState | None:
         state = self.get_state(user_id)
@@ -221,7 +445,7 @@ class ConversationStateManager:
             expires_at=now + self._pagination_ttl,
         )
         state.updated_at = now
-        self._store.set(user_id, state)
+        self._save(user_id, state, "pagination")
 
     def get_pagination(self, user_id: str) -> PaginationState | None:
         state = self.get_state(user_id)
@@ -231,23 +455,44 @@ class ConversationStateManager:
         state = self.get_state(user_id)
         state.pagination = None
         state.updated_at = time.time()
-        self._store.set(user_id, state)
+        self._save(user_id, state, "pagination")
 
     def get_last_result_payload(self, user_id: str) -> dict[str, Any] | None:
         last_result = self.get_last_result(user_id)
         if not last_result:
             return None
-        return {
-            "records": last_result.records,
+        records = last_result.records
+        if last_result.compact:
+            records, _ = self.rehydrate_records(records)
+        payload: dict[str, Any] = {
+            "records": records,
             "record_ids": last_result.record_ids,
             "query_summary": last_result.query_summary,
         }
+        if last_result.table_id:
+            payload["table_id"] = last_result.table_id
+        if last_result.table_name:
+            payload["table_name"] = last_result.table_name
+        if last_result.query_meta:
+            payload["query_meta"] = last_result.query_meta
+        return payload
+
+    def rehydrate_records(self, records: list[Any]) -> tuple[list[Any], list[str]]:
+        """用进程内 LRU 回填紧凑记录；返回 (记录, 未命中的 record_id)。"""
+        if self._record_cache is None:
+            return records, [str(item.get("record_id") or "") for item in records if is_compact(item)]
+        return self._record_cache.rehydrate(records)
+
+    def remember_records(self, records: list[dict[str, Any]]) -> None:
+        """外部（如 MCP 批量拉取）取回的完整记录写入 LRU。"""
+        if self._record_cache is not None:
+            self._record_cache.put_many(records)
 
     def set_last_skill(self, user_id: str, skill_name: str) -> None:
         state = self.get_state(user_id)
         state.extras["last_skill"] = skill_name
         state.updated_at = time.time()
-        self._store.set(user_id, state)
+        self._save(user_id, state, "extras")
 
     def get_last_skill(self, user_id: str) -> str | None:
         state = self.get_state(user_id)
@@ -267,7 +512,7 @@ class ConversationStateManager:
         if merged:
             state.extras["reply_preferences"] = merged
             state.updated_at = time.time()
-            self._store.set(user_id, state)
+            self._save(user_id, state, "extras")
 
     def get_reply_preferences(self, user_id: str) -> dict[str, str]:
         state = self.get_state(user_id)
@@ -286,7 +531,7 @@ class ConversationStateManager:
         state.active_table_id = str(table_id).strip() if table_id else None
         state.active_table_name = str(table_name).strip() if table_name else None
         state.updated_at = time.time()
-        self._store.set(user_id, state)
+        self._save(user_id, state, "active_table_id", "active_table_name")
 
     def get_active_table(self, user_id: str) -> dict[str, str | None]:
         state = self.get_state(user_id)
@@ -300,7 +545,7 @@ class ConversationStateManager:
         state.active_table_id = None
         state.active_table_name = None
         state.updated_at = time.time()
-        self._store.set(user_id, state)
+        self._save(user_id, state, "active_table_id", "active_table_name")
 
     def set_active_record(
         self,
@@ -341,13 +586,13 @@ class ConversationStateManager:
         if table_name:
             state.active_table_name = table_name
         state.updated_at = now
-        self._store.set(user_id, state)
+        self._save(user_id, state, "active_record", "active_table_id", "active_table_name")
 
     def clear_active_record(self, user_id: str) -> None:
         state = self.get_state(user_id)
         state.active_record = None
         state.updated_at = time.time()
-        self._store.set(user_id, state)
+        self._save(user_id, state, "active_record")
 
     def get_active_record(self, user_id: str) -> ActiveRecordState | None:
         state = self.get_state(user_id)
@@ -367,7 +612,7 @@ class ConversationStateManager:
         if chunk and (current - chunk.last_at > self.CHUNK_STALE_SECONDS):
             state.message_chunk = None
             state.updated_at = current
-            self._store.set(user_id, state)
+            self._save(user_id, state, "message_chunk")
             return None
         return chunk
 
@@ -375,7 +620,7 @@ class ConversationStateManager:
         state = self.get_state(user_id)
         state.message_chunk = chunk
         state.updated_at = time.time()
-        self._store.set(user_id, state)
+        self._save(user_id, state, "message_chunk")
 
     def set_pending_action(
         self,
@@ -403,7 +648,7 @@ class ConversationStateManager:
             expires_at=now + (ttl_seconds if ttl_seconds is not None else self._pending_action_ttl),
         )
         state.updated_at = now
-        self._store.set(user_id, state)
+        self._save(user_id, state, "pending_action")
 
     def update_pending_action_operations(self, user_id: str, pending: PendingActionState) -> PendingActionState | None:
         """Persist per-operation status updates for the current pending action."""
@@ -419,7 +664,7 @@ class ConversationStateManager:
         current.payload = dict(pending.payload) if isinstance(pending.payload, dict) else {}
         current.status = pending.status
         state.updated_at = time.time()
-        self._store.set(user_id, state)
+        self._save(user_id, state, "pending_action")
         return current
 
     def get_pending_action(self, user_id: str) -> PendingActionState | None:
@@ -430,7 +675,7 @@ class ConversationStateManager:
         state = self.get_state(user_id)
         state.pending_action = None
         state.updated_at = time.time()
-        self._store.set(user_id, state)
+        self._save(user_id, state, "pending_action")
 
     def confirm_pending_action(self, user_id: str) -> PendingActionState | None:
         """S2: 确认 pending_action，用状态机迁移。返回迁移后的 state 或 None。"""
@@ -444,7 +689,7 @@ class ConversationStateManager:
         except ValueError:
             return None
         state.updated_at = now
-        self._store.set(user_id, state)
+        self._save(user_id, state, "pending_action")
         return pa
 
     def cancel_pending_action(self, user_id: str) -> PendingActionState | None:
@@ -459,5 +704,5 @@ class ConversationStateManager:
         except ValueError:
             return None
         state.updated_at = now
-        self._store.set(user_id, state)
+        self._save(user_id, state, "pending_action")
         return pa
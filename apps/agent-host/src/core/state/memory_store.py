@@ -6,16 +6,21 @@ from __future__ import annotations
 
 import threading
 import time
+from typing import Iterable
 
 from src.core.state.models import ConversationState
+from src.utils.expiry import ExpiryIndex
 
 
 class MemoryStateStore:
-    """内存状态存储，支持 TTL 清理。"""
+    """内存状态存储，支持 TTL 清理（按 expires_at 建过期索引，清理只触达到期项）。"""
 
     def __init__(self) -> None:
         self._lock = threading.Lock()
         self._states: dict[str, ConversationState] = {}
+        # 最近一次写入时的 revision；状态对象按引用共享，不能用对象自身字段判断冲突
+        self._revisions: dict[str, int] = {}
+        self._expiry = ExpiryIndex()
 
     def get(self, session_key: str | None = None, *, user_id: str | None = None) -> ConversationState | None:
         key = str(session_key or user_id or "").strip()
@@ -36,6 +41,27 @@ class MemoryStateStore:
             return
         with self._lock:
             self._states[key] = state
+            self._revisions[key] = state.revision
+            self._expiry.touch(key, state.expires_at)
+
+    def compare_and_set(
+        self,
+        session_key: str,
+        state: ConversationState,
+        expected_revision: int,
+        fields: Iterable[str] | None = None,
+    ) -> bool:
+        key = str(session_key or "").strip()
+        if not key:
+            return False
+        with self._lock:
+            if self._revisions.get(key, 0) != expected_revision:
+                return False
+            state.revision = expected_revision + 1
+            self._states[key] = state
+            self._revisions[key] = state.revision
+            self._expiry.touch(key, state.expires_at)
+            return True
 
     def delete(self, session_key: str | None = None, *, user_id: str | None = None) -> None:
         key = str(session_key or user_id or "").strip()
@@ -43,17 +69,29 @@ class MemoryStateStore:
             return
         with self._lock:
             self._states.pop(key, None)
+            self._revisions.pop(key, None)
+            self._expiry.discard(key)
 
     def list_session_keys(self) -> list[str]:
         with self._lock:
             return list(self._states.keys())
 
-    def cleanup_expired(self) -> None:
-        now = time.time()
+    def cleanup_expired(self, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        removed = 0
         with self._lock:
-            expired = [uid for uid, state in self._states.items() if state.is_expired(now)]
-            for uid in expired:
-                self._states.pop(uid, None)
+            for key in self._expiry.pop_expired(now):
+                state = self._states.get(key)
+                if state is None:
+                    continue
+                # 状态对象可能被原地续期而未回写，以 expires_at 复核
+                if state.is_expired(now):
+                    self._states.pop(key, None)
+                    self._revisions.pop(key, None)
+                    removed += 1
+                else:
+                    self._expiry.touch(key, state.expires_at)
+        return removed
 
     def active_count(self) -> int:
         with self._lock:
@@ -1,5 +1,7 @@
 """
 会话状态模型定义。
+
+模型均为 slots dataclass（每会话常驻内存，减少实例开销）；序列化见 codec.py。
 """
 
 from __future__ import annotations
@@ -8,7 +10,7 @@ from dataclasses import dataclass, field
 from typing import Any
 
 
-@dataclass
+@dataclass(slots=True)
 class PendingDeleteState:
     record_id: str
     record_summary: str
@@ -20,7 +22,7 @@ class PendingDeleteState:
         return now >= self.expires_at
 
 
-@dataclass
+@dataclass(slots=True)
 class PaginationState:
     tool: str
     params: dict[str, Any]
@@ -34,19 +36,24 @@ class PaginationState:
         return now >= self.expires_at
 
 
-@dataclass
+@dataclass(slots=True)
 class LastResultState:
     records: list[dict[str, Any]]
     record_ids: list[str]
     query_summary: str
     created_at: float
     expires_at: float
+    table_id: str | None = None
+    table_name: str | None = None
+    query_meta: dict[str, Any] = field(default_factory=dict)
+    # compact 模式下 records 仅为紧凑引用，完整记录经 RecordCache / MCP 回填
+    compact: bool = False
 
     def is_expired(self, now: float) -> bool:
         return now >= self.expires_at
 
 
-@dataclass
+@dataclass(slots=True)
 class ActiveRecordState:
     record_id: str
     record_summary: str
@@ -61,7 +68,7 @@ class ActiveRecordState:
         return now >= self.expires_at
 
 
-@dataclass
+@dataclass(slots=True)
 class MessageChunkState:
     segments: list[str] = field(default_factory=list)
     started_at: float = 0.0
@@ -85,7 +92,7 @@ class OperationExecutionStatus(str, Enum):
     SKIPPED = "skipped"
 
 
-@dataclass
+@dataclass(slots=True)
 class OperationEntry:
     """Per-operation execution state for batch pending actions."""
 
@@ -149,7 +156,7 @@ _VALID_TRANSITIONS: dict[PendingActionStatus, set[PendingActionStatus]] = {
 }
 
 
-@dataclass
+@dataclass(slots=True)
 class PendingActionState:
     action: str
     payload: dict[str, Any] = field(default_factory=dict)
@@ -243,7 +250,7 @@ class PendingActionState:
         self.status = target
 
 
-@dataclass
+@dataclass(slots=True)
 class ConversationState:
     user_id: str
     created_at: float
@@ -259,6 +266,8 @@ class ConversationState:
     pending_action: PendingActionState | None = None
     message_chunk: MessageChunkState | None = None
     extras: dict[str, Any] = field(default_factory=dict)
+    # 每次回写递增，供工作单元做乐观并发校验
+    revision: int = 0
 
     def __post_init__(self) -> None:
         if isinstance(self.pending_action, dict):
@@ -0,0 +1,141 @@
+"""
+描述: last_result 紧凑引用与记录回填
+主要功能:
+    - compact_record / compact_result_data: 只保留 record_id、表信息与少量展示字段
+    - RecordCache: 进程内有界 LRU，保存完整记录，供"第2个""这条"等追问按需回填
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+import threading
+from typing import Any, Iterable
+
+
+LAST_RESULT_MODES = ("full", "compact")
+COMPACT_MARKER = "_compact"
+
+# 展示投影优先保留的标识字段（与 ActiveRecordState 摘要取值一致）
+_IDENTITY_FIELDS = ("案号", "项目ID", "案件名称", "项目名称", "委托人", "标题", "名称")
+_RECORD_KEYS = ("record_id", "record_url", "table_id", "table_name", "app_token")
+# 结果数据中只做展示、可按需重建的大字段
+_HEAVY_RESULT_KEYS = ("schema",)
+
+
+# region 紧凑投影
+def compact_record(
+    record: dict[str, Any],
+    max_display_fields: int = 4,
+    max_value_chars: int = 64,
+) -> dict[str, Any]:
+    """
+    完整记录 -> 紧凑引用
+
+    参数:
+        record: 技能返回的记录（含 fields / fields_text）
+        max_display_fields: 展示投影最多保留的字段数
+        max_value_chars: 单个字段值的最大字符数
+    返回:
+        只含 record_id、表信息与 fields_text 展示投影的记录
+    """
+    if not isinstance(record, dict) or record.get(COMPACT_MARKER):
+        return record
+    compact: dict[str, Any] = {key: record[key] for key in _RECORD_KEYS if record.get(key)}
+    fields = record.get("fields_text") or record.get("fields") or {}
+    display: dict[str, str] = {}
+    if isinstance(fields, dict):
+        ordered = [name for name in _IDENTITY_FIELDS if name in fields]
+        ordered.extend(name for name in fields if name not in _IDENTITY_FIELDS)
+        for name in ordered:
+            if len(display) >= max_display_fields:
+                break
+            value = fields.get(name)
+            if value is None or isinstance(value, (dict, list)):
+                continue
+            text = str(value).strip()
+            if text:
+                display[str(name)] = text[:max_value_chars]
+    compact["fields_text"] = display
+    compact[COMPACT_MARKER] = True
+    return compact
+
+
+def is_compact(record: Any) -> bool:
+    return isinstance(record, dict) and bool(record.get(COMPACT_MARKER))
+
+
+def compact_result_data(data: dict[str, Any], cache: RecordCache | None = None) -> dict[str, Any]:
+    """技能结果数据 -> 紧凑副本（不修改原对象）；完整记录写入 cache。"""
+    if not isinstance(data, dict):
+        return data
+    compact = {key: value for key, value in data.items() if key not in _HEAVY_RESULT_KEYS}
+    records = data.get("records")
+    if isinstance(records, list):
+        if cache is not None:
+            cache.put_many(records)
+        compact["records"] = [compact_record(item) for item in records]
+    return compact
+
+
+# endregion
+
+
+# region 记录缓存
+class RecordCache:
+    """完整记录的有界 LRU（按 record_id），线程安全。"""
+
+    def __init__(self, max_size: int = 2048) -> None:
+        self._max_size = max(1, int(max_size))
+        self._records: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def put_many(self, records: Iterable[Any]) -> None:
+        with self._lock:
+            for record in records:
+                if not isinstance(record, dict) or is_compact(record):
+                    continue
+                record_id = str(record.get("record_id") or "").strip()
+                if not record_id:
+                    continue
+                self._records[record_id] = record
+                self._records.move_to_end(record_id)
+            while len(self._records) > self._max_size:
+                self._records.popitem(last=False)
+
+    def get_many(self, record_ids: Iterable[str]) -> dict[str, dict[str, Any]]:
+        found: dict[str, dict[str, Any]] = {}
+        with self._lock:
+            for record_id in record_ids:
+                record = self._records.get(record_id)
+                if record is None:
+                    self.misses += 1
+                    continue
+                self._records.move_to_end(record_id)
+                found[record_id] = record
+                self.hits += 1
+        return found
+
+    def rehydrate(self, records: list[Any]) -> tuple[list[Any], list[str]]:
+        """
+        用缓存回填紧凑记录
+
+        返回:
+            (回填后的记录列表, 仍未命中的 record_id 列表)
+        """
+        wanted = [str(item.get("record_id") or "") for item in records if is_compact(item)]
+        if not wanted:
+            return records, []
+        found = self.get_many(wanted)
+        rehydrated = [
+            found.get(str(item.get("record_id") or ""), item) if is_compact(item) else item for item in records
+        ]
+        missing = [record_id for record_id in wanted if record_id and record_id not in found]
+        return rehydrated, missing
+
+
+# endregion
@@ -1,23 +1,44 @@
 """
-Redis 会话状态存储占位实现。
+Redis 会话状态存储实现。
+
+存储布局：
+- 每个会话一个 Hash：`{prefix}{session_key}`，字段 core 存标量/列表，子状态
+  (pending_delete / pagination / last_result / active_record / pending_action / message_chunk)
+  各占一个字段，可独立读写；键自身带 TTL，到期由 Redis 原生淘汰。
+- 过期索引为一个 Sorted Set：`{prefix}__expiry__`，member=session_key，score=expires_at。
+  active_count / list_session_keys / cleanup_expired 均走索引，不再 SCAN 全库。
 
 说明：
-- 当前实现以最小可用为目标，优先保证失败可降级。
-- 不提供分布式锁、pipeline 或高级优化。
+- 字段值由 codec 编码为带版本号的位置数组（orjson 优先），兼容读取 v1 JSON 对象。
+  无法解析的 Hash 视为损坏并删除；编码版本不匹配（滚动发布）只按未命中处理，不删除。
+- 写入用 transaction pipeline（HSET + HDEL + EXPIRE + ZADD 一次往返）。
+- core 中的 revision 供 compare_and_set（WATCH + MULTI）做乐观并发校验，
+  ConversationStateManager 的请求级工作单元据此在请求结束时一次性回写。
+- RedisStateStore 为同步实现（ConversationStateManager 为同步接口）；请求路径经
+  ConversationStateManager.aunit_of_work 在线程池中调用，不阻塞事件循环。
+- 兼容读取旧版整串 JSON 值（首次读取后改写为 Hash）。
 """
 
 from __future__ import annotations
 
 import json
 import logging
+import math
 import time
-from dataclasses import asdict
-from typing import Any
+from typing import Any, Iterable
 
+from src.core.state.codec import (
+    decode_core,
+    decode_substate as codec_decode_substate,
+    encode_core,
+    encode_substate,
+    UnknownCodecVersionError,
+)
 from src.core.state.models import (
     ActiveRecordState,
     ConversationState,
     LastResultState,
+    MessageChunkState,
     PaginationState,
     PendingActionState,
     PendingDeleteState,
@@ -25,13 +46,147 @@ from src.core.state.models import (
 
 logger = logging.getLogger(__name__)
 
+CORE_FIELD = "core"
+SUBSTATE_TYPES: dict[str, type] = {
+    "pending_delete": PendingDeleteState,
+    "pagination": PaginationState,
+    "last_result": LastResultState,
+    "active_record": ActiveRecordState,
+    "pending_action": PendingActionState,
+    "message_chunk": MessageChunkState,
+}
+_INDEX_SUFFIX = "__expiry__"
+_DEFAULT_PREFIX = "omniagent:state:"
+
+
+# region 编解码
+def encode_state(
+    state: ConversationState,
+    fields: Iterable[str] | None = None,
+) -> tuple[dict[str, bytes | str], list[str]]:
+    """
+    将状态编码为 Hash 字段（codec 版本化位置编码）
+
+    参数:
+        state: 会话状态
+        fields: 仅编码这些子状态字段（None 表示全部）；core 始终编码
+    返回:
+        (待写入字段, 待删除字段)
+    """
+    names = SUBSTATE_TYPES.keys() if fields is None else [name for name in fields if name in SUBSTATE_TYPES]
+    mapping = {CORE_FIELD: encode_core(state)}
+    removed: list[str] = []
+    for name in names:
+        value = getattr(state, name)
+        if value is None:
+            removed.append(name)
+        else:
+            mapping[name] = encode_substate(value)
+    return mapping, removed
+
+
+def decode_substate(name: str, raw: str | bytes | None) -> Any:
+    return codec_decode_substate(SUBSTATE_TYPES[name], raw)
+
+
+def decode_state(mapping: dict[Any, Any]) -> ConversationState | None:
+    """
+    Hash 字段 -> ConversationState；缺少 core 或解析失败返回 None
+
+    编码版本不匹配时抛出 UnknownCodecVersionError（数据未损坏，由调用方决定是否保留）。
+    """
+    try:
+        fields = {_text(key): value for key, value in mapping.items()}
+        core = decode_core(fields.get(CORE_FIELD))
+        if core is None:
+            return None
+        state = ConversationState(**core)
+        for name in SUBSTATE_TYPES:
+            if name in fields:
+                setattr(state, name, decode_substate(name, fields[name]))
+        return state
+    except UnknownCodecVersionError:
+        raise
+    except Exception:
+        logger.warning(
+            "反序列化会话状态失败，已丢弃无效值",
+            extra={"event_code": "state_store.redis.deserialize_failed"},
+        )
+        return None
+
+
+def decode_legacy_state(raw: str | bytes) -> ConversationState | None:
+    """旧版整串 JSON 值 -> ConversationState。"""
+    try:
+        data = json.loads(raw)
+        if not isinstance(data, dict):
+            return None
+        for name, model in SUBSTATE_TYPES.items():
+            if isinstance(data.get(name), dict):
+                data[name] = model(**data[name])
+        return ConversationState(**data)
+    except Exception:
+        logger.warning(
+            "反序列化会话状态失败，已丢弃无效值",
+            extra={"event_code": "state_store.redis.deserialize_failed"},
+        )
+        return None
+
+
+def _text(value: Any) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
 
+def _stored_revision(raw_core: str | bytes | None, now: float) -> int:
+    """core 字段中的 revision；缺失、损坏或已过期的会话按 0 处理（与 get 返回 None 对齐）。"""
+    try:
+        core = decode_core(raw_core)
+    except ValueError:
+        return 0
+    if core is None or float(core.get("expires_at") or 0.0) <= now:
+        return 0
+    return int(core.get("revision") or 0)
+
+
+def _ttl_seconds(expires_at: float, now: float) -> int:
+    return max(int(math.ceil(expires_at - now)), 1)
+
+
+def _is_wrong_type(exc: Exception) -> bool:
+    return "WRONGTYPE" in str(exc)
+
+
+def _is_watch_error(exc: Exception) -> bool:
+    return type(exc).__name__ == "WatchError"
+
+
+def _pool_kwargs(redis_settings: Any) -> dict[str, Any]:
+    kwargs: dict[str, Any] = {
+        "decode_responses": True,
+        "socket_timeout": float(getattr(redis_settings, "socket_timeout_seconds", 1.0) or 1.0),
+        "max_connections": int(getattr(redis_settings, "max_connections", 32) or 32),
+    }
+    if not str(getattr(redis_settings, "dsn", "") or "").strip():
+        kwargs.update(
+            host=str(getattr(redis_settings, "host", "localhost") or "localhost"),
+            port=int(getattr(redis_settings, "port", 6379) or 6379),
+            db=int(getattr(redis_settings, "db", 0) or 0),
+            password=getattr(redis_settings, "password", None),
+        )
+    return kwargs
+
+
+# endregion
+
+
+# region 同步实现
 class RedisStateStore:
-    """Redis-backed 状态存储（轻量占位）。"""
+    """Redis-backed 状态存储（Hash 分字段 + Sorted Set 过期索引）。"""
 
-    def __init__(self, client: Any, key_prefix: str = "omniagent:state:") -> None:
+    def __init__(self, client: Any, key_prefix: str = _DEFAULT_PREFIX) -> None:
         self._client = client
-        self._key_prefix = str(key_prefix or "omniagent:state:")
+        self._key_prefix = str(key_prefix or _DEFAULT_PREFIX)
+        self._index_key = f"{self._key_prefix}{_INDEX_SUFFIX}"
 
     @classmethod
     def from_settings(cls, redis_settings: Any) -> RedisStateStore:
@@ -41,43 +196,64 @@ class RedisStateStore:
             raise RuntimeError("redis dependency unavailable") from exc
 
         dsn = str(getattr(redis_settings, "dsn", "") or "").strip()
-        socket_timeout = float(getattr(redis_settings, "socket_timeout_seconds", 1.0) or 1.0)
-        if dsn:
-            client = redis.Redis.from_url(
-                dsn,
-                decode_responses=True,
-                socket_timeout=socket_timeout,
-            )
-        else:
-            client = redis.Redis(
-                host=str(getattr(redis_settings, "host", "localhost") or "localhost"),
-                port=int(getattr(redis_settings, "port", 6379) or 6379),
-                db=int(getattr(redis_settings, "db", 0) or 0),
-                password=getattr(redis_settings, "password", None),
-                decode_responses=True,
-                socket_timeout=socket_timeout,
-            )
+        kwargs = _pool_kwargs(redis_settings)
+        pool = redis.ConnectionPool.from_url(dsn, **kwargs) if dsn else redis.ConnectionPool(**kwargs)
+        client = redis.Redis(connection_pool=pool)
 
         try:
             client.ping()
         except Exception as exc:
             raise RuntimeError("redis ping failed") from exc
 
-        return cls(client=client, key_prefix=str(getattr(redis_settings, "key_prefix", "omniagent:state:")))
+        return cls(client=client, key_prefix=str(getattr(redis_settings, "key_prefix", _DEFAULT_PREFIX)))
 
     def get(self, session_key: str | None = None, *, user_id: str | None = None) -> ConversationState | None:
         key = str(session_key or user_id or "").strip()
         if not key:
             return None
-        raw = self._client.get(self._redis_key(key))
-        if not raw:
-            return None
-        state = self._deserialize_state(raw)
-        if state is None:
-            self.delete(key)
-            return None
-        state.session_key = key
-        return state
+        try:
+            mapping = self._client.hgetall(self._redis_key(key))
+        except Exception as exc:
+            if not _is_wrong_type(exc):
+                raise
+            return self._migrate_legacy(key)
+        return self._finish_get(key, mapping)
+
+    def get_many(self, session_keys: Iterable[str]) -> dict[str, ConversationState]:
+        """批量读取（单次 pipeline 往返）；缺失或过期的会话不出现在结果中。"""
+        keys = [str(item).strip() for item in session_keys if str(item or "").strip()]
+        if not keys:
+            return {}
+        pipe = self._client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(self._redis_key(key))
+        results = pipe.execute(raise_on_error=False)
+        states: dict[str, ConversationState] = {}
+        for key, mapping in zip(keys, results):
+            if isinstance(mapping, Exception):
+                if not _is_wrong_type(mapping):
+                    raise mapping
+                state = self._migrate_legacy(key)
+            else:
+                state = self._finish_get(key, mapping)
+            if state is not None:
+                states[key] = state
+        return states
+
+    def get_fields(self, session_key: str, fields: Iterable[str]) -> dict[str, Any]:
+        """只读取指定子状态字段（HMGET），不反序列化其余字段。"""
+        names = [name for name in fields if name in SUBSTATE_TYPES]
+        if not names:
+            return {}
+        values = self._client.hmget(self._redis_key(session_key), names)
+        result: dict[str, Any] = {}
+        for name, raw in zip(names, values):
+            try:
+                result[name] = decode_substate(name, raw)
+            except UnknownCodecVersionError as exc:
+                self._log_version_mismatch(session_key, exc)
+                result[name] = None
+        return result
 
     def set(
         self,
@@ -89,66 +265,134 @@ class RedisStateStore:
         key = str(session_key or user_id or "").strip()
         if not key or state is None:
             return
+        self._write(key, state, None)
 
-        payload = json.dumps(asdict(state))
-        ttl_seconds = max(int(state.expires_at - time.time()), 1)
-        self._client.set(self._redis_key(key), payload, ex=ttl_seconds)
+    def set_fields(self, session_key: str, state: ConversationState, fields: Iterable[str]) -> None:
+        """只回写指定子状态字段（core 与 TTL/索引始终刷新）。"""
+        key = str(session_key or "").strip()
+        if not key:
+            return
+        self._write(key, state, list(fields))
 
     def delete(self, session_key: str | None = None, *, user_id: str | None = None) -> None:
         key = str(session_key or user_id or "").strip()
         if not key:
             return
-        self._client.delete(self._redis_key(key))
+        pipe = self._client.pipeline(transaction=True)
+        pipe.delete(self._redis_key(key))
+        pipe.zrem(self._index_key, key)
+        pipe.execute()
 
     def list_session_keys(self) -> list[str]:
-        keys: list[str] = []
-        for redis_key in self._iter_keys():
-            as_text = str(redis_key)
-            if as_text.startswith(self._key_prefix):
-                keys.append(as_text[len(self._key_prefix) :])
-        return keys
-
-    def cleanup_expired(self) -> None:
-        now = time.time()
-        for session_key in self.list_session_keys():
-            state = self.get(session_key)
-            if state is None or state.is_expired(now):
-                self.delete(session_key)
-
-    def active_count(self) -> int:
-        return len(self.list_session_keys())
-
-    def _iter_keys(self) -> list[str]:
-        pattern = f"{self._key_prefix}*"
-        if hasattr(self._client, "scan_iter"):
-            return [str(item) for item in self._client.scan_iter(match=pattern)]
-        if hasattr(self._client, "keys"):
-            return [str(item) for item in self._client.keys(pattern)]
-        return []
+        return [_text(item) for item in self._client.zrange(self._index_key, 0, -1)]
 
-    def _redis_key(self, session_key: str) -> str:
-        return f"{self._key_prefix}{session_key}"
+    def cleanup_expired(self, now: float | None = None) -> int:
+        """只裁剪过期索引；会话 Hash 由键 TTL 淘汰，且 get 不返回已过期状态。"""
+        now = time.time() if now is None else now
+        return int(self._client.zremrangebyscore(self._index_key, "-inf", now) or 0)
+
+    def active_count(self, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        return int(self._client.zcount(self._index_key, f"({now}", "+inf") or 0)
 
-    def _deserialize_state(self, raw: str) -> ConversationState | None:
+    def compare_and_set(
+        self,
+        session_key: str,
+        state: ConversationState,
+        expected_revision: int,
+        fields: Iterable[str] | None = None,
+    ) -> bool:
+        """
+        条件写入（WATCH + MULTI）：存储内 revision 与预期一致才写入
+
+        参数:
+            session_key: 会话键
+            state: 待写入状态（成功后 revision 置为 expected_revision + 1）
+            expected_revision: 读取时的 revision；已过期或不存在的会话视为 0
+            fields: 仅回写这些子状态字段（None 表示全部）
+        返回:
+            是否写入成功；False 表示期间有其他写入
+        """
+        key = str(session_key or "").strip()
+        if not key:
+            return False
+        redis_key = self._redis_key(key)
+        names = None if fields is None else list(fields)
+        with self._client.pipeline(transaction=True) as pipe:
+            try:
+                pipe.watch(redis_key)
+                current = _stored_revision(pipe.hget(redis_key, CORE_FIELD), time.time())
+                if current != expected_revision:
+                    return False
+                pipe.multi()
+                revision = state.revision
+                state.revision = expected_revision + 1
+                self._queue_write(pipe, key, state, names)
+                try:
+                    pipe.execute()
+                except Exception:
+                    state.revision = revision
+                    raise
+                return True
+            except Exception as exc:
+                if _is_watch_error(exc) or _is_wrong_type(exc):
+                    return False
+                raise
+
+    def _write(self, key: str, state: ConversationState, fields: list[str] | None) -> None:
+        pipe = self._client.pipeline(transaction=True)
+        self._queue_write(pipe, key, state, fields)
+        pipe.execute()
+
+    def _queue_write(self, pipe: Any, key: str, state: ConversationState, fields: list[str] | None) -> None:
+        mapping, removed = encode_state(state, fields)
+        redis_key = self._redis_key(key)
+        pipe.hset(redis_key, mapping=mapping)
+        if removed:
+            pipe.hdel(redis_key, *removed)
+        pipe.expire(redis_key, _ttl_seconds(state.expires_at, time.time()))
+        pipe.zadd(self._index_key, {key: state.expires_at})
+
+    def _finish_get(self, key: str, mapping: dict[Any, Any] | None) -> ConversationState | None:
+        if not mapping:
+            return None
         try:
-            data = json.loads(raw)
-            if not isinstance(data, dict):
-                return None
-
-            if isinstance(data.get("pending_delete"), dict):
-                data["pending_delete"] = PendingDeleteState(**data["pending_delete"])
-            if isinstance(data.get("pagination"), dict):
-                data["pagination"] = PaginationState(**data["pagination"])
-            if isinstance(data.get("last_result"), dict):
-                data["last_result"] = LastResultState(**data["last_result"])
-            if isinstance(data.get("active_record"), dict):
-                data["active_record"] = ActiveRecordState(**data["active_record"])
-            if isinstance(data.get("pending_action"), dict):
-                data["pending_action"] = PendingActionState(**data["pending_action"])
-            return ConversationState(**data)
-        except Exception:
-            logger.warning(
-                "反序列化会话状态失败，已丢弃无效值",
-                extra={"event_code": "state_store.redis.deserialize_failed"},
-            )
+            state = decode_state(mapping)
+        except UnknownCodecVersionError as exc:
+            # 其他版本实例写入的会话：按未命中处理，保留原值
+            self._log_version_mismatch(key, exc)
             return None
+        if state is None:
+            self.delete(key)
+            return None
+        if state.is_expired(time.time()):
+            return None
+        state.session_key = key
+        return state
+
+    @staticmethod
+    def _log_version_mismatch(key: str, exc: UnknownCodecVersionError) -> None:
+        logger.warning(
+            "会话状态编码版本不匹配，按未命中处理",
+            extra={
+                "event_code": "state_store.redis.codec_version_mismatch",
+                "session_key": key,
+                "codec_version": str(exc.version),
+            },
+        )
+
+    def _migrate_legacy(self, key: str) -> ConversationState | None:
+        raw = self._client.get(self._redis_key(key))
+        state = decode_legacy_state(raw) if raw else None
+        self._client.delete(self._redis_key(key))
+        if state is None:
+            return None
+        state.session_key = key
+        self._write(key, state, None)
+        return None if state.is_expired(time.time()) else state
+
+    def _redis_key(self, session_key: str) -> str:
+        return f"{self._key_prefix}{session_key}"
+
+
+# endregion
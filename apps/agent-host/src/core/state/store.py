@@ -6,7 +6,7 @@
 
 from __future__ import annotations
 
-from typing import Protocol
+from typing import Iterable, Protocol
 
 from src.core.state.models import ConversationState
 
@@ -26,8 +26,22 @@ class StateStore(Protocol):
     def list_session_keys(self) -> list[str]:
         ...
 
-    def cleanup_expired(self) -> None:
+    def cleanup_expired(self) -> int | None:
         ...
 
     def active_count(self) -> int:
         ...
+
+
+class VersionedStateStore(StateStore, Protocol):
+    """支持按 revision 条件写入的状态存储（供请求级工作单元回写）。"""
+
+    def compare_and_set(
+        self,
+        session_key: str,
+        state: ConversationState,
+        expected_revision: int,
+        fields: Iterable[str] | None = None,
+    ) -> bool:
+        """存储内 revision 等于 expected_revision 时写入（revision 置为 +1），否则返回 False。"""
+        ...
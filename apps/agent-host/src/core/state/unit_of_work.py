@@ -0,0 +1,81 @@
+"""
+描述: 请求级会话状态工作单元（write-behind）
+主要功能:
+    - 通过 ContextVar 为单个请求挂载工作单元，请求内（含并发子任务）共享
+    - 首次读取时加载并完成子状态过期清理，后续读取全部走内存
+    - setter 只记录被修改的属性，请求结束时一次性回写（Redis 为单个 pipeline）
+    - 回写按 revision 做乐观并发校验，冲突时在最新状态上重放被修改的属性
+"""
+
+from __future__ import annotations
+
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.core.state.models import ConversationState
+
+
+# region 数据结构
+@dataclass
+class UnitOfWorkStats:
+    """工作单元内的存储访问统计。"""
+
+    store_reads: int = 0
+    store_writes: int = 0
+    conflicts: int = 0
+    mutations: int = 0
+
+
+@dataclass
+class StateUnitOfWork:
+    """单个会话在一次请求内的状态缓冲。"""
+
+    session_key: str
+    owner: Any
+    state: ConversationState | None = None
+    loaded_revision: int = 0
+    dirty: set[str] = field(default_factory=set)
+    closed: bool = False
+    stats: UnitOfWorkStats = field(default_factory=UnitOfWorkStats)
+
+    def attach(self, state: ConversationState, loaded_revision: int, changed: set[str]) -> None:
+        self.state = state
+        self.loaded_revision = loaded_revision
+        self.dirty.update(changed)
+        self.stats.store_reads += 1
+
+    def mark(self, attrs: tuple[str, ...]) -> None:
+        self.dirty.update(attrs)
+        self.stats.mutations += 1
+
+    def reset(self) -> None:
+        """会话被删除：丢弃缓冲，下次读取重新加载。"""
+        self.state = None
+        self.loaded_revision = 0
+        self.dirty.clear()
+
+    def covers(self, owner: Any, session_key: str) -> bool:
+        return not self.closed and self.owner is owner and self.session_key == session_key
+
+
+# endregion
+
+
+# region 上下文管理
+_CURRENT_UNIT: ContextVar[StateUnitOfWork | None] = ContextVar("state_unit_of_work", default=None)
+
+
+def get_unit_of_work() -> StateUnitOfWork | None:
+    return _CURRENT_UNIT.get()
+
+
+def bind_unit_of_work(unit: StateUnitOfWork | None) -> Any:
+    return _CURRENT_UNIT.set(unit)
+
+
+def unbind_unit_of_work(token: Any) -> None:
+    _CURRENT_UNIT.reset(token)
+
+
+# endregion
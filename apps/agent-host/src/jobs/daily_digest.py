@@ -7,6 +7,7 @@ from typing import Any
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from src.jobs.reminder_dispatcher import ReminderDispatchPayload, ReminderDispatcher
+from src.llm.scheduler import PRIORITY_BACKGROUND, llm_priority
 from src.mcp.client import MCPClient
 
 
@@ -32,7 +33,7 @@ class DailyDigestScheduler:
     def start(self) -> None:
         hour, minute = self._parse_schedule(self._schedule)
         self._scheduler.add_job(
-            self._push_daily_digest,
+            self._run_daily_digest,
             "cron",
             hour=hour,
             minute=minute,
@@ -44,6 +45,11 @@ class DailyDigestScheduler:
     async def stop(self) -> None:
         self._scheduler.shutdown(wait=False)
 
+    async def _run_daily_digest(self) -> None:
+        # 定时摘要属于后台任务，其中的 LLM 调用让位于交互消息
+        with llm_priority(PRIORITY_BACKGROUND):
+            await self._push_daily_digest()
+
     async def _push_daily_digest(self) -> None:
         if not self._reminder_chat_id or self._dispatcher is None:
             return
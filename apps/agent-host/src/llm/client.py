@@ -4,25 +4,57 @@
     - 统一封装 OpenAI 兼容接口
     - 处理请求日志记录与异常重试
     - 提供 JSON 解析和辅助工具方法
+    - 相同请求单飞合并（single-flight）与确定性调用的短期结果缓存
+    - 按路由上下文对冲备用模型，并向模型健康登记表上报成败与延迟
+    - 每次上游调用先向优先级调度器申请名额
 """
 
 from __future__ import annotations
 
 import asyncio
-from contextlib import contextmanager
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
 from contextvars import ContextVar, Token
+from dataclasses import dataclass
+import hashlib
 import json
 import logging
 import time
-from typing import Any, cast
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, cast
 
 from openai import AsyncOpenAI, BadRequestError
 import httpx
 from openai.types.chat import ChatCompletionMessageParam
 
 from src.config import LLMSettings
+from src.llm.model_health import get_model_health
+from src.llm.scheduler import get_llm_priority, get_llm_scheduler
+from src.llm.usage_ledger import LLMUsageEntry, get_llm_stage, get_usage_ledger
 from src.utils.exceptions import LLMTimeoutError
-from src.utils.metrics import record_llm_call
+from src.utils.metrics import (
+    observe_llm_stage_tokens,
+    record_llm_call,
+    record_llm_coalesced,
+    record_llm_first_token,
+    record_llm_hedge,
+)
+
+
+_MEMO_MAX_ENTRIES = 256
+
+
+@dataclass
+class _InflightCall:
+    """单飞调用：共享的上游任务、当前等待方数量与上游用量（供合并方记账）。"""
+
+    task: asyncio.Task[str] | None = None
+    waiters: int = 0
+    usage: LLMUsageEntry | None = None
+
+
+# 上游任务内可见，_capture_usage 据此把用量回填给单飞调用
+_UPSTREAM_CALL: ContextVar[_InflightCall | None] = ContextVar("llm_upstream_call", default=None)
 
 
 # region LLM 客户端
@@ -61,6 +93,10 @@ class LLMClient:
         self._route_metadata_var: ContextVar[dict[str, Any]] = ContextVar(
             "llm_route_metadata", default={}
         )
+        self._coalesce_enabled = bool(getattr(settings, "coalesce_enabled", True))
+        self._memo_ttl_seconds = max(0.0, float(getattr(settings, "memo_ttl_seconds", 0.0) or 0.0))
+        self._inflight: dict[str, _InflightCall] = {}
+        self._memo: OrderedDict[str, tuple[float, str, LLMUsageEntry | None]] = OrderedDict()
 
     @property
     def model_name(self) -> str:
@@ -89,12 +125,244 @@ class LLMClient:
         返回:
             模型回复文本
         """
-        logger = self._logger
         timeout_seconds = timeout if timeout is not None else self._settings.timeout
-        start = time.perf_counter()
-        status = "success"
         route_metadata = self._route_metadata_var.get({})
         model_name = str(route_metadata.get("model_selected") or self._primary_model)
+        if not self._coalesce_enabled:
+            return await self._chat_upstream(messages, timeout_seconds, model_name, route_metadata)
+
+        key = self._request_key(model_name, messages)
+        memo_enabled = self._memo_ttl_seconds > 0 and float(self._settings.temperature) == 0.0
+        if memo_enabled:
+            cached = self._memo.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                self._memo.move_to_end(key)
+                record_llm_coalesced("chat", "memo")
+                self._record_coalesced_usage("memo", cached[2], 0.0)
+                return cached[1]
+
+        # 共享任务在发起方上下文中排队；不同优先级不合并，交互请求不会落入 shadow/batch 队列被丢弃
+        inflight_key = f"{get_llm_priority()}:{key}"
+        call = self._inflight.get(inflight_key)
+        if call is not None and call.task is not None and not call.task.done():
+            record_llm_coalesced("chat", "inflight")
+            start = time.perf_counter()
+            result = await self._await_shared(call)
+            self._record_coalesced_usage("inflight", call.usage, time.perf_counter() - start)
+            return result
+
+        # 上游请求由独立任务承载：发起方被取消时，其余等待方仍可拿到结果；全部等待方离开后才取消
+        call = _InflightCall()
+        call.task = asyncio.create_task(
+            self._chat_shared(call, messages, timeout_seconds, model_name, route_metadata)
+        )
+        self._inflight[inflight_key] = call
+        call.task.add_done_callback(lambda done: self._on_upstream_done(inflight_key, key, call, memo_enabled))
+        return await self._await_shared(call)
+
+    async def _chat_shared(
+        self,
+        call: _InflightCall,
+        messages: list[dict[str, str]],
+        timeout_seconds: float,
+        model_name: str,
+        route_metadata: dict[str, Any],
+    ) -> str:
+        _UPSTREAM_CALL.set(call)
+        return await self._chat_upstream(messages, timeout_seconds, model_name, route_metadata)
+
+    @staticmethod
+    async def _await_shared(call: _InflightCall) -> str:
+        task = cast(asyncio.Task[str], call.task)
+        call.waiters += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not task.done():
+                # 最后一个等待方已取消/超时：释放上游配额与调度名额
+                task.cancel()
+
+    def _record_coalesced_usage(self, kind: str, source: LLMUsageEntry | None, waited_seconds: float) -> None:
+        """合并方在自己的账本记一条零 token 记录，避免回退到共享槽位；实际用量只计在发起方。"""
+        ledger = get_usage_ledger()
+        if ledger is None:
+            return
+        metadata = dict(source.metadata) if source is not None else {}
+        metadata.update(
+            {
+                "coalesced": kind,
+                "coalesced_token_count": str(source.token_count if source is not None else 0),
+            }
+        )
+        ledger.record(
+            LLMUsageEntry(
+                stage=get_llm_stage(),
+                model=source.model if source is not None else self._primary_model,
+                latency_ms=int(waited_seconds * 1000),
+                estimated=False,
+                metadata=metadata,
+            )
+        )
+
+    def _request_key(self, model_name: str, messages: list[dict[str, str]]) -> str:
+        payload = json.dumps(
+            [model_name, self._settings.temperature, self._settings.max_tokens, messages],
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _on_upstream_done(self, inflight_key: str, key: str, call: _InflightCall, memo_enabled: bool) -> None:
+        if self._inflight.get(inflight_key) is call:
+            self._inflight.pop(inflight_key, None)
+        task = cast(asyncio.Task[str], call.task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            return
+        if memo_enabled:
+            self._memo[key] = (time.monotonic() + self._memo_ttl_seconds, task.result(), call.usage)
+            self._memo.move_to_end(key)
+            while len(self._memo) > _MEMO_MAX_ENTRIES:
+                self._memo.popitem(last=False)
+
+    async def _chat_upstream(
+        self,
+        messages: list[dict[str, str]],
+        timeout_seconds: float,
+        model_name: str,
+        route_metadata: dict[str, Any],
+    ) -> str:
+        hedge_model = self._resolve_hedge_model(model_name, route_metadata)
+        if hedge_model:
+            return await self._chat_hedged(messages, timeout_seconds, model_name, hedge_model, route_metadata)
+        response, duration = await self._request_completion(messages, timeout_seconds, model_name)
+        self._capture_usage(response, duration, route_metadata)
+        return response.choices[0].message.content or ""
+
+    def _resolve_hedge_model(self, model_name: str, route_metadata: dict[str, Any]) -> str:
+        """
+        对冲模型由 ModelRouter 写入路由上下文，本客户端需显式开启对冲且备用模型未熔断。
+
+        说明:
+            - 此处只读检查熔断；多数调用主模型及时返回、不会真正对冲，
+              半开探测名额在真正发出对冲请求前才占用
+        """
+        hedge_cfg = getattr(self._settings, "hedge", None)
+        if not bool(getattr(hedge_cfg, "enabled", False)):
+            return ""
+        hedge_model = str(route_metadata.get("hedge_model") or "").strip()
+        if not hedge_model or hedge_model == model_name:
+            return ""
+        health = get_model_health()
+        if health is not None and health.is_open(hedge_model):
+            return ""
+        return hedge_model
+
+    async def _chat_hedged(
+        self,
+        messages: list[dict[str, str]],
+        timeout_seconds: float,
+        model_name: str,
+        hedge_model: str,
+        route_metadata: dict[str, Any],
+    ) -> str:
+        """
+        对冲请求：主模型在自适应延迟内未返回（或已失败）时并发请求备用模型，取先成功者。
+        """
+        health = get_model_health()
+        delay = health.hedge_delay_seconds(model_name) if health is not None else 2.0
+        start = time.perf_counter()
+        hedge_started_at: float | None = None
+        tasks: dict[asyncio.Task[tuple[Any, float]], str] = {
+            asyncio.create_task(self._request_completion(messages, timeout_seconds, model_name)): model_name
+        }
+        try:
+            done, _ = await asyncio.wait(set(tasks), timeout=delay)
+            primary = next(iter(tasks))
+            if primary in done and primary.exception() is None:
+                response, duration = primary.result()
+                self._capture_usage(response, duration, route_metadata)
+                return response.choices[0].message.content or ""
+            if primary in done and isinstance(primary.exception(), BadRequestError):
+                # 4xx（超长上下文、非法参数）换模型也无法恢复，不对冲
+                raise cast(BaseException, primary.exception())
+
+            if health is not None and not health.allow(hedge_model):
+                # 备用模型的半开探测名额已被占用：不对冲，只等主模型（主模型已失败则直接抛出）
+                response, duration = await primary
+                self._capture_usage(response, duration, route_metadata)
+                return response.choices[0].message.content or ""
+            hedge_started_at = health.now() if health is not None else None
+
+            remaining = max(1.0, timeout_seconds - (time.perf_counter() - start))
+            tasks[asyncio.create_task(self._request_completion(messages, remaining, hedge_model))] = hedge_model
+            record_llm_hedge("fired" if primary not in done else "failover")
+
+            pending = {task for task in tasks if not task.done()}
+            first_error: BaseException | None = primary.exception() if primary.done() else None
+            winner: asyncio.Task[tuple[Any, float]] | None = None
+            while pending and winner is None:
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    error = task.exception()
+                    if error is None and winner is None:
+                        winner = task
+                    elif error is not None and first_error is None:
+                        first_error = error
+            if winner is None:
+                raise first_error or LLMTimeoutError(timeout_seconds)
+
+            winner_model = tasks[winner]
+            record_llm_hedge("hedge_won" if winner_model == hedge_model else "primary_won")
+            metadata = dict(route_metadata or {})
+            metadata.update(
+                {
+                    "hedge_fired": "true",
+                    "hedge_winner": winner_model,
+                    "hedge_delay_ms": str(int(delay * 1000)),
+                }
+            )
+            response, duration = winner.result()
+            self._capture_usage(response, duration, metadata)
+            return response.choices[0].message.content or ""
+        finally:
+            for task, task_model in tasks.items():
+                if task.done():
+                    continue
+                task.cancel()
+                if health is None:
+                    continue
+                if task_model == hedge_model and hedge_started_at is not None:
+                    # 被取消的对冲请求没有结果：释放它可能占用的半开探测名额
+                    health.release_probe(hedge_model, hedge_started_at)
+                elif task_model == model_name and len(tasks) > 1:
+                    # 输给对冲的慢主请求：已耗时是其延迟的下界，计入分位数样本
+                    health.observe_latency(model_name, time.perf_counter() - start)
+
+    async def _request_completion(
+        self,
+        messages: list[dict[str, str]],
+        timeout_seconds: float,
+        model_name: str,
+    ) -> tuple[Any, float]:
+        scheduler = get_llm_scheduler()
+        async with scheduler.slot() if scheduler is not None else nullcontext():
+            return await self._send_completion(messages, timeout_seconds, model_name)
+
+    async def _send_completion(
+        self,
+        messages: list[dict[str, str]],
+        timeout_seconds: float,
+        model_name: str,
+    ) -> tuple[Any, float]:
+        logger = self._logger
+        health = get_model_health()
+        started_at = health.now() if health is not None else None
+        start = time.perf_counter()
+        status = "success"
         try:
             response = await asyncio.wait_for(
                 self._client.chat.completions.create(
@@ -108,6 +376,8 @@ class LLMClient:
         except asyncio.TimeoutError as exc:
             status = "timeout"
             logger.warning("LLM request timeout after %ss", timeout_seconds)
+            if health is not None:
+                health.record(model_name, ok=False, started_at=started_at)
             raise LLMTimeoutError(timeout_seconds) from exc
         except BadRequestError as exc:
             status = "error"
@@ -115,18 +385,116 @@ class LLMClient:
                 logger.error("LLM 400 response: %s", exc.response.text)
             logger.error("LLM request failed: %s", exc)
             raise
+        except asyncio.CancelledError:
+            status = "cancelled"
+            if health is not None and started_at is not None:
+                health.release_probe(model_name, started_at)
+            raise
         except Exception as exc:
             status = "error"
             response = getattr(exc, "response", None)
             if response is not None:
                 logger.error("LLM error response: %s", response.text)
             logger.error("LLM request failed: %s", exc)
+            if health is not None:
+                health.record(model_name, ok=False, started_at=started_at)
             raise
         finally:
             duration = time.perf_counter() - start
             record_llm_call("chat", status, duration)
-        self._capture_usage(response, duration, route_metadata)
-        return response.choices[0].message.content or ""
+        if health is not None:
+            health.record(model_name, ok=True, latency_seconds=duration, started_at=started_at)
+        return response, duration
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, str]],
+        timeout: float | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        流式对话请求
+
+        参数:
+            messages: 消息列表
+            timeout: 超时时间 (秒)，作用于整个流式响应
+
+        返回:
+            逐段产出的模型回复文本增量
+        """
+        scheduler = get_llm_scheduler()
+        async with scheduler.slot() if scheduler is not None else nullcontext():
+            async for text in self._stream_completion(messages, timeout):
+                yield text
+
+    async def _stream_completion(
+        self,
+        messages: list[dict[str, str]],
+        timeout: float | None,
+    ) -> AsyncIterator[str]:
+        logger = self._logger
+        timeout_seconds = timeout if timeout is not None else self._settings.timeout
+        start = time.perf_counter()
+        deadline = start + float(timeout_seconds)
+        status = "success"
+        route_metadata = self._route_metadata_var.get({})
+        model_name = str(route_metadata.get("model_selected") or self._primary_model)
+        usage: Any = None
+        response_model = ""
+        first_token_seen = False
+        try:
+            stream = await asyncio.wait_for(
+                self._client.chat.completions.create(
+                    model=model_name,
+                    messages=cast(list[ChatCompletionMessageParam], messages),
+                    temperature=self._settings.temperature,
+                    max_tokens=self._settings.max_tokens,
+                    stream=True,
+                    # 末尾额外下发一个 choices 为空、携带 usage 的 chunk
+                    stream_options={"include_usage": True},
+                ),
+                timeout=timeout_seconds,
+            )
+            iterator = stream.__aiter__()
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), timeout=remaining)
+                except StopAsyncIteration:
+                    break
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                response_model = str(getattr(chunk, "model", "") or response_model)
+                choices = getattr(chunk, "choices", None) or []
+                if not choices:
+                    continue
+                delta = getattr(choices[0], "delta", None)
+                text = str(getattr(delta, "content", "") or "")
+                if not text:
+                    continue
+                if not first_token_seen:
+                    first_token_seen = True
+                    record_llm_first_token("chat_stream", time.perf_counter() - start)
+                yield text
+        except asyncio.TimeoutError as exc:
+            status = "timeout"
+            logger.warning("LLM stream timeout after %ss", timeout_seconds)
+            raise LLMTimeoutError(timeout_seconds) from exc
+        except BadRequestError as exc:
+            status = "error"
+            if exc.response is not None:
+                logger.error("LLM 400 response: %s", exc.response.text)
+            logger.error("LLM stream request failed: %s", exc)
+            raise
+        except Exception as exc:
+            status = "error"
+            logger.error("LLM stream request failed: %s", exc)
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            record_llm_call("chat_stream", status, duration)
+        self._capture_usage(SimpleNamespace(usage=usage, model=response_model), duration, route_metadata)
 
     def consume_last_usage(self) -> dict[str, Any] | None:
         value = self._last_usage
@@ -138,7 +506,32 @@ class LLMClient:
         total_tokens = int(getattr(usage, "total_tokens", 0) or 0)
         prompt_tokens = int(getattr(usage, "prompt_tokens", 0) or 0)
         completion_tokens = int(getattr(usage, "completion_tokens", 0) or 0)
-        model = str(getattr(response, "model", "") or route_metadata.get("model_selected") or self._primary_model)
+        model = str(
+            getattr(response, "model", "")
+            or route_metadata.get("hedge_winner")
+            or route_metadata.get("model_selected")
+            or self._primary_model
+        )
+        stage = get_llm_stage()
+        observe_llm_stage_tokens(stage, prompt_tokens, completion_tokens)
+        entry = LLMUsageEntry(
+            stage=stage,
+            model=model,
+            token_count=total_tokens,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency_ms=int(duration_seconds * 1000),
+            estimated=total_tokens <= 0,
+            metadata=dict(route_metadata or {}),
+        )
+        call = _UPSTREAM_CALL.get()
+        if call is not None:
+            call.usage = entry
+        ledger = get_usage_ledger()
+        if ledger is not None:
+            # 请求级账本存在时不再写共享槽位，避免并发请求互相覆盖
+            ledger.record(entry)
+            return
         self._last_usage = {
             "model": model,
             "token_count": total_tokens,
@@ -0,0 +1,197 @@
+"""
+描述: 模型健康度登记表
+主要功能:
+    - 按模型统计近期调用的错误/超时率，超过阈值时熔断（冷却后仅放行单个半开探测请求）
+    - 记录近期成功调用延迟（被对冲取消的慢请求按已耗时计入下界样本），给出对冲请求的自适应分位数延迟
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+import logging
+import math
+import time
+from typing import Callable, Deque
+
+from src.utils.metrics import set_model_circuit_state
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelHealthConfig:
+    breaker_enabled: bool = False
+    window_seconds: float = 60.0
+    min_calls: int = 5
+    failure_rate_threshold: float = 0.5
+    cooldown_seconds: float = 30.0
+    latency_window: int = 50
+    hedge_percentile: float = 0.95
+    hedge_min_delay_ms: int = 300
+    hedge_max_delay_ms: int = 5000
+    hedge_initial_delay_ms: int = 2000
+
+
+class _ModelStats:
+    def __init__(self, latency_window: int) -> None:
+        self.outcomes: Deque[tuple[float, bool]] = deque()
+        self.latencies: Deque[float] = deque(maxlen=max(1, latency_window))
+        self.opened_at: float | None = None
+        self.probe_started_at: float | None = None
+
+
+class ModelHealthRegistry:
+    def __init__(self, config: ModelHealthConfig, clock: Callable[[], float] = time.monotonic) -> None:
+        self._config = config
+        self._clock = clock
+        self._stats: dict[str, _ModelStats] = {}
+
+    def allow(self, model: str) -> bool:
+        """
+        准入一次请求
+
+        说明:
+            - 熔断关闭时放行
+            - 熔断打开且在冷却期内拒绝
+            - 冷却结束后只放行一个半开探测请求，探测结果回报前其余请求仍被拒绝；
+              探测被取消时由调用方 release_probe 释放名额，未回报超过一个冷却期后也允许重新探测
+        """
+        if not self._config.breaker_enabled:
+            return True
+        stats = self._stats.get(str(model or ""))
+        if stats is None or stats.opened_at is None:
+            return True
+        now = self._clock()
+        if not self._probe_available(stats, now):
+            return False
+        stats.probe_started_at = now
+        return True
+
+    def now(self) -> float:
+        """登记表时钟；请求开始时取值，回报结果时传给 record(started_at=...)。"""
+        return self._clock()
+
+    def release_probe(self, model: str, started_at: float) -> None:
+        """熔断后发起的请求被取消（未得出结果）：释放半开探测名额，下一次请求可立即探测。"""
+        stats = self._stats.get(str(model or ""))
+        if stats is None or stats.probe_started_at is None or started_at < stats.probe_started_at:
+            return
+        stats.probe_started_at = None
+
+    def is_open(self, model: str) -> bool:
+        """熔断是否拒绝新请求（只读，不占用半开探测名额）。"""
+        if not self._config.breaker_enabled:
+            return False
+        stats = self._stats.get(str(model or ""))
+        if stats is None or stats.opened_at is None:
+            return False
+        return not self._probe_available(stats, self._clock())
+
+    def _probe_available(self, stats: _ModelStats, now: float) -> bool:
+        cooldown = self._config.cooldown_seconds
+        if stats.opened_at is None or now - stats.opened_at < cooldown:
+            return False
+        return stats.probe_started_at is None or now - stats.probe_started_at >= cooldown
+
+    def record(
+        self,
+        model: str,
+        ok: bool,
+        latency_seconds: float | None = None,
+        started_at: float | None = None,
+    ) -> None:
+        """
+        回报一次调用结果
+
+        参数:
+            started_at: 请求开始时的 now()；熔断打开后只有获准探测之后发起的请求才算探测结果，
+                熔断前发出、迟到的结果（或过期探测的结果）不改变熔断状态
+        """
+        key = str(model or "")
+        if not key:
+            return
+        stats = self._stats.setdefault(key, _ModelStats(self._config.latency_window))
+        now = self._clock()
+        if ok and latency_seconds is not None:
+            stats.latencies.append(max(0.0, float(latency_seconds)))
+
+        if stats.opened_at is not None:
+            if stats.probe_started_at is None or started_at is None or started_at < stats.probe_started_at:
+                return
+            # 半开探测结果：成功则关闭熔断并清空窗口，失败则重新计时
+            stats.probe_started_at = None
+            if ok:
+                stats.opened_at = None
+                stats.outcomes.clear()
+                set_model_circuit_state(key, False)
+            else:
+                stats.opened_at = now
+            return
+
+        stats.outcomes.append((now, not ok))
+        self._prune(stats, now)
+        if not self._config.breaker_enabled or stats.opened_at is not None:
+            return
+        calls = len(stats.outcomes)
+        if calls < max(1, self._config.min_calls):
+            return
+        failures = sum(1 for _, failed in stats.outcomes if failed)
+        if failures / calls >= self._config.failure_rate_threshold:
+            stats.opened_at = now
+            set_model_circuit_state(key, True)
+            logger.warning(
+                "模型熔断打开: %s",
+                key,
+                extra={
+                    "event_code": "llm.model_health.circuit_open",
+                    "model": key,
+                    "calls": calls,
+                    "failures": failures,
+                },
+            )
+
+    def observe_latency(self, model: str, latency_seconds: float) -> None:
+        """
+        只记录延迟样本，不计成败
+
+        说明:
+            - 对冲胜出后被取消的慢请求没有完成耗时，按已耗时记为下界样本；
+              否则分位数只看到快请求，对冲延迟会持续下降、对冲越发越多
+        """
+        key = str(model or "")
+        if not key:
+            return
+        stats = self._stats.setdefault(key, _ModelStats(self._config.latency_window))
+        stats.latencies.append(max(0.0, float(latency_seconds)))
+
+    def hedge_delay_seconds(self, model: str) -> float:
+        """主模型近期成功延迟的分位数，样本不足时使用初始延迟。"""
+        cfg = self._config
+        stats = self._stats.get(str(model or ""))
+        samples = sorted(stats.latencies) if stats is not None else []
+        if len(samples) < 5:
+            delay_ms = float(cfg.hedge_initial_delay_ms)
+        else:
+            index = min(len(samples) - 1, max(0, math.ceil(cfg.hedge_percentile * len(samples)) - 1))
+            delay_ms = samples[index] * 1000
+        return max(cfg.hedge_min_delay_ms, min(cfg.hedge_max_delay_ms, delay_ms)) / 1000.0
+
+    def _prune(self, stats: _ModelStats, now: float) -> None:
+        cutoff = now - self._config.window_seconds
+        while stats.outcomes and stats.outcomes[0][0] < cutoff:
+            stats.outcomes.popleft()
+
+
+_GLOBAL_MODEL_HEALTH: ModelHealthRegistry | None = None
+
+
+def configure_model_health(config: ModelHealthConfig) -> ModelHealthRegistry:
+    global _GLOBAL_MODEL_HEALTH
+    _GLOBAL_MODEL_HEALTH = ModelHealthRegistry(config)
+    return _GLOBAL_MODEL_HEALTH
+
+
+def get_model_health() -> ModelHealthRegistry | None:
+    return _GLOBAL_MODEL_HEALTH
@@ -0,0 +1,271 @@
+"""
+描述: 按优先级调度的 LLM 并发控制
+主要功能:
+    - 通过 ContextVar 标记调用优先级（interactive / batch / background / shadow）
+    - 全局并发上限 + 各优先级并发上限，并为交互流量预留容量
+    - 空出容量时按优先级从高到低唤醒排队者；低优先级排队超限或等待超时直接丢弃，交互流量只排队不丢弃
+    - 上报排队深度、在途数量、等待时长与丢弃次数
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import logging
+import time
+from typing import AsyncIterator, Deque, Iterator
+
+from src.utils.exceptions import LLMOverloadedError
+from src.utils.metrics import (
+    observe_llm_scheduler_wait,
+    record_llm_scheduler_shed,
+    set_llm_scheduler_inflight,
+    set_llm_scheduler_queue_depth,
+)
+
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+PRIORITY_BACKGROUND = "background"
+PRIORITY_SHADOW = "shadow"
+
+# 数值越小优先级越高
+PRIORITY_ORDER: tuple[str, ...] = (
+    PRIORITY_INTERACTIVE,
+    PRIORITY_BATCH,
+    PRIORITY_BACKGROUND,
+    PRIORITY_SHADOW,
+)
+
+
+# region 配置
+@dataclass
+class LLMPriorityLimits:
+    """
+    单个优先级的限制
+
+    属性:
+        max_concurrency: 该优先级同时在途上限
+        max_queue: 排队上限，超过则直接丢弃
+        max_wait_seconds: 排队等待上限，None 表示一直等待
+
+    说明:
+        交互优先级只使用 max_concurrency；max_queue / max_wait_seconds 对其不生效（交互请求从不丢弃）
+    """
+
+    max_concurrency: int
+    max_queue: int = 100
+    max_wait_seconds: float | None = None
+
+
+def _default_class_limits() -> dict[str, LLMPriorityLimits]:
+    return {
+        PRIORITY_INTERACTIVE: LLMPriorityLimits(max_concurrency=8, max_queue=200, max_wait_seconds=None),
+        PRIORITY_BATCH: LLMPriorityLimits(max_concurrency=3, max_queue=50, max_wait_seconds=30.0),
+        PRIORITY_BACKGROUND: LLMPriorityLimits(max_concurrency=2, max_queue=20, max_wait_seconds=60.0),
+        PRIORITY_SHADOW: LLMPriorityLimits(max_concurrency=1, max_queue=5, max_wait_seconds=2.0),
+    }
+
+
+@dataclass
+class LLMSchedulerConfig:
+    """
+    调度器配置
+
+    属性:
+        max_concurrency: 全局在途上限
+        reserved_interactive: 仅交互流量可使用的预留容量
+        classes: 各优先级限制
+    """
+
+    max_concurrency: int = 8
+    reserved_interactive: int = 2
+    classes: dict[str, LLMPriorityLimits] = field(default_factory=_default_class_limits)
+
+
+# endregion
+
+
+# region 调度器
+class LLMScheduler:
+    """
+    优先级调度器
+
+    功能:
+        - slot(priority): 获取一个调用名额，退出时归还
+        - 交互流量只受全局/自身上限约束；其余优先级不得占用预留容量
+        - 归还名额时按优先级从高到低唤醒，同一优先级先进先出
+    """
+
+    def __init__(self, config: LLMSchedulerConfig) -> None:
+        self._config = config
+        self._max_concurrency = max(1, int(config.max_concurrency))
+        self._reserved = max(0, min(int(config.reserved_interactive), self._max_concurrency - 1))
+        self._limits = {
+            priority: config.classes.get(priority) or LLMPriorityLimits(max_concurrency=self._max_concurrency)
+            for priority in PRIORITY_ORDER
+        }
+        self._active: dict[str, int] = {priority: 0 for priority in PRIORITY_ORDER}
+        self._waiters: dict[str, Deque[asyncio.Future[None]]] = {priority: deque() for priority in PRIORITY_ORDER}
+
+    @property
+    def total_active(self) -> int:
+        return sum(self._active.values())
+
+    def active(self, priority: str) -> int:
+        return self._active.get(normalize_priority(priority), 0)
+
+    def queue_depth(self, priority: str) -> int:
+        return len(self._waiters.get(normalize_priority(priority), ()))
+
+    @asynccontextmanager
+    async def slot(self, priority: str | None = None) -> AsyncIterator[None]:
+        resolved = normalize_priority(priority or get_llm_priority())
+        await self.acquire(resolved)
+        try:
+            yield
+        finally:
+            self.release(resolved)
+
+    async def acquire(self, priority: str) -> None:
+        """获取名额；低优先级在排队已满或等待超时时抛出 LLMOverloadedError，交互优先级一直排队。"""
+        priority = normalize_priority(priority)
+        if self._can_start(priority) and not self._waiters[priority]:
+            self._grant(priority)
+            observe_llm_scheduler_wait(priority, 0.0)
+            return
+
+        limits = self._limits[priority]
+        queue = self._waiters[priority]
+        sheddable = priority != PRIORITY_INTERACTIVE
+        if sheddable and len(queue) >= max(0, int(limits.max_queue)):
+            self._shed(priority, "queue_full")
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        queue.append(future)
+        set_llm_scheduler_queue_depth(priority, len(queue))
+        start = time.perf_counter()
+        try:
+            if limits.max_wait_seconds is None or not sheddable:
+                await asyncio.shield(future)
+            else:
+                await asyncio.wait_for(asyncio.shield(future), timeout=max(0.0, float(limits.max_wait_seconds)))
+        except asyncio.TimeoutError:
+            if not self._abandon(priority, future):
+                # 超时与授予同时发生：名额已记在本调用名下，直接使用
+                observe_llm_scheduler_wait(priority, time.perf_counter() - start)
+                return
+            self._shed(priority, "wait_timeout")
+        except asyncio.CancelledError:
+            if not self._abandon(priority, future):
+                self.release(priority)
+            raise
+        observe_llm_scheduler_wait(priority, time.perf_counter() - start)
+
+    def release(self, priority: str) -> None:
+        priority = normalize_priority(priority)
+        self._active[priority] = max(0, self._active[priority] - 1)
+        set_llm_scheduler_inflight(priority, self._active[priority])
+        self._dispatch()
+
+    def _can_start(self, priority: str) -> bool:
+        total = self.total_active
+        if total >= self._max_concurrency:
+            return False
+        if self._active[priority] >= max(1, int(self._limits[priority].max_concurrency)):
+            return False
+        if priority != PRIORITY_INTERACTIVE and total >= self._max_concurrency - self._reserved:
+            return False
+        return True
+
+    def _grant(self, priority: str) -> None:
+        self._active[priority] += 1
+        set_llm_scheduler_inflight(priority, self._active[priority])
+
+    def _dispatch(self) -> None:
+        """按优先级顺序唤醒排队者，直到没有可用名额。"""
+        for priority in PRIORITY_ORDER:
+            queue = self._waiters[priority]
+            while queue and self._can_start(priority):
+                future = queue.popleft()
+                if future.done():
+                    continue
+                self._grant(priority)
+                future.set_result(None)
+            set_llm_scheduler_queue_depth(priority, len(queue))
+
+    def _abandon(self, priority: str, future: asyncio.Future[None]) -> bool:
+        """移出排队；返回 False 表示已被授予名额。"""
+        if future.done() and not future.cancelled():
+            return False
+        future.cancel()
+        try:
+            self._waiters[priority].remove(future)
+        except ValueError:
+            pass
+        set_llm_scheduler_queue_depth(priority, len(self._waiters[priority]))
+        return True
+
+    def _shed(self, priority: str, reason: str) -> None:
+        record_llm_scheduler_shed(priority, reason)
+        logger.warning(
+            "LLM 调度丢弃低优先级请求: %s (%s)",
+            priority,
+            reason,
+            extra={
+                "event_code": "llm.scheduler.shed",
+                "priority": priority,
+                "reason": reason,
+                "active": self.total_active,
+                "queue_depth": len(self._waiters[priority]),
+            },
+        )
+        raise LLMOverloadedError(priority=priority, reason=reason)
+
+
+# endregion
+
+
+# region 优先级上下文
+_CURRENT_PRIORITY: ContextVar[str] = ContextVar("llm_priority", default=PRIORITY_INTERACTIVE)
+
+
+def normalize_priority(priority: str | None) -> str:
+    value = str(priority or "").strip().lower()
+    return value if value in PRIORITY_ORDER else PRIORITY_INTERACTIVE
+
+
+@contextmanager
+def llm_priority(priority: str) -> Iterator[None]:
+    """标记当前代码块（及其创建的子任务）内 LLM 调用的优先级。"""
+    token = _CURRENT_PRIORITY.set(normalize_priority(priority))
+    try:
+        yield
+    finally:
+        _CURRENT_PRIORITY.reset(token)
+
+
+def get_llm_priority() -> str:
+    return _CURRENT_PRIORITY.get()
+
+
+_GLOBAL_LLM_SCHEDULER: LLMScheduler | None = None
+
+
+def configure_llm_scheduler(config: LLMSchedulerConfig | None) -> LLMScheduler | None:
+    """配置全局调度器；传入 None 时关闭调度（所有调用直接放行）。"""
+    global _GLOBAL_LLM_SCHEDULER
+    _GLOBAL_LLM_SCHEDULER = LLMScheduler(config) if config is not None else None
+    return _GLOBAL_LLM_SCHEDULER
+
+
+def get_llm_scheduler() -> LLMScheduler | None:
+    return _GLOBAL_LLM_SCHEDULER
+
+
+# endregion
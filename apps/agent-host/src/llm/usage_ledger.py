@@ -0,0 +1,116 @@
+"""
+描述: 请求级 LLM 用量账本
+主要功能:
+    - 通过 ContextVar 为每个请求挂载独立账本，并发请求之间互不串扰
+    - 累计请求内每一次 LLM 调用（planner / intent / time_range / summary / chitchat ...）
+    - 按阶段汇总 token 与延迟，供 UsageLogger / CostMonitor 计算准确总量
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import time
+from typing import Any, Iterator
+
+
+DEFAULT_STAGE = "other"
+
+
+# region 数据结构
+@dataclass
+class LLMUsageEntry:
+    """单次 LLM 调用的用量记录。"""
+
+    stage: str
+    model: str
+    token_count: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: int = 0
+    estimated: bool = True
+    metadata: dict[str, Any] = field(default_factory=dict)
+    ts: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "stage": self.stage,
+            "model": self.model,
+            "token_count": self.token_count,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_ms": self.latency_ms,
+            "estimated": self.estimated,
+        }
+
+
+class UsageLedger:
+    """请求级用量账本（仅在单个请求的任务树内共享）。"""
+
+    def __init__(self) -> None:
+        self._entries: list[LLMUsageEntry] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record(self, entry: LLMUsageEntry) -> None:
+        self._entries.append(entry)
+
+    def entries(self) -> list[LLMUsageEntry]:
+        return list(self._entries)
+
+    def by_stage(self) -> dict[str, dict[str, int]]:
+        """按阶段汇总调用次数、token 与延迟。"""
+        summary: dict[str, dict[str, int]] = {}
+        for entry in self._entries:
+            bucket = summary.setdefault(
+                entry.stage,
+                {"calls": 0, "token_count": 0, "prompt_tokens": 0, "completion_tokens": 0, "latency_ms": 0},
+            )
+            bucket["calls"] += 1
+            bucket["token_count"] += entry.token_count
+            bucket["prompt_tokens"] += entry.prompt_tokens
+            bucket["completion_tokens"] += entry.completion_tokens
+            bucket["latency_ms"] += entry.latency_ms
+        return summary
+
+
+# endregion
+
+
+# region 上下文管理
+_CURRENT_LEDGER: ContextVar[UsageLedger | None] = ContextVar("llm_usage_ledger", default=None)
+_CURRENT_STAGE: ContextVar[str] = ContextVar("llm_usage_stage", default=DEFAULT_STAGE)
+
+
+@contextmanager
+def usage_ledger_scope() -> Iterator[UsageLedger]:
+    """为当前请求挂载新账本；子任务创建时复制上下文，记录写入同一账本。"""
+    ledger = UsageLedger()
+    token = _CURRENT_LEDGER.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _CURRENT_LEDGER.reset(token)
+
+
+@contextmanager
+def llm_stage(stage: str) -> Iterator[None]:
+    """标记当前代码块内 LLM 调用所属阶段。"""
+    token = _CURRENT_STAGE.set(str(stage or DEFAULT_STAGE))
+    try:
+        yield
+    finally:
+        _CURRENT_STAGE.reset(token)
+
+
+def get_usage_ledger() -> UsageLedger | None:
+    return _CURRENT_LEDGER.get()
+
+
+def get_llm_stage() -> str:
+    return _CURRENT_STAGE.get()
+
+
+# endregion
@@ -19,9 +19,10 @@ from fastapi import FastAPI
 
 from src.api.health import router as health_router
 from src.api.metrics import router as metrics_router
-from src.api.webhook import router as webhook_router, agent_core
+from src.api.webhook import router as webhook_router, agent_core, shutdown_message_dispatcher
 from src.config import get_settings
 from src.core.intent import load_skills_config
+from src.utils.expiry import ExpirySweeper
 from src.utils.logger import setup_logging
 from src.utils.workspace import ensure_workspace
 from src.utils.hot_reload import HotReloadManager
@@ -53,7 +54,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     应用生命周期回调
 
     功能:
-        - Startup: 启动热更新、连接数据库、初始化调度器
+        - Startup: 启动热更新、过期清扫、连接数据库、初始化调度器
         - Shutdown: 停止任务、关闭连接
     """
     # 启动配置热更新
@@ -69,6 +70,14 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     )
     hot_reload_manager.start_all()
 
+    # 后台清扫过期会话/上下文/状态（替代每条消息的全量扫描）
+    if settings.session.cleanup.enabled:
+        app.state.expiry_sweeper = ExpirySweeper(
+            agent_core.asweep_expired,
+            interval_seconds=settings.session.cleanup.interval_seconds,
+        )
+        app.state.expiry_sweeper.start()
+
     skills_config = load_skills_config("config/skills.yaml")
     reminder_cfg = skills_config.get("reminder", {})
     app.state.reminder_dispatcher = ReminderDispatcher(settings=settings)
@@ -134,6 +143,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     
     # 关闭
     hot_reload_manager.stop_all()
+    expiry_sweeper: ExpirySweeper | None = getattr(app.state, "expiry_sweeper", None)
+    if expiry_sweeper is not None:
+        expiry_sweeper.stop()
     scheduler: ReminderScheduler | None = getattr(app.state, "reminder_scheduler", None)
     if scheduler is not None:
         await scheduler.stop()
@@ -143,6 +155,8 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     daily_digest_scheduler = getattr(app.state, "daily_digest_scheduler", None)
     if daily_digest_scheduler is not None:
         await daily_digest_scheduler.stop()
+    await shutdown_message_dispatcher()
+    await agent_core.aclose()
     logger.info("Feishu Agent shutdown complete")
 # endregion
 
@@ -165,6 +165,17 @@ class LLMRateLimitError(LLMError):
         )
 
 
+class LLMOverloadedError(LLMError):
+    """LLM 调度容量不足，低优先级请求被丢弃"""
+
+    def __init__(self, priority: str, reason: str) -> None:
+        super().__init__(
+            message=f"LLM 调度繁忙，已丢弃 {priority} 请求 ({reason})",
+            code="LLM_OVERLOADED",
+            details={"priority": priority, "reason": reason},
+        )
+
+
 class LLMResponseError(LLMError):
     """LLM 响应格式错误"""
     
@@ -268,6 +279,7 @@ USER_FRIENDLY_MESSAGES = {
     "SKILL_TIMEOUT": "抱歉，操作响应超时，请稍后重试。",
     "LLM_TIMEOUT": "响应超时，请稍后重试。",
     "LLM_RATE_LIMIT": "请求太频繁，请稍后再试。",
+    "LLM_OVERLOADED": "当前请求较多，请稍后再试。",
     "MCP_CONNECTION_ERROR": "服务暂时不可用，请稍后重试。",
     "MCP_TIMEOUT": "查询超时，请稍后重试。",
     "UNKNOWN_ERROR": "遇到未知错误，请稍后重试。",
@@ -0,0 +1,217 @@
+"""
+描述: 过期索引与后台清扫器
+主要功能:
+    - ExpiryIndex: 按截止时间索引 key 的最小堆（惰性删除），续期 O(1)、清扫只触达到期项
+    - ExpirySweeper: 周期调用清扫函数（同步或协程函数），取代每条消息都全量扫描的过期清理
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+
+logger = logging.getLogger(__name__)
+
+# 堆中陈旧项超过有效 key 数的倍数后重建，避免频繁提前截止时间导致堆膨胀
+_COMPACT_FACTOR = 2
+_COMPACT_MIN_SIZE = 1024
+
+
+# ============================================
+# region ExpiryIndex
+# ============================================
+class ExpiryIndex:
+    """
+    过期索引（最小堆 + 惰性删除）
+
+    功能:
+        - touch: 登记/续期 key 的截止时间；截止时间推后时只改字典，不入堆
+        - discard: 移除 key，堆中残留项在弹出时丢弃
+        - pop_expired: 弹出截止时间 <= now 的 key；遇到已续期的堆项则按新截止时间重新入堆
+
+    说明:
+        - 非线程安全，由持有方加锁
+        - 每个 key 在堆中最多只有一个有效项（_queued 记录其截止时间）
+    """
+
+    __slots__ = ("_heap", "_deadlines", "_queued")
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, str]] = []
+        self._deadlines: dict[str, float] = {}
+        self._queued: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._deadlines
+
+    def deadline(self, key: str) -> float | None:
+        return self._deadlines.get(key)
+
+    def touch(self, key: str, deadline: float) -> None:
+        self._deadlines[key] = deadline
+        queued = self._queued.get(key)
+        if queued is not None and queued <= deadline:
+            return
+        self._queued[key] = deadline
+        heapq.heappush(self._heap, (deadline, key))
+        if len(self._heap) > _COMPACT_FACTOR * len(self._deadlines) + _COMPACT_MIN_SIZE:
+            self._compact()
+
+    def discard(self, key: str) -> None:
+        self._deadlines.pop(key, None)
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._deadlines.clear()
+        self._queued.clear()
+
+    def pop_expired(self, now: float) -> list[str]:
+        heap = self._heap
+        expired: list[str] = []
+        while heap and heap[0][0] <= now:
+            queued, key = heapq.heappop(heap)
+            if self._queued.get(key) != queued:
+                continue
+            deadline = self._deadlines.get(key)
+            if deadline is None:
+                del self._queued[key]
+                continue
+            if deadline <= now:
+                del self._queued[key]
+                del self._deadlines[key]
+                expired.append(key)
+                continue
+            self._queued[key] = deadline
+            heapq.heappush(heap, (deadline, key))
+        return expired
+
+    def _compact(self) -> None:
+        self._queued = dict(self._deadlines)
+        self._heap = [(deadline, key) for key, deadline in self._deadlines.items()]
+        heapq.heapify(self._heap)
+
+
+# endregion
+# ============================================
+
+
+# ============================================
+# region ExpirySweeper
+# ============================================
+class ExpirySweeper:
+    """
+    后台过期清扫器
+
+    功能:
+        - 在运行中的事件循环内以 asyncio 任务运行；无事件循环时（如长连接入口）退化为守护线程
+        - 清扫异常只记录日志，不中断后续周期
+    """
+
+    def __init__(
+        self,
+        sweep: Callable[[], Any],
+        interval_seconds: float = 300,
+        name: str = "expiry-sweeper",
+    ) -> None:
+        """
+        参数:
+            sweep: 清扫函数；返回协程时，任务模式下在循环内 await，线程模式下用 asyncio.run 执行
+            interval_seconds: 清扫间隔（秒）
+            name: 任务/线程名称
+        """
+        self._sweep = sweep
+        self._interval = max(float(interval_seconds), 0.01)
+        self._name = name
+        self._task: asyncio.Task[None] | None = None
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        if self._task is not None:
+            return not self._task.done()
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            logger.warning("ExpirySweeper already running", extra={"event_code": "expiry.sweeper.already_running"})
+            return
+        self._stop_event.clear()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._thread = threading.Thread(target=self._run_thread, name=self._name, daemon=True)
+            self._thread.start()
+        else:
+            self._task = loop.create_task(self._run_async(), name=self._name)
+        logger.info(
+            "过期清扫器已启动",
+            extra={"event_code": "expiry.sweeper.started", "interval_seconds": self._interval},
+        )
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def sweep_once(self) -> None:
+        started = time.perf_counter()
+        try:
+            result = self._sweep()
+            if inspect.iscoroutine(result):
+                asyncio.run(result)
+        except Exception:
+            self._log_failed()
+            return
+        self._log_swept(started)
+
+    async def asweep_once(self) -> None:
+        started = time.perf_counter()
+        try:
+            result = self._sweep()
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            self._log_failed()
+            return
+        self._log_swept(started)
+
+    @staticmethod
+    def _log_failed() -> None:
+        logger.warning("过期清扫失败", extra={"event_code": "expiry.sweeper.failed"}, exc_info=True)
+
+    @staticmethod
+    def _log_swept(started: float) -> None:
+        logger.debug(
+            "过期清扫完成",
+            extra={
+                "event_code": "expiry.sweeper.swept",
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+            },
+        )
+
+    async def _run_async(self) -> None:
+        while not self._stop_event.is_set():
+            await asyncio.sleep(self._interval)
+            await self.asweep_once()
+
+    def _run_thread(self) -> None:
+        while not self._stop_event.wait(self._interval):
+            self.sweep_once()
+
+
+# endregion
+# ============================================
@@ -0,0 +1,76 @@
+"""
+描述: 文件内容缓存
+主要功能:
+    - 按路径缓存文本内容的有界 LRU
+    - 每次读取先 stat，(mtime_ns, size) 未变直接返回缓存，不再读盘
+    - 写入方可主动 invalidate，避免同一时间片内的改动被漏判
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+import os
+from pathlib import Path
+import threading
+
+
+# region 文件内容缓存
+class FileContentCache:
+    """
+    (mtime_ns, size) 校验的文件文本 LRU，线程安全
+
+    说明:
+        - 文件不存在返回空字符串，并移除对应缓存项
+        - 供线程池中的读取使用，锁只保护字典，不包住磁盘 I/O
+    """
+
+    def __init__(self, max_entries: int = 256, encoding: str = "utf-8") -> None:
+        self._max_entries = max(1, int(max_entries))
+        self._encoding = encoding
+        self._entries: OrderedDict[str, tuple[int, int, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def read_text(self, path: str | Path) -> str:
+        key = os.fspath(path)
+        try:
+            stat = os.stat(key)
+        except FileNotFoundError:
+            self.invalidate(key)
+            return ""
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[:2] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[2]
+            self.misses += 1
+
+        try:
+            with open(key, encoding=self._encoding) as handle:
+                text = handle.read()
+        except FileNotFoundError:
+            self.invalidate(key)
+            return ""
+        with self._lock:
+            self._entries[key] = (signature[0], signature[1], text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return text
+
+    def invalidate(self, path: str | Path) -> None:
+        with self._lock:
+            self._entries.pop(os.fspath(path), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# endregion
@@ -52,6 +52,13 @@ if PROMETHEUS_AVAILABLE:
         ["method"],
         buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0),
     )
+
+    # 本地意图分类器判定结果（accepted 直接采用 / deferred 交给 LLM）
+    INTENT_LOCAL_CLASSIFIER_COUNT = Counter(
+        "feishu_agent_intent_local_classifier_total",
+        "Local intent classifier decisions",
+        ["outcome"],
+    )
     
     # LLM 调用计数
     LLM_CALL_COUNT = Counter(
@@ -68,6 +75,131 @@ if PROMETHEUS_AVAILABLE:
         buckets=(0.5, 1.0, 2.0, 5.0, 10.0, 30.0),
     )
 
+    # LLM 请求合并（单飞 / 短期结果缓存）
+    LLM_COALESCED_COUNT = Counter(
+        "feishu_agent_llm_coalesced_calls_total",
+        "LLM calls served without a new upstream request",
+        ["operation", "kind"],
+    )
+
+    # LLM 对冲请求结果（fired / primary_won / hedge_won / failover）
+    LLM_HEDGE_COUNT = Counter(
+        "feishu_agent_llm_hedged_requests_total",
+        "Hedged LLM request outcomes",
+        ["outcome"],
+    )
+
+    # LLM 调度器：各优先级排队深度 / 在途数量 / 等待时长 / 丢弃次数
+    LLM_SCHEDULER_QUEUE_DEPTH = Gauge(
+        "feishu_agent_llm_scheduler_queue_depth",
+        "LLM scheduler queued calls by priority",
+        ["priority"],
+    )
+    LLM_SCHEDULER_INFLIGHT = Gauge(
+        "feishu_agent_llm_scheduler_inflight",
+        "LLM scheduler in-flight calls by priority",
+        ["priority"],
+    )
+    LLM_SCHEDULER_WAIT = Histogram(
+        "feishu_agent_llm_scheduler_wait_seconds",
+        "Time spent waiting for an LLM scheduler slot",
+        ["priority"],
+        buckets=(0.0, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+    )
+    LLM_SCHEDULER_SHED = Counter(
+        "feishu_agent_llm_scheduler_shed_total",
+        "LLM calls shed by the scheduler",
+        ["priority", "reason"],
+    )
+
+    # 入站消息分发器：排队深度 / 在途会话 / 排队等待 / 过载丢弃
+    MESSAGE_DISPATCH_QUEUE_DEPTH = Gauge(
+        "feishu_agent_message_dispatch_queue_depth",
+        "Inbound messages waiting in per-session dispatch queues",
+        ["source"],
+    )
+    MESSAGE_DISPATCH_INFLIGHT = Gauge(
+        "feishu_agent_message_dispatch_inflight",
+        "Inbound messages being processed by dispatch workers",
+        ["source"],
+    )
+    MESSAGE_DISPATCH_WAIT = Histogram(
+        "feishu_agent_message_dispatch_wait_seconds",
+        "Time an inbound message waits before a dispatch worker picks it up",
+        ["source"],
+        buckets=(0.0, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+    )
+    MESSAGE_DISPATCH_SHED = Counter(
+        "feishu_agent_message_dispatch_shed_total",
+        "Inbound messages shed by the dispatcher",
+        ["source", "reason"],
+    )
+
+    # 模型熔断状态（1=打开）
+    MODEL_CIRCUIT_OPEN = Gauge(
+        "feishu_agent_model_circuit_open",
+        "Whether the per-model circuit breaker is open",
+        ["model"],
+    )
+
+    # LLM 流式首 token 延迟
+    LLM_FIRST_TOKEN_DURATION = Histogram(
+        "feishu_agent_llm_first_token_seconds",
+        "Latency from LLM request start to first streamed token",
+        ["operation"],
+        buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0),
+    )
+
+    # 用户侧首个可见 token 延迟（消息接收 -> 卡片首次出现模型输出）
+    REPLY_FIRST_VISIBLE_TOKEN_DURATION = Histogram(
+        "feishu_agent_reply_first_visible_token_seconds",
+        "Latency from inbound message to first model token visible to the user",
+        ["channel"],
+        buckets=(0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0),
+    )
+
+    REPLY_STREAM_UPDATE_COUNT = Counter(
+        "feishu_agent_reply_stream_updates_total",
+        "Total streaming reply card send/patch operations",
+        ["channel", "operation", "status"],
+    )
+
+    # 单次 LLM 调用 token 数（按编排阶段）
+    LLM_STAGE_TOKENS = Histogram(
+        "feishu_agent_llm_stage_tokens",
+        "Tokens consumed per LLM call, by pipeline stage",
+        ["stage", "kind"],
+        buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000),
+    )
+
+    # 编排流水线阶段耗时（sequential / concurrent 对比 p50）
+    PIPELINE_STAGE_DURATION = Histogram(
+        "feishu_agent_pipeline_stage_duration_seconds",
+        "Orchestrator pipeline stage duration in seconds",
+        ["stage", "mode"],
+        buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0),
+    )
+
+    # Planner 结果缓存
+    PLANNER_CACHE_LOOKUP_COUNT = Counter(
+        "feishu_agent_planner_cache_lookups_total",
+        "Planner result cache lookups",
+        ["tier", "result"],
+    )
+
+    PLANNER_CACHE_INVALIDATION_COUNT = Counter(
+        "feishu_agent_planner_cache_invalidations_total",
+        "Planner result cache invalidations",
+        ["reason"],
+    )
+
+    # Embedding 向量缓存
+    EMBEDDING_CACHE_LOOKUP_COUNT = Counter(
+        "feishu_agent_embedding_cache_lookups_total",
+        "Embedding cache lookups per text",
+        ["tier", "result"],
+    )
+
     # Reminder 推送计数
     REMINDER_PUSH_COUNT = Counter(
         "feishu_agent_reminder_push_total",
@@ -244,8 +376,28 @@ else:
     SKILL_EXECUTION_COUNT = DummyMetric()
     SKILL_EXECUTION_DURATION = DummyMetric()
     INTENT_PARSE_DURATION = DummyMetric()
+    INTENT_LOCAL_CLASSIFIER_COUNT = DummyMetric()
     LLM_CALL_COUNT = DummyMetric()
     LLM_CALL_DURATION = DummyMetric()
+    LLM_COALESCED_COUNT = DummyMetric()
+    LLM_HEDGE_COUNT = DummyMetric()
+    LLM_SCHEDULER_QUEUE_DEPTH = DummyMetric()
+    LLM_SCHEDULER_INFLIGHT = DummyMetric()
+    LLM_SCHEDULER_WAIT = DummyMetric()
+    LLM_SCHEDULER_SHED = DummyMetric()
+    MESSAGE_DISPATCH_QUEUE_DEPTH = DummyMetric()
+    MESSAGE_DISPATCH_INFLIGHT = DummyMetric()
+    MESSAGE_DISPATCH_WAIT = DummyMetric()
+    MESSAGE_DISPATCH_SHED = DummyMetric()
+    MODEL_CIRCUIT_OPEN = DummyMetric()
+    LLM_FIRST_TOKEN_DURATION = DummyMetric()
+    REPLY_FIRST_VISIBLE_TOKEN_DURATION = DummyMetric()
+    REPLY_STREAM_UPDATE_COUNT = DummyMetric()
+    LLM_STAGE_TOKENS = DummyMetric()
+    PIPELINE_STAGE_DURATION = DummyMetric()
+    PLANNER_CACHE_LOOKUP_COUNT = DummyMetric()
+    PLANNER_CACHE_INVALIDATION_COUNT = DummyMetric()
+    EMBEDDING_CACHE_LOOKUP_COUNT = DummyMetric()
     MCP_TOOL_CALL_COUNT = DummyMetric()
     FEISHU_EVENT_COUNT = DummyMetric()
     CHITCHAT_GUARD_COUNT = DummyMetric()
@@ -293,12 +445,122 @@ def record_intent_parse(method: str, duration: float) -> None:
     INTENT_PARSE_DURATION.labels(method=method).observe(duration)
 
 
+def record_intent_local_classifier(outcome: str) -> None:
+    """记录本地意图分类器判定结果（accepted / deferred / rejected_label）。"""
+    INTENT_LOCAL_CLASSIFIER_COUNT.labels(outcome=str(outcome or "unknown")).inc()
+
+
 def record_llm_call(operation: str, status: str, duration: float) -> None:
     """记录 LLM 调用指标"""
     LLM_CALL_COUNT.labels(operation=operation, status=status).inc()
     LLM_CALL_DURATION.labels(operation=operation).observe(duration)
 
 
+def record_llm_coalesced(operation: str, kind: str) -> None:
+    """记录被合并的 LLM 调用（kind: inflight 共享在途请求 / memo 命中短期缓存）。"""
+    LLM_COALESCED_COUNT.labels(operation=operation, kind=kind).inc()
+
+
+def record_llm_hedge(outcome: str) -> None:
+    """记录 LLM 对冲请求结果。"""
+    LLM_HEDGE_COUNT.labels(outcome=str(outcome or "unknown")).inc()
+
+
+def set_model_circuit_state(model: str, is_open: bool) -> None:
+    """更新模型熔断状态。"""
+    MODEL_CIRCUIT_OPEN.labels(model=str(model or "unknown")).set(1 if is_open else 0)
+
+
+def set_llm_scheduler_queue_depth(priority: str, depth: int) -> None:
+    """更新 LLM 调度器排队深度。"""
+    LLM_SCHEDULER_QUEUE_DEPTH.labels(priority=str(priority or "unknown")).set(max(0, int(depth)))
+
+
+def set_llm_scheduler_inflight(priority: str, count: int) -> None:
+    """更新 LLM 调度器在途数量。"""
+    LLM_SCHEDULER_INFLIGHT.labels(priority=str(priority or "unknown")).set(max(0, int(count)))
+
+
+def observe_llm_scheduler_wait(priority: str, duration: float) -> None:
+    """记录获取 LLM 调度名额的等待时长。"""
+    LLM_SCHEDULER_WAIT.labels(priority=str(priority or "unknown")).observe(max(0.0, duration))
+
+
+def record_llm_scheduler_shed(priority: str, reason: str) -> None:
+    """记录被调度器丢弃的 LLM 调用（reason: queue_full / wait_timeout）。"""
+    LLM_SCHEDULER_SHED.labels(priority=str(priority or "unknown"), reason=str(reason or "unknown")).inc()
+
+
+def set_message_dispatch_queue_depth(source: str, depth: int) -> None:
+    """更新入站消息分发器排队深度。"""
+    MESSAGE_DISPATCH_QUEUE_DEPTH.labels(source=str(source or "unknown")).set(max(0, int(depth)))
+
+
+def set_message_dispatch_inflight(source: str, count: int) -> None:
+    """更新入站消息分发器在途数量。"""
+    MESSAGE_DISPATCH_INFLIGHT.labels(source=str(source or "unknown")).set(max(0, int(count)))
+
+
+def observe_message_dispatch_wait(source: str, duration: float) -> None:
+    """记录入站消息从入队到开始处理的等待时长。"""
+    MESSAGE_DISPATCH_WAIT.labels(source=str(source or "unknown")).observe(max(0.0, duration))
+
+
+def record_message_dispatch_shed(source: str, reason: str) -> None:
+    """记录被分发器丢弃的入站消息（reason: backlog_full / session_queue_full）。"""
+    MESSAGE_DISPATCH_SHED.labels(source=str(source or "unknown"), reason=str(reason or "unknown")).inc()
+
+
+def record_llm_first_token(operation: str, duration: float) -> None:
+    """记录 LLM 流式首 token 延迟"""
+    LLM_FIRST_TOKEN_DURATION.labels(operation=operation).observe(max(0.0, duration))
+
+
+def observe_reply_first_visible_token(channel: str, duration_seconds: float) -> None:
+    """记录用户侧首个可见 token 延迟。"""
+    REPLY_FIRST_VISIBLE_TOKEN_DURATION.labels(channel=str(channel or "unknown")).observe(max(0.0, duration_seconds))
+
+
+def record_reply_stream_update(channel: str, operation: str, status: str) -> None:
+    """记录流式回复卡片的发送/更新结果。"""
+    REPLY_STREAM_UPDATE_COUNT.labels(
+        channel=str(channel or "unknown"),
+        operation=str(operation or "unknown"),
+        status=str(status or "unknown"),
+    ).inc()
+
+
+def observe_llm_stage_tokens(stage: str, prompt_tokens: int, completion_tokens: int) -> None:
+    """记录单次 LLM 调用在所属阶段的 token 消耗。"""
+    label = str(stage or "other")
+    LLM_STAGE_TOKENS.labels(stage=label, kind="prompt").observe(max(0, int(prompt_tokens)))
+    LLM_STAGE_TOKENS.labels(stage=label, kind="completion").observe(max(0, int(completion_tokens)))
+
+
+def observe_pipeline_stage(stage: str, mode: str, duration_seconds: float) -> None:
+    """记录编排流水线单阶段耗时。"""
+    PIPELINE_STAGE_DURATION.labels(stage=str(stage or "unknown"), mode=str(mode or "unknown")).observe(
+        max(0.0, duration_seconds)
+    )
+
+
+def record_planner_cache_lookup(tier: str, result: str) -> None:
+    """记录 Planner 缓存查询结果（tier: exact/similar，result: hit/miss）。"""
+    PLANNER_CACHE_LOOKUP_COUNT.labels(tier=str(tier or "unknown"), result=str(result or "unknown")).inc()
+
+
+def record_planner_cache_invalidation(reason: str) -> None:
+    """记录 Planner 缓存失效原因。"""
+    PLANNER_CACHE_INVALIDATION_COUNT.labels(reason=str(reason or "unknown")).inc()
+
+
+def record_embedding_cache_lookup(tier: str, result: str, count: int = 1) -> None:
+    """记录 Embedding 缓存查询结果（tier: memory/sqlite，result: hit/miss）。"""
+    if count <= 0:
+        return
+    EMBEDDING_CACHE_LOOKUP_COUNT.labels(tier=str(tier or "unknown"), result=str(result or "unknown")).inc(count)
+
+
 def record_mcp_tool_call(tool_name: str, status: str) -> None:
     """记录 MCP 工具调用结果"""
     MCP_TOOL_CALL_COUNT.labels(tool_name=tool_name, status=status).inc()
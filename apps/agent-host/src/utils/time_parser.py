@@ -1,13 +1,46 @@
 """
 Time range parser.
+
+正则在模块加载时预编译；解析结果按 (规范化文本, 当天日期) 做 LRU 缓存，跨过本地零点时整体清空。
+批量接口 parse_time_ranges 供场景校验等批处理路径使用。
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import date, datetime, timedelta
+from functools import lru_cache
 import re
-from typing import Optional
+import threading
+from typing import Iterable, Optional
+
+_TIME_CACHE_SIZE = 2048
+
+_PERIOD = r"(凌晨|早上|上午|中午|下午|傍晚|晚上|今晚|明晚|今早|明早)?"
+_RELATIVE_WEEKDAY_PATTERN = re.compile(r"(下周|本周|这周|周)([一二三四五六日天])")
+_FUTURE_DAYS_PATTERN = re.compile(r"(?:未来|接下来)\s*([一二两三四五六七八九十\d]{1,3})\s*天")
+_AFTER_DAYS_PATTERNS = (
+    re.compile(r"(?:过|再过|还有)\s*([一二两三四五六七八九十\d]{1,3})\s*天"),
+    re.compile(r"([一二两三四五六七八九十\d]{1,3})\s*天后"),
+)
+_YEAR_MONTH_PATTERN = re.compile(r"(?<!\d)(\d{4})\s*年\s*(\d{1,2})\s*月(?:份)?(?!\d)")
+_MONTH_ONLY_PATTERN = re.compile(r"(?<!\d)(\d{1,2})\s*月(?:份)?(?!\d)")
+_CLOCK_PATTERN = re.compile(_PERIOD + r"\s*(\d{1,2})[:：](\d{1,2})")
+_HOUR_PATTERN = re.compile(_PERIOD + r"\s*(\d{1,2})点(?:\s*(半|\d{1,2}分?))?")
+_YMD_PATTERN = re.compile(r"(?<!\d)(\d{4})\s*(?:年|[\-/\.])\s*(\d{1,2})\s*(?:月|[\-/\.])\s*(\d{1,2})\s*(?:日|号)?")
+_MD_PATTERN = re.compile(r"(?<!\d)(\d{1,2})\s*(?:月|[\-/\.])\s*(\d{1,2})\s*(?:日|号)?(?!\d)")
+_RANGE_HINT_PATTERN = re.compile(r"(到|至|~|之间|起?至)")
+# 任何可解析的时间表达都至少包含其中一个字符；不含时直接返回 None
+_TIME_HINT_PATTERN = re.compile(r"[\d天周月早午晚夜凌]")
+_NORMALIZE_TABLE = str.maketrans({
+    "／": "/",
+    "－": "-",
+    "—": "-",
+    "–": "-",
+    "．": ".",
+    "：": ":",
+    "～": "~",
+})
 
 
 @dataclass
@@ -67,7 +100,7 @@ def _adjust_hour(hour: int, period: str) -> int:
 
 def _extract_relative_day(text: str, today: date) -> date | None:
     week_map = {"一": 0, "二": 1, "三": 2, "四": 3, "五": 4, "六": 5, "日": 6, "天": 6}
-    m = re.search(r"(下周|本周|这周|周)([一二三四五六日天])", text)
+    m = _RELATIVE_WEEKDAY_PATTERN.search(text)
     if m:
         prefix = m.group(1)
         weekday = week_map[m.group(2)]
@@ -122,7 +155,7 @@ def _parse_day_count(token: str) -> int | None:
 
 
 def _extract_future_days_range(text: str, today: date) -> TimeRange | None:
-    matched = re.search(r"(?:未来|接下来)\s*([一二两三四五六七八九十\d]{1,3})\s*天", text)
+    matched = _FUTURE_DAYS_PATTERN.search(text)
     if not matched:
         return None
     days = _parse_day_count(matched.group(1))
@@ -132,12 +165,8 @@ def _extract_future_days_range(text: str, today: date) -> TimeRange | None:
 
 
 def _extract_after_days(text: str, today: date) -> date | None:
-    patterns = (
-        r"(?:过|再过|还有)\s*([一二两三四五六七八九十\d]{1,3})\s*天",
-        r"([一二两三四五六七八九十\d]{1,3})\s*天后",
-    )
-    for pattern in patterns:
-        matched = re.search(pattern, text)
+    for pattern in _AFTER_DAYS_PATTERNS:
+        matched = pattern.search(text)
         if not matched:
             continue
         days = _parse_day_count(matched.group(1))
@@ -157,14 +186,14 @@ def _extract_month_range(text: str, today: date) -> TimeRange | None:
     if "这个月" in text or "本月" in text or "这月" in text:
         return _month_range(today)
 
-    year_month = re.search(r"(?<!\d)(\d{4})\s*年\s*(\d{1,2})\s*月(?:份)?(?!\d)", text)
+    year_month = _YEAR_MONTH_PATTERN.search(text)
     if year_month:
         year = int(year_month.group(1))
         month = int(year_month.group(2))
         if 1 <= month <= 12:
             return _month_range_by_year_month(year, month)
 
-    month_only = re.search(r"(?<!\d)(\d{1,2})\s*月(?:份)?(?!\d)", text)
+    month_only = _MONTH_ONLY_PATTERN.search(text)
     if not month_only:
         return None
     month = int(month_only.group(1))
@@ -180,7 +209,7 @@ def _extract_month_range(text: str, today: date) -> TimeRange | None:
 
 def _extract_time_window(text: str) -> tuple[str | None, str | None]:
     # 先识别具体时刻
-    m = re.search(r"(凌晨|早上|上午|中午|下午|傍晚|晚上|今晚|明晚|今早|明早)?\s*(\d{1,2})[:：](\d{1,2})", text)
+    m = _CLOCK_PATTERN.search(text)
     if m:
         period = m.group(1) or ""
         hour = _adjust_hour(int(m.group(2)), period)
@@ -189,7 +218,7 @@ def _extract_time_window(text: str) -> tuple[str | None, str | None]:
             hm = _format_hm(hour, minute)
             return hm, hm
 
-    m = re.search(r"(凌晨|早上|上午|中午|下午|傍晚|晚上|今晚|明晚|今早|明早)?\s*(\d{1,2})点(?:\s*(半|\d{1,2}分?))?", text)
+    m = _HOUR_PATTERN.search(text)
     if m:
         period = m.group(1) or ""
         hour = _adjust_hour(int(m.group(2)), period)
@@ -199,7 +228,7 @@ def _extract_time_window(text: str) -> tuple[str | None, str | None]:
             hm = _format_hm(hour, minute)
             return hm, hm
         if minute_token:
-            minute = int(re.sub(r"分", "", minute_token))
+            minute = int(minute_token.replace("分", ""))
             if 0 <= minute <= 59:
                 hm = _format_hm(hour, minute)
                 return hm, hm
@@ -223,19 +252,7 @@ def _extract_time_window(text: str) -> tuple[str | None, str | None]:
 
 
 def _normalize_text(text: str) -> str:
-    normalized = str(text or "")
-    replacements = {
-        "／": "/",
-        "－": "-",
-        "—": "-",
-        "–": "-",
-        "．": ".",
-        "：": ":",
-        "～": "~",
-    }
-    for src, dst in replacements.items():
-        normalized = normalized.replace(src, dst)
-    return normalized.strip()
+    return str(text or "").translate(_NORMALIZE_TABLE).strip()
 
 
 def _safe_date(year: int, month: int, day: int) -> Optional[date]:
@@ -247,13 +264,10 @@ def _safe_date(year: int, month: int, day: int) -> Optional[date]:
 
 def _extract_explicit_dates(text: str, today: date) -> list[date]:
     """提取文本中的显式日期（支持 YYYY/MM/DD, YYYY-MM-DD, YYYY年M月D日, M/D, M月D日）。"""
-    ymd_pattern = re.compile(r"(?<!\d)(\d{4})\s*(?:年|[\-/\.])\s*(\d{1,2})\s*(?:月|[\-/\.])\s*(\d{1,2})\s*(?:日|号)?")
-    md_pattern = re.compile(r"(?<!\d)(\d{1,2})\s*(?:月|[\-/\.])\s*(\d{1,2})\s*(?:日|号)?(?!\d)")
-
     matches: list[tuple[int, date]] = []
     occupied: list[tuple[int, int]] = []
 
-    for m in ymd_pattern.finditer(text):
+    for m in _YMD_PATTERN.finditer(text):
         dt = _safe_date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
         if dt:
             matches.append((m.start(), dt))
@@ -265,7 +279,7 @@ def _extract_explicit_dates(text: str, today: date) -> list[date]:
             masked_chars[idx] = " "
     masked_text = "".join(masked_chars)
 
-    for m in md_pattern.finditer(masked_text):
+    for m in _MD_PATTERN.finditer(masked_text):
         dt = _safe_date(today.year, int(m.group(1)), int(m.group(2)))
         if dt:
             matches.append((m.start(), dt))
@@ -274,9 +288,63 @@ def _extract_explicit_dates(text: str, today: date) -> list[date]:
     return [item[1] for item in matches]
 
 
-def parse_time_range(text: str) -> Optional[TimeRange]:
-    today = date.today()
+def parse_time_range(text: str, today: date | None = None) -> Optional[TimeRange]:
+    """
+    解析文本中的日期/时间范围
+
+    参数:
+        text: 原始文本
+        today: 基准日期，默认本地当天
+    返回:
+        TimeRange（调用方可自由修改，不影响缓存）；无时间表达时返回 None
+    """
     normalized = _normalize_text(text)
+    if not _TIME_HINT_PATTERN.search(normalized):
+        return None
+    cached = _parse_cached(normalized, _resolve_today(today))
+    return replace(cached) if cached is not None else None
+
+
+def parse_time_ranges(texts: Iterable[str], today: date | None = None) -> list[Optional[TimeRange]]:
+    """
+    批量解析（场景校验、批量导入等路径）
+
+    基准日期只取一次；规范化后相同的文本只解析一次；不含时间线索的文本直接跳过。
+    """
+    base = _resolve_today(today)
+    parsed: dict[str, Optional[TimeRange]] = {}
+    results: list[Optional[TimeRange]] = []
+    for text in texts:
+        normalized = _normalize_text(text)
+        if normalized not in parsed:
+            parsed[normalized] = _parse_cached(normalized, base) if _TIME_HINT_PATTERN.search(normalized) else None
+        cached = parsed[normalized]
+        results.append(replace(cached) if cached is not None else None)
+    return results
+
+
+_cache_day: date | None = None
+_cache_day_lock = threading.Lock()
+
+
+def _resolve_today(today: date | None) -> date:
+    """返回基准日期；本地日期变化（跨零点）时清空缓存，旧日期的条目不再驻留。"""
+    global _cache_day
+    current = date.today()
+    if current != _cache_day:
+        with _cache_day_lock:
+            if current != _cache_day:
+                _parse_cached.cache_clear()
+                _cache_day = current
+    return today or current
+
+
+@lru_cache(maxsize=_TIME_CACHE_SIZE)
+def _parse_cached(normalized: str, today: date) -> Optional[TimeRange]:
+    return _parse_normalized(normalized, today)
+
+
+def _parse_normalized(normalized: str, today: date) -> Optional[TimeRange]:
     time_from, time_to = _extract_time_window(normalized)
 
     future_days_range = _extract_future_days_range(normalized, today)
@@ -287,7 +355,7 @@ def parse_time_range(text: str) -> Optional[TimeRange]:
 
     explicit_dates = _extract_explicit_dates(normalized, today)
     if explicit_dates:
-        has_range_hint = bool(re.search(r"(到|至|~|之间|起?至)", normalized))
+        has_range_hint = bool(_RANGE_HINT_PATTERN.search(normalized))
         if has_range_hint and len(explicit_dates) >= 2:
             first = explicit_dates[0]
             second = explicit_dates[1]
@@ -2,12 +2,20 @@
 
 from src.vector.config import load_vector_config
 from src.vector.embedding import EmbeddingClient
+from src.vector.embedding_cache import EmbeddingCache
+from src.vector.backend import VECTOR_BACKENDS, VectorStore, create_vector_store
 from src.vector.chroma_store import ChromaStore
+from src.vector.numpy_store import NumpyVectorStore
 from src.vector.memory import VectorMemoryManager
 
 __all__ = [
     "load_vector_config",
     "EmbeddingClient",
+    "EmbeddingCache",
+    "VECTOR_BACKENDS",
+    "VectorStore",
+    "create_vector_store",
     "ChromaStore",
+    "NumpyVectorStore",
     "VectorMemoryManager",
 ]
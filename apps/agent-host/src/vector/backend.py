@@ -0,0 +1,80 @@
+"""
+向量存储后端抽象接口与工厂。
+
+用于解耦 Chroma 与进程内 NumPy 实现（vector_store.type: chroma | numpy）。
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Protocol
+
+logger = logging.getLogger(__name__)
+
+VECTOR_BACKENDS = ("chroma", "numpy")
+
+
+class VectorStore(Protocol):
+    """按用户隔离的向量存储接口。"""
+
+    @property
+    def is_available(self) -> bool:
+        ...
+
+    def add_documents(
+        self,
+        user_id: str,
+        documents: list[str],
+        embeddings: list[list[float]],
+        metadatas: list[dict[str, Any]],
+        ids: list[str],
+    ) -> None:
+        ...
+
+    def upsert_documents(
+        self,
+        user_id: str,
+        documents: list[str],
+        embeddings: list[list[float]],
+        metadatas: list[dict[str, Any]],
+        ids: list[str],
+    ) -> None:
+        ...
+
+    def query(
+        self,
+        user_id: str,
+        embedding: list[float],
+        top_k: int,
+        where: dict[str, Any] | None = None,
+    ) -> list[str]:
+        """余弦相似度 top-k；where 为元数据过滤（字段相等或 {"$in": [...]}）。"""
+        ...
+
+
+def create_vector_store(config: dict[str, Any]) -> VectorStore | None:
+    """根据 vector.yaml 创建向量存储；类型不支持时返回 None。"""
+    store_cfg = config.get("vector_store") or {}
+    backend = str(store_cfg.get("type") or "chroma").strip().lower()
+    if backend == "chroma":
+        from src.vector.chroma_store import ChromaStore
+
+        chroma_cfg = config.get("chroma") or {}
+        return ChromaStore(
+            persist_path=chroma_cfg.get("persist_path", "./workspace/chroma"),
+            collection_prefix=chroma_cfg.get("collection_prefix", "memory_vectors_"),
+        )
+    if backend == "numpy":
+        from src.vector.numpy_store import NumpyVectorStore
+
+        numpy_cfg = config.get("numpy") or {}
+        return NumpyVectorStore(
+            persist_path=numpy_cfg.get("persist_path", "./workspace/vector_index"),
+            initial_capacity=int(numpy_cfg.get("initial_capacity", 256)),
+        )
+    logger.warning(
+        "不支持的向量存储类型: %s",
+        backend,
+        extra={"event_code": "vector.backend.unsupported", "backend": backend},
+    )
+    return None
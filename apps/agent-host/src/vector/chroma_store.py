@@ -87,7 +87,39 @@ class ChromaStore:
             ids=ids,
         )
 
-    def query(self, user_id: str, embedding: list[float], top_k: int) -> list[str]:
+    def upsert_documents(
+        self,
+        user_id: str,
+        documents: list[str],
+        embeddings: list[list[float]],
+        metadatas: list[dict[str, Any]],
+        ids: list[str],
+    ) -> None:
+        """
+        批量写入文档（同 ID 覆盖）
+
+        参数:
+            user_id: 归属用户 ID (决定 Collection)
+            documents: 原始文本文档
+            embeddings: 对应的向量列表
+            metadatas: 元数据列表
+            ids: 文档唯一 ID
+        """
+        collection = self._get_collection(user_id)
+        collection.upsert(
+            documents=documents,
+            embeddings=embeddings,
+            metadatas=metadatas,
+            ids=ids,
+        )
+
+    def query(
+        self,
+        user_id: str,
+        embedding: list[float],
+        top_k: int,
+        where: dict[str, Any] | None = None,
+    ) -> list[str]:
         """
         向量检索
 
@@ -95,14 +127,19 @@ class ChromaStore:
             user_id: 归属用户 ID
             embedding: 查询向量
             top_k: 返回结果数量
+            where: 元数据过滤 (Chroma where 语法)
 
         返回:
             匹配的文本文档列表
         """
         collection = self._get_collection(user_id)
+        kwargs: dict[str, Any] = {}
+        if where:
+            kwargs["where"] = where
         result = collection.query(
             query_embeddings=[embedding],
             n_results=top_k,
+            **kwargs,
         )
         docs = result.get("documents") or [[]]
         return docs[0]
@@ -4,15 +4,19 @@
     - 文本向量化 (Text Embedding)
     - 支持 SiliconFlow API 调用
     - 自动批处理 (Batch Processing)
+    - 内容哈希缓存：只有未命中的文本才请求服务商
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any
 
 import httpx
 
+from src.vector.embedding_cache import EmbeddingCache, build_scope, text_digest
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,12 +29,13 @@ class EmbeddingClient:
         - 封装第三方 Embedding API
         - 提供文本到向量的转换能力
     """
-    def __init__(self, config: dict[str, Any]) -> None:
+    def __init__(self, config: dict[str, Any], cache: EmbeddingCache | None = None) -> None:
         """
         初始化客户端
 
         参数:
             config: 配置字典 (包含 provider, api_key, model 等)
+            cache: Embedding 缓存；为空时按 config["cache"] 构建
         """
         self._provider = config.get("provider", "")
         self._api_base = config.get("api_base", "")
@@ -38,12 +43,20 @@ class EmbeddingClient:
         self._model = config.get("model", "")
         self._timeout = float(config.get("timeout", 10))
         self._batch_size = max(int(config.get("batch_size", 32)), 1)
+        dimensions = config.get("dimensions")
+        self._dimensions = int(dimensions) if dimensions not in (None, "") else None
+        self._cache = cache if cache is not None else EmbeddingCache.from_config(config.get("cache"))
+        self._cache_scope = build_scope(self._model, self._dimensions)
 
     @property
     def batch_size(self) -> int:
         """获取批处理大小"""
         return self._batch_size
 
+    @property
+    def cache(self) -> EmbeddingCache | None:
+        return self._cache
+
     async def embed_texts(self, texts: list[str]) -> list[list[float]]:
         """
         批量生成文本向量
@@ -60,7 +73,46 @@ class EmbeddingClient:
             raise ValueError("Unsupported embedding provider")
         if not self._api_key or not self._api_base:
             raise ValueError("Embedding API config missing")
-
+        if self._cache is None:
+            return await self._request_embeddings(texts)
+
+        digests = [text_digest(text) for text in texts]
+        cached = await self._cache_get(digests)
+        # 同一请求内重复文本只请求一次
+        pending: dict[str, str] = {}
+        for digest, text in zip(digests, texts):
+            if digest not in cached and digest not in pending:
+                pending[digest] = text
+        if pending:
+            fresh = await self._request_embeddings(list(pending.values()))
+            fetched = dict(zip(pending.keys(), fresh))
+            await self._cache_put(fetched)
+            cached.update(fetched)
+        return [cached[digest] for digest in digests]
+
+    async def _cache_get(self, digests: list[str]) -> dict[str, list[float]]:
+        assert self._cache is not None
+        try:
+            if self._cache.persistent:
+                return await asyncio.to_thread(self._cache.get_many, self._cache_scope, digests)
+            return self._cache.get_many(self._cache_scope, digests)
+        except Exception as exc:
+            # 缓存读取失败（SQLite 被锁/损坏）按全部未命中处理
+            logger.warning("Embedding cache read failed: %s", exc)
+            return {}
+
+    async def _cache_put(self, items: dict[str, list[float]]) -> None:
+        assert self._cache is not None
+        try:
+            if self._cache.persistent:
+                await asyncio.to_thread(self._cache.put_many, self._cache_scope, items)
+            else:
+                self._cache.put_many(self._cache_scope, items)
+        except Exception as exc:
+            # 缓存写入失败不影响本次结果
+            logger.warning("Embedding cache write failed: %s", exc)
+
+    async def _request_embeddings(self, texts: list[str]) -> list[list[float]]:
         url = f"{self._api_base.rstrip('/')}/embeddings"
         headers = {"Authorization": f"Bearer {self._api_key}"}
 
@@ -68,7 +120,9 @@ class EmbeddingClient:
         async with httpx.AsyncClient(timeout=self._timeout) as client:
             for start in range(0, len(texts), self._batch_size):
                 batch = texts[start:start + self._batch_size]
-                payload = {"model": self._model, "input": batch}
+                payload: dict[str, Any] = {"model": self._model, "input": batch}
+                if self._dimensions:
+                    payload["dimensions"] = self._dimensions
                 response = await client.post(url, headers=headers, json=payload)
                 response.raise_for_status()
                 data = response.json()
@@ -0,0 +1,185 @@
+"""
+描述: Embedding 向量缓存
+主要功能:
+    - 以文本内容 SHA-256 为键，按 (模型, 维度) 划分作用域，换模型/维度自然失效
+    - 进程内有界 LRU（float32 紧凑存储）+ 可选 SQLite 持久化（重启后仍命中）
+    - 上报各层命中/未命中计数
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import OrderedDict
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable
+
+from src.utils.metrics import record_embedding_cache_lookup
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def build_scope(model: str, dimensions: int | None) -> str:
+    """缓存作用域：模型名 + 输出维度（未显式指定维度时为模型默认维度）。"""
+    return f"{model or 'unknown'}#{int(dimensions) if dimensions else 'default'}"
+
+
+# region SQLite 持久层
+class SQLiteEmbeddingStore:
+    """embedding_cache 表：(scope, text_hash) -> float32 向量。"""
+
+    def __init__(self, db_path: str | Path) -> None:
+        self._db_path = Path(db_path)
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._ensure_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self._db_path))
+
+    def _ensure_schema(self) -> None:
+        with self._lock:
+            with self._connect() as conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS embedding_cache (
+                        scope TEXT NOT NULL,
+                        text_hash TEXT NOT NULL,
+                        dim INTEGER NOT NULL,
+                        vector BLOB NOT NULL,
+                        created_at REAL NOT NULL,
+                        PRIMARY KEY (scope, text_hash)
+                    )
+                    """
+                )
+
+    def get_many(self, scope: str, digests: list[str]) -> dict[str, array]:
+        found: dict[str, array] = {}
+        if not digests:
+            return found
+        with self._lock:
+            with self._connect() as conn:
+                # SQLite 默认变量上限 999，分段查询
+                for start in range(0, len(digests), 500):
+                    chunk = digests[start:start + 500]
+                    placeholders = ",".join("?" for _ in chunk)
+                    rows = conn.execute(
+                        f"SELECT text_hash, dim, vector FROM embedding_cache "
+                        f"WHERE scope = ? AND text_hash IN ({placeholders})",
+                        (scope, *chunk),
+                    ).fetchall()
+                    for digest, dim, blob in rows:
+                        vector = array("f")
+                        vector.frombytes(blob)
+                        if len(vector) == int(dim):
+                            found[str(digest)] = vector
+        return found
+
+    def put_many(self, scope: str, items: dict[str, array]) -> None:
+        if not items:
+            return
+        now = time.time()
+        rows = [(scope, digest, len(vector), vector.tobytes(), now) for digest, vector in items.items()]
+        with self._lock:
+            with self._connect() as conn:
+                conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO embedding_cache (scope, text_hash, dim, vector, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    rows,
+                )
+
+
+# endregion
+
+
+# region 缓存
+class EmbeddingCache:
+    """
+    两级 Embedding 缓存
+
+    说明:
+        - 内存层按 (scope, digest) LRU 淘汰，向量以 array('f') 保存（约为 list[float] 的 1/6）
+        - SQLite 层只在内存未命中时查询；读写均为同步调用，异步调用方应放到线程池执行
+    """
+
+    def __init__(self, max_entries: int = 4096, store: SQLiteEmbeddingStore | None = None) -> None:
+        self._max_entries = max(1, int(max_entries))
+        self._store = store
+        self._entries: OrderedDict[tuple[str, str], array] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any] | None) -> "EmbeddingCache | None":
+        """embedding.cache 配置 -> 缓存实例；未启用返回 None。"""
+        cfg = config if isinstance(config, dict) else {}
+        if not _as_bool(cfg.get("enabled", True)):
+            return None
+        sqlite_path = str(cfg.get("sqlite_path") or "").strip()
+        store = SQLiteEmbeddingStore(sqlite_path) if sqlite_path else None
+        return cls(max_entries=int(cfg.get("max_entries", 4096)), store=store)
+
+    @property
+    def persistent(self) -> bool:
+        return self._store is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(self, scope: str, digests: Iterable[str]) -> dict[str, list[float]]:
+        wanted = list(dict.fromkeys(digests))
+        found: dict[str, array] = {}
+        with self._lock:
+            for digest in wanted:
+                vector = self._entries.get((scope, digest))
+                if vector is not None:
+                    self._entries.move_to_end((scope, digest))
+                    found[digest] = vector
+        record_embedding_cache_lookup("memory", "hit", len(found))
+        record_embedding_cache_lookup("memory", "miss", len(wanted) - len(found))
+
+        missing = [digest for digest in wanted if digest not in found]
+        if missing and self._store is not None:
+            loaded = self._store.get_many(scope, missing)
+            record_embedding_cache_lookup("sqlite", "hit", len(loaded))
+            record_embedding_cache_lookup("sqlite", "miss", len(missing) - len(loaded))
+            if loaded:
+                self._remember(scope, loaded)
+                found.update(loaded)
+
+        self.hits += len(found)
+        self.misses += len(wanted) - len(found)
+        return {digest: vector.tolist() for digest, vector in found.items()}
+
+    def put_many(self, scope: str, items: dict[str, list[float]]) -> None:
+        packed = {digest: array("f", vector) for digest, vector in items.items()}
+        if not packed:
+            return
+        self._remember(scope, packed)
+        if self._store is not None:
+            self._store.put_many(scope, packed)
+
+    def _remember(self, scope: str, items: dict[str, array]) -> None:
+        with self._lock:
+            for digest, vector in items.items():
+                self._entries[(scope, digest)] = vector
+                self._entries.move_to_end((scope, digest))
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+def _as_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() not in {"", "0", "false", "no", "off"}
+    return bool(value)
+
+
+# endregion
@@ -1,23 +1,32 @@
 """
 描述: 向量记忆管理器
 主要功能:
-    - 统一封装向量存储 (Chroma) 与 Embedding 客户端
+    - 统一封装向量存储 (Chroma / NumPy) 与 Embedding 客户端
     - 管理记忆写入与检索流程
+    - 写入走按用户缓冲的 write-behind：攒够条数或到时间窗口后，一次 Embedding 批量 + 一次 upsert
     - 异常处理与降级
 """
 
 from __future__ import annotations
 
+import asyncio
+from dataclasses import dataclass
+import hashlib
 import logging
-import uuid
 from typing import Any
 
-from src.vector.chroma_store import ChromaStore
+from src.vector.backend import VectorStore
 from src.vector.embedding import EmbeddingClient
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class _PendingMemory:
+    content: str
+    metadata: dict[str, Any]
+
+
 # region 向量记忆管理器
 class VectorMemoryManager:
     """
@@ -26,14 +35,18 @@ class VectorMemoryManager:
     功能:
         - 协调 Embedding 生成与向量存储
         - 管理用户语义记忆检索
+        - 缓冲写入，按用户合并后批量落库
     """
 
     def __init__(
         self,
-        store: ChromaStore,
+        store: VectorStore,
         embedder: EmbeddingClient,
         top_k: int = 5,
         fallback: str = "keyword",
+        write_batch_size: int = 16,
+        flush_interval_seconds: float = 2.0,
+        max_buffered: int = 1000,
     ) -> None:
         """
         初始化管理器
@@ -43,46 +56,95 @@ class VectorMemoryManager:
             embedder: Embedding 客户端
             top_k: 默认检索条数
             fallback: 检索失败时的降级策略 (保留字段)
+            write_batch_size: 单用户缓冲达到该条数立即落库
+            flush_interval_seconds: 单用户首条缓冲后最长等待时间
+            max_buffered: 全部用户缓冲总条数上限，超过则全部落库
         """
         self._store = store
         self._embedder = embedder
         self._top_k = top_k
         self._fallback = fallback
+        self._write_batch_size = max(1, int(write_batch_size))
+        self._flush_interval_seconds = max(0.0, float(flush_interval_seconds))
+        self._max_buffered = max(1, int(max_buffered))
+        self._pending: dict[str, list[_PendingMemory]] = {}
+        self._buffered = 0
+        self._timers: dict[str, asyncio.Task[None]] = {}
+        self._flush_tasks: set[asyncio.Task[Any]] = set()
+
+    @property
+    def buffered(self) -> int:
+        return self._buffered
+
+    def enqueue(self, user_id: str, content: str, metadata: dict[str, Any]) -> bool:
+        """
+        缓冲一条记忆（需在事件循环内调用，不阻塞）
+
+        返回:
+            是否已缓冲（空文本或存储不可用时返回 False）
+        """
+        if not content.strip() or not self._store_available():
+            return False
+        loop = asyncio.get_running_loop()
+        self._pending.setdefault(user_id, []).append(_PendingMemory(content=content, metadata=metadata))
+        self._buffered += 1
+
+        if self._buffered >= self._max_buffered:
+            self._spawn(loop, self.flush())
+        elif len(self._pending[user_id]) >= self._write_batch_size:
+            self._spawn(loop, self.flush(user_id))
+        else:
+            timer = self._timers.get(user_id)
+            if timer is None or timer.done():
+                self._timers[user_id] = loop.create_task(self._flush_later(user_id))
+        return True
 
     async def add_memory(self, user_id: str, content: str, metadata: dict[str, Any]) -> None:
         """
-        添加语义记忆
+        添加语义记忆（进入写缓冲，由批量落库统一处理）
 
         参数:
             user_id: 用户 ID
             content: 记忆文本内容
             metadata: 关联元数据
         """
-        if not content.strip():
-            return
-        if not self._store.is_available():
-            return
-        try:
-            embedding = await self._embedder.embed_texts([content])
-        except Exception as exc:
-            logger.warning("Vector embed failed: %s", exc)
-            return
-        if not embedding:
-            return
+        self.enqueue(user_id, content, metadata)
 
-        try:
-            self._store.add_documents(
-                user_id=user_id,
-                documents=[content],
-                embeddings=embedding,
-                metadatas=[metadata],
-                ids=[str(uuid.uuid4())],
-            )
-        except Exception as exc:
-            logger.warning("Vector store add failed: %s", exc)
-            return
+    async def flush(self, user_id: str | None = None) -> int:
+        """
+        立即落库缓冲的记忆
 
-    async def search(self, user_id: str, query: str, top_k: int | None = None) -> list[str]:
+        参数:
+            user_id: 指定用户；为空时落库全部用户
+        返回:
+            成功写入的条数
+        """
+        user_ids = [user_id] if user_id is not None else list(self._pending)
+        written = 0
+        for uid in user_ids:
+            timer = self._timers.pop(uid, None)
+            if timer is not None and timer is not asyncio.current_task():
+                timer.cancel()
+            items = self._pending.pop(uid, None)
+            if not items:
+                continue
+            self._buffered -= len(items)
+            written += await self._write_batch(uid, items)
+        return written
+
+    async def aclose(self) -> None:
+        """停机前落库全部缓冲（等待在途批次完成）。"""
+        if self._flush_tasks:
+            await asyncio.gather(*list(self._flush_tasks), return_exceptions=True)
+        await self.flush()
+
+    async def search(
+        self,
+        user_id: str,
+        query: str,
+        top_k: int | None = None,
+        where: dict[str, Any] | None = None,
+    ) -> list[str]:
         """
         语义检索
 
@@ -90,14 +152,18 @@ class VectorMemoryManager:
             user_id: 用户 ID
             query: 查询文本
             top_k: 自定义返回条数 (覆盖默认值)
+            where: 元数据过滤（字段相等或 {"$in": [...]}）
 
         返回:
             匹配的记忆文本列表
         """
         if not query.strip():
             return []
-        if not self._store.is_available():
+        if not self._store_available():
             return []
+        # 先落库该用户的缓冲，保证刚写入的记忆可被检索到
+        if self._pending.get(user_id):
+            await self.flush(user_id)
 
         k = top_k if top_k is not None else self._top_k
         try:
@@ -109,8 +175,64 @@ class VectorMemoryManager:
             return []
 
         try:
-            return self._store.query(user_id=user_id, embedding=embedding[0], top_k=k)
+            # 存储调用为同步 IO / 计算，放到线程池避免阻塞事件循环
+            if where:
+                return await asyncio.to_thread(
+                    self._store.query, user_id=user_id, embedding=embedding[0], top_k=k, where=where
+                )
+            return await asyncio.to_thread(self._store.query, user_id=user_id, embedding=embedding[0], top_k=k)
         except Exception as exc:
             logger.warning("Vector store query failed: %s", exc)
             return []
+
+    async def _flush_later(self, user_id: str) -> None:
+        try:
+            await asyncio.sleep(self._flush_interval_seconds)
+        except asyncio.CancelledError:
+            return
+        if self._timers.get(user_id) is asyncio.current_task():
+            self._timers.pop(user_id, None)
+        await self.flush(user_id)
+
+    async def _write_batch(self, user_id: str, items: list[_PendingMemory]) -> int:
+        # 同一批内相同文本只保留最后一条（ID 由用户 + 文本决定，upsert 覆盖旧值）
+        latest: dict[str, _PendingMemory] = {}
+        for item in items:
+            latest[self._memory_id(user_id, item.content)] = item
+        ids = list(latest)
+        documents = [item.content for item in latest.values()]
+        try:
+            embeddings = await self._embedder.embed_texts(documents)
+        except Exception as exc:
+            logger.warning("Vector embed failed: %s", exc)
+            return 0
+        if len(embeddings) != len(documents):
+            return 0
+
+        try:
+            await asyncio.to_thread(
+                self._store.upsert_documents,
+                user_id=user_id,
+                documents=documents,
+                embeddings=embeddings,
+                metadatas=[item.metadata for item in latest.values()],
+                ids=ids,
+            )
+        except Exception as exc:
+            logger.warning("Vector store upsert failed: %s", exc)
+            return 0
+        return len(ids)
+
+    def _store_available(self) -> bool:
+        available = self._store.is_available
+        return bool(available() if callable(available) else available)
+
+    def _spawn(self, loop: asyncio.AbstractEventLoop, coro: Any) -> None:
+        task = loop.create_task(coro)
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    @staticmethod
+    def _memory_id(user_id: str, content: str) -> str:
+        return hashlib.sha1(f"{user_id}\n{content}".encode("utf-8")).hexdigest()
 # endregion
@@ -0,0 +1,382 @@
+"""
+描述: 进程内 NumPy 向量索引
+主要功能:
+    - 每个用户一个目录：归一化 float32 矩阵（内存映射文件）+ 追加写的文档日志
+    - 暴力余弦 top-k（矩阵乘 + argpartition），支持元数据过滤
+    - 与 ChromaStore 相同的接口，可通过 vector_store.type: numpy 切换
+
+说明:
+    - 目录结构: {persist_path}/{user}/vectors.f32、index.json、docs.jsonl
+    - docs.jsonl 为行号 -> (id, 文本, 元数据) 的追加日志，后写覆盖先写；upsert 同 ID 原位覆盖向量
+    - 被覆盖的日志行超过阈值（且多于存活行数）时按内存中的行重写 docs.jsonl
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import threading
+from typing import Any
+
+try:
+    import numpy as np
+
+    _NUMPY_AVAILABLE = True
+except Exception:  # pragma: no cover - 依赖是否安装由环境决定
+    _NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_INDEX_VERSION = 1
+# 失效日志行达到 max(该值, 存活行数) 时压缩 docs.jsonl
+_COMPACT_MIN_DEAD_LINES = 256
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+@dataclass
+class _UserIndex:
+    root: Path
+    dim: int = 0
+    capacity: int = 0
+    matrix: Any = None
+    ids: list[str] = field(default_factory=list)
+    rows: dict[str, int] = field(default_factory=dict)
+    documents: list[str] = field(default_factory=list)
+    metadatas: list[dict[str, Any]] = field(default_factory=list)
+    log_lines: int = 0
+
+    @property
+    def count(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dead_lines(self) -> int:
+        return max(0, self.log_lines - self.count)
+
+
+# region NumPy 向量存储
+class NumpyVectorStore:
+    """
+    NumPy 向量存储 (User 粒度隔离)
+
+    功能:
+        - 懒加载用户索引，进程内常驻
+        - 写入即落盘（内存映射矩阵 flush + 文档日志追加）
+        - 线程安全，可在线程池中调用
+    """
+
+    def __init__(self, persist_path: str | Path, initial_capacity: int = 256) -> None:
+        """
+        初始化存储
+
+        参数:
+            persist_path: 数据持久化根目录
+            initial_capacity: 新用户矩阵的初始行数（不足时翻倍扩容）
+        """
+        self._root = Path(persist_path)
+        self._initial_capacity = max(1, int(initial_capacity))
+        self._indexes: dict[str, _UserIndex] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def is_available(self) -> bool:
+        """检查 NumPy 是否可用"""
+        return _NUMPY_AVAILABLE
+
+    # region 写入
+    def add_documents(
+        self,
+        user_id: str,
+        documents: list[str],
+        embeddings: list[list[float]],
+        metadatas: list[dict[str, Any]],
+        ids: list[str],
+    ) -> None:
+        """批量添加文档（同 ID 视为覆盖，与 upsert 一致）"""
+        self.upsert_documents(user_id, documents, embeddings, metadatas, ids)
+
+    def upsert_documents(
+        self,
+        user_id: str,
+        documents: list[str],
+        embeddings: list[list[float]],
+        metadatas: list[dict[str, Any]],
+        ids: list[str],
+    ) -> None:
+        """
+        批量写入文档（同 ID 覆盖）
+
+        参数:
+            user_id: 归属用户 ID
+            documents: 原始文本文档
+            embeddings: 对应的向量列表
+            metadatas: 元数据列表
+            ids: 文档唯一 ID
+        """
+        if not (len(documents) == len(embeddings) == len(metadatas) == len(ids)):
+            raise ValueError("documents/embeddings/metadatas/ids length mismatch")
+        if not ids:
+            return
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        with self._lock:
+            index = self._load(user_id)
+            if index.dim == 0:
+                self._init_matrix(index, vectors.shape[1])
+            elif vectors.shape[1] != index.dim:
+                raise ValueError(f"embedding dim {vectors.shape[1]} != index dim {index.dim}")
+
+            rows: list[int] = []
+            for doc_id in ids:
+                row = index.rows.get(doc_id)
+                if row is None:
+                    row = index.count
+                    index.rows[doc_id] = row
+                    index.ids.append(doc_id)
+                    index.documents.append("")
+                    index.metadatas.append({})
+                rows.append(row)
+            if index.count > index.capacity:
+                self._grow(index, index.count)
+
+            index.matrix[rows] = vectors
+            index.matrix.flush()
+            lines = []
+            for row, doc_id, document, metadata in zip(rows, ids, documents, metadatas):
+                index.documents[row] = document
+                index.metadatas[row] = dict(metadata or {})
+                lines.append(
+                    json.dumps(
+                        {"row": row, "id": doc_id, "document": document, "metadata": index.metadatas[row]},
+                        ensure_ascii=False,
+                    )
+                )
+            with open(index.root / "docs.jsonl", "a", encoding="utf-8") as handle:
+                handle.write("\n".join(lines) + "\n")
+            index.log_lines += len(lines)
+            self._write_header(index)
+            self._maybe_compact(index)
+
+    # endregion
+
+    # region 检索
+    def query(
+        self,
+        user_id: str,
+        embedding: list[float],
+        top_k: int,
+        where: dict[str, Any] | None = None,
+    ) -> list[str]:
+        """
+        向量检索
+
+        参数:
+            user_id: 归属用户 ID
+            embedding: 查询向量
+            top_k: 返回结果数量
+            where: 元数据过滤
+
+        返回:
+            匹配的文本文档列表（按相似度降序）
+        """
+        with self._lock:
+            index = self._load(user_id)
+            return [index.documents[row] for row, _ in self._top_rows(index, embedding, top_k, where)]
+
+    def search_ids(
+        self,
+        user_id: str,
+        embedding: list[float],
+        top_k: int,
+        where: dict[str, Any] | None = None,
+    ) -> list[tuple[str, float]]:
+        """同 query，返回 (文档 ID, 余弦相似度)。"""
+        with self._lock:
+            index = self._load(user_id)
+            return [(index.ids[row], score) for row, score in self._top_rows(index, embedding, top_k, where)]
+
+    def count(self, user_id: str) -> int:
+        with self._lock:
+            return self._load(user_id).count
+
+    def _top_rows(
+        self,
+        index: _UserIndex,
+        embedding: list[float],
+        top_k: int,
+        where: dict[str, Any] | None,
+    ) -> list[tuple[int, float]]:
+        if index.count == 0 or top_k <= 0:
+            return []
+        query = _normalize(np.asarray(embedding, dtype=np.float32).reshape(1, -1))[0]
+        if query.shape[0] != index.dim:
+            raise ValueError(f"query dim {query.shape[0]} != index dim {index.dim}")
+        scores = index.matrix[: index.count] @ query
+        if where:
+            mask = np.fromiter(
+                (_match_metadata(metadata, where) for metadata in index.metadatas),
+                dtype=bool,
+                count=index.count,
+            )
+            candidates = int(mask.sum())
+            if candidates == 0:
+                return []
+            scores = np.where(mask, scores, -np.inf)
+        else:
+            candidates = index.count
+        k = min(int(top_k), candidates)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(row), float(scores[row])) for row in top]
+
+    # endregion
+
+    # region 持久化
+    def _user_root(self, user_id: str) -> Path:
+        digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:12]
+        readable = _SAFE_NAME.sub("_", user_id)[:48] or "user"
+        return self._root / f"{readable}-{digest}"
+
+    def _load(self, user_id: str) -> _UserIndex:
+        index = self._indexes.get(user_id)
+        if index is not None:
+            return index
+        index = _UserIndex(root=self._user_root(user_id))
+        header_path = index.root / "index.json"
+        if header_path.exists():
+            header = json.loads(header_path.read_text(encoding="utf-8"))
+            index.dim = int(header.get("dim") or 0)
+            index.capacity = int(header.get("capacity") or 0)
+            if index.dim and index.capacity:
+                index.matrix = np.memmap(
+                    index.root / "vectors.f32",
+                    dtype=np.float32,
+                    mode="r+",
+                    shape=(index.capacity, index.dim),
+                )
+            self._replay_docs(index)
+            self._maybe_compact(index)
+        self._indexes[user_id] = index
+        return index
+
+    @staticmethod
+    def _replay_docs(index: _UserIndex) -> None:
+        docs_path = index.root / "docs.jsonl"
+        if not docs_path.exists():
+            return
+        entries: dict[int, dict[str, Any]] = {}
+        with open(docs_path, encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                index.log_lines += 1
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # 崩溃时可能残留半行，跳过
+                    continue
+                entries[int(entry["row"])] = entry
+        # 行号连续分配；遇到缺口（向量已写、日志未写完）即截断
+        for row in range(len(entries)):
+            entry = entries.get(row)
+            if entry is None or row >= index.capacity:
+                break
+            index.rows[str(entry["id"])] = row
+            index.ids.append(str(entry["id"]))
+            index.documents.append(str(entry.get("document") or ""))
+            index.metadatas.append(dict(entry.get("metadata") or {}))
+
+    @staticmethod
+    def _maybe_compact(index: _UserIndex) -> None:
+        """重复写入同一 ID（如同一段记忆被反复记住）会让日志无限增长，达到阈值后按存活行重写。"""
+        if index.dead_lines < max(_COMPACT_MIN_DEAD_LINES, index.count):
+            return
+        docs_path = index.root / "docs.jsonl"
+        tmp_path = docs_path.with_suffix(".jsonl.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            for row in range(index.count):
+                handle.write(
+                    json.dumps(
+                        {
+                            "row": row,
+                            "id": index.ids[row],
+                            "document": index.documents[row],
+                            "metadata": index.metadatas[row],
+                        },
+                        ensure_ascii=False,
+                    )
+                    + "\n"
+                )
+        os.replace(tmp_path, docs_path)
+        logger.info(
+            "向量文档日志已压缩",
+            extra={
+                "event_code": "vector.numpy_store.compacted",
+                "rows": index.count,
+                "dropped_lines": index.dead_lines,
+            },
+        )
+        index.log_lines = index.count
+
+    def _init_matrix(self, index: _UserIndex, dim: int) -> None:
+        index.root.mkdir(parents=True, exist_ok=True)
+        index.dim = int(dim)
+        index.capacity = 0
+        self._grow(index, self._initial_capacity)
+
+    @staticmethod
+    def _grow(index: _UserIndex, needed: int) -> None:
+        capacity = max(needed, index.capacity * 2, 1)
+        path = index.root / "vectors.f32"
+        if index.matrix is not None:
+            index.matrix.flush()
+            index.matrix = None
+        with open(path, "ab") as handle:
+            handle.truncate(capacity * index.dim * 4)
+        index.capacity = capacity
+        index.matrix = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, index.dim))
+
+    @staticmethod
+    def _write_header(index: _UserIndex) -> None:
+        header_path = index.root / "index.json"
+        tmp_path = header_path.with_suffix(".json.tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {"version": _INDEX_VERSION, "dim": index.dim, "capacity": index.capacity, "count": index.count}
+            ),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, header_path)
+
+    # endregion
+
+
+# endregion
+
+
+def _normalize(vectors: Any) -> Any:
+    if vectors.ndim != 2 or vectors.shape[1] == 0:
+        raise ValueError("embeddings must be a non-empty 2-D array")
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+def _match_metadata(metadata: dict[str, Any], where: dict[str, Any]) -> bool:
+    for key, expected in where.items():
+        value = metadata.get(key)
+        if isinstance(expected, dict):
+            if "$in" in expected and value not in expected["$in"]:
+                return False
+            if "$eq" in expected and value != expected["$eq"]:
+                return False
+            if "$ne" in expected and value == expected["$ne"]:
+                return False
+        elif value != expected:
+            return False
+    return True
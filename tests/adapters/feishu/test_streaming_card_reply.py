@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+import sys
+
+
+ROOT = Path(__file__).resolve().parents[3]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.adapters.channels.feishu.reply_stream import (  # noqa: E402
+    FeishuStreamingCardReply,
+    create_streaming_card_reply,
+)
+
+
+def _settings(stream_enabled: bool = True, card_enabled: bool = True) -> SimpleNamespace:
+    return SimpleNamespace(
+        reply=SimpleNamespace(
+            stream_enabled=stream_enabled,
+            card_enabled=card_enabled,
+            stream_update_interval_ms=0,
+            stream_placeholder_text="生成中",
+        )
+    )
+
+
+def _card_text(card: dict) -> str:
+    return card["body"]["elements"][0]["content"]
+
+
+def test_create_streaming_card_reply_respects_flags() -> None:
+    assert create_streaming_card_reply(_settings(stream_enabled=False), "oc_1") is None
+    assert create_streaming_card_reply(_settings(card_enabled=False), "oc_1") is None
+    assert create_streaming_card_reply(_settings(), "") is None
+    assert create_streaming_card_reply(_settings(), "oc_1") is not None
+
+
+def test_streaming_reply_sends_placeholder_then_patches_and_finalizes(monkeypatch) -> None:
+    sent: list[dict] = []
+    patched: list[tuple[str, dict]] = []
+
+    async def _send(_settings, chat_id, msg_type, content, reply_message_id=None):
+        sent.append({"chat_id": chat_id, "msg_type": msg_type, "content": content, "reply": reply_message_id})
+        return {"message_id": "om_stream"}
+
+    async def _update(_settings, message_id, msg_type, content):
+        patched.append((message_id, content))
+
+    monkeypatch.setattr("src.adapters.channels.feishu.reply_stream.send_message", _send)
+    monkeypatch.setattr("src.adapters.channels.feishu.reply_stream.update_message", _update)
+
+    reply = FeishuStreamingCardReply(_settings(), "oc_1", "om_user", update_interval_seconds=0, placeholder_text="生成中")
+
+    async def _run() -> bool:
+        await reply.on_start()
+        await asyncio.sleep(0)
+        await reply.on_delta("第一段")
+        await reply.on_delta("，第二段")
+        await asyncio.sleep(0.01)
+        return await reply.finalize("text", {"text": "最终回复"})
+
+    delivered = asyncio.run(_run())
+
+    assert delivered is True
+    assert len(sent) == 1
+    assert sent[0]["msg_type"] == "interactive"
+    assert sent[0]["reply"] == "om_user"
+    assert _card_text(sent[0]["content"]) == "生成中"
+    assert all(message_id == "om_stream" for message_id, _ in patched)
+    assert _card_text(patched[-2][1]) == "第一段，第二段"
+    assert _card_text(patched[-1][1]) == "最终回复"
+
+
+def test_streaming_reply_finalize_falls_back_when_placeholder_failed(monkeypatch) -> None:
+    async def _send(*_args, **_kwargs):
+        raise RuntimeError("boom")
+
+    async def _update(*_args, **_kwargs):
+        raise AssertionError("should not patch")
+
+    monkeypatch.setattr("src.adapters.channels.feishu.reply_stream.send_message", _send)
+    monkeypatch.setattr("src.adapters.channels.feishu.reply_stream.update_message", _update)
+
+    reply = FeishuStreamingCardReply(_settings(), "oc_1", update_interval_seconds=0)
+
+    async def _run() -> bool:
+        await reply.on_start()
+        await reply.on_delta("x")
+        return await reply.finalize("text", {"text": "x"})
+
+    assert asyncio.run(_run()) is False
+
+
+def test_streaming_reply_finalize_noop_when_never_started() -> None:
+    reply = FeishuStreamingCardReply(_settings(), "oc_1")
+
+    assert asyncio.run(reply.finalize("text", {"text": "hello"})) is False
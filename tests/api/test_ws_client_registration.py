@@ -15,3 +15,20 @@ def test_ws_client_registers_bot_presence_events() -> None:
 def test_ws_client_registers_card_action_trigger_event() -> None:
     content = (REPO_ROOT / "apps" / "agent-host" / "src" / "api" / "ws_client.py").read_text(encoding="utf-8")
     assert "register_p2_card_action_trigger" in content
+
+
+def test_ws_client_runs_expiry_sweeper_on_lark_event_loop() -> None:
+    content = (REPO_ROOT / "apps" / "agent-host" / "src" / "api" / "ws_client.py").read_text(encoding="utf-8")
+    assert "ws_loop = lark_ws_client.loop" in content
+    assert "ws_loop.call_soon(expiry_sweeper.start)" in content
+
+
+def test_ws_client_drains_agent_core_on_shutdown() -> None:
+    content = (REPO_ROOT / "apps" / "agent-host" / "src" / "api" / "ws_client.py").read_text(encoding="utf-8")
+    assert "_shutdown_agent_core(ws_loop)" in content
+    assert "loop.run_until_complete(agent_core.aclose())" in content
+
+
+def test_ws_client_finalizes_stream_card_on_handler_failure() -> None:
+    content = (REPO_ROOT / "apps" / "agent-host" / "src" / "api" / "ws_client.py").read_text(encoding="utf-8")
+    assert 'not await stream_reply.finalize("text", {"text": error_text})' in content
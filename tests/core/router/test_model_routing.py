@@ -9,6 +9,7 @@ AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
 sys.path.insert(0, str(AGENT_HOST_ROOT))
 
 from src.core.router.model_routing import ModelRouter, RuleBasedComplexityScorer
+from src.llm.model_health import ModelHealthConfig, ModelHealthRegistry
 
 
 def test_router_defaults_to_primary_when_disabled() -> None:
@@ -76,3 +77,31 @@ def test_complexity_scorer_handles_empty_query() -> None:
     score = scorer.score("")
 
     assert score.level == "simple"
+
+
+def test_router_reroutes_when_selected_model_circuit_is_open() -> None:
+    now = [0.0]
+    health = ModelHealthRegistry(
+        ModelHealthConfig(breaker_enabled=True, min_calls=2, cooldown_seconds=30),
+        clock=lambda: now[0],
+    )
+    router = ModelRouter(
+        enabled=False,
+        ratio=0.0,
+        primary_model="primary",
+        hedge_model="backup",
+        health=health,
+    )
+
+    healthy = router.decide(user_id="u4", query="查案件")
+    assert healthy.model_selected == "primary"
+    assert healthy.metadata["hedge_model"] == "backup"
+
+    health.record("primary", ok=False)
+    health.record("primary", ok=False)
+    rerouted = router.decide(user_id="u4", query="查案件")
+
+    assert rerouted.model_selected == "backup"
+    assert rerouted.route_label == "breaker_fallback"
+    assert rerouted.metadata["breaker_skipped"] == "primary"
+    assert "hedge_model" not in rerouted.metadata
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import sys
+from typing import Any
+
+
+ROOT = Path(__file__).resolve().parents[3]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.core.skills.summary import SummarySkill  # noqa: E402
+from src.core.types import SkillContext  # noqa: E402
+from src.llm.scheduler import PRIORITY_INTERACTIVE, get_llm_priority  # noqa: E402
+
+
+def _records(count: int) -> list[dict[str, Any]]:
+    statuses = ["进行中", "已结案"]
+    return [
+        {
+            "fields_text": {
+                "案号": f"（2024）粤0304民初{i:04d}号",
+                "案由": "合同纠纷",
+                "委托人": f"委托人{i}",
+                "开庭日": "2024-07-01",
+                "主办律师": "张三",
+                "案件状态": statuses[i % 2],
+                "审理法院": "深圳中院" if i < 3 else "福田法院",
+            }
+        }
+        for i in range(count)
+    ]
+
+
+class _RecordingLLM:
+    def __init__(self, fail_map: bool = False) -> None:
+        self.map_prompts: list[str] = []
+        self.reduce_prompts: list[str] = []
+        self.map_priorities: list[str] = []
+        self.active = 0
+        self.max_active = 0
+        self._fail_map = fail_map
+
+    async def chat(self, messages: list[dict[str, str]], timeout: float | None = None) -> str:
+        prompt = messages[-1]["content"]
+        if "批案件记录" in prompt:
+            self.map_prompts.append(prompt)
+            index = len(self.map_prompts)
+            self.map_priorities.append(get_llm_priority())
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            await asyncio.sleep(0.01)
+            self.active -= 1
+            if self._fail_map:
+                raise RuntimeError("map failed")
+            return f"要点{index}"
+        self.reduce_prompts.append(prompt)
+        return "最终摘要"
+
+
+def _skill(llm: _RecordingLLM, **map_reduce: Any) -> SummarySkill:
+    return SummarySkill(llm_client=llm, skills_config={"summary": {"map_reduce": map_reduce}})
+
+
+def test_small_result_set_uses_single_prompt_with_aggregates() -> None:
+    llm = _RecordingLLM()
+    skill = _skill(llm, chunk_token_budget=5000)
+
+    result = asyncio.run(skill.execute(SkillContext(query="总结一下", user_id="u1", last_result={"records": _records(4)})))
+
+    assert result.success
+    assert llm.map_prompts == []
+    assert len(llm.reduce_prompts) == 1
+    assert "案件状态：进行中 2 条、已结案 2 条" in llm.reduce_prompts[0]
+    assert result.data["aggregates"]["审理法院"] == {"深圳中院": 3, "福田法院": 1}
+    assert "最终摘要" in result.reply_text
+
+
+def test_large_result_set_is_chunked_mapped_concurrently_and_reduced() -> None:
+    llm = _RecordingLLM()
+    skill = _skill(llm, chunk_token_budget=200, max_concurrency=2)
+
+    result = asyncio.run(skill.execute(SkillContext(query="总结一下", user_id="u1", last_result={"records": _records(30)})))
+
+    assert len(llm.map_prompts) > 2
+    assert llm.max_active == 2
+    assert set(llm.map_priorities) == {PRIORITY_INTERACTIVE}
+    assert all(skill._estimate_tokens(p) < 200 + 200 for p in llm.map_prompts)
+    reduce_prompt = llm.reduce_prompts[0]
+    assert "分块摘要" in reduce_prompt
+    assert "要点1" in reduce_prompt
+    assert "共 30 条" in reduce_prompt
+    assert result.data["total"] == 30
+
+
+def test_failed_map_chunks_fall_back_to_raw_lines() -> None:
+    llm = _RecordingLLM(fail_map=True)
+    skill = _skill(llm, chunk_token_budget=200)
+
+    asyncio.run(skill.execute(SkillContext(query="总结一下", user_id="u1", last_result={"records": _records(12)})))
+
+    assert "（2024）粤0304民初0000号" in llm.reduce_prompts[0]
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import sys
+from typing import Any
+
+
+ROOT = Path(__file__).resolve().parents[3]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.core.orchestrator import AgentOrchestrator  # noqa: E402
+from src.core.state import ConversationStateManager, MemoryStateStore  # noqa: E402
+from src.core.state.record_cache import RecordCache, compact_record, compact_result_data, is_compact  # noqa: E402
+from src.core.state.redis_store import encode_state  # noqa: E402
+
+
+def _record(index: int) -> dict[str, Any]:
+    fields = {
+        "案号": f"(2026)粤0101民初{index}号",
+        "委托人": f"委托人{index}",
+        "案件详情": "详情" * 200,
+        "进展": [{"text": "开庭"}],
+        "主办律师": "张三",
+        "法院": "天河法院",
+    }
+    fields.update({f"备注{slot}": "内容" * 30 for slot in range(20)})
+    return {
+        "record_id": f"rec_{index}",
+        "record_url": f"https://example.feishu.cn/base/app/tbl?record={index}",
+        "fields": fields,
+        "fields_text": dict(fields),
+    }
+
+
+def test_compact_record_keeps_reference_and_small_projection() -> None:
+    compact = compact_record(_record(1), max_display_fields=3)
+
+    assert is_compact(compact)
+    assert compact["record_id"] == "rec_1"
+    assert list(compact["fields_text"]) == ["案号", "委托人", "案件详情"]
+    assert len(compact["fields_text"]["案件详情"]) == 64
+    assert "fields" not in compact
+
+
+def test_compact_result_data_drops_schema_and_fills_cache() -> None:
+    cache = RecordCache()
+    data = {"records": [_record(1)], "schema": [{"field_name": "案号"}] * 20, "table_name": "案件项目总库"}
+
+    compact = compact_result_data(data, cache)
+
+    assert "schema" not in compact
+    assert compact["table_name"] == "案件项目总库"
+    assert is_compact(compact["records"][0])
+    assert "schema" in data and not is_compact(data["records"][0])
+    assert len(cache) == 1
+
+
+def test_record_cache_evicts_least_recently_used() -> None:
+    cache = RecordCache(max_size=2)
+    cache.put_many([_record(1), _record(2)])
+    cache.get_many(["rec_1"])
+    cache.put_many([_record(3)])
+
+    assert set(cache.get_many(["rec_1", "rec_2", "rec_3"])) == {"rec_1", "rec_3"}
+    assert cache.misses == 1
+
+
+def test_compact_mode_rehydrates_payload_from_cache_and_shrinks_state() -> None:
+    records = [_record(index) for index in range(20)]
+    full = ConversationStateManager(store=MemoryStateStore())
+    compact = ConversationStateManager(store=MemoryStateStore(), last_result_mode="compact")
+
+    full.set_last_result("u1", records, "查案件")
+    compact.set_last_result("u1", records, "查案件", table_id="tbl_1", query_meta={"tool": "search"})
+
+    payload = compact.get_last_result_payload("u1")
+    assert payload is not None
+    assert payload["records"][0] is records[0]
+    assert payload["table_id"] == "tbl_1"
+    assert payload["query_meta"] == {"tool": "search"}
+
+    full_size = len(encode_state(full.get_state("u1"))[0]["last_result"])
+    compact_size = len(encode_state(compact.get_state("u1"))[0]["last_result"])
+    assert compact_size * 10 < full_size
+
+
+class _FakeMCP:
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, dict[str, Any]]] = []
+
+    async def call_tool(self, tool_name: str, params: dict[str, Any]) -> dict[str, Any]:
+        self.calls.append((tool_name, params))
+        return _record(int(str(params["record_id"]).split("_")[1]))
+
+
+def test_orchestrator_fetches_cache_misses_through_mcp() -> None:
+    manager = ConversationStateManager(
+        store=MemoryStateStore(),
+        last_result_mode="compact",
+        record_cache=RecordCache(max_size=1),
+    )
+    manager.set_last_result("u1", [_record(1), _record(2)], "查案件", table_id="tbl_1")
+    orchestrator = AgentOrchestrator.__new__(AgentOrchestrator)
+    orchestrator._state_manager = manager
+    orchestrator._mcp = _FakeMCP()
+
+    payload = manager.get_last_result_payload("u1")
+    assert payload is not None
+    assert is_compact(payload["records"][0]) and not is_compact(payload["records"][1])
+
+    rehydrated = asyncio.run(orchestrator._rehydrate_last_result(payload))
+
+    assert rehydrated is not None
+    assert not any(is_compact(item) for item in rehydrated["records"])
+    assert orchestrator._mcp.calls == [
+        ("feishu.v1.bitable.record.get", {"table_id": "tbl_1", "record_id": "rec_1"}),
+    ]
+    assert rehydrated["records"][0]["fields_text"]["案件详情"] == "详情" * 200
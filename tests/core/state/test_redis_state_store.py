@@ -1,40 +1,29 @@
 from __future__ import annotations
 
+import asyncio
+from dataclasses import asdict
+import json
 from pathlib import Path
 import sys
+import threading
 import time
 
+import pytest
+
+
+fakeredis = pytest.importorskip("fakeredis")
 
 ROOT = Path(__file__).resolve().parents[3]
 AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
 sys.path.insert(0, str(AGENT_HOST_ROOT))
 
-from src.core.state.models import ConversationState, PendingDeleteState
+from src.core.state.models import ConversationState, PaginationState, PendingDeleteState
+from src.core.state.manager import ConversationStateManager
 from src.core.state.redis_store import RedisStateStore
 
 
-class _FakeRedis:
-    def __init__(self) -> None:
-        self._data: dict[str, str] = {}
-
-    def set(self, key: str, value: str, ex: int | None = None) -> None:
-        self._data[key] = value
-
-    def get(self, key: str) -> str | None:
-        return self._data.get(key)
-
-    def delete(self, key: str) -> None:
-        self._data.pop(key, None)
-
-    def scan_iter(self, match: str | None = None):
-        if not match or not match.endswith("*"):
-            for key in list(self._data.keys()):
-                yield key
-            return
-        prefix = match[:-1]
-        for key in list(self._data.keys()):
-            if key.startswith(prefix):
-                yield key
+def _client():
+    return fakeredis.FakeRedis(decode_responses=True)
 
 
 def _build_state(session_key: str, expires_at: float) -> ConversationState:
@@ -55,7 +44,7 @@ def _build_state(session_key: str, expires_at: float) -> ConversationState:
 
 
 def test_redis_state_store_roundtrip_with_nested_fields() -> None:
-    store = RedisStateStore(client=_FakeRedis(), key_prefix="test:state:")
+    store = RedisStateStore(client=_client(), key_prefix="test:state:")
     session_key = "group:oc_g1:user:ou_u1"
     state = _build_state(session_key=session_key, expires_at=time.time() + 120)
 
@@ -69,7 +58,7 @@ def test_redis_state_store_roundtrip_with_nested_fields() -> None:
 
 
 def test_redis_state_store_supports_legacy_user_id_keywords() -> None:
-    store = RedisStateStore(client=_FakeRedis(), key_prefix="test:state:")
+    store = RedisStateStore(client=_client(), key_prefix="test:state:")
     state = _build_state(session_key="ou_u1", expires_at=time.time() + 60)
 
     store.set(user_id="ou_u1", state=state)
@@ -80,7 +69,7 @@ def test_redis_state_store_supports_legacy_user_id_keywords() -> None:
 
 
 def test_redis_state_store_list_and_cleanup_expired() -> None:
-    store = RedisStateStore(client=_FakeRedis(), key_prefix="test:state:")
+    store = RedisStateStore(client=_client(), key_prefix="test:state:")
     live = _build_state(session_key="ou_live", expires_at=time.time() + 300)
     expired = _build_state(session_key="ou_expired", expires_at=time.time() - 1)
 
@@ -88,8 +77,80 @@ def test_redis_state_store_list_and_cleanup_expired() -> None:
     store.set("ou_expired", expired)
     assert set(store.list_session_keys()) == {"ou_live", "ou_expired"}
 
-    store.cleanup_expired()
+    assert store.cleanup_expired() == 1
 
     assert store.get("ou_expired") is None
     assert store.get("ou_live") is not None
     assert store.active_count() == 1
+
+
+def test_redis_state_store_splits_substates_into_hash_fields() -> None:
+    client = _client()
+    store = RedisStateStore(client=client, key_prefix="test:state:")
+    state = _build_state(session_key="ou_u1", expires_at=time.time() + 300)
+    store.set("ou_u1", state)
+
+    assert set(client.hkeys("test:state:ou_u1")) == {"core", "pending_delete"}
+    assert 0 < client.ttl("test:state:ou_u1") <= 300
+
+    now = time.time()
+    state.pending_delete = None
+    state.pagination = PaginationState(
+        tool="search", params={}, page_token="t2", current_page=2, total=30, created_at=now, expires_at=now + 60
+    )
+    store.set_fields("ou_u1", state, ["pagination", "pending_delete"])
+
+    assert set(client.hkeys("test:state:ou_u1")) == {"core", "pagination"}
+    fields = store.get_fields("ou_u1", ["pagination", "last_result"])
+    assert fields["pagination"].page_token == "t2" and fields["last_result"] is None
+    assert set(store.get_many(["ou_u1", "ou_missing"])) == {"ou_u1"}
+
+
+def test_redis_state_store_migrates_legacy_string_values() -> None:
+    client = _client()
+    store = RedisStateStore(client=client, key_prefix="test:state:")
+    legacy = _build_state(session_key="ou_old", expires_at=time.time() + 120)
+    client.set("test:state:ou_old", json.dumps(asdict(legacy)), ex=120)
+
+    loaded = store.get("ou_old")
+
+    assert loaded is not None and loaded.pending_delete is not None
+    assert client.type("test:state:ou_old") == "hash"
+    assert store.active_count() == 1
+
+
+def test_redis_state_store_keeps_hashes_from_other_codec_versions() -> None:
+    client = _client()
+    store = RedisStateStore(client=client, key_prefix="test:state:")
+    client.hset("test:state:ou_new", mapping={"core": json.dumps([3, "ou_new", 0, 0, time.time() + 120])})
+    client.hset("test:state:ou_bad", mapping={"core": "{not json"})
+
+    assert store.get("ou_new") is None
+    assert store.get("ou_bad") is None
+    assert client.exists("test:state:ou_new") == 1
+    assert client.exists("test:state:ou_bad") == 0
+
+
+def test_async_unit_of_work_keeps_redis_io_off_the_event_loop() -> None:
+    store = RedisStateStore(client=_client(), key_prefix="test:state:")
+    manager = ConversationStateManager(store=store)
+    io_threads: list[int] = []
+    for name in ("get", "compare_and_set"):
+        original = getattr(store, name)
+
+        def _traced(*args, _original=original, **kwargs):
+            io_threads.append(threading.get_ident())
+            return _original(*args, **kwargs)
+
+        setattr(store, name, _traced)
+
+    async def _run() -> int:
+        async with manager.aunit_of_work("ou_u1"):
+            manager.set_last_skill("ou_u1", "query")
+            assert manager.get_last_skill("ou_u1") == "query"
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(_run())
+
+    assert len(io_threads) == 2 and loop_thread not in io_threads
+    assert manager.get_last_skill("ou_u1") == "query"
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from dataclasses import asdict, fields
+import json
+from pathlib import Path
+import sys
+import time
+
+
+ROOT = Path(__file__).resolve().parents[3]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.core.state.codec import (  # noqa: E402
+    CODEC_VERSION,
+    CORE_FIELDS,
+    OPERATION_FIELDS,
+    SUBSTATE_FIELDS,
+    decode_core,
+    decode_substate,
+    encode_core,
+    encode_substate,
+)
+from src.core.state.redis_store import SUBSTATE_TYPES  # noqa: E402
+from src.core.state.models import (  # noqa: E402
+    ConversationState,
+    LastResultState,
+    OperationEntry,
+    OperationExecutionStatus,
+    PaginationState,
+    PendingActionState,
+    PendingActionStatus,
+)
+
+
+def test_field_tuples_follow_dataclass_order() -> None:
+    # 位置编码依赖字段顺序：codec 元组必须与模型字段一一对应
+    for model, names in SUBSTATE_FIELDS.items():
+        assert names == tuple(item.name for item in fields(model)), model.__name__
+    assert OPERATION_FIELDS == tuple(item.name for item in fields(OperationEntry))
+    core_model_fields = {item.name for item in fields(ConversationState)}
+    assert set(CORE_FIELDS) == core_model_fields - set(SUBSTATE_TYPES)
+
+
+def test_models_are_slotted() -> None:
+    state = ConversationState(user_id="u1", created_at=1.0, updated_at=1.0, expires_at=2.0)
+
+    assert not hasattr(state, "__dict__")
+    state.session_key = "u2"
+    assert state.user_id == "u2"
+
+
+def test_pending_action_round_trip_keeps_operations_and_status() -> None:
+    now = time.time()
+    pending = PendingActionState(
+        action="batch_update_records",
+        payload={"table_id": "tbl_1"},
+        operations=[
+            OperationEntry(index=0, payload={"record_id": "rec_1"}),
+            OperationEntry(index=1, payload={"record_id": "rec_2"}, status=OperationExecutionStatus.FAILED, error_code="E1"),
+        ],
+        status=PendingActionStatus.CONFIRMABLE,
+        created_at=now,
+        expires_at=now + 60,
+    )
+
+    raw = encode_substate(pending)
+    decoded = decode_substate(PendingActionState, raw)
+
+    assert json.loads(raw)[0] == CODEC_VERSION
+    assert decoded == pending
+    assert decoded.operations[1].status is OperationExecutionStatus.FAILED
+
+
+def test_core_round_trip_and_v1_object_compat() -> None:
+    state = ConversationState(
+        user_id="u1",
+        created_at=1.0,
+        updated_at=2.0,
+        expires_at=3.0,
+        last_result_ids=["rec_1"],
+        extras={"last_skill": "QuerySkill"},
+        revision=7,
+    )
+
+    assert ConversationState(**decode_core(encode_core(state))) == state
+
+    legacy = LastResultState(records=[{"record_id": "rec_1"}], record_ids=["rec_1"], query_summary="q", created_at=1.0, expires_at=2.0)
+    assert decode_substate(LastResultState, json.dumps(asdict(legacy))) == legacy
+    assert decode_core(json.dumps({"user_id": "u1", "created_at": 1.0, "updated_at": 1.0, "expires_at": 2.0}))["user_id"] == "u1"
+
+
+def test_non_string_keys_encode_like_stdlib_json() -> None:
+    now = time.time()
+    pagination = PaginationState(
+        tool="search_cases",
+        params={1: "a", "page": 2},
+        page_token=None,
+        current_page=1,
+        total=None,
+        created_at=now,
+        expires_at=now + 60,
+    )
+
+    decoded = decode_substate(PaginationState, encode_substate(pagination))
+
+    assert decoded.params == {"1": "a", "page": 2}
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+import pytest
+
+
+ROOT = Path(__file__).resolve().parents[3]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.core.state import ConversationStateManager, MemoryStateStore
+from src.core.state.models import ConversationState
+
+
+class _CountingStore(MemoryStateStore):
+    def __init__(self) -> None:
+        super().__init__()
+        self.gets = 0
+        self.sets = 0
+        self.cas_calls: list[list[str] | None] = []
+
+    def get(self, session_key: str | None = None, *, user_id: str | None = None) -> ConversationState | None:
+        self.gets += 1
+        return super().get(session_key, user_id=user_id)
+
+    def set(self, session_key=None, state=None, *, user_id=None) -> None:  # type: ignore[override]
+        self.sets += 1
+        super().set(session_key, state, user_id=user_id)
+
+    def compare_and_set(self, session_key, state, expected_revision, fields=None) -> bool:  # type: ignore[override]
+        self.cas_calls.append(None if fields is None else list(fields))
+        return super().compare_and_set(session_key, state, expected_revision, fields=fields)
+
+
+def test_unit_of_work_reads_once_and_flushes_once() -> None:
+    store = _CountingStore()
+    manager = ConversationStateManager(store=store)
+
+    with manager.unit_of_work("u1") as unit:
+        manager.get_last_result_payload("u1")
+        manager.get_last_skill("u1")
+        manager.get_active_table("u1")
+        manager.get_pending_action("u1")
+        manager.set_last_skill("u1", "QuerySkill")
+        manager.set_last_result("u1", [{"record_id": "rec_1"}], "q")
+        manager.set_active_table("u1", "tbl_1", "案件")
+        assert store.gets == 1
+        assert store.sets == 0
+        assert store.cas_calls == []
+
+    assert unit.closed
+    assert unit.stats.store_reads == 1
+    assert unit.stats.store_writes == 1
+    assert len(store.cas_calls) == 1
+    assert {"extras", "last_result", "active_table_id"} <= set(store.cas_calls[0] or [])
+
+    assert manager.get_last_skill("u1") == "QuerySkill"
+    assert manager.get_active_table("u1")["table_id"] == "tbl_1"
+    payload = manager.get_last_result_payload("u1")
+    assert payload is not None and payload["record_ids"] == ["rec_1"]
+
+
+def test_unit_of_work_nested_scope_reuses_outer_unit() -> None:
+    manager = ConversationStateManager(store=_CountingStore())
+
+    with manager.unit_of_work("u1") as outer:
+        with manager.unit_of_work("u1") as inner:
+            manager.set_last_skill("u1", "QuerySkill")
+        assert inner is outer
+        assert not outer.closed
+    assert outer.stats.store_writes == 1
+
+
+def test_unit_of_work_does_not_buffer_other_sessions() -> None:
+    store = _CountingStore()
+    manager = ConversationStateManager(store=store)
+
+    with manager.unit_of_work("u1"):
+        manager.set_last_skill("u2", "QuerySkill")
+        assert store.sets > 0
+
+    assert manager.get_last_skill("u2") == "QuerySkill"
+
+
+def test_unit_of_work_replays_dirty_fields_on_conflict() -> None:
+    store = MemoryStateStore()
+    manager = ConversationStateManager(store=store)
+    manager.set_last_skill("u1", "OldSkill")
+
+    with manager.unit_of_work("u1") as unit:
+        manager.set_active_table("u1", "tbl_1", "案件")
+        # 模拟并发写入：另一个副本直接替换存储内的状态
+        other = ConversationState.from_dict(
+            {
+                "user_id": "u1",
+                "created_at": 1.0,
+                "updated_at": 1.0,
+                "expires_at": 4102444800.0,
+                "extras": {"last_skill": "OtherSkill"},
+                "revision": 99,
+            }
+        )
+        store.set("u1", other)
+
+    assert unit.stats.conflicts == 1
+    assert manager.get_active_table("u1")["table_id"] == "tbl_1"
+    assert manager.get_last_skill("u1") == "OtherSkill"
+
+
+def test_clear_session_inside_unit_drops_buffered_state() -> None:
+    manager = ConversationStateManager(store=MemoryStateStore())
+    manager.set_last_skill("u1", "QuerySkill")
+
+    with manager.unit_of_work("u1"):
+        manager.get_state("u1")
+        manager.clear_session("u1")
+        assert manager.get_last_skill("u1") is None
+
+
+def test_redis_compare_and_set_detects_concurrent_write() -> None:
+    fakeredis = pytest.importorskip("fakeredis")
+    from src.core.state.redis_store import RedisStateStore
+
+    store = RedisStateStore(client=fakeredis.FakeRedis(decode_responses=True), key_prefix="test:uow:")
+    manager = ConversationStateManager(store=store)
+    manager.set_last_skill("u1", "OldSkill")
+    loaded = store.get("u1")
+    assert loaded is not None
+
+    manager.set_last_skill("u1", "NewSkill")
+    assert store.compare_and_set("u1", loaded, loaded.revision) is False
+
+    with manager.unit_of_work("u1") as unit:
+        manager.set_active_table("u1", "tbl_1", "案件")
+        manager.set_pagination("u1", "search", {}, "tok", 1, 10)
+
+    assert unit.stats.conflicts == 0
+    fresh = store.get("u1")
+    assert fresh is not None
+    assert fresh.active_table_id == "tbl_1"
+    assert fresh.pagination is not None and fresh.pagination.page_token == "tok"
+    assert fresh.extras.get("last_skill") == "NewSkill"
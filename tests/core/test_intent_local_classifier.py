@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+import sys
+from typing import Any
+
+import numpy as np
+import pytest
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.core.intent.classifier import (  # noqa: E402
+    CharNgramIntentClassifier,
+    LocalIntentClassifier,
+    load_local_intent_classifier,
+)
+from src.core.intent.parser import IntentParser  # noqa: E402
+from src.core.intent.training import (  # noqa: E402
+    collect_training_samples,
+    cross_validate,
+    decision_log_samples,
+    scenario_samples,
+)
+import src.core.intent.training as training_module  # noqa: E402
+
+
+_SAMPLES = [
+    ("查所有案件", "QuerySkill"),
+    ("帮我找一下张三的案子", "QuerySkill"),
+    ("这周有什么庭要开", "QuerySkill"),
+    ("提醒我明天下午开会", "ReminderSkill"),
+    ("别忘了周五交材料", "ReminderSkill"),
+    ("新建一个案件", "CreateSkill"),
+    ("录入新案子委托人李四", "CreateSkill"),
+]
+
+_SKILLS_CONFIG: dict[str, Any] = {
+    "intent": {"thresholds": {"direct_execute": 0.7, "llm_confirm": 0.4}},
+    "query": {"keywords": ["查", "案件"]},
+    "reminder": {"keywords": ["提醒"]},
+    "create": {"keywords": ["新建"]},
+}
+
+
+class _RecordingLLM:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    async def chat_json(self, prompt: str, **kwargs: Any) -> dict[str, Any]:
+        self.calls.append(prompt)
+        return {"skills": [{"name": "ChitchatSkill", "score": 0.9, "reason": "llm"}]}
+
+
+def test_classifier_ranks_skills_and_reports_margin() -> None:
+    model = CharNgramIntentClassifier.fit(_SAMPLES)
+
+    prediction = model.predict("记得提醒我开会")
+
+    assert prediction.label == "ReminderSkill"
+    assert prediction.margin > 0
+    assert [name for name, _ in prediction.ranked][0] == "ReminderSkill"
+    assert model.predict("￥￥").ranked == []
+
+
+def test_artifact_round_trip_and_version_check(tmp_path: Path) -> None:
+    model = CharNgramIntentClassifier.fit(_SAMPLES)
+    path = model.save(tmp_path / "intent.npz")
+
+    loaded = CharNgramIntentClassifier.load(path)
+    assert loaded.model_version == model.model_version
+    assert loaded.labels == model.labels
+    assert loaded.predict("新建案件").ranked == model.predict("新建案件").ranked
+
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data["meta"]))
+        arrays = {key: data[key] for key in ("idf", "centroids")}
+    meta["format_version"] = 999
+    stale = tmp_path / "stale.npz"
+    np.savez(stale, meta=np.array(json.dumps(meta)), **arrays)
+    with pytest.raises(ValueError):
+        CharNgramIntentClassifier.load(stale)
+    assert load_local_intent_classifier({"enabled": True, "artifact_path": str(stale)}) is None
+    assert load_local_intent_classifier({"enabled": False, "artifact_path": str(path)}) is None
+    assert load_local_intent_classifier({"enabled": True, "artifact_path": str(path)}) is not None
+
+
+def test_parser_uses_local_classifier_before_llm() -> None:
+    llm = _RecordingLLM()
+    classifier = LocalIntentClassifier(CharNgramIntentClassifier.fit(_SAMPLES), min_score=0.2, min_margin=0.05)
+    parser = IntentParser(_SKILLS_CONFIG, llm_client=llm, local_classifier=classifier)
+
+    result = asyncio.run(parser.parse("别忘了周五交材料"))
+
+    assert result.method == "local_model"
+    assert result.skills[0].name == "ReminderSkill"
+    assert llm.calls == []
+
+
+def test_parser_defers_to_llm_when_margin_is_low() -> None:
+    llm = _RecordingLLM()
+    classifier = LocalIntentClassifier(CharNgramIntentClassifier.fit(_SAMPLES), min_score=0.2, min_margin=0.99)
+    parser = IntentParser(_SKILLS_CONFIG, llm_client=llm, local_classifier=classifier)
+
+    result = asyncio.run(parser.parse("别忘了周五交材料"))
+
+    assert result.method == "llm"
+    assert len(llm.calls) == 1
+
+
+def test_training_samples_from_scenarios_keywords_and_decision_logs(tmp_path: Path) -> None:
+    scenarios = tmp_path / "scenarios.yaml"
+    scenarios.write_text(
+        "variables:\n  who: 张三\n"
+        "scenarios:\n"
+        "  - scenario_id: S1\n    dialogue:\n      - role: user\n        text: 查${who}的案件\n"
+        "    expected:\n      intent: QuerySkill\n"
+        "  - scenario_id: S2\n    dialogue:\n      - role: user\n        text: 算了\n"
+        "    expected:\n      intent: cancel\n",
+        encoding="utf-8",
+    )
+    log_path = tmp_path / "agent.log"
+    lines = [
+        {
+            "event_code": "orchestrator.intent.parsed_planner",
+            "query": "下周的庭帮我列一下",
+            "intent": {"method": "planner", "skills": [{"name": "QuerySkill", "score": 0.9}]},
+        },
+        {
+            "event_code": "orchestrator.intent.parsed",
+            "query": "查",
+            "intent": {"method": "rule", "skills": [{"name": "QuerySkill", "score": 0.9}]},
+        },
+    ]
+    log_path.write_text("plain text line\n" + "\n".join(json.dumps(line, ensure_ascii=False) for line in lines), encoding="utf-8")
+
+    assert scenario_samples(scenarios, ["QuerySkill"]) == [("查张三的案件", "QuerySkill")]
+    assert decision_log_samples([log_path], ["QuerySkill"]) == [("下周的庭帮我列一下", "QuerySkill")]
+
+    config = dict(_SKILLS_CONFIG, skills={"query": {"timeout_seconds": 15}})
+    samples = collect_training_samples(config, scenarios_path=scenarios, decision_logs=[log_path])
+    assert ("提醒", "ReminderSkill") in samples
+    assert ("查张三的案件", "QuerySkill") in samples
+    assert len(samples) == len(set(samples))
+
+
+def test_cross_validation_never_scores_on_training_texts(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    scenarios = tmp_path / "scenarios.yaml"
+    rows = "".join(
+        f"  - scenario_id: S{index}\n    dialogue:\n      - role: user\n        text: {text}\n"
+        f"    expected:\n      intent: {label}\n"
+        for index, (text, label) in enumerate(_SAMPLES)
+    )
+    scenarios.write_text("scenarios:\n" + rows, encoding="utf-8")
+    trained_on: list[set[str]] = []
+    original_train = training_module.train
+
+    def _recording_train(samples, ngram_range=(1, 3)):
+        trained_on.append({text for text, _ in samples})
+        return original_train(samples, ngram_range=ngram_range)
+
+    monkeypatch.setattr(training_module, "train", _recording_train)
+
+    report = cross_validate(_SKILLS_CONFIG, scenarios_path=scenarios, folds=3, repeat=1)
+
+    assert (report.samples, report.folds) == (len(_SAMPLES), 3)
+    assert len(trained_on) == 3
+    for fold, texts in enumerate(trained_on):
+        held_out = {text for text, _ in _SAMPLES[fold::3]}
+        assert not held_out & texts
+        assert {text for text, _ in _SAMPLES} - held_out <= texts
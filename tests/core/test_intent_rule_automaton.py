@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import random
+import sys
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+sys.path.insert(0, str(ROOT / "tools"))
+
+from bench_intent_rules import _automaton, _baseline, _corpus  # noqa: E402
+from src.core.intent.parser import IntentParser, load_skills_config  # noqa: E402
+from src.core.intent.rules import KeywordAutomaton  # noqa: E402
+
+
+def _production_parser() -> IntentParser:
+    config = load_skills_config(str(AGENT_HOST_ROOT / "config" / "skills.yaml"))
+    return IntentParser({key: value for key, value in config.items() if key != "skills"})
+
+
+def test_automaton_finds_overlapping_and_nested_patterns() -> None:
+    automaton = KeywordAutomaton(["案件", "查案", "件", "he", "she", "hers", ""])
+
+    assert automaton.find_all("帮我查案件") == {"查案", "案件", "件"}
+    assert automaton.find_all("ushers") == {"she", "he", "hers"}
+    assert automaton.find_all("") == set()
+
+    rng = random.Random(7)
+    alphabet = "ab查案件"
+    for _ in range(300):
+        patterns = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(6)]
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        assert KeywordAutomaton(patterns).find_all(text) == {p for p in patterns if p in text}
+
+
+def test_rule_scores_match_keyword_loop_on_scenario_corpus() -> None:
+    parser = _production_parser()
+    corpus = _corpus(ROOT / "docs" / "scenarios" / "scenarios.yaml")
+
+    assert corpus
+    for query in corpus + ["提醒我明天开庭", "新建案件并提醒我", "查询CASE状态", "Query 下周的案子"]:
+        assert _automaton(parser, query) == _baseline(parser, query), query
+
+
+def test_case_insensitive_keywords_chains_and_boosts() -> None:
+    parser = IntentParser(
+        {
+            "query": {"keywords": ["CASE", "查", "查"], "time_keywords": ["Today"]},
+            "create": {"keywords": ["新建"]},
+            "chain": {"triggers": [{"pattern": r"然后.*提醒"}]},
+            "chains": {"q2r": {"trigger_keywords": ["并提醒"]}},
+        }
+    )
+
+    matches = parser._rule_match("查 case today")
+    assert [(m.name, round(m.score, 2), m.reason) for m in matches] == [
+        ("QuerySkill", 0.9, "命中关键词: CASE, 查, 查，时间: Today")
+    ]
+    assert parser._rule_match("新建")[0].score == 0.8
+    assert parser._detect_chain("查完然后再提醒我")
+    assert parser._detect_chain("新建并提醒")
+    assert not parser._detect_chain("新建")
+
+    result = asyncio.run(parser.parse("新建并提醒"))
+    assert result.is_chain
+    assert result.skills[0].name == "CreateSkill"
@@ -9,6 +9,7 @@ AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
 sys.path.insert(0, str(AGENT_HOST_ROOT))
 
 from src.core.l0.engine import L0RuleEngine  # noqa: E402
+from src.core.state import ConversationStateManager, MemoryStateStore  # noqa: E402
 
 
 class _DummyState:
@@ -39,3 +40,48 @@ def test_l0_update_collect_fields_can_clear_for_unrelated_query_phrase() -> None
     should_continue = engine._should_continue_pending_action("查一下张三的案子", "update_collect_fields")
 
     assert should_continue is False
+
+
+class _CountingStore(MemoryStateStore):
+    def __init__(self) -> None:
+        super().__init__()
+        self.gets = 0
+        self.cleanups = 0
+
+    def get(self, session_key=None, *, user_id=None):
+        self.gets += 1
+        return super().get(session_key, user_id=user_id)
+
+    def cleanup_expired(self) -> None:
+        self.cleanups += 1
+        super().cleanup_expired()
+
+
+def test_l0_evaluate_reads_state_once_and_skips_cleanup() -> None:
+    store = _CountingStore()
+    manager = ConversationStateManager(store=store)
+    manager.set_last_result("u1", [{"record_id": "rec_1", "fields_text": {"案号": "A-1"}}], "q")
+    manager.set_active_record("u1", {"record_id": "rec_9"})
+    engine = L0RuleEngine(state_manager=manager, l0_rules={}, skills_config={})
+    store.gets = 0
+
+    decision = engine.evaluate("u1", "删除第一个")
+
+    assert decision.force_skill == "DeleteSkill"
+    assert decision.force_last_result == {"records": [{"record_id": "rec_1", "fields_text": {"案号": "A-1"}}]}
+    assert store.gets == 1
+    assert store.cleanups == 0
+
+
+def test_l0_compiled_patterns_cover_configured_phrases() -> None:
+    manager = ConversationStateManager(store=MemoryStateStore())
+    engine = L0RuleEngine(
+        state_manager=manager,
+        l0_rules={"batch_delete_phrases": ["一键清空"], "next_page_triggers": ["再来点"]},
+        skills_config={},
+    )
+
+    assert "批量删除" in (engine.evaluate("u1", "一键清空案件").reply or {}).get("text", "")
+    assert "没有可继续分页" in (engine.evaluate("u1", "再来点").reply or {}).get("text", "")
+    assert engine.evaluate("u1", "HELP").intent_hint == "chitchat"
+    assert engine.evaluate("u1", "你好，帮我查案件").intent_hint is None
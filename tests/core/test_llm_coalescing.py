@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import sys
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.config import LLMSettings  # noqa: E402
+from src.llm.client import LLMClient  # noqa: E402
+from src.llm.scheduler import PRIORITY_SHADOW, get_llm_priority, llm_priority  # noqa: E402
+from src.llm.usage_ledger import usage_ledger_scope  # noqa: E402
+
+
+class _FakeCompletions:
+    def __init__(self, delay: float = 0.02, fail: bool = False) -> None:
+        self.calls = 0
+        self._delay = delay
+        self._fail = fail
+
+    async def create(self, **kwargs: Any) -> Any:
+        self.calls += 1
+        content = f"reply-{self.calls}"
+        await asyncio.sleep(self._delay)
+        if self._fail:
+            raise RuntimeError("upstream failed")
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(total_tokens=10, prompt_tokens=6, completion_tokens=4),
+            model=kwargs.get("model", ""),
+        )
+
+
+def _build_client(completions: _FakeCompletions, **overrides: Any) -> LLMClient:
+    settings = LLMSettings(api_key="test-key", **overrides)
+    client = LLMClient(settings)
+    client._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client
+
+
+def test_concurrent_identical_chat_calls_share_one_upstream_request() -> None:
+    completions = _FakeCompletions()
+    client = _build_client(completions)
+    messages = [{"role": "user", "content": "查所有案件"}]
+
+    async def _run() -> list[str]:
+        return list(await asyncio.gather(*(client.chat(messages) for _ in range(5))))
+
+    results = asyncio.run(_run())
+
+    assert completions.calls == 1
+    assert results == ["reply-1"] * 5
+    assert client._inflight == {}
+
+
+def test_different_messages_are_not_coalesced() -> None:
+    completions = _FakeCompletions()
+    client = _build_client(completions)
+
+    async def _run() -> list[str]:
+        return list(
+            await asyncio.gather(
+                client.chat([{"role": "user", "content": "a"}]),
+                client.chat([{"role": "user", "content": "b"}]),
+            )
+        )
+
+    assert sorted(asyncio.run(_run())) == ["reply-1", "reply-2"]
+    assert completions.calls == 2
+
+
+def test_interactive_call_does_not_join_lower_priority_inflight_call() -> None:
+    completions = _FakeCompletions(delay=0.05)
+    priorities: list[str] = []
+    create = completions.create
+
+    async def _create(**kwargs: Any) -> Any:
+        priorities.append(get_llm_priority())
+        return await create(**kwargs)
+
+    completions.create = _create  # type: ignore[method-assign]
+    client = _build_client(completions)
+    messages = [{"role": "user", "content": "查所有案件"}]
+
+    async def _shadow() -> str:
+        with llm_priority(PRIORITY_SHADOW):
+            return await client.chat(messages)
+
+    async def _run() -> list[str]:
+        shadow = asyncio.create_task(_shadow())
+        await asyncio.sleep(0.01)
+        interactive = await client.chat(messages)
+        return [await shadow, interactive]
+
+    assert sorted(asyncio.run(_run())) == ["reply-1", "reply-2"]
+    assert priorities == ["shadow", "interactive"]
+
+
+def test_memo_only_applies_to_deterministic_calls() -> None:
+    messages = [{"role": "user", "content": "今天开庭"}]
+
+    deterministic = _FakeCompletions(delay=0)
+    client = _build_client(deterministic, temperature=0.0, memo_ttl_seconds=30)
+    asyncio.run(client.chat(messages))
+    assert asyncio.run(client.chat(messages)) == "reply-1"
+    assert deterministic.calls == 1
+
+    sampled = _FakeCompletions(delay=0)
+    client = _build_client(sampled, temperature=0.3, memo_ttl_seconds=30)
+    asyncio.run(client.chat(messages))
+    asyncio.run(client.chat(messages))
+    assert sampled.calls == 2
+
+
+def test_coalesced_callers_all_receive_upstream_error() -> None:
+    completions = _FakeCompletions(fail=True)
+    client = _build_client(completions, temperature=0.0, memo_ttl_seconds=30)
+    messages = [{"role": "user", "content": "x"}]
+
+    async def _run() -> list[Any]:
+        return list(await asyncio.gather(*(client.chat(messages) for _ in range(3)), return_exceptions=True))
+
+    results = asyncio.run(_run())
+
+    assert completions.calls == 1
+    assert all(isinstance(item, RuntimeError) for item in results)
+    assert client._memo == {}
+    with pytest.raises(RuntimeError):
+        asyncio.run(client.chat(messages))
+    assert completions.calls == 2
+
+
+def test_coalescing_can_be_disabled() -> None:
+    completions = _FakeCompletions()
+    client = _build_client(completions, coalesce_enabled=False)
+    messages = [{"role": "user", "content": "查所有案件"}]
+
+    async def _run() -> None:
+        await asyncio.gather(client.chat(messages), client.chat(messages))
+
+    asyncio.run(_run())
+    assert completions.calls == 2
+
+
+def test_upstream_is_cancelled_when_last_waiter_leaves() -> None:
+    completions = _FakeCompletions(delay=5)
+    client = _build_client(completions)
+    messages = [{"role": "user", "content": "查所有案件"}]
+
+    async def _run() -> bool:
+        waiters = [asyncio.create_task(client.chat(messages)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        call = next(iter(client._inflight.values()))
+        waiters[0].cancel()
+        await asyncio.sleep(0)
+        still_running = not call.task.done()
+        waiters[1].cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.wait([call.task], timeout=1)
+        return still_running and call.task.cancelled()
+
+    assert asyncio.run(_run()) is True
+    assert client._inflight == {}
+
+
+def test_coalesced_waiter_records_zero_cost_entry_in_own_ledger() -> None:
+    completions = _FakeCompletions()
+    client = _build_client(completions)
+    messages = [{"role": "user", "content": "查所有案件"}]
+
+    async def _request() -> list[Any]:
+        with usage_ledger_scope() as ledger:
+            await client.chat(messages)
+            return ledger.entries()
+
+    async def _run() -> list[list[Any]]:
+        return list(await asyncio.gather(_request(), _request()))
+
+    first, second = asyncio.run(_run())
+
+    assert completions.calls == 1
+    assert [entry.token_count for entry in first] == [10]
+    assert len(second) == 1
+    assert second[0].token_count == 0
+    assert second[0].metadata["coalesced"] == "inflight"
+    assert second[0].metadata["coalesced_token_count"] == "10"
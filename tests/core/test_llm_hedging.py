@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import sys
+from types import SimpleNamespace
+from typing import Any
+
+import httpx
+from openai import BadRequestError
+import pytest
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+import src.llm.client as client_module  # noqa: E402
+from src.config import LLMSettings  # noqa: E402
+from src.llm.client import LLMClient  # noqa: E402
+from src.llm.model_health import ModelHealthConfig, ModelHealthRegistry  # noqa: E402
+from src.llm.usage_ledger import usage_ledger_scope  # noqa: E402
+
+
+class _ModelCompletions:
+    """按模型名返回不同延迟/结果的假上游。"""
+
+    def __init__(self, delays: dict[str, float], failing: set[str] | None = None) -> None:
+        self.delays = delays
+        self.failing = failing or set()
+        self.calls: list[str] = []
+        self.cancelled: list[str] = []
+
+    async def create(self, **kwargs: Any) -> Any:
+        model = kwargs["model"]
+        self.calls.append(model)
+        try:
+            await asyncio.sleep(self.delays.get(model, 0))
+        except asyncio.CancelledError:
+            self.cancelled.append(model)
+            raise
+        if model in self.failing:
+            raise RuntimeError(f"{model} failed")
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f"from-{model}"))],
+            usage=SimpleNamespace(total_tokens=10, prompt_tokens=6, completion_tokens=4),
+            model=model,
+        )
+
+
+def _build_client(completions: _ModelCompletions, monkeypatch, health: ModelHealthRegistry) -> LLMClient:
+    monkeypatch.setattr(client_module, "get_model_health", lambda: health)
+    settings = LLMSettings(api_key="test-key", hedge={"enabled": True})
+    client = LLMClient(settings)
+    client._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client
+
+
+def test_breaker_opens_on_failure_rate_and_half_opens_after_cooldown() -> None:
+    now = [0.0]
+    health = ModelHealthRegistry(
+        ModelHealthConfig(breaker_enabled=True, min_calls=4, failure_rate_threshold=0.5, cooldown_seconds=10),
+        clock=lambda: now[0],
+    )
+    health.record("m", ok=True, latency_seconds=0.1)
+    health.record("m", ok=False)
+    health.record("m", ok=True, latency_seconds=0.1)
+    assert health.allow("m")
+    health.record("m", ok=False)
+    assert health.is_open("m")
+
+    now[0] = 11.0
+    assert health.allow("m")
+    health.record("m", ok=False, started_at=11.0)
+    assert health.is_open("m")
+
+    # 熔断前发出、迟到的成功结果不是探测结果
+    now[0] = 22.0
+    health.record("m", ok=True, latency_seconds=0.1, started_at=5.0)
+    assert health.allow("m")
+    assert health.is_open("m")
+    health.record("m", ok=True, latency_seconds=0.1, started_at=22.0)
+    assert not health.is_open("m")
+
+
+def test_half_open_breaker_admits_a_single_probe() -> None:
+    now = [0.0]
+    health = ModelHealthRegistry(
+        ModelHealthConfig(breaker_enabled=True, min_calls=1, cooldown_seconds=10),
+        clock=lambda: now[0],
+    )
+    health.record("m", ok=False)
+
+    now[0] = 11.0
+    assert not health.is_open("m")
+    assert health.allow("m")
+    assert health.is_open("m")
+    assert not health.allow("m")
+
+    # 探测未回报超过一个冷却期后允许重新探测
+    now[0] = 22.0
+    assert health.allow("m")
+    assert not health.allow("m")
+    health.record("m", ok=True, latency_seconds=0.1, started_at=22.0)
+    assert health.allow("m")
+    assert health.allow("m")
+
+
+def test_cancelled_probe_releases_the_half_open_slot() -> None:
+    now = [0.0]
+    health = ModelHealthRegistry(
+        ModelHealthConfig(breaker_enabled=True, min_calls=1, cooldown_seconds=10),
+        clock=lambda: now[0],
+    )
+    health.record("m", ok=False)
+
+    now[0] = 11.0
+    assert health.allow("m")
+    health.release_probe("m", started_at=11.0)
+    assert not health.is_open("m")
+    assert health.allow("m")
+
+
+def test_hedge_delay_tracks_latency_percentile() -> None:
+    health = ModelHealthRegistry(
+        ModelHealthConfig(hedge_percentile=0.9, hedge_min_delay_ms=50, hedge_max_delay_ms=1000, hedge_initial_delay_ms=800)
+    )
+    assert health.hedge_delay_seconds("m") == pytest.approx(0.8)
+    for latency in (0.1, 0.1, 0.2, 0.2, 0.3, 0.3, 0.4, 0.4, 0.5, 2.0):
+        health.record("m", ok=True, latency_seconds=latency)
+    assert health.hedge_delay_seconds("m") == pytest.approx(0.5)
+
+
+def test_slow_primary_loses_to_hedged_model(monkeypatch) -> None:
+    health = ModelHealthRegistry(ModelHealthConfig(hedge_initial_delay_ms=20, hedge_min_delay_ms=10))
+    completions = _ModelCompletions({"primary": 1.0, "backup": 0.01})
+    client = _build_client(completions, monkeypatch, health)
+
+    async def _run() -> tuple[str, Any]:
+        with usage_ledger_scope() as ledger:
+            with client.route_context(model_selected="primary", hedge_model="backup"):
+                text = await client.chat([{"role": "user", "content": "查案件"}])
+            await asyncio.sleep(0)
+            return text, ledger.entries()
+
+    text, entries = asyncio.run(_run())
+
+    assert text == "from-backup"
+    assert completions.calls == ["primary", "backup"]
+    assert completions.cancelled == ["primary"]
+    assert len(entries) == 1
+    assert entries[0].model == "backup"
+    assert entries[0].metadata["hedge_winner"] == "backup"
+    assert entries[0].metadata["hedge_fired"] == "true"
+
+
+def test_failed_primary_fails_over_to_hedge_model(monkeypatch) -> None:
+    health = ModelHealthRegistry(ModelHealthConfig(breaker_enabled=True, min_calls=1))
+    completions = _ModelCompletions({"primary": 0, "backup": 0}, failing={"primary"})
+    client = _build_client(completions, monkeypatch, health)
+
+    async def _run() -> str:
+        with client.route_context(model_selected="primary", hedge_model="backup"):
+            return await client.chat([{"role": "user", "content": "查案件"}])
+
+    assert asyncio.run(_run()) == "from-backup"
+    assert health.is_open("primary")
+
+
+def test_fast_primary_does_not_fire_hedge(monkeypatch) -> None:
+    health = ModelHealthRegistry(ModelHealthConfig(hedge_initial_delay_ms=500))
+    completions = _ModelCompletions({"primary": 0, "backup": 0})
+    client = _build_client(completions, monkeypatch, health)
+
+    async def _run() -> str:
+        with client.route_context(model_selected="primary", hedge_model="backup"):
+            return await client.chat([{"role": "user", "content": "查案件"}])
+
+    assert asyncio.run(_run()) == "from-primary"
+    assert completions.calls == ["primary"]
+
+
+def test_bad_request_from_primary_is_not_hedged(monkeypatch) -> None:
+    health = ModelHealthRegistry(ModelHealthConfig(hedge_initial_delay_ms=500))
+    completions = _ModelCompletions({"primary": 0, "backup": 0})
+    request = httpx.Request("POST", "https://llm.test/chat/completions")
+
+    async def _create(**kwargs: Any) -> Any:
+        completions.calls.append(kwargs["model"])
+        raise BadRequestError(
+            "context length exceeded",
+            response=httpx.Response(400, request=request, text="too long"),
+            body=None,
+        )
+
+    completions.create = _create  # type: ignore[method-assign]
+    client = _build_client(completions, monkeypatch, health)
+
+    async def _run() -> str:
+        with client.route_context(model_selected="primary", hedge_model="backup"):
+            return await client.chat([{"role": "user", "content": "查案件"}])
+
+    with pytest.raises(BadRequestError):
+        asyncio.run(_run())
+    assert completions.calls == ["primary"]
+
+
+def _open_backup_breaker(now: list[float]) -> ModelHealthRegistry:
+    health = ModelHealthRegistry(
+        ModelHealthConfig(
+            breaker_enabled=True,
+            min_calls=1,
+            cooldown_seconds=10,
+            hedge_initial_delay_ms=20,
+            hedge_min_delay_ms=10,
+        ),
+        clock=lambda: now[0],
+    )
+    health.record("backup", ok=False)
+    now[0] = 11.0
+    return health
+
+
+def test_fast_primary_after_cooldown_leaves_backup_probe_available(monkeypatch) -> None:
+    now = [0.0]
+    health = _open_backup_breaker(now)
+    completions = _ModelCompletions({"primary": 0, "backup": 0})
+    client = _build_client(completions, monkeypatch, health)
+
+    async def _run(prompt: str) -> str:
+        with client.route_context(model_selected="primary", hedge_model="backup"):
+            return await client.chat([{"role": "user", "content": prompt}])
+
+    assert asyncio.run(_run("快")) == "from-primary"
+    assert not health.is_open("backup")
+
+    completions.delays["primary"] = 1.0
+    assert asyncio.run(_run("慢")) == "from-backup"
+    assert completions.calls == ["primary", "primary", "backup"]
+    assert not health.is_open("backup") and health.allow("backup")
+
+
+def test_cancelled_hedge_probe_releases_backup_slot(monkeypatch) -> None:
+    now = [0.0]
+    health = _open_backup_breaker(now)
+    completions = _ModelCompletions({"primary": 0.05, "backup": 1.0})
+    client = _build_client(completions, monkeypatch, health)
+
+    async def _run() -> str:
+        with client.route_context(model_selected="primary", hedge_model="backup"):
+            return await client.chat([{"role": "user", "content": "查案件"}])
+
+    assert asyncio.run(_run()) == "from-primary"
+    assert completions.cancelled == ["backup"]
+    assert not health.is_open("backup")
+
+
+def test_primary_cancelled_by_hedge_still_feeds_latency_percentile(monkeypatch) -> None:
+    health = ModelHealthRegistry(
+        ModelHealthConfig(hedge_percentile=0.95, hedge_min_delay_ms=1, hedge_initial_delay_ms=5)
+    )
+    for _ in range(5):
+        health.record("primary", ok=True, latency_seconds=0.005)
+    completions = _ModelCompletions({"primary": 1.0, "backup": 0.03})
+    client = _build_client(completions, monkeypatch, health)
+
+    async def _run(prompt: str) -> str:
+        with client.route_context(model_selected="primary", hedge_model="backup"):
+            return await client.chat([{"role": "user", "content": prompt}])
+
+    for index in range(3):
+        assert asyncio.run(_run(f"查案件{index}")) == "from-backup"
+
+    # 被取消的慢主请求按已耗时计入样本，对冲延迟不会只被快请求拉低
+    assert health.hedge_delay_seconds("primary") >= 0.03
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import sys
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+import src.llm.client as client_module  # noqa: E402
+from src.config import LLMSettings  # noqa: E402
+from src.llm.client import LLMClient  # noqa: E402
+from src.llm.scheduler import (  # noqa: E402
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_SHADOW,
+    LLMPriorityLimits,
+    LLMScheduler,
+    LLMSchedulerConfig,
+    llm_priority,
+)
+from src.utils.exceptions import LLMOverloadedError  # noqa: E402
+
+
+def _scheduler(max_concurrency: int, reserved: int = 0, **classes: LLMPriorityLimits) -> LLMScheduler:
+    return LLMScheduler(
+        LLMSchedulerConfig(max_concurrency=max_concurrency, reserved_interactive=reserved, classes=dict(classes))
+    )
+
+
+def test_interactive_uses_reserved_capacity_background_cannot() -> None:
+    scheduler = _scheduler(2, reserved=1)
+
+    async def _run() -> None:
+        await scheduler.acquire(PRIORITY_BACKGROUND)
+        background = asyncio.create_task(scheduler.acquire(PRIORITY_BACKGROUND))
+        await asyncio.sleep(0)
+        assert not background.done()
+        assert scheduler.queue_depth(PRIORITY_BACKGROUND) == 1
+
+        await asyncio.wait_for(scheduler.acquire(PRIORITY_INTERACTIVE), timeout=0.1)
+        assert scheduler.total_active == 2
+
+        scheduler.release(PRIORITY_INTERACTIVE)
+        await asyncio.sleep(0)
+        assert not background.done()
+        scheduler.release(PRIORITY_BACKGROUND)
+        await asyncio.wait_for(background, timeout=0.1)
+        assert scheduler.active(PRIORITY_BACKGROUND) == 1
+
+    asyncio.run(_run())
+
+
+def test_released_slot_goes_to_highest_priority_waiter() -> None:
+    scheduler = _scheduler(1)
+    order: list[str] = []
+
+    async def _worker(priority: str) -> None:
+        async with scheduler.slot(priority):
+            order.append(priority)
+            await asyncio.sleep(0)
+
+    async def _run() -> None:
+        await scheduler.acquire(PRIORITY_INTERACTIVE)
+        waiters = [
+            asyncio.create_task(_worker(PRIORITY_BACKGROUND)),
+            asyncio.create_task(_worker(PRIORITY_INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        scheduler.release(PRIORITY_INTERACTIVE)
+        await asyncio.gather(*waiters)
+
+    asyncio.run(_run())
+    assert order == [PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND]
+
+
+def test_low_priority_is_shed_when_queue_full_or_wait_expires() -> None:
+    scheduler = _scheduler(
+        1,
+        shadow=LLMPriorityLimits(max_concurrency=1, max_queue=1, max_wait_seconds=0.05),
+    )
+
+    async def _run() -> list[Any]:
+        await scheduler.acquire(PRIORITY_INTERACTIVE)
+        return list(
+            await asyncio.gather(
+                scheduler.acquire(PRIORITY_SHADOW),
+                scheduler.acquire(PRIORITY_SHADOW),
+                return_exceptions=True,
+            )
+        )
+
+    results = asyncio.run(_run())
+
+    reasons = sorted(exc.details["reason"] for exc in results if isinstance(exc, LLMOverloadedError))
+    assert reasons == ["queue_full", "wait_timeout"]
+    assert scheduler.queue_depth(PRIORITY_SHADOW) == 0
+    assert scheduler.total_active == 1
+
+
+def test_interactive_is_never_shed() -> None:
+    scheduler = _scheduler(
+        1,
+        interactive=LLMPriorityLimits(max_concurrency=1, max_queue=1, max_wait_seconds=0.01),
+    )
+
+    async def _run() -> None:
+        await scheduler.acquire(PRIORITY_INTERACTIVE)
+        waiters = [asyncio.create_task(scheduler.acquire(PRIORITY_INTERACTIVE)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        assert not any(task.done() for task in waiters)
+        assert scheduler.queue_depth(PRIORITY_INTERACTIVE) == 3
+        for _ in waiters:
+            scheduler.release(PRIORITY_INTERACTIVE)
+            await asyncio.sleep(0)
+        await asyncio.wait_for(asyncio.gather(*waiters), timeout=0.1)
+        assert scheduler.total_active == 1
+
+    asyncio.run(_run())
+
+
+def test_cancelled_waiter_does_not_leak_slot() -> None:
+    scheduler = _scheduler(1)
+
+    async def _run() -> None:
+        await scheduler.acquire(PRIORITY_INTERACTIVE)
+        waiter = asyncio.create_task(scheduler.acquire(PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        scheduler.release(PRIORITY_INTERACTIVE)
+        assert scheduler.total_active == 0
+        await asyncio.wait_for(scheduler.acquire(PRIORITY_INTERACTIVE), timeout=0.1)
+
+    asyncio.run(_run())
+
+
+def test_llm_client_calls_go_through_scheduler(monkeypatch) -> None:
+    scheduler = _scheduler(1)
+    monkeypatch.setattr(client_module, "get_llm_scheduler", lambda: scheduler)
+    in_flight = {"now": 0, "max": 0}
+
+    async def _create(**kwargs: Any) -> Any:
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))],
+            usage=None,
+            model=kwargs.get("model", ""),
+        )
+
+    client = LLMClient(LLMSettings(api_key="test-key"))
+    client._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_create)))
+
+    async def _background_call() -> str:
+        with llm_priority(PRIORITY_BACKGROUND):
+            return await client.chat([{"role": "user", "content": "digest"}])
+
+    async def _run() -> list[str]:
+        return list(
+            await asyncio.gather(
+                client.chat([{"role": "user", "content": "a"}]),
+                client.chat([{"role": "user", "content": "b"}]),
+                _background_call(),
+            )
+        )
+
+    assert asyncio.run(_run()) == ["ok", "ok", "ok"]
+    assert in_flight["max"] == 1
+    assert scheduler.total_active == 0
@@ -0,0 +1,80 @@
+import asyncio
+import os
+from pathlib import Path
+import sys
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.core.memory import MemoryManager
+from src.core.soul import SoulManager
+from src.utils.file_cache import FileContentCache
+
+
+def test_file_cache_revalidates_by_mtime_and_size(tmp_path: Path) -> None:
+    path = tmp_path / "memory.md"
+    path.write_text("- a\n", encoding="utf-8")
+    cache = FileContentCache(max_entries=2)
+
+    assert cache.read_text(path) == "- a\n"
+    assert cache.read_text(path) == "- a\n"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    path.write_text("- a\n- b\n", encoding="utf-8")
+    assert cache.read_text(path) == "- a\n- b\n"
+    assert cache.misses == 2
+
+    path.unlink()
+    assert cache.read_text(path) == ""
+    assert len(cache) == 0
+
+
+def test_file_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = FileContentCache(max_entries=2)
+    paths = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / f"{name}.md"
+        path.write_text(name, encoding="utf-8")
+        paths.append(path)
+        cache.read_text(path)
+
+    assert len(cache) == 2
+    cache.read_text(paths[0])
+    assert cache.misses == 4
+
+
+def test_memory_manager_async_snapshot_uses_cache_and_sees_writes(tmp_path: Path) -> None:
+    manager = MemoryManager(workspace_root=tmp_path)
+    manager.remember_user("u1", "喜欢简洁回复")
+    manager.append_daily_log("u1", "用户: 查案件")
+
+    first = asyncio.run(manager.asnapshot("u1"))
+    misses = manager.file_cache.misses
+    second = asyncio.run(manager.asnapshot("u1"))
+
+    assert first == second
+    assert "喜欢简洁回复" in first.user_memory
+    assert "查案件" in first.recent_logs
+    assert manager.file_cache.misses == misses
+
+    manager.append_daily_log("u1", "助手: 找到 3 条")
+    third = asyncio.run(manager.asnapshot("u1"))
+    assert "找到 3 条" in third.recent_logs
+
+
+def test_soul_manager_async_prompt_rereads_only_changed_files(tmp_path: Path) -> None:
+    soul = SoulManager(workspace_root=tmp_path, reload_interval=0)
+    soul_path = tmp_path / "SOUL.md"
+    soul_path.write_text("保持专业", encoding="utf-8")
+
+    assert "保持专业" in asyncio.run(soul.abuild_system_prompt())
+    misses = soul._file_cache.misses
+    assert asyncio.run(soul.abuild_system_prompt()) == soul.build_system_prompt()
+    assert soul._file_cache.misses == misses
+
+    soul_path.write_text("保持专业，简洁回答", encoding="utf-8")
+    stat = soul_path.stat()
+    os.utime(soul_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert "简洁回答" in asyncio.run(soul.abuild_system_prompt())
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import sys
+from types import SimpleNamespace
+import types
+from typing import Any
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+# orchestrator imports Postgres client, which requires asyncpg at import time.
+sys.modules.setdefault("asyncpg", types.ModuleType("asyncpg"))
+
+import src.core.orchestrator as orchestrator_module  # noqa: E402
+from src.core.orchestrator import AgentOrchestrator, _resolve_concurrent_pipeline  # noqa: E402
+from src.core.planner.schema import PlannerOutput  # noqa: E402
+
+
+def _build_orchestrator(planner: Any, context_builder: Any, llm: Any = None) -> AgentOrchestrator:
+    orchestrator = AgentOrchestrator.__new__(AgentOrchestrator)
+    orchestrator._planner = planner
+    orchestrator._build_llm_context = context_builder
+    orchestrator._llm = llm or SimpleNamespace()
+    orchestrator._llm_timeout = 5
+    return orchestrator
+
+
+def test_resolve_concurrent_pipeline_reads_skills_config() -> None:
+    assert _resolve_concurrent_pipeline({"pipeline": {"concurrent": True}}) is True
+    assert _resolve_concurrent_pipeline({"pipeline": {}}) is False
+    assert _resolve_concurrent_pipeline(None) is False
+
+
+def test_concurrent_planning_overlaps_context_and_planner() -> None:
+    planner_started = asyncio.Event()
+
+    async def _context_builder(user_id: str, **kwargs: Any) -> dict[str, str]:
+        # 顺序执行时 Planner 尚未启动，这里会一直等待
+        await asyncio.wait_for(planner_started.wait(), timeout=1)
+        return {"soul_prompt": "soul"}
+
+    class _Planner:
+        fused = False
+
+        async def plan(self, query: str, *, user_profile: Any = None) -> PlannerOutput:
+            planner_started.set()
+            return PlannerOutput(intent="query_all", tool="search", confidence=0.9)
+
+    async def _run() -> tuple[Any, Any, Any, dict[str, float]]:
+        timings: dict[str, float] = {}
+        orchestrator = _build_orchestrator(_Planner(), _context_builder)
+        tasks = orchestrator._start_concurrent_planning(
+            "u1",
+            "查所有案件",
+            file_markdown="",
+            file_provider="none",
+            user_profile=None,
+            stage_timings=timings,
+        )
+        plan = await tasks.planner
+        context = await tasks.context
+        time_range = await tasks.time_range if tasks.time_range else None
+        return plan, context, time_range, timings
+
+    plan, context, time_range, timings = asyncio.run(_run())
+
+    assert plan.intent == "query_all"
+    assert context == {"soul_prompt": "soul"}
+    assert time_range is None
+    assert {"context", "planner", "time_range"} <= set(timings)
+
+
+def test_cancelled_speculative_time_range_keeps_context_task(monkeypatch) -> None:
+    monkeypatch.setattr(orchestrator_module, "parse_time_range", lambda _text: None)
+    llm_calls: list[str] = []
+    release_context = asyncio.Event()
+
+    async def _context_builder(user_id: str, **kwargs: Any) -> dict[str, str]:
+        await release_context.wait()
+        return {"soul_prompt": "soul"}
+
+    class _Planner:
+        fused = False
+
+        async def plan(self, query: str, *, user_profile: Any = None) -> PlannerOutput:
+            return PlannerOutput(intent="clarify_needed", tool="none", confidence=0.5, clarify_question="?")
+
+    class _LLM:
+        async def parse_time_range(self, text: str, **kwargs: Any) -> dict[str, str]:
+            llm_calls.append(text)
+            return {"date_from": "2026-01-01", "date_to": "2026-01-01"}
+
+    async def _run() -> dict[str, str]:
+        orchestrator = _build_orchestrator(_Planner(), _context_builder, llm=_LLM())
+        tasks = orchestrator._start_concurrent_planning(
+            "u1",
+            "下午的庭",
+            file_markdown="",
+            file_provider="none",
+            user_profile=None,
+            stage_timings={},
+        )
+        plan = await tasks.planner
+        assert orchestrator._speculative_time_range_lost(plan)
+        assert tasks.time_range is not None
+        tasks.time_range.cancel()
+        await asyncio.sleep(0)
+        release_context.set()
+        return await tasks.context
+
+    assert asyncio.run(_run()) == {"soul_prompt": "soul"}
+    assert llm_calls == []
@@ -1,4 +1,5 @@
 import asyncio
+from contextlib import nullcontext
 from pathlib import Path
 import sys
 import types
@@ -132,6 +133,7 @@ def test_handle_message_always_returns_outbound_structure() -> None:
     orchestrator._state_manager = SimpleNamespace(
         cleanup_expired=lambda: None,
         active_count=lambda: 0,
+        aunit_of_work=lambda _user_id: nullcontext(),
     )
     orchestrator._l0_engine = SimpleNamespace(
         evaluate=lambda *_args, **_kwargs: SimpleNamespace(
@@ -166,6 +168,7 @@ def test_handle_message_exception_path_also_contains_outbound() -> None:
     orchestrator._state_manager = SimpleNamespace(
         cleanup_expired=lambda: None,
         active_count=lambda: 0,
+        aunit_of_work=lambda _user_id: nullcontext(),
     )
     orchestrator._l0_engine = SimpleNamespace(
         evaluate=lambda *_args, **_kwargs: (_ for _ in ()).throw(RuntimeError("boom"))
@@ -204,6 +207,7 @@ def test_reload_config_refreshes_assistant_name_for_outbound(monkeypatch) -> Non
     orchestrator._state_manager = SimpleNamespace(
         cleanup_expired=lambda: None,
         active_count=lambda: 0,
+        aunit_of_work=lambda _user_id: nullcontext(),
     )
     orchestrator._sessions = SimpleNamespace(
         cleanup_expired=lambda: None,
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+import sys
+from types import SimpleNamespace
+from typing import Any
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+import src.core.planner.engine as engine_module  # noqa: E402
+from src.core.planner.cache import PlannerCache, build_planner_cache, normalize_query  # noqa: E402
+from src.core.planner.engine import PlannerEngine  # noqa: E402
+from src.core.planner.schema import PlannerOutput  # noqa: E402
+
+
+def _plan(intent: str = "query_all", tool: str = "search", **params: Any) -> PlannerOutput:
+    return PlannerOutput(intent=intent, tool=tool, params=params, confidence=0.9)
+
+
+class _CountingLLM:
+    def __init__(self) -> None:
+        self._settings = SimpleNamespace(api_key="test-key")
+        self.calls = 0
+
+    async def chat_json(self, prompt: str, system: str | None = None, timeout: float | None = None) -> dict[str, Any]:
+        self.calls += 1
+        return {"intent": "query_all", "tool": "search", "params": {}, "confidence": 0.9}
+
+
+def test_normalize_query_ignores_case_width_and_punctuation() -> None:
+    assert normalize_query(" 查所有案件！ ") == normalize_query("查所有案件")
+    assert normalize_query("ＡＢＣ 123") == "abc123"
+
+
+def test_planner_cache_exact_hit_ttl_and_lru() -> None:
+    now = [0.0]
+    cache = PlannerCache(ttl_seconds=10, max_entries=2, clock=lambda: now[0])
+
+    cache.put("查所有案件", "s1", _plan())
+    cache.put("我的案件", "s1", _plan("query_my_cases", "search_person"))
+    assert cache.get("查所有案件。", "s1") is not None
+    assert cache.get("查所有案件", "s2") is None
+
+    cache.put("今天开庭", "s1", _plan("query_date_range", "search_date_range"))
+    assert cache.get("我的案件", "s1") is None  # LRU evicted
+    assert cache.get("查所有案件", "s1") is not None
+
+    now[0] = 11.0
+    assert cache.get("查所有案件", "s1") is None
+    assert len(cache) == 1
+
+
+def test_planner_cache_similarity_tier_only_reuses_parameter_free_plans() -> None:
+    cache = PlannerCache(similarity_enabled=True, similarity_threshold=0.7)
+    cache.put("帮我查所有案件", "s1", _plan())
+    cache.put("查张三的案件", "s1", _plan("query_person", "search_person", owner_name="张三"))
+
+    similar = cache.get("帮我查一下所有案件", "s1")
+    assert similar is not None and similar.intent == "query_all"
+    assert cache.get("查李三的案件", "s1") is None
+
+
+def test_build_planner_cache_disabled_by_default() -> None:
+    assert build_planner_cache(None) is None
+    assert isinstance(build_planner_cache({"enabled": True}), PlannerCache)
+
+
+def test_planner_engine_cache_skips_repeated_llm_calls(tmp_path: Path) -> None:
+    llm = _CountingLLM()
+    engine = PlannerEngine(llm_client=llm, scenarios_dir=str(tmp_path), cache=PlannerCache())
+
+    asyncio.run(engine.plan("查所有案件"))
+    asyncio.run(engine.plan("查所有案件！"))
+    assert llm.calls == 1
+
+    engine.invalidate_cache("reload")
+    asyncio.run(engine.plan("查所有案件"))
+    assert llm.calls == 2
+
+
+def test_planner_engine_invalidates_cache_when_scenarios_change(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(engine_module, "_SCENARIOS_CHECK_INTERVAL_SECONDS", 0.0)
+    scenario = tmp_path / "query.yaml"
+    scenario.write_text("rules:\n  - pattern: 查全部\n    intent: query_all\n    tool: search\n", encoding="utf-8")
+    llm = _CountingLLM()
+    engine = PlannerEngine(llm_client=llm, scenarios_dir=str(tmp_path), cache=PlannerCache())
+
+    asyncio.run(engine.plan("查所有案件"))
+    scenario.write_text("rules:\n  - pattern: 查所有\n    intent: query_all\n    tool: search\n", encoding="utf-8")
+    stat = scenario.stat()
+    os.utime(scenario, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    asyncio.run(engine.plan("查所有案件"))
+
+    assert llm.calls == 2
+    assert "查所有 -> intent=query_all" in engine._system_prompt
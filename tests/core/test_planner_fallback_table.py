@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+import pytest
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+sys.path.insert(0, str(ROOT / "tools"))
+
+import src.core.planner.engine as engine_module  # noqa: E402
+from bench_planner_fallback import DEFAULT_GOLDEN, load_golden, pin_today, run_case  # noqa: E402
+from src.core.planner.engine import PlannerEngine  # noqa: E402
+from src.core.planner.fallback_rules import CompiledFallbackTable, FallbackRule  # noqa: E402
+
+
+def test_fallback_plan_matches_golden_set(monkeypatch) -> None:
+    today, cases = load_golden(DEFAULT_GOLDEN)
+    # 先登记原值，测试结束后由 monkeypatch 还原 pin_today 的替换
+    monkeypatch.setattr(engine_module, "date", engine_module.date)
+    pin_today(today)
+    planner = PlannerEngine(llm_client=object(), scenarios_dir="/tmp/not-exists", enabled=False)
+
+    mismatches = [case["query"] for case in cases if run_case(planner, case) != case["expected"]]
+
+    assert len(cases) > 500
+    assert mismatches == []
+
+
+def test_table_rejects_unknown_signals() -> None:
+    with pytest.raises(ValueError, match="no_such_signal"):
+        CompiledFallbackTable(rules=(FallbackRule("broken", when=(("case", "no_such_signal"),)),))
+
+
+def test_table_respects_rule_order_and_handler_fallthrough() -> None:
+    class _Handlers:
+        def __init__(self) -> None:
+            self.calls: list[str] = []
+
+        def _decline(self, ctx) -> None:
+            self.calls.append(ctx.normalized)
+            return None
+
+    table = CompiledFallbackTable(
+        rules=(
+            FallbackRule("declines", when=(("case",),), handler="_decline"),
+            FallbackRule("listing", when=(("case", "case_listing"), ("all_cases",)), intent="query_all", tool="search", confidence=0.8),
+            FallbackRule("case", when=(("case",),), intent="query_view", tool="search", confidence=0.5),
+        )
+    )
+    handlers = _Handlers()
+
+    assert table.evaluate("案件 有哪些", "案件有哪些", handlers).intent == "query_all"
+    assert table.evaluate("查全部", "查全部", handlers).intent == "query_all"
+    assert table.evaluate("项目", "项目", handlers).intent == "query_view"
+    assert table.evaluate("你好", "你好", handlers) is None
+    assert handlers.calls == ["案件有哪些", "项目"]
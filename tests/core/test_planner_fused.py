@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date
+from pathlib import Path
+import sys
+from types import SimpleNamespace
+import types
+from typing import Any
+
+import pytest
+from pydantic import ValidationError
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+# orchestrator imports Postgres client, which requires asyncpg at import time.
+sys.modules.setdefault("asyncpg", types.ModuleType("asyncpg"))
+
+from src.core.intent.parser import IntentParser, IntentResult, SkillMatch  # noqa: E402
+from src.core.orchestrator import AgentOrchestrator  # noqa: E402
+from src.core.planner.engine import PlannerEngine  # noqa: E402
+from src.core.planner.schema import FusedPlannerOutput, PlannerOutput  # noqa: E402
+
+
+def _fused_payload(**overrides: Any) -> dict[str, Any]:
+    payload: dict[str, Any] = {
+        "intent": "query_date_range",
+        "tool": "search_date_range",
+        "params": {},
+        "confidence": 0.88,
+        "clarify_question": "",
+        "skills": [{"name": "QuerySkill", "score": 0.9, "reason": "开庭查询"}],
+        "is_chain": False,
+        "date_from": "2026-03-02",
+        "date_to": "2026-03-08",
+        "time_from": "",
+        "time_to": "",
+    }
+    payload.update(overrides)
+    return payload
+
+
+class _FakeLLM:
+    def __init__(self, response: dict[str, Any]) -> None:
+        self._settings = SimpleNamespace(api_key="test-key")
+        self._response = response
+        self.calls: list[dict[str, Any]] = []
+
+    async def chat_json(self, prompt: str, system: str | None = None, timeout: float | None = None) -> dict[str, Any]:
+        self.calls.append({"prompt": prompt, "system": system or ""})
+        return dict(self._response)
+
+
+def test_fused_output_exposes_skill_ranking_and_time_range() -> None:
+    output = FusedPlannerOutput.model_validate(_fused_payload(time_from="09:00", time_to="12:00"))
+
+    assert output.skills[0].name == "QuerySkill"
+    assert output.time_range() == {
+        "date_from": "2026-03-02",
+        "date_to": "2026-03-08",
+        "time_from": "09:00",
+        "time_to": "12:00",
+    }
+    assert output.to_context()["time_range"]["date_from"] == "2026-03-02"
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"date_from": "下周一"},
+        {"date_to": ""},
+        {"date_from": "2026-03-09"},
+        {"date_from": "", "date_to": "", "time_from": "09:00"},
+    ],
+)
+def test_fused_output_rejects_malformed_time_range(overrides: dict[str, Any]) -> None:
+    with pytest.raises(ValidationError):
+        FusedPlannerOutput.model_validate(_fused_payload(**overrides))
+
+
+def test_planner_engine_fused_mode_returns_fused_output() -> None:
+    llm = _FakeLLM(_fused_payload())
+    engine = PlannerEngine(
+        llm_client=llm,
+        scenarios_dir="/tmp/not-exists",
+        enabled=True,
+        fused=True,
+        skill_catalog=[{"name": "QuerySkill", "description": "查询案件"}],
+    )
+
+    output = asyncio.run(engine.plan("下周开庭的案子"))
+
+    assert isinstance(output, FusedPlannerOutput)
+    assert len(llm.calls) == 1
+    assert date.today().isoformat() in llm.calls[0]["prompt"]
+    assert "QuerySkill: 查询案件" in llm.calls[0]["system"]
+
+
+def test_planner_engine_fused_mode_keeps_base_plan_when_fused_fields_invalid() -> None:
+    engine = PlannerEngine(
+        llm_client=_FakeLLM(_fused_payload(date_from="下周一")),
+        scenarios_dir="/tmp/not-exists",
+        enabled=True,
+        fused=True,
+    )
+
+    output = asyncio.run(engine.plan("下周开庭的案子"))
+
+    assert isinstance(output, PlannerOutput)
+    assert not isinstance(output, FusedPlannerOutput)
+    assert output.intent == "query_date_range"
+
+
+def test_intent_parser_uses_fused_hint_instead_of_llm_classify() -> None:
+    class _FailingLLM:
+        async def chat_json(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+            raise AssertionError("LLM classify should be skipped")
+
+    parser = IntentParser(skills_config={}, llm_client=_FailingLLM())
+    hint = IntentResult(
+        skills=[SkillMatch(name="ReminderSkill", score=0.8, reason="planner")],
+        method="planner_fused",
+    )
+
+    result = asyncio.run(parser.parse("帮我弄一下那个", llm_hint=hint))
+
+    assert result.top_skill() is not None
+    assert result.top_skill().name == "ReminderSkill"
+
+
+def test_resolve_time_range_uses_fused_plan_without_llm_call(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("src.core.orchestrator.parse_time_range", lambda _text: None)
+    calls: list[str] = []
+
+    class _RecordingLLM:
+        async def parse_time_range(self, text: str, **kwargs: Any) -> dict[str, str]:
+            calls.append(text)
+            return {"date_from": "2026-01-01", "date_to": "2026-01-01"}
+
+    orchestrator = AgentOrchestrator.__new__(AgentOrchestrator)
+    orchestrator._llm = _RecordingLLM()
+    orchestrator._llm_timeout = 5
+
+    fused = FusedPlannerOutput.model_validate(_fused_payload())
+    no_range = FusedPlannerOutput.model_validate(_fused_payload(date_from="", date_to=""))
+
+    resolved = asyncio.run(orchestrator._resolve_time_range("国庆节后那周下午开庭", fused_plan=fused))
+    empty = asyncio.run(orchestrator._resolve_time_range("国庆节后那周下午开庭", fused_plan=no_range))
+
+    assert resolved == {"date_from": "2026-03-02", "date_to": "2026-03-08"}
+    assert empty is None
+    assert calls == []
+
+
+def test_resolve_time_range_ignores_fused_dates_without_time_hint(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("src.core.orchestrator.parse_time_range", lambda _text: None)
+    orchestrator = AgentOrchestrator.__new__(AgentOrchestrator)
+
+    fused = FusedPlannerOutput.model_validate(_fused_payload())
+
+    assert asyncio.run(orchestrator._resolve_time_range("查所有案件", fused_plan=fused)) is None
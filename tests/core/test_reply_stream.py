@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import sys
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.core.reply_stream import chat_with_reply_stream, reply_stream_context  # noqa: E402
+from src.core.skills.chitchat import ChitchatSkill  # noqa: E402
+from src.core.types import SkillContext  # noqa: E402
+
+
+class _StreamingLLM:
+    def __init__(self, deltas: list[str]) -> None:
+        self.deltas = deltas
+        self.chat_calls = 0
+        self.stream_calls = 0
+
+    async def chat(self, messages, timeout=None):
+        self.chat_calls += 1
+        return "".join(self.deltas)
+
+    async def chat_stream(self, messages, timeout=None):
+        self.stream_calls += 1
+        for delta in self.deltas:
+            yield delta
+
+
+class _RecordingSink:
+    def __init__(self) -> None:
+        self.started = 0
+        self.deltas: list[str] = []
+
+    async def on_start(self) -> None:
+        self.started += 1
+
+    async def on_delta(self, delta: str) -> None:
+        self.deltas.append(delta)
+
+
+def test_chat_with_reply_stream_uses_plain_chat_without_sink() -> None:
+    llm = _StreamingLLM(["你", "好"])
+
+    text = asyncio.run(chat_with_reply_stream(llm, [{"role": "user", "content": "hi"}]))
+
+    assert text == "你好"
+    assert llm.chat_calls == 1
+    assert llm.stream_calls == 0
+
+
+def test_chat_with_reply_stream_pushes_deltas_to_sink() -> None:
+    llm = _StreamingLLM(["案件", "进展", "顺利"])
+    sink = _RecordingSink()
+
+    async def _run() -> str:
+        with reply_stream_context(sink):
+            return await chat_with_reply_stream(llm, [{"role": "user", "content": "hi"}], timeout=3)
+
+    text = asyncio.run(_run())
+
+    assert text == "案件进展顺利"
+    assert sink.started == 1
+    assert sink.deltas == ["案件", "进展", "顺利"]
+    assert llm.chat_calls == 0
+
+
+def test_chat_with_reply_stream_keeps_generating_when_sink_fails() -> None:
+    llm = _StreamingLLM(["a", "b", "c"])
+
+    class _BrokenSink(_RecordingSink):
+        async def on_delta(self, delta: str) -> None:
+            self.deltas.append(delta)
+            raise RuntimeError("boom")
+
+    sink = _BrokenSink()
+
+    async def _run() -> str:
+        with reply_stream_context(sink):
+            return await chat_with_reply_stream(llm, [])
+
+    assert asyncio.run(_run()) == "abc"
+    assert sink.deltas == ["a"]
+
+
+def test_chitchat_llm_reply_streams_through_context_sink() -> None:
+    llm = _StreamingLLM(["开庭", "前请", "准备材料"])
+    skill = ChitchatSkill(skills_config={"chitchat": {"allow_llm": True}}, llm_client=llm)
+    sink = _RecordingSink()
+
+    async def _run():
+        with reply_stream_context(sink):
+            return await skill.execute(SkillContext(query="案件开庭前要准备什么", user_id="u1"))
+
+    result = asyncio.run(_run())
+
+    assert result.reply_text == "开庭前请准备材料"
+    assert sink.deltas == ["开庭", "前请", "准备材料"]
@@ -34,3 +34,30 @@ def test_trim_context_to_token_budget_removes_oldest_messages() -> None:
     context = manager.get_context(user_id)
     assert removed == 2
     assert [item["content"] for item in context] == ["C" * 40, "D" * 40]
+
+
+def test_trim_uses_cached_token_counts_and_running_total(monkeypatch) -> None:
+    manager = SessionManager(SessionSettings(ttl_minutes=30, max_rounds=2, max_context_tokens=4000))
+    user_id = "u-token-cache"
+    for index in range(6):
+        manager.add_message(user_id, "user" if index % 2 == 0 else "assistant", str(index) * 40)
+
+    session = manager.get_or_create(user_id)
+    # max_rounds=2 只保留最近 4 条，累计值随之扣减
+    assert [item["content"][0] for item in session.messages] == ["2", "3", "4", "5"]
+    assert list(session.message_tokens) == [manager._estimate_message_tokens(item) for item in session.messages]
+    assert session.token_total == sum(session.message_tokens)
+
+    calls = {"count": 0}
+    original = manager._estimate_message_tokens
+
+    def _counting(message):
+        calls["count"] += 1
+        return original(message)
+
+    monkeypatch.setattr(manager, "_estimate_message_tokens", _counting)
+    removed = manager.trim_context_to_token_budget(user_id=user_id, max_tokens=35, keep_recent_messages=1)
+
+    assert removed == 2
+    assert calls["count"] == 0
+    assert session.token_total == sum(session.message_tokens) <= 35
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import sys
+from types import SimpleNamespace
+import types
+from typing import Any
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+# orchestrator imports Postgres client, which requires asyncpg at import time.
+sys.modules.setdefault("asyncpg", types.ModuleType("asyncpg"))
+
+import src.core.orchestrator as orchestrator_module  # noqa: E402
+from src.core.orchestrator import AgentOrchestrator  # noqa: E402
+from src.core.router.model_routing import RoutingDecision  # noqa: E402
+from src.llm.client import LLMClient  # noqa: E402
+from src.llm.usage_ledger import get_usage_ledger, llm_stage, usage_ledger_scope  # noqa: E402
+
+
+def _build_client() -> LLMClient:
+    client = LLMClient.__new__(LLMClient)
+    client._primary_model = "primary-model"
+    client._last_usage = None
+    return client
+
+
+def _response(model: str, prompt_tokens: int, completion_tokens: int) -> Any:
+    usage = SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+    )
+    return SimpleNamespace(usage=usage, model=model)
+
+
+def test_usage_ledger_isolates_concurrent_requests() -> None:
+    client = _build_client()
+
+    async def _request(tokens: int) -> dict[str, dict[str, int]]:
+        with usage_ledger_scope() as ledger:
+            with llm_stage("planner"):
+                client._capture_usage(_response("m", tokens, 1), 0.1, {})
+            await asyncio.sleep(0)
+
+            async def _child() -> None:
+                with llm_stage("time_range"):
+                    client._capture_usage(_response("m", tokens, 2), 0.05, {})
+
+            await asyncio.create_task(_child())
+            return ledger.by_stage()
+
+    async def _run() -> list[dict[str, dict[str, int]]]:
+        return list(await asyncio.gather(_request(100), _request(300)))
+
+    first, second = asyncio.run(_run())
+
+    assert first["planner"]["prompt_tokens"] == 100
+    assert first["time_range"]["completion_tokens"] == 2
+    assert second["planner"]["prompt_tokens"] == 300
+    assert second["time_range"]["calls"] == 1
+    assert client.consume_last_usage() is None
+    assert get_usage_ledger() is None
+
+
+def test_record_usage_log_sums_every_call_in_request_ledger() -> None:
+    records: list[Any] = []
+
+    class _DummyUsageLogger:
+        def log(self, record: Any) -> bool:
+            records.append(record)
+            return True
+
+    orchestrator = AgentOrchestrator.__new__(AgentOrchestrator)
+    orchestrator._usage_logger = _DummyUsageLogger()
+    orchestrator._usage_model_pricing = orchestrator_module.load_model_pricing(
+        model_pricing_json=(
+            '{"models":{"task-model":{"input_per_1k":1.0,"output_per_1k":1.0},'
+            '"chat-model":{"input_per_1k":2.0,"output_per_1k":2.0}}}'
+        )
+    )
+    orchestrator._drain_latest_llm_usage = lambda: None
+    orchestrator._llm = SimpleNamespace(model_name="chat-model")
+    route_decision = RoutingDecision(
+        model_selected="chat-model",
+        route_label="primary_default",
+        complexity="medium",
+        reason="default",
+        in_ab_bucket=False,
+        metadata={},
+    )
+    client = _build_client()
+
+    with usage_ledger_scope():
+        with llm_stage("planner"):
+            client._capture_usage(_response("task-model", 500, 500), 0.2, {})
+        with llm_stage("chitchat"):
+            client._capture_usage(_response("chat-model", 1000, 1000), 0.4, {})
+        orchestrator._record_usage_log("u1", "c1", "ChitchatSkill", "text", route_decision)
+
+    assert len(records) == 1
+    record = records[0]
+    assert record.token_count == 3000
+    assert record.prompt_tokens == 1500
+    assert round(record.cost, 6) == 5.0
+    assert record.estimated is False
+    assert record.model == "chat-model"
+    assert record.metadata["llm_calls"] == "2"
+    assert record.metadata["latency_ms"] == "600"
+    assert [stage["stage"] for stage in record.metadata["stages"]] == ["planner", "chitchat"]
+
+
+def test_empty_request_ledger_records_zero_usage_without_shared_slot() -> None:
+    records: list[Any] = []
+
+    class _DummyUsageLogger:
+        def log(self, record: Any) -> bool:
+            records.append(record)
+            return True
+
+    orchestrator = AgentOrchestrator.__new__(AgentOrchestrator)
+    orchestrator._usage_logger = _DummyUsageLogger()
+    orchestrator._usage_model_pricing = {}
+    orchestrator._drain_latest_llm_usage = lambda: {"model": "other", "token_count": 999, "ts": 1.0}
+    orchestrator._llm = SimpleNamespace(model_name="chat-model")
+    route_decision = RoutingDecision(
+        model_selected="chat-model",
+        route_label="primary_default",
+        complexity="medium",
+        reason="default",
+        in_ab_bucket=False,
+        metadata={},
+    )
+
+    with usage_ledger_scope():
+        orchestrator._record_usage_log("u1", "c1", "QuerySkill", "text", route_decision)
+
+    assert len(records) == 1
+    assert records[0].token_count == 0
+    assert records[0].cost == 0
+    assert records[0].model == "chat-model"
+    assert records[0].metadata["llm_calls"] == "0"
+
+
+class _FakeStream:
+    def __init__(self, chunks: list[Any]) -> None:
+        self._chunks = list(chunks)
+
+    def __aiter__(self) -> "_FakeStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        if not self._chunks:
+            raise StopAsyncIteration
+        return self._chunks.pop(0)
+
+
+def test_chat_stream_requests_and_records_final_chunk_usage() -> None:
+    from src.config import LLMSettings
+
+    requests: list[dict[str, Any]] = []
+
+    async def _create(**kwargs: Any) -> _FakeStream:
+        requests.append(kwargs)
+        delta = SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="你好"))], usage=None, model="m")
+        usage = SimpleNamespace(prompt_tokens=12, completion_tokens=3, total_tokens=15)
+        return _FakeStream([delta, SimpleNamespace(choices=[], usage=usage, model="m")])
+
+    client = LLMClient(LLMSettings(api_key="test-key"))
+    client._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_create)))
+
+    async def _run() -> tuple[list[str], list[Any]]:
+        with usage_ledger_scope() as ledger:
+            parts = [text async for text in client.chat_stream([{"role": "user", "content": "hi"}])]
+            return parts, ledger.entries()
+
+    parts, entries = asyncio.run(_run())
+
+    assert parts == ["你好"]
+    assert requests[0]["stream_options"] == {"include_usage": True}
+    assert [(entry.token_count, entry.estimated) for entry in entries] == [(15, False)]
@@ -155,6 +155,68 @@ def test_process_message_uses_group_user_scoped_key(monkeypatch) -> None:
     assert len(sent_calls) == 1
 
 
+def test_process_message_finalizes_stream_card_when_handler_raises_mid_stream(monkeypatch) -> None:
+    import src.adapters.channels.feishu.reply_stream as reply_stream_module
+
+    sent_calls: list[dict[str, object]] = []
+    updates: list[dict[str, object]] = []
+
+    async def _fake_send_message(settings, chat_id, msg_type, content, reply_message_id=None):
+        sent_calls.append({"chat_id": chat_id, "msg_type": msg_type, "content": content})
+        return {"message_id": "stream-card-1"}
+
+    async def _fake_update_message(settings, message_id, msg_type, content):
+        updates.append({"message_id": message_id, "content": content})
+
+    class _FailingAgentCore:
+        async def handle_message(self, user_id, text, **kwargs):
+            sink = kwargs["stream_sink"]
+            await sink.on_delta("半截回复")
+            await asyncio.sleep(0.01)
+            raise RuntimeError("上游中断")
+
+    class _FakeUserManager:
+        async def get_or_create_profile(self, **_kwargs):
+            return SimpleNamespace(name="张三")
+
+    class _AlwaysProcessAssembler:
+        async def ingest(self, **_kwargs):
+            return SimpleNamespace(should_process=True, text="查一下案件", reason="fast_path")
+
+    settings = SimpleNamespace(
+        reply=SimpleNamespace(
+            card_enabled=True,
+            stream_enabled=True,
+            stream_update_interval_ms=0,
+            templates=SimpleNamespace(error="处理失败：{message}"),
+        )
+    )
+    monkeypatch.setattr(webhook_module, "_get_settings", lambda: settings)
+    monkeypatch.setattr(webhook_module, "_get_agent_core", lambda: _FailingAgentCore())
+    monkeypatch.setattr(webhook_module, "_get_user_manager", lambda: _FakeUserManager())
+    monkeypatch.setattr(webhook_module, "_get_chunk_assembler", lambda: _AlwaysProcessAssembler())
+    monkeypatch.setattr(webhook_module, "send_message", _fake_send_message)
+    monkeypatch.setattr(reply_stream_module, "send_message", _fake_send_message)
+    monkeypatch.setattr(reply_stream_module, "update_message", _fake_update_message)
+
+    message = {
+        "chat_id": "oc_stream_fail",
+        "chat_type": "p2p",
+        "message_id": "msg_stream_fail",
+        "content": json.dumps({"text": "查一下案件"}, ensure_ascii=False),
+    }
+    sender = {"sender_id": {"open_id": "ou_test_user"}}
+
+    ok = asyncio.run(webhook_module._process_message(message, sender))
+
+    assert ok is False
+    assert len(sent_calls) == 1
+    assert "半截回复" in json.dumps(sent_calls[0]["content"], ensure_ascii=False)
+    assert updates
+    assert updates[-1]["message_id"] == "stream-card-1"
+    assert "处理失败：上游中断" in json.dumps(updates[-1]["content"], ensure_ascii=False)
+
+
 def test_process_file_message_falls_back_to_guidance_when_unavailable(monkeypatch) -> None:
     sent_calls: list[dict[str, object]] = []
     agent_called = {"value": False}
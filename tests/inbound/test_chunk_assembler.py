@@ -115,9 +115,8 @@ def test_chunk_assembler_flushes_orphan_chunks_on_session_expire() -> None:
     first = asyncio.run(assembler.ingest(scope_key=session_key, text="帮我查", now=now))
     assert first.should_process is False
 
-    # 手动将会话标记为过期，触发 cleanup 回调
-    session_manager._sessions[session_key].last_active = session_manager._sessions[session_key].last_active.replace(year=2000)
-    session_manager.cleanup_expired()
+    # 将清理时钟推进到 TTL 之后，触发 cleanup 回调
+    session_manager.cleanup_expired(now=now + 61)
 
     assert flushed_texts == ["帮我查"]
 
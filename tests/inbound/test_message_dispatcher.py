@@ -0,0 +1,167 @@
+import asyncio
+from pathlib import Path
+import sys
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.api.conversation_scope import resolve_sender_user_id
+from src.api.message_dispatcher import (
+    SHED_BACKLOG_FULL,
+    SHED_SESSION_QUEUE_FULL,
+    MessageDispatcher,
+    MessageDispatcherConfig,
+)
+
+
+def test_dispatcher_keeps_per_session_order_and_interleaves_sessions() -> None:
+    dispatcher = MessageDispatcher(MessageDispatcherConfig(max_workers=4))
+    events: list[str] = []
+    active: dict[str, int] = {}
+    overlaps: list[str] = []
+
+    def _job(key: str, index: int):
+        async def _run() -> None:
+            active[key] = active.get(key, 0) + 1
+            if active[key] > 1:
+                overlaps.append(key)
+            events.append(f"{key}:start:{index}")
+            await asyncio.sleep(0.01 * (3 - index))
+            events.append(f"{key}:end:{index}")
+            active[key] -= 1
+
+        return _run
+
+    async def _main() -> None:
+        for index in range(3):
+            assert dispatcher.submit("u1", _job("u1", index))
+            assert dispatcher.submit("u2", _job("u2", index))
+        await dispatcher.join()
+        await dispatcher.aclose()
+
+    asyncio.run(_main())
+
+    assert overlaps == []
+    for key in ("u1", "u2"):
+        own = [item for item in events if item.startswith(f"{key}:")]
+        assert own == [f"{key}:{phase}:{index}" for index in range(3) for phase in ("start", "end")]
+    # 不同会话并行：u2 的首条不必等 u1 全部完成
+    assert events.index("u2:start:0") < events.index("u1:end:0")
+
+
+def test_dispatcher_caps_global_concurrency() -> None:
+    dispatcher = MessageDispatcher(MessageDispatcherConfig(max_workers=2))
+    state = {"inflight": 0, "peak": 0}
+
+    async def _job() -> None:
+        state["inflight"] += 1
+        state["peak"] = max(state["peak"], state["inflight"])
+        await asyncio.sleep(0.01)
+        state["inflight"] -= 1
+
+    async def _main() -> None:
+        for index in range(10):
+            dispatcher.submit(f"u{index}", _job)
+        await dispatcher.join()
+        await dispatcher.aclose()
+
+    asyncio.run(_main())
+
+    assert state["peak"] == 2
+
+
+def test_dispatcher_sheds_with_busy_callback() -> None:
+    dispatcher = MessageDispatcher(MessageDispatcherConfig(max_workers=1, max_backlog=3, max_queue_per_session=2))
+    shed: list[str] = []
+    processed: list[str] = []
+
+    async def _main() -> None:
+        release = asyncio.Event()
+
+        async def _blocker() -> None:
+            await release.wait()
+
+        def _job(name: str):
+            async def _run() -> None:
+                processed.append(name)
+
+            return _run
+
+        async def _on_shed(reason: str) -> None:
+            shed.append(reason)
+
+        assert dispatcher.submit("u0", _blocker)
+        await asyncio.sleep(0)  # 让 worker 取走 u0，占满唯一的 worker
+        assert dispatcher.submit("u1", _job("a"), on_shed=_on_shed)
+        assert dispatcher.submit("u1", _job("b"), on_shed=_on_shed)
+        assert not dispatcher.submit("u1", _job("c"), on_shed=_on_shed)
+        assert dispatcher.submit("u2", _job("d"), on_shed=_on_shed)
+        assert not dispatcher.submit("u3", _job("e"), on_shed=_on_shed)
+        assert dispatcher.backlog == 3
+        release.set()
+        await dispatcher.join()
+        await dispatcher.aclose()
+
+    asyncio.run(_main())
+
+    assert shed == [SHED_SESSION_QUEUE_FULL, SHED_BACKLOG_FULL]
+    assert processed == ["a", "d", "b"]
+
+
+def test_dispatcher_aclose_drains_queued_messages_within_timeout() -> None:
+    dispatcher = MessageDispatcher(MessageDispatcherConfig(max_workers=1, shutdown_drain_seconds=1.0))
+    processed: list[str] = []
+
+    def _job(name: str, delay: float):
+        async def _run() -> None:
+            await asyncio.sleep(delay)
+            processed.append(name)
+
+        return _run
+
+    async def _main() -> None:
+        for name in ("a", "b", "c"):
+            assert dispatcher.submit("u1", _job(name, 0.01))
+        await dispatcher.aclose()
+        assert processed == ["a", "b", "c"]
+
+        assert dispatcher.submit("u1", _job("stuck", 10))
+        await dispatcher.aclose(drain_timeout_seconds=0.05)
+        assert dispatcher.backlog == 0 and dispatcher.inflight == 0
+
+    asyncio.run(_main())
+    assert "stuck" not in processed
+
+
+def test_dispatcher_survives_failing_job_and_disabled_mode_runs_directly() -> None:
+    dispatcher = MessageDispatcher(MessageDispatcherConfig(max_workers=1))
+    disabled = MessageDispatcher(MessageDispatcherConfig(enabled=False, max_backlog=1))
+    processed: list[str] = []
+
+    async def _boom() -> None:
+        raise RuntimeError("boom")
+
+    async def _ok() -> None:
+        processed.append("ok")
+
+    async def _main() -> None:
+        dispatcher.submit("u1", _boom)
+        dispatcher.submit("u1", _ok)
+        await dispatcher.join()
+        await dispatcher.aclose()
+        assert disabled.submit("u1", _ok) and disabled.submit("u1", _ok)
+        await asyncio.sleep(0)
+
+    asyncio.run(_main())
+
+    assert processed == ["ok", "ok", "ok"]
+
+
+def test_resolve_sender_user_id_fallback_chain() -> None:
+    assert resolve_sender_user_id("ou_1", "u_1", "oc_1", "om_1") == "ou_1"
+    assert resolve_sender_user_id("", "u_1", "oc_1", "om_1") == "user:u_1"
+    assert resolve_sender_user_id(None, None, "oc_1", "om_1") == "chat:oc_1:msg:om_1"
+    assert resolve_sender_user_id(None, None, "oc_1", None) == "chat:oc_1:anon"
+    assert resolve_sender_user_id(None, None, None, None) == "unknown"
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import sys
+import time
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.config import SessionSettings  # noqa: E402
+import src.core.session as session_module  # noqa: E402
+from src.core.router.router import ContextManager  # noqa: E402
+from src.core.session import SessionManager  # noqa: E402
+from src.core.state import MemoryStateStore  # noqa: E402
+from src.core.state.models import ConversationState  # noqa: E402
+from src.core.types import SkillContext  # noqa: E402
+from src.utils.expiry import ExpiryIndex, ExpirySweeper  # noqa: E402
+
+
+def test_index_pops_only_due_keys_and_follows_renewals() -> None:
+    index = ExpiryIndex()
+    index.touch("a", 10.0)
+    index.touch("b", 20.0)
+    index.touch("c", 30.0)
+    index.touch("a", 25.0)  # 续期：堆中旧项在弹出时按新截止时间重新入堆
+    index.touch("c", 5.0)  # 提前：立即入堆
+    index.discard("b")
+
+    assert index.pop_expired(9.0) == ["c"]
+    assert index.pop_expired(24.0) == []
+    assert len(index) == 1 and "a" in index
+    assert index.pop_expired(25.0) == ["a"]
+    assert len(index) == 0 and index.pop_expired(1_000.0) == []
+
+
+def test_index_compacts_stale_entries() -> None:
+    index = ExpiryIndex()
+    for step in range(5_000):
+        index.touch("hot", 10_000.0 - step)
+
+    assert len(index._heap) <= 2 * len(index) + 1024
+    assert index.pop_expired(10_000.0) == ["hot"]
+
+
+def test_session_cleanup_fires_listeners_for_due_sessions_only(monkeypatch) -> None:
+    class _Clock(datetime):
+        current = datetime(2024, 6, 15, 9, 0, tzinfo=timezone.utc)
+
+        @classmethod
+        def now(cls, tz=None):  # type: ignore[override]
+            return cls.current
+
+    monkeypatch.setattr(session_module, "datetime", _Clock)
+    manager = SessionManager(SessionSettings(ttl_minutes=1))
+    expired: list[str] = []
+    manager.register_expire_listener(expired.append)
+    start = _Clock.current.timestamp()
+    manager.add_message("u_idle", "user", "hi")
+    _Clock.current += timedelta(seconds=30)
+    manager.add_message("u_active", "user", "hi")
+
+    assert manager.cleanup_expired(now=start + 30) == 0
+    assert manager.cleanup_expired(now=start + 61) == 1
+    assert expired == ["u_idle"]
+    assert manager.active_count() == 1
+
+
+def test_expired_session_is_replaced_on_next_access() -> None:
+    manager = SessionManager(SessionSettings(ttl_minutes=1))
+    expired: list[str] = []
+    manager.register_expire_listener(expired.append)
+    manager.add_message("u1", "user", "old")
+    session = manager._sessions["u1"]
+    session.last_active = session.last_active.replace(year=2000)
+
+    assert manager.get_context("u1") == []
+    assert expired == ["u1"]
+
+
+def test_context_manager_expires_by_index() -> None:
+    manager = ContextManager(ttl_minutes=1)
+    manager.set("u1", SkillContext(query="q", user_id="u1"))
+    manager.set("u2", SkillContext(query="q", user_id="u2"))
+    manager.clear("u2")
+
+    assert manager.cleanup_expired(now=time.time() + 30) == 0
+    assert manager.cleanup_expired(now=time.time() + 61) == 1
+    assert manager.get("u1") is None
+    assert manager.active_count() == 0
+
+
+def test_memory_store_rechecks_in_place_renewal() -> None:
+    store = MemoryStateStore()
+    now = time.time()
+    renewed = ConversationState(user_id="u1", created_at=now, updated_at=now, expires_at=now + 10)
+    store.set("u1", renewed)
+    store.set("u2", ConversationState(user_id="u2", created_at=now, updated_at=now, expires_at=now + 10))
+    renewed.expires_at = now + 100  # 原地续期，未回写 store
+
+    assert store.cleanup_expired(now=now + 20) == 1
+    assert store.list_session_keys() == ["u1"]
+    assert store.cleanup_expired(now=now + 100) == 1
+    assert store.active_count() == 0
+
+
+def test_sweeper_runs_in_background_thread_without_event_loop() -> None:
+    calls: list[float] = []
+
+    def _sweep() -> None:
+        calls.append(time.time())
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    sweeper = ExpirySweeper(_sweep, interval_seconds=0.01)
+    sweeper.start()
+    deadline = time.time() + 2
+    while len(calls) < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    sweeper.stop()
+
+    assert len(calls) >= 3
+    assert sweeper.running is False
+
+
+def test_sweeper_awaits_coroutine_sweep_on_the_event_loop() -> None:
+    swept: list[int] = []
+
+    async def _sweep() -> None:
+        await asyncio.sleep(0)
+        swept.append(1)
+
+    async def _run() -> None:
+        sweeper = ExpirySweeper(_sweep, interval_seconds=0.01)
+        sweeper.start()
+        for _ in range(200):
+            if len(swept) >= 2:
+                break
+            await asyncio.sleep(0.01)
+        sweeper.stop()
+
+    asyncio.run(_run())
+    assert len(swept) >= 2
+
+    ExpirySweeper(_sweep).sweep_once()
+    assert len(swept) >= 3
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+import sys
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.utils import time_parser  # noqa: E402
+from src.utils.time_parser import parse_time_range, parse_time_ranges  # noqa: E402
+
+
+def test_cache_is_keyed_by_today_and_results_are_copies() -> None:
+    first = parse_time_range("明天下午开庭", today=date(2024, 6, 15))
+    assert first is not None
+    assert (first.date_from, first.time_from, first.time_to) == ("2024-06-16", "13:00", "17:59")
+
+    first.date_from = "mutated"
+    again = parse_time_range("明天下午开庭", today=date(2024, 6, 15))
+    assert again is not None and again.date_from == "2024-06-16"
+
+    next_day = parse_time_range("明天下午开庭", today=date(2024, 6, 16))
+    assert next_day is not None and next_day.date_from == "2024-06-17"
+
+
+def test_cache_rolls_over_at_local_midnight(monkeypatch) -> None:
+    class _Clock(date):
+        current = date(2024, 6, 15)
+
+        @classmethod
+        def today(cls) -> date:
+            return cls.current
+
+    monkeypatch.setattr(time_parser, "date", _Clock)
+    parse_time_range("本周开庭")
+    assert time_parser._parse_cached.cache_info().currsize >= 1
+
+    _Clock.current = date(2024, 6, 17)
+    rolled = parse_time_range("本周开庭")
+
+    assert rolled is not None and rolled.date_from == "2024-06-17"
+    assert time_parser._parse_cached.cache_info().currsize == 1
+
+
+def test_batch_parse_matches_single_calls() -> None:
+    today = date(2024, 6, 15)
+    texts = ["本周开庭", "查所有案件", "3月5日到3月8日", "本周开庭", "", "下周三上午10点"]
+
+    batch = parse_time_ranges(texts, today=today)
+
+    assert batch == [parse_time_range(text, today=today) for text in texts]
+    assert batch[1] is None and batch[4] is None
+    assert batch[0] is not batch[3]
+    assert batch[2] is not None and (batch[2].date_from, batch[2].date_to) == ("2024-03-05", "2024-03-08")
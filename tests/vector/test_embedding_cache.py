@@ -0,0 +1,92 @@
+import asyncio
+from pathlib import Path
+import sqlite3
+import sys
+from typing import Any
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.vector.embedding import EmbeddingClient
+from src.vector.embedding_cache import EmbeddingCache, SQLiteEmbeddingStore
+
+
+def _client(cache: EmbeddingCache | None, **overrides: Any) -> tuple[EmbeddingClient, list[list[str]]]:
+    config = {
+        "provider": "siliconflow",
+        "api_base": "https://example.invalid/v1",
+        "api_key": "k",
+        "model": "bge-small",
+        "cache": {"enabled": False},
+    }
+    config.update(overrides)
+    client = EmbeddingClient(config, cache=cache)
+    calls: list[list[str]] = []
+
+    async def _fake_request(texts: list[str]) -> list[list[float]]:
+        calls.append(list(texts))
+        return [[float(len(text)), 0.5, -1.0] for text in texts]
+
+    client._request_embeddings = _fake_request  # type: ignore[method-assign]
+    return client, calls
+
+
+def test_only_cache_misses_reach_provider_and_order_is_kept() -> None:
+    client, calls = _client(EmbeddingCache(max_entries=16))
+
+    first = asyncio.run(client.embed_texts(["a", "bb", "a"]))
+    second = asyncio.run(client.embed_texts(["bb", "ccc", "a"]))
+
+    assert first == [[1.0, 0.5, -1.0], [2.0, 0.5, -1.0], [1.0, 0.5, -1.0]]
+    assert second == [[2.0, 0.5, -1.0], [3.0, 0.5, -1.0], [1.0, 0.5, -1.0]]
+    assert calls == [["a", "bb"], ["ccc"]]
+    assert client.cache is not None
+    assert (client.cache.hits, client.cache.misses) == (2, 3)
+
+
+def test_cache_is_scoped_by_model_and_dimensions() -> None:
+    cache = EmbeddingCache(max_entries=16)
+    small, small_calls = _client(cache, model="bge-small")
+    large, large_calls = _client(cache, model="bge-large")
+    reduced, reduced_calls = _client(cache, model="bge-small", dimensions=256)
+
+    for client in (small, large, reduced, small):
+        asyncio.run(client.embed_texts(["同一段文本"]))
+
+    assert small_calls == [["同一段文本"]]
+    assert large_calls == [["同一段文本"]]
+    assert reduced_calls == [["同一段文本"]]
+
+
+def test_sqlite_backing_survives_restart(tmp_path: Path) -> None:
+    db_path = tmp_path / "embedding_cache.sqlite3"
+    warm, warm_calls = _client(EmbeddingCache(store=SQLiteEmbeddingStore(db_path)))
+    asyncio.run(warm.embed_texts(["记忆一", "记忆二"]))
+
+    cold, cold_calls = _client(EmbeddingCache(store=SQLiteEmbeddingStore(db_path)))
+    vectors = asyncio.run(cold.embed_texts(["记忆二", "记忆三"]))
+
+    assert warm_calls == [["记忆一", "记忆二"]]
+    assert cold_calls == [["记忆三"]]
+    assert vectors == [[3.0, 0.5, -1.0], [3.0, 0.5, -1.0]]
+
+
+def test_sqlite_read_failure_falls_back_to_provider(tmp_path: Path) -> None:
+    store = SQLiteEmbeddingStore(tmp_path / "embedding_cache.sqlite3")
+
+    def _broken_get_many(scope: str, digests: list[str]) -> dict[str, Any]:
+        raise sqlite3.OperationalError("database is locked")
+
+    store.get_many = _broken_get_many  # type: ignore[method-assign]
+    client, calls = _client(EmbeddingCache(store=store))
+
+    assert asyncio.run(client.embed_texts(["记忆一"])) == [[3.0, 0.5, -1.0]]
+    assert calls == [["记忆一"]]
+
+
+def test_cache_from_config() -> None:
+    assert EmbeddingCache.from_config({"enabled": "false"}) is None
+    cache = EmbeddingCache.from_config({"enabled": True, "max_entries": 8, "sqlite_path": ""})
+    assert cache is not None and not cache.persistent
@@ -0,0 +1,109 @@
+import asyncio
+from pathlib import Path
+import sys
+
+import numpy as np
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.vector.backend import create_vector_store
+from src.vector.memory import VectorMemoryManager
+from src.vector.numpy_store import NumpyVectorStore
+
+
+def _add(store: NumpyVectorStore, user_id: str, vectors: dict[str, list[float]], **metadata) -> None:
+    ids = list(vectors)
+    store.upsert_documents(
+        user_id=user_id,
+        documents=[f"doc-{doc_id}" for doc_id in ids],
+        embeddings=[vectors[doc_id] for doc_id in ids],
+        metadatas=[dict(metadata) for _ in ids],
+        ids=ids,
+    )
+
+
+def test_query_returns_cosine_top_k_in_order(tmp_path: Path) -> None:
+    store = NumpyVectorStore(tmp_path)
+    _add(store, "u1", {"a": [1.0, 0.0], "b": [0.0, 3.0], "c": [2.0, 2.0]})
+    _add(store, "u2", {"z": [1.0, 0.0]})
+
+    assert store.query("u1", [1.0, 0.1], top_k=2) == ["doc-a", "doc-c"]
+    assert store.query("u1", [0.0, 1.0], top_k=10) == ["doc-b", "doc-c", "doc-a"]
+    assert store.query("u2", [0.0, 1.0], top_k=5) == ["doc-z"]
+    assert store.query("nobody", [1.0, 0.0], top_k=5) == []
+
+
+def test_matches_exact_brute_force(tmp_path: Path) -> None:
+    rng = np.random.default_rng(7)
+    matrix = rng.normal(size=(300, 16))
+    store = NumpyVectorStore(tmp_path, initial_capacity=8)
+    _add(store, "u1", {str(i): row.tolist() for i, row in enumerate(matrix)})
+
+    query = rng.normal(size=16)
+    normalized = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+    expected = [str(i) for i in np.argsort(-(normalized @ query))[:10]]
+    assert [doc_id for doc_id, _ in store.search_ids("u1", query.tolist(), top_k=10)] == expected
+
+
+def test_upsert_overwrites_row_and_filters_metadata(tmp_path: Path) -> None:
+    store = NumpyVectorStore(tmp_path)
+    _add(store, "u1", {"a": [1.0, 0.0]}, kind="note")
+    _add(store, "u1", {"b": [0.9, 0.1]}, kind="todo")
+    _add(store, "u1", {"a": [0.0, 1.0]}, kind="note")
+
+    assert store.count("u1") == 2
+    assert store.query("u1", [1.0, 0.0], top_k=1) == ["doc-b"]
+    assert store.query("u1", [1.0, 0.0], top_k=5, where={"kind": "note"}) == ["doc-a"]
+    assert store.query("u1", [1.0, 0.0], top_k=5, where={"kind": {"$in": ["todo"]}}) == ["doc-b"]
+    assert store.query("u1", [1.0, 0.0], top_k=5, where={"kind": "missing"}) == []
+
+
+def test_index_persists_across_instances_and_grows(tmp_path: Path) -> None:
+    store = NumpyVectorStore(tmp_path, initial_capacity=2)
+    for i in range(5):
+        _add(store, "user:1", {f"d{i}": [float(i), 1.0]})
+    _add(store, "user:1", {"d0": [-1.0, 0.0]})
+
+    reopened = NumpyVectorStore(tmp_path)
+    assert reopened.count("user:1") == 5
+    assert reopened.query("user:1", [-1.0, 0.0], top_k=1) == ["doc-d0"]
+    assert reopened.query("user:1", [1.0, 0.0], top_k=1) == ["doc-d4"]
+
+
+def test_docs_log_is_compacted_after_repeated_upserts(tmp_path: Path) -> None:
+    store = NumpyVectorStore(tmp_path)
+    for i in range(600):
+        _add(store, "u1", {"same": [1.0, float(i)], "other": [0.0, 1.0]})
+
+    (docs_path,) = tmp_path.glob("*/docs.jsonl")
+    assert len(docs_path.read_text(encoding="utf-8").splitlines()) <= 2 + 2 * 256
+
+    reopened = NumpyVectorStore(tmp_path)
+    assert reopened.count("u1") == 2
+    assert reopened.search_ids("u1", [1.0, 599.0], top_k=1)[0][0] == "same"
+
+
+def test_create_vector_store_selects_backend(tmp_path: Path) -> None:
+    store = create_vector_store({"vector_store": {"type": "numpy"}, "numpy": {"persist_path": str(tmp_path)}})
+    assert isinstance(store, NumpyVectorStore)
+    assert create_vector_store({"vector_store": {"type": "faiss"}}) is None
+
+
+class _FakeEmbedder:
+    async def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        return [[1.0, float(len(text))] for text in texts]
+
+
+def test_vector_memory_manager_writes_and_searches_numpy_store(tmp_path: Path) -> None:
+    async def scenario() -> list[str]:
+        manager = VectorMemoryManager(store=NumpyVectorStore(tmp_path), embedder=_FakeEmbedder())
+        await manager.add_memory("u1", "短", {"source": "chat"})
+        await manager.add_memory("u1", "更长一点的记忆", {"source": "file"})
+        filtered = await manager.search("u1", "短", top_k=5, where={"source": "file"})
+        await manager.aclose()
+        return filtered
+
+    assert asyncio.run(scenario()) == ["更长一点的记忆"]
@@ -0,0 +1,106 @@
+import asyncio
+from pathlib import Path
+import sys
+from typing import Any
+
+
+ROOT = Path(__file__).resolve().parents[2]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.core.memory import MemoryManager
+from src.vector.memory import VectorMemoryManager
+
+
+class _FakeEmbedder:
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    async def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+class _FakeStore:
+    is_available = True
+
+    def __init__(self) -> None:
+        self.upserts: list[tuple[str, list[str], list[str]]] = []
+
+    def upsert_documents(self, user_id: str, documents, embeddings, metadatas, ids) -> None:
+        assert len(documents) == len(embeddings) == len(metadatas) == len(ids)
+        self.upserts.append((user_id, list(documents), list(ids)))
+
+    def query(self, user_id: str, embedding: list[float], top_k: int) -> list[str]:
+        return [doc for uid, docs, _ in self.upserts if uid == user_id for doc in docs][:top_k]
+
+
+def _manager(**kwargs: Any) -> tuple[VectorMemoryManager, _FakeStore, _FakeEmbedder]:
+    store, embedder = _FakeStore(), _FakeEmbedder()
+    return VectorMemoryManager(store=store, embedder=embedder, **kwargs), store, embedder
+
+
+def test_size_threshold_flushes_one_batch_per_user() -> None:
+    manager, store, embedder = _manager(write_batch_size=3, flush_interval_seconds=60)
+
+    async def _main() -> None:
+        for index in range(3):
+            manager.enqueue("u1", f"记忆{index}", {"type": "auto"})
+        manager.enqueue("u2", "另一个用户", {"type": "auto"})
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert store.upserts == [("u1", ["记忆0", "记忆1", "记忆2"], store.upserts[0][2])]
+        assert manager.buffered == 1
+        await manager.aclose()
+
+    asyncio.run(_main())
+
+    assert embedder.calls == [["记忆0", "记忆1", "记忆2"], ["另一个用户"]]
+    assert [item[0] for item in store.upserts] == ["u1", "u2"]
+    assert manager.buffered == 0
+
+
+def test_time_threshold_flush_and_batch_dedup() -> None:
+    manager, store, embedder = _manager(write_batch_size=100, flush_interval_seconds=0.01)
+
+    async def _main() -> None:
+        manager.enqueue("u1", "偏好：简洁", {"n": 1})
+        manager.enqueue("u1", "偏好：简洁", {"n": 2})
+        manager.enqueue("u1", "查过张三的案子", {"n": 3})
+        await asyncio.sleep(0.05)
+
+    asyncio.run(_main())
+
+    assert embedder.calls == [["偏好：简洁", "查过张三的案子"]]
+    assert len(store.upserts) == 1
+
+
+def test_search_flushes_pending_writes_first() -> None:
+    manager, store, _ = _manager(write_batch_size=100, flush_interval_seconds=60)
+
+    async def _main() -> list[str]:
+        manager.enqueue("u1", "喜欢表格回复", {})
+        hits = await manager.search("u1", "回复格式")
+        await manager.aclose()
+        return hits
+
+    assert asyncio.run(_main()) == ["喜欢表格回复"]
+
+
+def test_memory_manager_buffers_inside_loop_and_writes_inline_without_loop(tmp_path: Path) -> None:
+    vector, store, embedder = _manager(write_batch_size=100, flush_interval_seconds=60)
+    memory = MemoryManager(workspace_root=tmp_path, vector_memory=vector)
+
+    memory.remember_user("u1", "同步调用直接落库")
+    assert store.upserts[-1][1] == ["同步调用直接落库"]
+
+    async def _main() -> None:
+        memory.append_daily_log("u1", "用户: 第一句", vectorize=True)
+        memory.append_daily_log("u1", "用户: 第二句", vectorize=True)
+        assert vector.buffered == 2
+        await memory.aclose()
+
+    asyncio.run(_main())
+
+    assert embedder.calls[-1] == ["用户: 第一句", "用户: 第二句"]
+    assert vector.buffered == 0
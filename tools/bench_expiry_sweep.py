@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, timezone
+import json
+from pathlib import Path
+import sys
+import time
+from typing import Callable
+
+
+ROOT = Path(__file__).resolve().parents[1]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.config import SessionSettings  # noqa: E402
+from src.core.router.router import ContextManager  # noqa: E402
+from src.core.session import SessionManager  # noqa: E402
+from src.core.state import ConversationStateManager, MemoryStateStore  # noqa: E402
+from src.core.types import SkillContext  # noqa: E402
+
+
+def _seed(users: int) -> tuple[SessionManager, ContextManager, ConversationStateManager]:
+    sessions = SessionManager(SessionSettings(ttl_minutes=30))
+    contexts = ContextManager(ttl_minutes=30)
+    states = ConversationStateManager(store=MemoryStateStore())
+    for index in range(users):
+        user_id = f"idle_{index}"
+        sessions.add_message(user_id, "user", "hi")
+        contexts.set(user_id, SkillContext(query="hi", user_id=user_id))
+        states.get_state(user_id)
+    return sessions, contexts, states
+
+
+def _full_scan(sessions: SessionManager, contexts: ContextManager, states: ConversationStateManager) -> None:
+    """改造前每条消息执行的三次全量扫描（只比较、不删除）。"""
+    ttl = timedelta(minutes=30)
+    now_dt = datetime.now(timezone.utc)
+    [uid for uid, session in sessions._sessions.items() if now_dt - session.last_active > ttl]
+    now = time.time()
+    [uid for uid in contexts._contexts if now > (contexts._expiry.deadline(uid) or now)]
+    store = states._store
+    with store._lock:
+        [uid for uid, state in store._states.items() if state.is_expired(now)]
+
+
+def _timed(fn: Callable[[], object], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1_000_000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare per-message full expiry scans with the indexed sweep")
+    parser.add_argument("--idle-users", type=int, default=50_000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    sessions, contexts, states = _seed(args.idle_users)
+
+    def _indexed() -> None:
+        sessions.cleanup_expired()
+        contexts.cleanup_expired()
+        states.cleanup_expired()
+
+    def _active_count() -> None:
+        max(contexts.active_count(), states.active_count())
+
+    full_scan_us = _timed(lambda: _full_scan(sessions, contexts, states), args.rounds)
+    indexed_us = _timed(_indexed, args.rounds)
+
+    # 全部过期后的一次清扫：每个 key 只被弹出一次
+    horizon = time.time() + 31 * 60
+    start = time.perf_counter()
+    removed = {
+        "sessions": sessions.cleanup_expired(now=horizon),
+        "contexts": contexts.cleanup_expired(now=horizon),
+        "states": states._store.cleanup_expired(now=horizon + 24 * 3600),
+    }
+    drain_ms = (time.perf_counter() - start) * 1000
+    print(
+        json.dumps(
+            {
+                "idle_users": args.idle_users,
+                "full_scan_per_message_us": round(full_scan_us, 1),
+                "indexed_sweep_idle_us": round(indexed_us, 2),
+                "active_count_us": round(_timed(_active_count, args.rounds * 100), 3),
+                "drain_all_expired_ms": round(drain_ms, 1),
+                "removed": removed,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
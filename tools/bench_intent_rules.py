@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from pathlib import Path
+import re
+import sys
+import time
+from typing import Any, Callable
+
+import yaml
+
+
+ROOT = Path(__file__).resolve().parents[1]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+DEFAULT_SKILLS_CONFIG = AGENT_HOST_ROOT / "config" / "skills.yaml"
+DEFAULT_SCENARIOS = ROOT / "docs" / "scenarios" / "scenarios.yaml"
+
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.core.intent.parser import IntentParser, load_skills_config  # noqa: E402
+
+_PLACEHOLDER_RE = re.compile(r"\$\{([^{}]+)\}")
+_CREATE_BOOST_WORDS = ["新增", "新建", "创建", "添加", "录入"]
+
+
+def _corpus(scenarios_path: Path) -> list[str]:
+    payload = yaml.safe_load(scenarios_path.read_text(encoding="utf-8")) or {}
+    variables = {str(k): str(v) for k, v in (payload.get("variables") or {}).items()}
+    texts: list[str] = []
+    for scenario in payload.get("scenarios") or []:
+        for turn in scenario.get("dialogue") or []:
+            if turn.get("role") != "user":
+                continue
+            text = _PLACEHOLDER_RE.sub(lambda m: variables.get(m.group(1), m.group(0)), str(turn.get("text") or ""))
+            if text.strip():
+                texts.append(text.strip())
+    return texts
+
+
+def _baseline(parser: IntentParser, query: str) -> tuple[bool, list[tuple[str, float, str]]]:
+    """逐关键词 `in` 扫描的旧实现，作为对照组。"""
+    is_chain = False
+    for trigger in (parser._config.get("chain", {}) or {}).get("triggers", []) or []:
+        pattern = trigger.get("pattern")
+        if pattern and re.search(pattern, query):
+            is_chain = True
+    for chain_cfg in parser._chains.values():
+        if any(trigger in query for trigger in chain_cfg.get("trigger_keywords", []) or []):
+            is_chain = True
+
+    query_lower = query.lower()
+    matches: list[tuple[str, float, str]] = []
+    for skill_key, skill_cfg in parser._skills.items():
+        keywords = skill_cfg.get("keywords", [])
+        if not keywords:
+            continue
+        hit_keywords = [kw for kw in keywords if kw in query or kw.lower() in query_lower]
+        time_hits = [kw for kw in skill_cfg.get("time_keywords", []) if kw in query or kw.lower() in query_lower]
+        if not hit_keywords:
+            continue
+        score = min(0.6 + min((len(hit_keywords) - 1) * 0.1, 0.3) + (0.1 if time_hits else 0.0), 1.0)
+        if skill_key == "reminder" and "提醒" in query:
+            score = min(score + 0.15, 1.0)
+        if skill_key == "create" and any(kw in query for kw in _CREATE_BOOST_WORDS):
+            score = min(score + 0.2, 1.0)
+        reason = f"命中关键词: {', '.join(hit_keywords[:3])}"
+        if len(hit_keywords) > 3:
+            reason += f" 等{len(hit_keywords)}个"
+        if time_hits:
+            reason += f"，时间: {', '.join(time_hits[:2])}"
+        matches.append((skill_cfg.get("name", skill_key), score, reason))
+    matches.sort(key=lambda x: x[1], reverse=True)
+    return is_chain, matches
+
+
+def _automaton(parser: IntentParser, query: str) -> tuple[bool, list[tuple[str, float, str]]]:
+    hits = parser._scan(query)
+    is_chain = parser._detect_chain(query, hits)
+    return is_chain, [(m.name, m.score, m.reason) for m in parser._rule_match(query, hits)]
+
+
+def _throughput(fn: Callable[[IntentParser, str], Any], parser: IntentParser, corpus: list[str], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in corpus:
+            fn(parser, query)
+    elapsed = time.perf_counter() - start
+    return (rounds * len(corpus)) / elapsed if elapsed > 0 else 0.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark IntentParser rule matching (keyword loop vs automaton)")
+    parser.add_argument("--skills-config", type=Path, default=DEFAULT_SKILLS_CONFIG)
+    parser.add_argument("--scenarios", type=Path, default=DEFAULT_SCENARIOS)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    skills_config = load_skills_config(str(args.skills_config))
+    intent_parser = IntentParser(skills_config)
+    if not intent_parser._skill_rules:
+        # `skills:` 仅含超时等运行参数时，关键词仍在顶层 query/create/... 段
+        intent_parser = IntentParser({key: value for key, value in skills_config.items() if key != "skills"})
+
+    corpus = _corpus(args.scenarios)
+    mismatches = [q for q in corpus if _baseline(intent_parser, q) != _automaton(intent_parser, q)]
+    baseline_qps = _throughput(_baseline, intent_parser, corpus, args.rounds)
+    automaton_qps = _throughput(_automaton, intent_parser, corpus, args.rounds)
+    print(
+        json.dumps(
+            {
+                "queries": len(corpus),
+                "rounds": args.rounds,
+                "patterns": len(intent_parser._automaton.patterns),
+                "baseline_qps": round(baseline_qps),
+                "automaton_qps": round(automaton_qps),
+                "speedup": round(automaton_qps / baseline_qps, 2) if baseline_qps else None,
+                "mismatches": mismatches,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
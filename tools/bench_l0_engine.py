@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from pathlib import Path
+import sys
+import time
+from typing import Any
+
+import yaml
+
+
+ROOT = Path(__file__).resolve().parents[1]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+DEFAULT_L0_RULES = AGENT_HOST_ROOT / "config" / "l0_rules.yaml"
+DEFAULT_SKILLS_CONFIG = AGENT_HOST_ROOT / "config" / "skills.yaml"
+
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.core.l0.engine import L0RuleEngine  # noqa: E402
+from src.core.state import ConversationStateManager, MemoryStateStore  # noqa: E402
+
+# 覆盖 L0 各分支的典型输入
+CORPUS = [
+    "查一下张三的案件",
+    "下周有哪些庭要开",
+    "帮我把这个案子的状态改成已结案",
+    "删除这条",
+    "第二个",
+    "删除第一个",
+    "下一页",
+    "确认删除",
+    "算了",
+    "你好",
+    "在吗",
+    "谢谢",
+    "全部删除",
+    "???",
+    "提醒我明天开庭",
+    "总结一下本周的案件",
+    "案号：（2024）粤0304民初123号",
+    "委托人是李四",
+]
+
+
+class CountingStore(MemoryStateStore):
+    """统计状态读取次数与全量过期扫描次数。"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.gets = 0
+        self.cleanups = 0
+
+    def get(self, session_key: str | None = None, *, user_id: str | None = None) -> Any:
+        self.gets += 1
+        return super().get(session_key, user_id=user_id)
+
+    def cleanup_expired(self) -> None:
+        self.cleanups += 1
+        super().cleanup_expired()
+
+
+def _seed(manager: ConversationStateManager, users: int) -> None:
+    for index in range(users):
+        user_id = f"idle_{index}"
+        manager.set_last_result(user_id, [{"record_id": f"rec_{index}"}], "seed")
+    manager.set_last_result("bench", [{"record_id": f"rec_{i}", "fields_text": {"案号": f"A-{i}"}} for i in range(5)], "q")
+    manager.set_pagination("bench", "search", {}, "token", 1, 50)
+    manager.set_active_record("bench", {"record_id": "rec_active", "fields_text": {"案号": "A-active"}})
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(q * len(ordered)) - 1))] if ordered else 0.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark L0RuleEngine.evaluate latency")
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--idle-users", type=int, default=5000, help="other users in the state store")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    l0_rules = yaml.safe_load(DEFAULT_L0_RULES.read_text(encoding="utf-8")) or {}
+    skills_config = yaml.safe_load(DEFAULT_SKILLS_CONFIG.read_text(encoding="utf-8")) or {}
+    store = CountingStore()
+    manager = ConversationStateManager(store=store)
+    _seed(manager, args.idle_users)
+    engine = L0RuleEngine(state_manager=manager, l0_rules=l0_rules, skills_config=skills_config)
+
+    store.gets = 0
+    latencies: list[float] = []
+    for _ in range(args.rounds):
+        for text in CORPUS:
+            start = time.perf_counter()
+            engine.evaluate("bench", text)
+            latencies.append((time.perf_counter() - start) * 1_000_000)
+    calls = len(latencies)
+    print(
+        json.dumps(
+            {
+                "evaluations": calls,
+                "idle_users": args.idle_users,
+                "p50_us": round(_percentile(latencies, 0.5), 1),
+                "p99_us": round(_percentile(latencies, 0.99), 1),
+                "mean_us": round(sum(latencies) / calls, 1) if calls else None,
+                "state_reads_per_eval": round(store.gets / calls, 2) if calls else None,
+                "full_cleanups": store.cleanups,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import argparse
+from datetime import date
+import json
+from pathlib import Path
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any
+
+
+ROOT = Path(__file__).resolve().parents[1]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+DEFAULT_GOLDEN = ROOT / "tests" / "core" / "fixtures" / "planner_fallback_golden.json"
+
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+import src.core.planner.engine as engine_module  # noqa: E402
+from src.core.planner.engine import PlannerEngine  # noqa: E402
+
+
+def load_golden(path: Path) -> tuple[date, list[dict[str, Any]]]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    return date.fromisoformat(payload["today"]), list(payload["cases"])
+
+
+def pin_today(today: date) -> None:
+    """golden 中的日期参数按固定“今天”生成，回放前替换 engine 模块内的 date。"""
+
+    class _PinnedDate(date):
+        @classmethod
+        def today(cls) -> date:  # type: ignore[override]
+            return today
+
+    engine_module.date = _PinnedDate  # type: ignore[misc]
+
+
+def run_case(planner: PlannerEngine, case: dict[str, Any]) -> dict[str, Any] | None:
+    profile = case.get("user_profile")
+    output = planner._fallback_plan(
+        case["query"],
+        user_profile=SimpleNamespace(**profile) if profile else None,
+    )
+    return None if output is None else output.model_dump()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay / benchmark PlannerEngine rule fallback against the golden set")
+    parser.add_argument("--golden", type=Path, default=DEFAULT_GOLDEN)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    today, cases = load_golden(args.golden)
+    pin_today(today)
+    planner = PlannerEngine(llm_client=object(), scenarios_dir=str(AGENT_HOST_ROOT / "config" / "scenarios"), enabled=False)
+
+    mismatches = [case["query"] for case in cases if run_case(planner, case) != case["expected"]]
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for case in cases:
+            run_case(planner, case)
+    elapsed = time.perf_counter() - start
+    calls = args.rounds * len(cases)
+    print(
+        json.dumps(
+            {
+                "cases": len(cases),
+                "rounds": args.rounds,
+                "qps": round(calls / elapsed) if elapsed > 0 else None,
+                "mean_us": round(elapsed / calls * 1_000_000, 1) if calls else None,
+                "mismatches": mismatches,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
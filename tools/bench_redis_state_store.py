@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import argparse
+from dataclasses import asdict
+import json
+from pathlib import Path
+import sys
+import time
+from typing import Any, Callable
+
+
+ROOT = Path(__file__).resolve().parents[1]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.core.state.models import ConversationState, LastResultState, PaginationState  # noqa: E402
+from src.core.state.redis_store import RedisStateStore, decode_legacy_state  # noqa: E402
+
+
+class LegacyStringStore:
+    """改造前的布局：整串 JSON + SCAN 计数/清理（GET + DELETE 逐键）。"""
+
+    def __init__(self, client: Any, key_prefix: str) -> None:
+        self._client = client
+        self._prefix = key_prefix
+
+    def get(self, key: str) -> ConversationState | None:
+        raw = self._client.get(self._prefix + key)
+        return decode_legacy_state(raw) if raw else None
+
+    def set(self, key: str, state: ConversationState) -> None:
+        self._client.set(self._prefix + key, json.dumps(asdict(state)), ex=max(int(state.expires_at - time.time()), 1))
+
+    def active_count(self) -> int:
+        return sum(1 for _ in self._client.scan_iter(match=f"{self._prefix}*"))
+
+    def cleanup_expired(self) -> None:
+        now = time.time()
+        for redis_key in list(self._client.scan_iter(match=f"{self._prefix}*")):
+            state = self.get(str(redis_key)[len(self._prefix) :])
+            if state is None or state.is_expired(now):
+                self._client.delete(redis_key)
+
+
+class CountingClient:
+    """统计客户端往返次数（pipeline 计一次）。"""
+
+    def __init__(self, client: Any) -> None:
+        self._client = client
+        self.round_trips = 0
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+        if name == "pipeline":
+            def _pipeline(*args: Any, **kwargs: Any) -> Any:
+                pipe = attr(*args, **kwargs)
+                original = pipe.execute
+
+                def _execute(*exec_args: Any, **exec_kwargs: Any) -> Any:
+                    self.round_trips += 1
+                    return original(*exec_args, **exec_kwargs)
+
+                pipe.execute = _execute
+                return pipe
+
+            return _pipeline
+        if name == "scan_iter":
+            return attr
+
+        def _call(*args: Any, **kwargs: Any) -> Any:
+            self.round_trips += 1
+            return attr(*args, **kwargs)
+
+        return _call
+
+
+def _state(user_id: str, records: int) -> ConversationState:
+    now = time.time()
+    rows = [{"record_id": f"rec_{i}", "fields_text": {"案号": f"A-{i}", "委托人": "张三"}} for i in range(records)]
+    return ConversationState(
+        user_id=user_id,
+        created_at=now,
+        updated_at=now,
+        expires_at=now + 1800,
+        last_result=LastResultState(
+            records=rows,
+            record_ids=[row["record_id"] for row in rows],
+            query_summary="q",
+            created_at=now,
+            expires_at=now + 600,
+        ),
+        pagination=PaginationState("search", {"q": "x"}, "t", 1, records, now, now + 600),
+    )
+
+
+def _client(url: str) -> Any:
+    if url:
+        import redis
+
+        return redis.Redis.from_url(url, decode_responses=True)
+    import fakeredis
+
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def _timed(fn: Callable[[], object], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1_000_000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark RedisStateStore layouts (local Redis via --url, else fakeredis)")
+    parser.add_argument("--url", default="", help="redis://localhost:6379/15; empty uses fakeredis")
+    parser.add_argument("--sessions", type=int, default=5_000)
+    parser.add_argument("--records", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    sync_client = _client(args.url)
+    sync_client.flushdb()
+    legacy_counted = CountingClient(sync_client)
+    legacy = LegacyStringStore(legacy_counted, "bench:legacy:")
+    counted = CountingClient(sync_client)
+    store = RedisStateStore(counted, key_prefix="bench:hash:")
+    states = {f"ou_{i}": _state(f"ou_{i}", args.records) for i in range(args.sessions)}
+
+    for key, state in states.items():
+        legacy.set(key, state)
+        store.set(key, state)
+
+    keys = list(states)[:200]
+    report: dict[str, Any] = {"backend": args.url or "fakeredis", "sessions": args.sessions}
+    legacy_counted.round_trips = 0
+    legacy.active_count()
+    legacy.cleanup_expired()
+    [legacy.get(k) for k in keys]
+    legacy.set("ou_0", states["ou_0"])
+    legacy_round_trips = legacy_counted.round_trips
+    counted.round_trips = 0
+    store.active_count()
+    store.cleanup_expired()
+    store.get_many(keys)
+    store.set_fields("ou_0", states["ou_0"], ["pagination"])
+    indexed_round_trips = counted.round_trips
+    report["legacy"] = {
+        "active_count_us": round(_timed(legacy.active_count, args.rounds), 1),
+        "cleanup_us": round(_timed(legacy.cleanup_expired, args.rounds), 1),
+        "get_200_us": round(_timed(lambda: [legacy.get(k) for k in keys], args.rounds), 1),
+        "round_trips_count_cleanup_get200_write": legacy_round_trips,
+    }
+    report["indexed"] = {
+        "active_count_us": round(_timed(store.active_count, args.rounds), 1),
+        "cleanup_us": round(_timed(store.cleanup_expired, args.rounds), 1),
+        "get_many_200_us": round(_timed(lambda: store.get_many(keys), args.rounds), 1),
+        "substate_read_us": round(_timed(lambda: store.get_fields("ou_0", ["pagination"]), args.rounds * 100), 1),
+        "round_trips_count_cleanup_get200_write": indexed_round_trips,
+    }
+
+    report["value_bytes"] = {
+        "legacy": len(sync_client.get("bench:legacy:ou_0") or ""),
+        "hash_fields": {name: len(value) for name, value in sync_client.hgetall("bench:hash:ou_0").items()},
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from pathlib import Path
+import sys
+import time
+from typing import Any
+
+
+ROOT = Path(__file__).resolve().parents[1]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.config import SessionSettings  # noqa: E402
+from src.core.session import SessionManager  # noqa: E402
+
+
+class _LegacyTrim:
+    """改造前的裁剪：list.pop(0) + 每轮重新估算整段历史。"""
+
+    def __init__(self, manager: SessionManager) -> None:
+        self._manager = manager
+        self.messages: list[dict[str, str]] = []
+
+    def add(self, role: str, content: str) -> None:
+        self.messages.append({"role": role, "content": content})
+
+    def trim(self, max_tokens: int, keep_recent_messages: int = 2) -> int:
+        estimate = self._manager._estimate_message_tokens
+        removed = 0
+        while len(self.messages) > keep_recent_messages and sum(estimate(item) for item in self.messages) > max_tokens:
+            self.messages.pop(0)
+            removed += 1
+        return removed
+
+
+def _budget_for(manager: SessionManager, history: int, content: str) -> int:
+    return history * manager._estimate_message_tokens({"role": "user", "content": content})
+
+
+def _run(history: int, requests: int, content: str) -> dict[str, Any]:
+    manager = SessionManager(SessionSettings(ttl_minutes=30, max_rounds=history * 2))
+    legacy = _LegacyTrim(manager)
+    budget = _budget_for(manager, history, content)
+    user_id = "bench"
+    for index in range(history):
+        role = "user" if index % 2 == 0 else "assistant"
+        manager.add_message(user_id, role, content)
+        legacy.add(role, content)
+
+    # 稳态：每个请求追加一问一答，然后裁回预算内（通常裁掉最旧的 2 条）
+    start = time.perf_counter()
+    for _ in range(requests):
+        legacy.add("user", content)
+        legacy.add("assistant", content)
+        legacy.trim(budget)
+    legacy_us = (time.perf_counter() - start) / requests * 1_000_000
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        manager.add_message(user_id, "user", content)
+        manager.add_message(user_id, "assistant", content)
+        manager.trim_context_to_token_budget(user_id, budget)
+    incremental_us = (time.perf_counter() - start) / requests * 1_000_000
+
+    assert len(legacy.messages) == len(manager.get_context(user_id))
+    return {
+        "history_messages": history,
+        "legacy_us_per_request": round(legacy_us, 2),
+        "incremental_us_per_request": round(incremental_us, 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark SessionManager token-budget trimming")
+    parser.add_argument("--histories", default="50,100,250,500")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--content-chars", type=int, default=200)
+    args = parser.parse_args()
+    # 每次裁剪都会打 warning，压测时屏蔽
+    logging.disable(logging.WARNING)
+
+    content = "案" * args.content_chars
+    histories = [int(item) for item in args.histories.split(",") if item.strip()]
+    report = {
+        "requests": args.requests,
+        "content_chars": args.content_chars,
+        "results": [_run(history, args.requests, content) for history in histories],
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
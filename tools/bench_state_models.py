@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import argparse
+from dataclasses import MISSING, asdict, dataclass, field, fields, make_dataclass
+import gc
+import json
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+
+ROOT = Path(__file__).resolve().parents[1]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.core.state.codec import decode_core, decode_substate, encode_core, encode_substate  # noqa: E402
+from src.core.state.models import (  # noqa: E402
+    ConversationState,
+    LastResultState,
+    PaginationState,
+    PendingDeleteState,
+)
+
+
+def _unslotted(model: type) -> type:
+    """改造前的模型：字段相同的普通 dataclass（实例带 __dict__）。"""
+    spec: list[Any] = []
+    for item in fields(model):
+        if item.default is not MISSING:
+            spec.append((item.name, Any, field(default=item.default)))
+        elif item.default_factory is not MISSING:
+            spec.append((item.name, Any, field(default_factory=item.default_factory)))
+        else:
+            spec.append((item.name, Any))
+    return make_dataclass(f"Legacy{model.__name__}", spec)
+
+
+LegacyConversationState = _unslotted(ConversationState)
+LegacyLastResultState = _unslotted(LastResultState)
+LegacyPaginationState = _unslotted(PaginationState)
+LegacyPendingDeleteState = _unslotted(PendingDeleteState)
+
+
+@dataclass
+class _Models:
+    state: type
+    last_result: type
+    pagination: type
+    pending_delete: type
+
+
+def _build(models: _Models, count: int, now: float) -> list[Any]:
+    states = []
+    for index in range(count):
+        rid = f"rec_{index}"
+        states.append(
+            models.state(
+                user_id=f"ou_{index}",
+                created_at=now,
+                updated_at=now,
+                expires_at=now + 1800,
+                last_result=models.last_result(
+                    records=[{"record_id": rid}],
+                    record_ids=[rid],
+                    query_summary="q",
+                    created_at=now,
+                    expires_at=now + 600,
+                ),
+                pagination=models.pagination("search", {"q": "x"}, "t", 1, 1, now, now + 600),
+                pending_delete=models.pending_delete(rid, "A-1", "tbl", now, now + 300),
+                last_result_ids=[rid],
+                extras={"last_skill": "QuerySkill"},
+            )
+        )
+    return states
+
+
+def _footprint(models: _Models, count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    states = _build(models, count, time.time())
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del states
+    return current / 1024 / 1024
+
+
+def _legacy_encode(state: Any) -> list[str]:
+    core = {
+        key: getattr(state, key)
+        for key in ("user_id", "created_at", "updated_at", "expires_at", "last_result_ids", "extras")
+    }
+    return [
+        json.dumps(core, ensure_ascii=False),
+        json.dumps(asdict(state.last_result), ensure_ascii=False),
+        json.dumps(asdict(state.pagination), ensure_ascii=False),
+        json.dumps(asdict(state.pending_delete), ensure_ascii=False),
+    ]
+
+
+def _legacy_decode(row: list[str]) -> Any:
+    state = ConversationState(**json.loads(row[0]))
+    state.last_result = LastResultState(**json.loads(row[1]))
+    state.pagination = PaginationState(**json.loads(row[2]))
+    state.pending_delete = PendingDeleteState(**json.loads(row[3]))
+    return state
+
+
+def _codec_encode(state: ConversationState) -> list[Any]:
+    return [
+        encode_core(state),
+        encode_substate(state.last_result),
+        encode_substate(state.pagination),
+        encode_substate(state.pending_delete),
+    ]
+
+
+def _codec_decode(row: list[Any]) -> ConversationState:
+    state = ConversationState(**(decode_core(row[0]) or {}))
+    state.last_result = decode_substate(LastResultState, row[1])
+    state.pagination = decode_substate(PaginationState, row[2])
+    state.pending_delete = decode_substate(PendingDeleteState, row[3])
+    return state
+
+
+def _per_item_us(fn: Callable[[Any], Any], items: list[Any]) -> tuple[float, list[Any]]:
+    start = time.perf_counter()
+    out = [fn(item) for item in items]
+    return (time.perf_counter() - start) / len(items) * 1_000_000, out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark slotted state models and the versioned codec")
+    parser.add_argument("--sessions", type=int, default=100_000)
+    args = parser.parse_args()
+
+    legacy_models = _Models(LegacyConversationState, LegacyLastResultState, LegacyPaginationState, LegacyPendingDeleteState)
+    slotted_models = _Models(ConversationState, LastResultState, PaginationState, PendingDeleteState)
+    report: dict[str, Any] = {"sessions": args.sessions}
+    report["memory_mb"] = {
+        "dict_dataclass": round(_footprint(legacy_models, args.sessions), 1),
+        "slots_dataclass": round(_footprint(slotted_models, args.sessions), 1),
+    }
+
+    states = _build(slotted_models, args.sessions, time.time())
+    legacy_encode_us, legacy_rows = _per_item_us(_legacy_encode, states)
+    legacy_decode_us, _ = _per_item_us(_legacy_decode, legacy_rows)
+    codec_encode_us, codec_rows = _per_item_us(_codec_encode, states)
+    codec_decode_us, _ = _per_item_us(_codec_decode, codec_rows)
+    report["per_state_us"] = {
+        "asdict_json": {"encode": round(legacy_encode_us, 2), "decode": round(legacy_decode_us, 2)},
+        "codec": {"encode": round(codec_encode_us, 2), "decode": round(codec_decode_us, 2)},
+    }
+    report["bytes_per_state"] = {
+        "asdict_json": round(sum(len(str(part).encode()) for row in legacy_rows for part in row) / len(states), 1),
+        "codec": round(sum(len(part) for row in codec_rows for part in row) / len(states), 1),
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
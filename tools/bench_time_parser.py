@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import argparse
+from datetime import date
+import json
+from pathlib import Path
+import re
+import sys
+import time
+from typing import Callable
+
+import yaml
+
+
+ROOT = Path(__file__).resolve().parents[1]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+DEFAULT_SCENARIOS = ROOT / "docs" / "scenarios" / "scenarios.yaml"
+
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.utils import time_parser  # noqa: E402
+
+_PLACEHOLDER_RE = re.compile(r"\$\{([^{}]+)\}")
+# 高频相对时间短语，模拟线上重复出现的输入
+_HOT_PHRASES = ["本周开庭", "下个月的庭", "明天下午开庭", "今天的安排", "下周三上午10点", "未来7天开庭", "3月5日开庭"]
+
+
+def _corpus(scenarios_path: Path) -> list[str]:
+    payload = yaml.safe_load(scenarios_path.read_text(encoding="utf-8")) or {}
+    variables = {str(k): str(v) for k, v in (payload.get("variables") or {}).items()}
+    texts: list[str] = []
+    for scenario in payload.get("scenarios") or []:
+        for turn in scenario.get("dialogue") or []:
+            if turn.get("role") == "user":
+                texts.append(_PLACEHOLDER_RE.sub(lambda m: variables.get(m.group(1), m.group(0)), str(turn.get("text") or "")))
+    return texts + _HOT_PHRASES
+
+
+def _timed(fn: Callable[[], object], rounds: int, per_round: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * per_round) * 1_000_000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark time_parser single / cached / batch parsing")
+    parser.add_argument("--scenarios", type=Path, default=DEFAULT_SCENARIOS)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = _corpus(args.scenarios)
+    today = date.today()
+
+    def _uncached() -> None:
+        for text in corpus:
+            time_parser._parse_normalized(time_parser._normalize_text(text), today)
+
+    def _cached() -> None:
+        for text in corpus:
+            time_parser.parse_time_range(text)
+
+    def _batch() -> None:
+        time_parser.parse_time_ranges(corpus)
+
+    assert time_parser.parse_time_ranges(corpus) == [time_parser.parse_time_range(text) for text in corpus]
+    print(
+        json.dumps(
+            {
+                "texts": len(corpus),
+                "with_time": sum(1 for item in time_parser.parse_time_ranges(corpus) if item is not None),
+                "uncached_us": round(_timed(_uncached, args.rounds, len(corpus)), 2),
+                "cached_us": round(_timed(_cached, args.rounds, len(corpus)), 2),
+                "batch_us": round(_timed(_batch, args.rounds, len(corpus)), 2),
+                "cache": time_parser._parse_cached.cache_info()._asdict(),
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
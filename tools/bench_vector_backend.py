@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any
+
+import numpy as np
+
+
+ROOT = Path(__file__).resolve().parents[1]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.vector.chroma_store import ChromaStore  # noqa: E402
+from src.vector.numpy_store import NumpyVectorStore  # noqa: E402
+
+
+def _dataset(size: int, dim: int, queries: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """聚簇分布的归一化向量（接近真实 Embedding 的局部密集结构）。"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(8, size // 200), dim))
+    labels = rng.integers(0, len(centers), size=size)
+    data = centers[labels] + rng.normal(scale=0.6, size=(size, dim))
+    picks = rng.integers(0, size, size=queries)
+    probes = data[picks] + rng.normal(scale=0.3, size=(queries, dim))
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    probes /= np.linalg.norm(probes, axis=1, keepdims=True)
+    return data.astype(np.float32), probes.astype(np.float32)
+
+
+def _ground_truth(data: np.ndarray, probes: np.ndarray, top_k: int) -> list[set[str]]:
+    scores = probes.astype(np.float64) @ data.astype(np.float64).T
+    return [{str(i) for i in np.argsort(-row)[:top_k]} for row in scores]
+
+
+def _run_backend(store: Any, data: np.ndarray, probes: np.ndarray, truth: list[set[str]], top_k: int, batch: int) -> dict[str, Any]:
+    started = time.perf_counter()
+    for start in range(0, len(data), batch):
+        ids = [str(i) for i in range(start, min(start + batch, len(data)))]
+        store.upsert_documents(
+            user_id="bench",
+            documents=ids,
+            embeddings=data[start:start + batch].tolist(),
+            metadatas=[{"source": "bench"} for _ in ids],
+            ids=ids,
+        )
+    insert_seconds = time.perf_counter() - started
+
+    store.query("bench", probes[0].tolist(), top_k)  # 预热：懒加载 / 建立连接
+    latencies: list[float] = []
+    hits = 0
+    for probe, expected in zip(probes, truth):
+        started = time.perf_counter()
+        found = store.query("bench", probe.tolist(), top_k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += len(expected.intersection(found))
+    latencies.sort()
+    return {
+        "insert_seconds": round(insert_seconds, 3),
+        "recall_at_k": round(hits / (len(truth) * top_k), 4),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+    }
+
+
+def _run(size: int, args: argparse.Namespace) -> dict[str, Any]:
+    data, probes = _dataset(size, args.dim, args.queries, args.seed)
+    truth = _ground_truth(data, probes, args.top_k)
+    result: dict[str, Any] = {"vectors": size}
+    with tempfile.TemporaryDirectory() as tmp:
+        result["numpy"] = _run_backend(NumpyVectorStore(Path(tmp) / "numpy"), data, probes, truth, args.top_k, args.batch)
+        if "chroma" in args.backends:
+            result["chroma"] = _run_backend(ChromaStore(str(Path(tmp) / "chroma")), data, probes, truth, args.top_k, args.batch)
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark NumPy vs Chroma vector backends (recall@k and query latency)")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--backends", default="numpy,chroma")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    sizes = [int(item) for item in args.sizes.split(",") if item.strip()]
+    report = {
+        "dim": args.dim,
+        "queries": args.queries,
+        "top_k": args.top_k,
+        "results": [_run(size, args) for size in sizes],
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import sys
+from typing import Any
+
+
+ROOT = Path(__file__).resolve().parents[1]
+AGENT_HOST_ROOT = ROOT / "apps" / "agent-host"
+DEFAULT_SKILLS_CONFIG = AGENT_HOST_ROOT / "config" / "skills.yaml"
+DEFAULT_SCENARIOS = ROOT / "docs" / "scenarios" / "scenarios.yaml"
+DEFAULT_OUTPUT = AGENT_HOST_ROOT / "config" / "intent_classifier.npz"
+
+sys.path.insert(0, str(AGENT_HOST_ROOT))
+
+from src.core.intent.classifier import CharNgramIntentClassifier, LocalIntentClassifier  # noqa: E402
+from src.core.intent.parser import load_skills_config  # noqa: E402
+from src.core.intent.training import (  # noqa: E402
+    benchmark,
+    collect_training_samples,
+    cross_validate,
+    scenario_samples,
+    train,
+)
+
+
+def _threshold_args(skills_config: dict[str, Any], args: argparse.Namespace) -> tuple[float, float]:
+    cfg = (skills_config.get("intent") or {}).get("local_classifier") or {}
+    min_score = args.min_score if args.min_score is not None else float(cfg.get("min_score", 0.35))
+    min_margin = args.min_margin if args.min_margin is not None else float(cfg.get("min_margin", 0.1))
+    return min_score, min_margin
+
+
+def _cmd_train(args: argparse.Namespace) -> int:
+    skills_config = load_skills_config(str(args.skills_config))
+    samples = collect_training_samples(
+        skills_config,
+        scenarios_path=args.scenarios,
+        decision_logs=args.decision_log or [],
+    )
+    model = train(samples, ngram_range=(args.ngram_min, args.ngram_max))
+    output = model.save(args.output)
+    print(
+        json.dumps(
+            {
+                "output": str(output),
+                "model_version": model.model_version,
+                "trained_at": model.trained_at,
+                "samples": model.sample_count,
+                "labels": model.labels,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+    return 0
+
+
+def _cmd_bench(args: argparse.Namespace) -> int:
+    skills_config = load_skills_config(str(args.skills_config))
+    model = CharNgramIntentClassifier.load(args.artifact)
+    min_score, min_margin = _threshold_args(skills_config, args)
+    if args.folds > 0:
+        # 默认留出评测：每折重新训练且不含该折的场景文本，准确率/覆盖率不受训练集泄漏影响
+        report = cross_validate(
+            skills_config,
+            scenarios_path=args.scenarios,
+            decision_logs=args.decision_log or [],
+            folds=args.folds,
+            min_score=min_score,
+            min_margin=min_margin,
+            ngram_range=model.ngram_range,
+            repeat=args.repeat,
+        )
+    else:
+        # 已保存模型在场景集上的表现（场景样本参与过训练，为训练集准确率）
+        classifier = LocalIntentClassifier(model, min_score=min_score, min_margin=min_margin)
+        report = benchmark(classifier, scenario_samples(args.scenarios, model.labels), repeat=args.repeat)
+    payload = {"model_version": model.model_version, "min_score": min_score, "min_margin": min_margin}
+    payload.update(report.to_dict())
+    print(json.dumps(payload, ensure_ascii=False, indent=2))
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Train / benchmark the local intent classifier")
+    parser.add_argument("--skills-config", type=Path, default=DEFAULT_SKILLS_CONFIG)
+    parser.add_argument("--scenarios", type=Path, default=DEFAULT_SCENARIOS)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = sub.add_parser("train", help="collect samples and write a versioned model artifact")
+    train_parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    train_parser.add_argument(
+        "--decision-log",
+        action="append",
+        help="JSON log file containing orchestrator.intent.parsed* events (repeatable)",
+    )
+    train_parser.add_argument("--ngram-min", type=int, default=1)
+    train_parser.add_argument("--ngram-max", type=int, default=3)
+    train_parser.set_defaults(func=_cmd_train)
+
+    bench_parser = sub.add_parser(
+        "bench",
+        help="report held-out accuracy / coverage / latency on the scenario set (k-fold by default)",
+    )
+    bench_parser.add_argument("--artifact", type=Path, default=DEFAULT_OUTPUT)
+    bench_parser.add_argument("--min-score", type=float, default=None)
+    bench_parser.add_argument("--min-margin", type=float, default=None)
+    bench_parser.add_argument("--repeat", type=int, default=50)
+    bench_parser.add_argument(
+        "--folds",
+        type=int,
+        default=5,
+        help="k-fold cross-validation over scenario turns; 0 scores the saved artifact (training accuracy)",
+    )
+    bench_parser.add_argument(
+        "--decision-log",
+        action="append",
+        help="decision logs used for training inside each fold (repeatable)",
+    )
+    bench_parser.set_defaults(func=_cmd_bench)
+
+    args = parser.parse_args()
+    return int(args.func(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())